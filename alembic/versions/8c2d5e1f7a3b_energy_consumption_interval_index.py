@@ -0,0 +1,33 @@
+"""Energy consumption interval index
+
+Revision ID: 8c2d5e1f7a3b
+Revises: 4fd70e44cd4a
+Create Date: 2026-10-18 09:12:41.308115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c2d5e1f7a3b'
+down_revision: Union[str, None] = '4fd70e44cd4a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Μία γραμμή ανά διάστημα δειγματοληψίας, ώστε να λειτουργούν τα bulk upserts
+    # του EnergyConnector και τα ερωτήματα ιστορικού ανά χρονικό εύρος
+    op.create_index(
+        'ix_energy_consumption_timestamp_predicted',
+        'energy_consumption',
+        ['timestamp', 'is_predicted'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_energy_consumption_timestamp_predicted', table_name='energy_consumption')
@@ -0,0 +1,51 @@
+"""GPU rentals registry
+
+Revision ID: b3f9a1d6c2e4
+Revises: 8c2d5e1f7a3b
+Create Date: 2026-10-18 14:05:22.614903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f9a1d6c2e4'
+down_revision: Union[str, None] = '8c2d5e1f7a3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('gpu_rentals',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rental_id', sa.String(), nullable=True),
+    sa.Column('gpu_model', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('price_per_hour', sa.Float(), nullable=True),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('end_time', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('accrued_cost', sa.Float(), nullable=True),
+    sa.Column('last_accrued_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_checked_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('auto_renew', sa.Boolean(), nullable=True),
+    sa.Column('renew_hours', sa.Integer(), nullable=True),
+    sa.Column('max_price_per_hour', sa.Float(), nullable=True),
+    sa.Column('max_total_cost', sa.Float(), nullable=True),
+    sa.Column('connection_info', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_gpu_rentals_id'), 'gpu_rentals', ['id'], unique=False)
+    op.create_index(op.f('ix_gpu_rentals_rental_id'), 'gpu_rentals', ['rental_id'], unique=True)
+    op.create_index(op.f('ix_gpu_rentals_status'), 'gpu_rentals', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_gpu_rentals_status'), table_name='gpu_rentals')
+    op.drop_index(op.f('ix_gpu_rentals_rental_id'), table_name='gpu_rentals')
+    op.drop_index(op.f('ix_gpu_rentals_id'), table_name='gpu_rentals')
+    op.drop_table('gpu_rentals')
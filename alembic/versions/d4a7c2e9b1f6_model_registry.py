@@ -0,0 +1,68 @@
+"""Model variants registry and benchmarks
+
+Revision ID: d4a7c2e9b1f6
+Revises: b3f9a1d6c2e4
+Create Date: 2026-10-18 23:40:11.529304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7c2e9b1f6'
+down_revision: Union[str, None] = 'b3f9a1d6c2e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('model_variants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('path', sa.String(), nullable=True),
+    sa.Column('quantization', sa.String(), nullable=True),
+    sa.Column('device', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('memory_bytes', sa.BigInteger(), nullable=True),
+    sa.Column('load_seconds', sa.Float(), nullable=True),
+    sa.Column('warmup_latency_ms', sa.Float(), nullable=True),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('activated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_model_variants_id'), 'model_variants', ['id'], unique=False)
+    op.create_index(op.f('ix_model_variants_name'), 'model_variants', ['name'], unique=True)
+    op.create_index(op.f('ix_model_variants_status'), 'model_variants', ['status'], unique=False)
+    op.create_table('model_benchmarks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('variant_id', sa.Integer(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('device', sa.String(), nullable=True),
+    sa.Column('num_threads', sa.Integer(), nullable=True),
+    sa.Column('max_batch_size', sa.Integer(), nullable=True),
+    sa.Column('concurrency', sa.Integer(), nullable=True),
+    sa.Column('tokens_per_sec', sa.Float(), nullable=True),
+    sa.Column('requests_per_sec', sa.Float(), nullable=True),
+    sa.Column('latency_p50_ms', sa.Float(), nullable=True),
+    sa.Column('latency_p95_ms', sa.Float(), nullable=True),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['variant_id'], ['model_variants.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_model_benchmarks_id'), 'model_benchmarks', ['id'], unique=False)
+    op.create_index(op.f('ix_model_benchmarks_variant_id'), 'model_benchmarks', ['variant_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_model_benchmarks_variant_id'), table_name='model_benchmarks')
+    op.drop_index(op.f('ix_model_benchmarks_id'), table_name='model_benchmarks')
+    op.drop_table('model_benchmarks')
+    op.drop_index(op.f('ix_model_variants_status'), table_name='model_variants')
+    op.drop_index(op.f('ix_model_variants_name'), table_name='model_variants')
+    op.drop_index(op.f('ix_model_variants_id'), table_name='model_variants')
+    op.drop_table('model_variants')
@@ -0,0 +1,122 @@
+"""Mining stats time-series layout: composite indexes and monthly partitions
+
+Revision ID: e7c3f9a2b5d8
+Revises: d4a7c2e9b1f6
+Create Date: 2026-10-18 23:58:04.117392
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7c3f9a2b5d8'
+down_revision: Union[str, None] = 'd4a7c2e9b1f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Μήνες μπροστά για τους οποίους δημιουργούνται διαμερίσεις (τις επόμενες τις
+# δημιουργεί το PartitionMaintainer)
+PREMAKE_MONTHS = 3
+
+COLUMNS = """
+    user_id integer REFERENCES users (id),
+    hashrate double precision,
+    coin varchar,
+    earnings double precision,
+    power_consumption double precision,
+    temperature double precision,
+    efficiency double precision
+"""
+
+
+def _month(value: datetime, offset: int = 0) -> datetime:
+    index = value.year * 12 + value.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_partition(start: datetime) -> None:
+    end = _month(start, 1)
+    op.execute(
+        f"CREATE TABLE mining_stats_p{start:%Y%m} PARTITION OF mining_stats "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        # SQLite: χωρίς διαμερίσεις, μόνο τα ευρετήρια (B-tree αντί για BRIN)
+        op.create_index('ix_mining_stats_user_timestamp', 'mining_stats', ['user_id', 'timestamp'])
+        op.create_index('ix_mining_stats_timestamp', 'mining_stats', ['timestamp'])
+        return
+
+    # Ο πίνακας ξαναδημιουργείται διαμερισμένος ανά μήνα (RANGE στο timestamp).
+    # Το κλειδί διαμέρισης πρέπει να ανήκει στο πρωτεύον κλειδί, άρα (id, timestamp)·
+    # το id συνεχίζει από την ίδια ακολουθία.
+    op.execute("ALTER TABLE mining_stats RENAME TO mining_stats_unpartitioned")
+    op.execute("ALTER TABLE mining_stats_unpartitioned RENAME CONSTRAINT mining_stats_pkey TO mining_stats_unpartitioned_pkey")
+    op.execute("ALTER INDEX ix_mining_stats_id RENAME TO ix_mining_stats_unpartitioned_id")
+    op.execute(f"""
+        CREATE TABLE mining_stats (
+            id integer NOT NULL DEFAULT nextval('mining_stats_id_seq'),
+            timestamp timestamptz NOT NULL DEFAULT now(),
+            {COLUMNS},
+            CONSTRAINT mining_stats_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    # Γραμμές εκτός των μηνιαίων διαμερίσεων (π.χ. λάθος ρολόι) δεν απορρίπτονται
+    op.execute("CREATE TABLE mining_stats_default PARTITION OF mining_stats DEFAULT")
+
+    now = datetime.now(timezone.utc)
+    first = op.get_bind().execute(sa.text("SELECT min(timestamp) FROM mining_stats_unpartitioned")).scalar()
+    month = _month(first if first is not None and first < now else now)
+    while month <= _month(now, PREMAKE_MONTHS):
+        _create_partition(month)
+        month = _month(month, 1)
+
+    op.execute("""
+        INSERT INTO mining_stats (id, timestamp, user_id, hashrate, coin, earnings,
+                                  power_consumption, temperature, efficiency)
+        SELECT id, COALESCE(timestamp, now()), user_id, hashrate, coin, earnings,
+               power_consumption, temperature, efficiency
+        FROM mining_stats_unpartitioned
+    """)
+    op.execute("ALTER SEQUENCE mining_stats_id_seq OWNED BY mining_stats.id")
+    op.execute("DROP TABLE mining_stats_unpartitioned")
+
+    # Τα ευρετήρια του γονικού πίνακα δημιουργούνται σε κάθε διαμέριση (και στις μελλοντικές)
+    op.create_index('ix_mining_stats_id', 'mining_stats', ['id'])
+    op.create_index('ix_mining_stats_user_timestamp', 'mining_stats', ['user_id', 'timestamp'])
+    # Οι μετρήσεις γράφονται με αύξουσα σειρά χρόνου: ένα BRIN είναι ελάχιστα KB ανά διαμέριση
+    op.create_index('ix_mining_stats_timestamp', 'mining_stats', ['timestamp'], postgresql_using='brin')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        op.drop_index('ix_mining_stats_timestamp', table_name='mining_stats')
+        op.drop_index('ix_mining_stats_user_timestamp', table_name='mining_stats')
+        return
+
+    op.execute(f"""
+        CREATE TABLE mining_stats_unpartitioned (
+            id integer NOT NULL DEFAULT nextval('mining_stats_id_seq'),
+            timestamp timestamptz DEFAULT now(),
+            {COLUMNS},
+            CONSTRAINT mining_stats_unpartitioned_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute("""
+        INSERT INTO mining_stats_unpartitioned (id, timestamp, user_id, hashrate, coin, earnings,
+                                                power_consumption, temperature, efficiency)
+        SELECT id, timestamp, user_id, hashrate, coin, earnings, power_consumption, temperature, efficiency
+        FROM mining_stats
+    """)
+    op.execute("ALTER SEQUENCE mining_stats_id_seq OWNED BY mining_stats_unpartitioned.id")
+    # Διαγράφονται και όλες οι διαμερίσεις (οι αποσπασμένες έχουν ήδη αποσυνδεθεί)
+    op.execute("DROP TABLE mining_stats")
+    op.execute("ALTER TABLE mining_stats_unpartitioned RENAME TO mining_stats")
+    op.execute("ALTER TABLE mining_stats RENAME CONSTRAINT mining_stats_unpartitioned_pkey TO mining_stats_pkey")
+    op.create_index('ix_mining_stats_id', 'mining_stats', ['id'])
@@ -0,0 +1,39 @@
+"""Crypto prices time-series indexes
+
+Revision ID: f2a8d5c1e9b4
+Revises: e7c3f9a2b5d8
+Create Date: 2026-10-19 00:21:37.642018
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8d5c1e9b4'
+down_revision: Union[str, None] = 'e7c3f9a2b5d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Εκτός συναλλαγής, ώστε στην PostgreSQL τα ευρετήρια να δημιουργούνται
+    # CONCURRENTLY χωρίς να μπλοκάρουν τις εγγραφές τιμών
+    with op.get_context().autocommit_block():
+        op.create_index('ix_crypto_prices_coin_timestamp', 'crypto_prices', ['coin', 'timestamp'],
+                        postgresql_concurrently=True)
+        op.create_index('ix_crypto_prices_timestamp', 'crypto_prices', ['timestamp'],
+                        postgresql_concurrently=True)
+        # Το (coin, timestamp) καλύπτει και τα ερωτήματα μόνο ανά coin
+        op.drop_index('ix_crypto_prices_coin', table_name='crypto_prices', postgresql_concurrently=True)
+    # Το energy_consumption έχει ήδη το ix_energy_consumption_timestamp_predicted
+    # (timestamp, is_predicted), που εξυπηρετεί τα ερωτήματα χρονικού εύρους
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_crypto_prices_coin', 'crypto_prices', ['coin'], postgresql_concurrently=True)
+        op.drop_index('ix_crypto_prices_timestamp', table_name='crypto_prices', postgresql_concurrently=True)
+        op.drop_index('ix_crypto_prices_coin_timestamp', table_name='crypto_prices', postgresql_concurrently=True)
@@ -1,70 +1,1011 @@
 import os
+import copy
+import asyncio
 import logging
-from typing import Dict, Any
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.batch_scheduler import BatchScheduler
+from backend.chat_context import ChatContext, ChatContextBuilder, estimate_tokens
+from backend.chat_sessions import SessionStore, common_prefix_length, crop_kv_cache, kv_cache_bytes, kv_cache_length
+from backend.response_cache import ResponseCache
+from backend.database import SessionLocal
+from backend.dataset_logger import DatasetLogger
+from backend.intent_router import IntentRouter
+from backend.mining_analytics import analyze_telemetry, default_analysis_range, load_mining_telemetry, telemetry_frame
+from backend.strategy_optimizer import MiningStrategyOptimizer, load_mining_config
+from backend.inference_executor import InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError
+from backend.model_registry import (
+    LoadedModel, ModelSwapInProgressError, ModelVariantNotFoundError,
+    active_variant, ensure_variant, get_variant, mark_variant, model_memory_bytes, set_active_variant
+)
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+SYSTEM_PROMPT = (
+    "Είσαι ο AI Mining Assistant. Απαντάς σύντομα και με ακρίβεια σε ερωτήσεις για "
+    "εξόρυξη κρυπτονομισμάτων, κατανάλωση ενέργειας, φωτοβολταϊκά και ενοικίαση GPU."
+)
+
+
+class ModelNotReadyError(Exception):
+    """
+    Το μοντέλο δεν είναι (ακόμα) διαθέσιμο για παραγωγή απαντήσεων
+    """
+
 
 class AIEngine:
     """
     Βασική κλάση AI Engine για το Mining Assistant
+
+    Το γλωσσικό μοντέλο φορτώνεται στο παρασκήνιο (σε ξεχωριστό thread), ώστε η
+    εκκίνηση του API να μην μπλοκάρει. Μέχρι να ολοκληρωθεί η φόρτωση, το
+    readiness() αναφέρει το στάδιο και την πρόοδο, και τα αιτήματα συνομιλίας
+    περιμένουν έως AI_READY_TIMEOUT δευτερόλεπτα πριν απορριφθούν.
+
+    Σε CPU το μοντέλο κβαντίζεται με dynamic quantization (int8) των γραμμικών
+    επιπέδων. Σε CUDA υποστηρίζεται φόρτωση 8bit/4bit μέσω bitsandbytes.
+
+    Οι παραλλαγές του μοντέλου (διαδρομή, κβάντιση) καταχωρίζονται στο μητρώο
+    model_variants. Κατά την εκκίνηση φορτώνεται η ενεργή παραλλαγή (ή αυτή του
+    MODEL_PATH). Με το swap_model() η νέα παραλλαγή φορτώνεται και ζεσταίνεται
+    στο παρασκήνιο ενώ η παλιά συνεχίζει να εξυπηρετεί, και η αλλαγή γίνεται με
+    μία ανάθεση, χωρίς επανεκκίνηση του API.
     """
-    def __init__(self):
-        self.model = None
+    def __init__(self, context_builder: Optional[ChatContextBuilder] = None):
         self.logger = logging.getLogger(__name__)
+        self.model_path = os.getenv("MODEL_PATH", "./models/mining-assistant-llm")
+        self.device = os.getenv("DEVICE", "cpu")
+        # dynamic (CPU int8), 8bit/4bit (CUDA, bitsandbytes) ή none
+        self.quantization = os.getenv("AI_MODEL_QUANTIZATION", "dynamic").lower()
+        # Όνομα της παραλλαγής του MODEL_PATH στο μητρώο, αν δεν υπάρχει ενεργή
+        self.variant_name = os.getenv("AI_MODEL_VARIANT", "default")
+        # Tokens που παράγονται στο ζέσταμα κάθε παραλλαγής (μετρά και την καθυστέρηση)
+        self.warmup_tokens = int(os.getenv("AI_WARMUP_TOKENS", 8))
+        # Ενεργή παραλλαγή: κάθε αίτημα κρατά το στιγμιότυπο με το οποίο ξεκίνησε
+        self._active: Optional[LoadedModel] = None
+        self.model_generation = 0
+        self._swap_lock: Optional[asyncio.Lock] = None
+        self.swap_status: Dict[str, Any] = {"state": "idle", "target": None, "stage": None, "error": None}
+        self.num_threads = int(os.getenv("AI_NUM_THREADS", 0))
+        self.max_new_tokens = int(os.getenv("AI_MAX_NEW_TOKENS", 256))
+        self.ready_timeout = float(os.getenv("AI_READY_TIMEOUT", 30))
+        self.use_mock = os.getenv("USE_MOCK_AI_MODEL", "False").lower() == "true"
+        # Τεχνητή καθυστέρηση του δοκιμαστικού μοντέλου (δευτερόλεπτα), για δοκιμές φορτίου
+        self.mock_latency = float(os.getenv("AI_MOCK_LATENCY", 0))
+        # Σχετικό κόστος κάθε επιπλέον μηνύματος σε ένα batch του δοκιμαστικού μοντέλου
+        self.mock_batch_cost = float(os.getenv("AI_MOCK_BATCH_COST", 0.15))
+        # Το inference εκτελείται σε workers πίσω από ουρά, όχι στο event loop
+        self.executor = InferenceExecutor()
+        # Συγκέντρωση ταυτόχρονων αιτημάτων σε batches (AI_BATCH_WINDOW_MS, AI_BATCH_MAX_SIZE)
+        self.scheduler = BatchScheduler(
+            self.executor,
+            self._generate_mock_batch if self.use_mock else self._generate_batch_sync
+        )
+        # Κατάσταση φόρτωσης: not_loaded, loading, ready, failed
+        self.status = "not_loaded"
+        self.progress = 0.0
+        self.load_stage: Optional[str] = None
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._load_task: Optional[asyncio.Task] = None
+        # Δεδομένα mining/ενέργειας/CloreAI που προστίθενται στο prompt κάθε ερώτησης
+        self.context_builder = context_builder
+        # Απλές ερωτήσεις (hashrate, κόστος ενέργειας, ...) απαντώνται από τα δεδομένα χωρίς το μοντέλο
+        self.router = IntentRouter(context_builder) if context_builder is not None else None
+        # Συνομιλίες πολλών γύρων με επαναχρησιμοποίηση του KV cache
+        self.sessions = SessionStore()
+        # Βελτιστοποιητής ανάθεσης GPU (κρατά την τελευταία λύση για θερμές επιλύσεις)
+        self.strategy = MiningStrategyOptimizer()
+        # Cache απαντήσεων, με κλειδί την ερώτηση και τις εκδόσεις των δεδομένων
+        self.cache = ResponseCache()
+        # Συνομιλίες και αναλύσεις ως δεδομένα fine-tuning (shards JSONL)· οι απαντήσεις
+        # του δοκιμαστικού μοντέλου δεν είναι δείγματα εκπαίδευσης
+        self.dataset = DatasetLogger(enabled=False) if self.use_mock else DatasetLogger()
+        # Χρόνοι έως το πρώτο token των streaming απαντήσεων (τελευταίες 1000)
+        self.streams = 0
+        self.streamed_chunks = 0
+        self._ttft = deque(maxlen=1000)
+
+    @property
+    def is_ready(self) -> bool:
+        return self.status == "ready"
+
+    @property
+    def model(self):
+        return self._active.model if self._active else None
+
+    @property
+    def tokenizer(self):
+        return self._active.tokenizer if self._active else None
+
+    def _ready_event(self) -> asyncio.Event:
+        if self._ready is None:
+            self._ready = asyncio.Event()
+        return self._ready
+
+    def _set_stage(self, stage: str, progress: float):
+        self.load_stage = stage
+        self.progress = progress
+        self.logger.info(f"Φόρτωση AI μοντέλου: {stage} ({progress:.0%})")
 
     async def load_model(self):
         """
-        Προσομοίωση φόρτωσης μοντέλου
+        Έναρξη φόρτωσης του μοντέλου στο παρασκήνιο (επιστρέφει αμέσως)
         """
-        try:
-            self.logger.info("Προσομοίωση φόρτωσης AI μοντέλου")
-            # Προς το παρόν μόνο προσομοίωση
-            self.model = {"loaded": True}
+        if self._load_task is not None and not self._load_task.done():
             return True
+        if self.is_ready:
+            return True
+        self._ready_event().clear()
+        self.status = "loading"
+        self.load_error = None
+        self._load_task = asyncio.create_task(self._load_in_background())
+        return True
+
+    def _initial_variant(self) -> Tuple[str, str, str, str]:
+        """
+        Η παραλλαγή της εκκίνησης: η ενεργή του μητρώου ή αυτή των ρυθμίσεων
+        """
+        settings = (self.variant_name, self.model_path, self.quantization, self.device)
+        db = SessionLocal()
+        try:
+            variant = active_variant(db) or ensure_variant(db, *settings)
+            return variant.name, variant.path, variant.quantization, variant.device
         except Exception as e:
+            self.logger.warning(f"Το μητρώο μοντέλων δεν είναι διαθέσιμο, χρήση MODEL_PATH: {str(e)}")
+            return settings
+        finally:
+            db.close()
+
+    def _persist_active(self, loaded: LoadedModel):
+        db = SessionLocal()
+        try:
+            set_active_variant(db, loaded)
+        except Exception as e:
+            self.logger.warning(f"Αδυναμία ενημέρωσης του μητρώου μοντέλων: {str(e)}")
+        finally:
+            db.close()
+
+    async def _load_in_background(self):
+        started = time.time()
+        try:
+            name, path, quantization, device = await asyncio.to_thread(self._initial_variant)
+            loaded = await asyncio.to_thread(
+                self._load_variant_sync, name, path, quantization, device, self._set_stage
+            )
+            self._activate(loaded)
+            await asyncio.to_thread(self._persist_active, loaded)
+            self.status = "ready"
+            self.progress = 1.0
+            self.load_stage = "ready"
+            self.load_seconds = time.time() - started
+            self.logger.info(f"Το AI μοντέλο φορτώθηκε σε {self.load_seconds:.1f}s")
+        except Exception as e:
+            self.status = "failed"
+            self.load_error = str(e)
             self.logger.error(f"Σφάλμα κατά τη φόρτωση του μοντέλου: {str(e)}")
-            return False
+        finally:
+            # Αφύπνιση όσων περιμένουν, είτε η φόρτωση πέτυχε είτε απέτυχε
+            self._ready_event().set()
+
+    def _resolve_device(self, torch, device: str) -> str:
+        if device.startswith("cuda") and not torch.cuda.is_available():
+            self.logger.warning("Το CUDA δεν είναι διαθέσιμο. Χρήση CPU για το AI μοντέλο")
+            return "cpu"
+        return device
+
+    def _load_variant_sync(self,
+                           name: str,
+                           path: str,
+                           quantization: str,
+                           device: str,
+                           report: Callable[[str, float], None]) -> LoadedModel:
+        """
+        Σύγχρονη φόρτωση, κβάντιση και ζέσταμα μιας παραλλαγής (εκτελείται σε thread)
+
+        Μετρώνται ο χρόνος φόρτωσης, η μνήμη των βαρών και η καθυστέρηση
+        παραγωγής AI_WARMUP_TOKENS tokens, που αποθηκεύονται στο μητρώο.
+        """
+        started = time.perf_counter()
+        if self.use_mock:
+            # Το δοκιμαστικό μοντέλο "ζεσταίνεται" με ένα αίτημα ίδιου κόστους
+            report("warmup", 0.9)
+            warmup_started = time.perf_counter()
+            if self.mock_latency:
+                time.sleep(self.mock_latency)
+            loaded = LoadedModel(name, path, quantization, device, {"loaded": True, "mock": True}, None)
+            loaded.warmup_latency_ms = (time.perf_counter() - warmup_started) * 1000
+            loaded.load_seconds = time.perf_counter() - started
+            return loaded
+
+        report("import", 0.05)
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+        device = self._resolve_device(torch, device)
+
+        report("tokenizer", 0.15)
+        tokenizer = AutoTokenizer.from_pretrained(path)
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+
+        report("weights", 0.3)
+        kwargs: Dict[str, Any] = {"low_cpu_mem_usage": True}
+        if device.startswith("cuda") and quantization in ("8bit", "4bit"):
+            from transformers import BitsAndBytesConfig
+            kwargs["quantization_config"] = BitsAndBytesConfig(
+                load_in_8bit=quantization == "8bit",
+                load_in_4bit=quantization == "4bit"
+            )
+            kwargs["device_map"] = "auto"
+        elif device.startswith("cuda"):
+            kwargs["torch_dtype"] = torch.float16
+
+        if os.path.exists(os.path.join(path, "adapter_config.json")):
+            # Fine-tuned LoRA adapter πάνω στο βασικό μοντέλο
+            from peft import AutoPeftModelForCausalLM
+            model = AutoPeftModelForCausalLM.from_pretrained(path, **kwargs)
+            model = model.merge_and_unload()
+        else:
+            model = AutoModelForCausalLM.from_pretrained(path, **kwargs)
+
+        if device == "cpu" and quantization == "dynamic":
+            report("quantization", 0.8)
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif "device_map" not in kwargs:
+            model = model.to(device)
+        model.eval()
+
+        loaded = LoadedModel(name, path, quantization, device, model, tokenizer)
+        loaded.memory_bytes = model_memory_bytes(model)
+
+        report("warmup", 0.9)
+        with torch.inference_mode():
+            inputs = tokenizer("ping", return_tensors="pt").to(device)
+            model.generate(**inputs, max_new_tokens=1, pad_token_id=tokenizer.pad_token_id)
+            # Η δεύτερη κλήση μετρά τη σταθερή καθυστέρηση, χωρίς lazy αρχικοποιήσεις
+            warmup_started = time.perf_counter()
+            model.generate(
+                **inputs,
+                max_new_tokens=self.warmup_tokens,
+                min_new_tokens=self.warmup_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id
+            )
+        loaded.warmup_latency_ms = (time.perf_counter() - warmup_started) * 1000
+        loaded.load_seconds = time.perf_counter() - started
+        return loaded
+
+    def _activate(self, loaded: LoadedModel):
+        """
+        Ατομική αλλαγή της ενεργής παραλλαγής
+
+        Τα νέα αιτήματα χρησιμοποιούν αμέσως τη νέα παραλλαγή, ενώ όσα εκτελούνται
+        ολοκληρώνονται με την παλιά, που αποδεσμεύεται όταν τελειώσουν.
+        """
+        self.model_generation += 1
+        loaded.generation = self.model_generation
+        self._active = loaded
+        # Τα KV caches των συνεδριών ανήκουν στο προηγούμενο μοντέλο
+        self.sessions.clear_kv()
+
+    def _swap_lock_obj(self) -> asyncio.Lock:
+        if self._swap_lock is None:
+            self._swap_lock = asyncio.Lock()
+        return self._swap_lock
+
+    async def swap_model(self, name: str) -> Dict[str, Any]:
+        """
+        Αλλαγή της ενεργής παραλλαγής χωρίς επανεκκίνηση του API
+
+        Η νέα παραλλαγή φορτώνεται και ζεσταίνεται σε thread, ενώ η τρέχουσα
+        συνεχίζει να εξυπηρετεί. Μόνο μετά το επιτυχές ζέσταμα γίνεται ενεργή. Αν
+        η φόρτωση αποτύχει, η τρέχουσα παραμένει και η παραλλαγή σημειώνεται ως
+        failed. ModelVariantNotFoundError αν δεν υπάρχει στο μητρώο και
+        ModelSwapInProgressError αν εκτελείται ήδη αλλαγή.
+        """
+        lock = self._swap_lock_obj()
+        if lock.locked() or (self._load_task is not None and not self._load_task.done()):
+            raise ModelSwapInProgressError(self.swap_status.get("target") or "αρχική φόρτωση")
+        async with lock:
+            def lookup():
+                db = SessionLocal()
+                try:
+                    variant = get_variant(db, name)
+                    if variant is None:
+                        raise ModelVariantNotFoundError(name)
+                    mark_variant(db, name, "loading")
+                    return variant.path, variant.quantization, variant.device
+                finally:
+                    db.close()
+
+            path, quantization, device = await asyncio.to_thread(lookup)
+            previous = self._active.name if self._active else None
+            self.swap_status = {"state": "loading", "target": name, "stage": None, "error": None}
+
+            def report(stage: str, progress: float):
+                self.swap_status["stage"] = stage
+                self.logger.info(f"Φόρτωση παραλλαγής {name}: {stage} ({progress:.0%})")
+
+            try:
+                loaded = await asyncio.to_thread(
+                    self._load_variant_sync, name, path, quantization, device, report
+                )
+            except Exception as e:
+                self.swap_status = {"state": "failed", "target": name, "stage": None, "error": str(e)}
+                self.logger.error(f"Αποτυχία φόρτωσης παραλλαγής {name}: {str(e)}")
+
+                def fail():
+                    db = SessionLocal()
+                    try:
+                        mark_variant(db, name, "failed", str(e))
+                    finally:
+                        db.close()
+
+                await asyncio.to_thread(fail)
+                raise
+
+            self._activate(loaded)
+            if self.status != "ready":
+                # Η αλλαγή αποκαθιστά και ένα μοντέλο που απέτυχε να φορτωθεί
+                self.status, self.progress, self.load_stage, self.load_error = "ready", 1.0, "ready", None
+                self._ready_event().set()
+            await asyncio.to_thread(self._persist_active, loaded)
+            self.swap_status = {"state": "idle", "target": None, "stage": None, "error": None}
+            self.logger.info(
+                f"Ενεργή παραλλαγή μοντέλου: {name} (προηγούμενη: {previous}), "
+                f"φόρτωση {loaded.load_seconds:.1f}s"
+            )
+            return {"previous": previous, "active": loaded.summary()}
+
+    def readiness(self) -> Dict[str, Any]:
+        """
+        Κατάσταση φόρτωσης του μοντέλου για το /health
+        """
+        return {
+            "status": self.status,
+            "progress": round(self.progress, 2),
+            "stage": self.load_stage,
+            "error": self.load_error,
+            "model_path": self._active.path if self._active else self.model_path,
+            "device": self._active.device if self._active else self.device,
+            "quantization": self._active.quantization if self._active else self.quantization,
+            "load_seconds": self.load_seconds,
+            "variant": self._active.summary() if self._active else None,
+            "swap": self.swap_status
+        }
+
+    async def wait_until_ready(self, timeout: Optional[float] = None):
+        """
+        Αναμονή μέχρι να φορτωθεί το μοντέλο (ModelNotReadyError αν λήξει ή αποτύχει)
+        """
+        if self.is_ready:
+            return
+        if self.status == "not_loaded":
+            await self.load_model()
+        timeout = self.ready_timeout if timeout is None else timeout
+        try:
+            await asyncio.wait_for(self._ready_event().wait(), timeout)
+        except asyncio.TimeoutError:
+            raise ModelNotReadyError(
+                f"Το AI μοντέλο φορτώνεται ακόμα ({self.load_stage}, {self.progress:.0%})"
+            )
+        if not self.is_ready:
+            raise ModelNotReadyError(f"Αποτυχία φόρτωσης AI μοντέλου: {self.load_error}")
+
+    def _build_prompt(self, tokenizer, message: str, context: Optional[str] = None) -> str:
+        system = SYSTEM_PROMPT
+        if context:
+            system = f"{SYSTEM_PROMPT}\n\nΤρέχοντα δεδομένα του χρήστη:\n{context}"
+        chat_template = getattr(tokenizer, "chat_template", None)
+        if chat_template:
+            return tokenizer.apply_chat_template(
+                [{"role": "system", "content": system}, {"role": "user", "content": message}],
+                tokenize=False,
+                add_generation_prompt=True
+            )
+        return f"{system}\n\nΧρήστης: {message}\nΒοηθός:"
+
+    def count_tokens(self, text: str) -> int:
+        tokenizer = self.tokenizer
+        if tokenizer is None:
+            return estimate_tokens(text)
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    async def build_context(self, message: str) -> Optional[ChatContext]:
+        """
+        Context από τα δεδομένα του API για την ερώτηση (None αν δεν είναι διαθέσιμο)
+        """
+        if self.context_builder is None:
+            return None
+        try:
+            return await self.context_builder.build(message, self.count_tokens)
+        except Exception as e:
+            self.logger.error(f"Σφάλμα κατά τη συναρμολόγηση context: {str(e)}")
+            return None
+
+    async def route(self, message: str) -> Optional[str]:
+        """
+        Απάντηση από τον IntentRouter για ερωτήσεις σταθερής μορφής (None αν χρειάζεται το μοντέλο)
+        """
+        if self.router is None:
+            return None
+        try:
+            routed = await self.router.route(message)
+        except Exception as e:
+            self.logger.error(f"Σφάλμα κατά τη δρομολόγηση ερώτησης: {str(e)}")
+            return None
+        return routed[1] if routed is not None else None
+
+    def _generate_batch_sync(self,
+                             requests: List[Tuple[str, Optional[str]]],
+                             cancel_event: threading.Event) -> List[Tuple[str, int]]:
+        """
+        Παραγωγή απαντήσεων για ένα batch (μήνυμα, context) με μία κλήση generate
+        (μπλοκάρει, εκτελείται σε worker του executor)
+
+        Τα prompts γεμίζονται (padding) από αριστερά ώστε όλα να τελειώνουν στην ίδια
+        θέση. Επιστρέφει (απάντηση, αριθμός νέων tokens) για κάθε μήνυμα.
+        """
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        class _CancelCriteria(StoppingCriteria):
+            # Διακοπή της παραγωγής όταν όλοι οι καλούντες ακυρώσουν
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return cancel_event.is_set()
+
+        active = self._active
+        tokenizer = active.tokenizer
+        tokenizer.padding_side = "left"
+        prompts = [self._build_prompt(tokenizer, message, context) for message, context in requests]
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(active.device)
+        with torch.inference_mode():
+            output = active.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+                stopping_criteria=StoppingCriteriaList([_CancelCriteria()])
+            )
+        new_tokens = output[:, inputs["input_ids"].shape[1]:]
+        results = []
+        for row in new_tokens:
+            # Τα tokens μετά το EOS είναι padding και δεν μετράνε
+            count = int((row != tokenizer.pad_token_id).sum())
+            results.append((tokenizer.decode(row, skip_special_tokens=True).strip(), count))
+        return results
+
+    def _generate_mock_batch(self,
+                             requests: List[Tuple[str, Optional[str]]],
+                             cancel_event: threading.Event) -> List[Tuple[str, int]]:
+        if self.mock_latency:
+            # Κάθε επιπλέον μήνυμα στο batch κοστίζει κλάσμα του χρόνου ενός αιτήματος
+            cancel_event.wait(self.mock_latency * (1 + self.mock_batch_cost * (len(requests) - 1)))
+        results = []
+        for message, _ in requests:
+            text = f"Λήφθηκε το μήνυμα: {message}"
+            results.append((text, len(text.split())))
+        return results
+
+    def _stream_sync(self,
+                     message: str,
+                     context: Optional[str],
+                     emit: Callable[[str], None],
+                     cancel_event: threading.Event):
+        """
+        Παραγωγή απάντησης με παράδοση κάθε κομματιού κειμένου μόλις αποκωδικοποιηθεί
+        (μπλοκάρει, εκτελείται σε worker του executor)
+        """
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList, TextStreamer
+
+        class _CancelCriteria(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return cancel_event.is_set()
+
+        class _EmitStreamer(TextStreamer):
+            # Το TextStreamer κρατά τα tokens μέχρι να σχηματιστεί ολόκληρη λέξη
+            def on_finalized_text(self, text: str, stream_end: bool = False):
+                if text:
+                    emit(text)
+
+        active = self._active
+        tokenizer = active.tokenizer
+        inputs = tokenizer(self._build_prompt(tokenizer, message, context), return_tensors="pt").to(active.device)
+        streamer = _EmitStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        with torch.inference_mode():
+            active.model.generate(
+                **inputs,
+                max_new_tokens=self.max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+                streamer=streamer,
+                stopping_criteria=StoppingCriteriaList([_CancelCriteria()])
+            )
+
+    def _stream_mock(self,
+                     message: str,
+                     context: Optional[str],
+                     emit: Callable[[str], None],
+                     cancel_event: threading.Event):
+        words = f"Λήφθηκε το μήνυμα: {message}".split()
+        for index, word in enumerate(words):
+            if self.mock_latency and cancel_event.wait(self.mock_latency / len(words)):
+                return
+            emit(word if index == 0 else f" {word}")
+
+    async def stream_response(self,
+                              message: str,
+                              timeout: Optional[float] = None,
+                              versions: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Παραγωγή απάντησης ως ροή κομματιών κειμένου
+
+        Η παραγωγή τρέχει σε worker του executor (εκτός batching) και κάθε κομμάτι
+        περνά στο event loop μέσω ουράς. Αν ο καταναλωτής σταματήσει (π.χ.
+        αποσύνδεση του client), η παραγωγή διακόπτεται. Καταγράφεται ο χρόνος έως
+        το πρώτο token (TTFT). Απάντηση από την cache ή τον IntentRouter αποστέλλεται
+        ως ένα κομμάτι.
+        """
+        routed = await self.route(message)
+        if routed is not None:
+            yield routed
+            return
+        await self.wait_until_ready()
+        context = await self.build_context(message)
+        if context is not None:
+            versions = context.versions
+        versions = {**(versions or {}), "model": self.model_generation}
+        cached, key, embedding = (None, None, None)
+        if self.cache.enabled:
+            cached, key, embedding = await self.cache.lookup(message, versions)
+        if cached is not None:
+            yield cached
+            return
+
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def emit(text: str):
+            loop.call_soon_threadsafe(chunks.put_nowait, text)
+
+        generate = self._stream_mock if self.use_mock else self._stream_sync
+        started = time.perf_counter()
+        task = asyncio.create_task(self.executor.submit(
+            generate, message, context.text if context else None, emit, timeout=timeout
+        ))
+        task.add_done_callback(lambda _: chunks.put_nowait(done))
+        parts: List[str] = []
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is done:
+                    break
+                if not parts:
+                    self._ttft.append(time.perf_counter() - started)
+                parts.append(chunk)
+                self.streamed_chunks += 1
+                yield chunk
+            # Σφάλματα του worker (π.χ. γεμάτη ουρά, timeout) διαδίδονται εδώ
+            await task
+            self.streams += 1
+            response = "".join(parts).strip()
+            if key is not None:
+                self.cache.store(key, message, response, embedding)
+            self._log_chat(message, context, response, "stream")
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def _ttft_metrics(self) -> Dict[str, Any]:
+        ordered = sorted(self._ttft)
+        if not ordered:
+            return {"samples": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+        return {
+            "samples": len(ordered),
+            "avg_ms": sum(ordered) / len(ordered) * 1000,
+            "p50_ms": ordered[len(ordered) // 2] * 1000,
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000
+        }
+
+    def _render_conversation(self, tokenizer, turns: List[Dict[str, str]]) -> str:
+        chat_template = getattr(tokenizer, "chat_template", None)
+        if chat_template:
+            return tokenizer.apply_chat_template(
+                [{"role": "system", "content": SYSTEM_PROMPT}] + turns,
+                tokenize=False,
+                add_generation_prompt=True
+            )
+        parts = [SYSTEM_PROMPT]
+        for turn in turns:
+            if turn["role"] == "user":
+                parts.append(f"\n\nΧρήστης: {turn['content']}\nΒοηθός:")
+            else:
+                parts.append(f" {turn['content']}")
+        return "".join(parts)
+
+    @staticmethod
+    def _user_turn(message: str, context: Optional[str]) -> Dict[str, str]:
+        # Το context μπαίνει στον γύρο του χρήστη και όχι στο system prompt, ώστε
+        # το πρόθεμα της συνομιλίας να μένει ίδιο και το KV cache να επαναχρησιμοποιείται
+        if context:
+            message = f"Τρέχοντα δεδομένα:\n{context}\n\nΕρώτηση: {message}"
+        return {"role": "user", "content": message}
+
+    def _tokenize_conversation(self, tokenizer, turns: List[Dict[str, str]]):
+        return tokenizer(
+            self._render_conversation(tokenizer, turns),
+            return_tensors="pt",
+            add_special_tokens=not getattr(tokenizer, "chat_template", None)
+        )["input_ids"]
+
+    def _system_prefix(self, active: LoadedModel) -> Tuple[Any, List[int]]:
+        """
+        KV cache του κοινού προθέματος όλων των συνομιλιών (υπολογίζεται μία φορά)
+
+        Το πρόθεμα είναι το κοινό τμήμα των tokens δύο διαφορετικών συνομιλιών,
+        οπότε δεν εξαρτάται από τη μορφή του chat template.
+        """
+        import torch
+
+        with active.prefix_lock:
+            if active.prefix is None:
+                first = self._tokenize_conversation(active.tokenizer, [{"role": "user", "content": "α"}])[0].tolist()
+                second = self._tokenize_conversation(active.tokenizer, [{"role": "user", "content": "β"}])[0].tolist()
+                prefix_ids = first[:common_prefix_length(first, second)]
+                cache = None
+                if prefix_ids:
+                    with torch.inference_mode():
+                        output = active.model(
+                            input_ids=torch.tensor([prefix_ids], device=active.device),
+                            use_cache=True
+                        )
+                    cache = output.past_key_values
+                active.prefix = (cache, prefix_ids)
+            cache, prefix_ids = active.prefix
+        return copy.deepcopy(cache), list(prefix_ids)
+
+    def _session_generate_sync(self,
+                               active: LoadedModel,
+                               cache,
+                               cached_ids: List[int],
+                               turns: List[Dict[str, str]],
+                               cancel_event: threading.Event) -> Dict[str, Any]:
+        """
+        Γύρος συνομιλίας με επαναχρησιμοποίηση του KV cache της συνεδρίας
+        (μπλοκάρει, εκτελείται σε worker του executor)
+
+        Κωδικοποιούνται μόνο τα tokens μετά το κοινό πρόθεμα με όσα καλύπτει ήδη
+        το cache: πρώτα ένα forward για το νέο τμήμα του prompt (εκτός του
+        τελευταίου token) και μετά generate, που συνεχίζει από το cache. Το cache
+        ανήκει στην παραλλαγή active, με την οποία ξεκίνησε ο γύρος.
+        """
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        class _CancelCriteria(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs) -> bool:
+                return cancel_event.is_set()
+
+        tokenizer = active.tokenizer
+        input_ids = self._tokenize_conversation(tokenizer, turns).to(active.device)
+        prompt_ids = input_ids[0].tolist()
+        if cache is None:
+            cache, cached_ids = self._system_prefix(active)
+
+        # Τουλάχιστον ένα token πρέπει να περάσει από το generate
+        reused = min(common_prefix_length(cached_ids, prompt_ids), len(prompt_ids) - 1)
+        cache = crop_kv_cache(cache, reused) if reused > 0 else None
 
-    async def generate_response(self, message: str) -> str:
+        with torch.inference_mode():
+            if cache is not None and reused < len(prompt_ids) - 1:
+                output = active.model(input_ids=input_ids[:, reused:-1], past_key_values=cache, use_cache=True)
+                cache = output.past_key_values
+            output = active.model.generate(
+                input_ids=input_ids,
+                attention_mask=torch.ones_like(input_ids),
+                past_key_values=cache,
+                max_new_tokens=self.max_new_tokens,
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+                stopping_criteria=StoppingCriteriaList([_CancelCriteria()]),
+                return_dict_in_generate=True,
+                use_cache=True
+            )
+
+        sequence = output.sequences[0]
+        cache = output.past_key_values
+        return {
+            "response": tokenizer.decode(sequence[len(prompt_ids):], skip_special_tokens=True).strip(),
+            "cache": cache,
+            "cached_ids": sequence.tolist()[:kv_cache_length(cache)],
+            "kv_bytes": kv_cache_bytes(cache),
+            "prompt_tokens": len(prompt_ids),
+            "reused_tokens": reused
+        }
+
+    def _session_mock(self,
+                      active: LoadedModel,
+                      cache,
+                      cached_ids: List[str],
+                      turns: List[Dict[str, str]],
+                      cancel_event: threading.Event) -> Dict[str, Any]:
+        # Οι λέξεις του prompt παίζουν τον ρόλο των tokens
+        prompt_ids = self._render_conversation(active.tokenizer, turns).split()
+        reused = min(common_prefix_length(cached_ids, prompt_ids), len(prompt_ids) - 1)
+        if self.mock_latency:
+            cancel_event.wait(self.mock_latency * max(0.1, 1 - reused / len(prompt_ids)))
+        response = f"Λήφθηκε το μήνυμα: {turns[-1]['content']}"
+        ids = prompt_ids + response.split()
+        return {
+            "response": response,
+            "cache": "mock",
+            "cached_ids": ids,
+            "kv_bytes": len(ids) * 1024,
+            "prompt_tokens": len(prompt_ids),
+            "reused_tokens": reused
+        }
+
+    async def chat_session(self,
+                           message: str,
+                           session_id: Optional[str] = None,
+                           timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Γύρος συνομιλίας σε συνεδρία (νέα αν το session_id δεν υπάρχει)
+
+        Οι γύροι της ίδιας συνεδρίας εκτελούνται σειριακά. Δεν περνούν από την
+        cache απαντήσεων ούτε από το batching, αφού εξαρτώνται από το ιστορικό.
+        """
+        await self.wait_until_ready()
+        context = await self.build_context(message)
+        session = self.sessions.get_or_create(session_id)
+        async with session.lock:
+            turns = session.turns + [self._user_turn(message, context.text if context else None)]
+            active = self._active
+            cache, cached_ids = self.sessions.take(session)
+            generate = self._session_mock if self.use_mock else self._session_generate_sync
+            result = await self.executor.submit(generate, active, cache, cached_ids, turns, timeout=timeout)
+            session.turns = turns + [{"role": "assistant", "content": result["response"]}]
+            # Μόνο ο νέος γύρος: οι προηγούμενοι έχουν ήδη καταγραφεί με το ίδιο session_id
+            self.dataset.log_chat(
+                SYSTEM_PROMPT, session.turns[-2:], source="session", session_id=session.session_id,
+                model=active.name, versions=context.versions if context else None
+            )
+            self.sessions.trim_turns(session)
+            # Cache παραλλαγής που αντικαταστάθηκε κατά τον γύρο δεν κρατιέται
+            current = active is self._active
+            self.sessions.record(
+                session, result["cache"] if current else None, result["cached_ids"] if current else [],
+                result["kv_bytes"] if current else 0, result["prompt_tokens"], result["reused_tokens"]
+            )
+        return {
+            "response": result["response"],
+            "session_id": session.session_id,
+            "prompt_tokens": result["prompt_tokens"],
+            "reused_tokens": result["reused_tokens"]
+        }
+
+    async def generate_response(self,
+                                message: str,
+                                timeout: Optional[float] = None,
+                                versions: Optional[Dict[str, Any]] = None) -> str:
         """
         Παραγωγή απάντησης από το AI
+
+        Το prompt συμπληρώνεται με context από τα τρέχοντα δεδομένα (αν υπάρχει
+        context_builder), του οποίου οι εκδόσεις γίνονται μέρος του κλειδιού της
+        cache. Επαναλαμβανόμενες ερωτήσεις εξυπηρετούνται από την cache όσο δεν
+        αλλάζουν τα δεδομένα. Ερωτήσεις σταθερής μορφής απαντώνται από τον
+        IntentRouter χωρίς το μοντέλο (και πριν αυτό φορτωθεί). Τα υπόλοιπα
+        αιτήματα περνούν από τον BatchScheduler και εκτελούνται μαζί με όσα άλλα
+        φτάσουν μέσα στο ίδιο παράθυρο. Οι ModelNotReadyError,
+        InferenceQueueFullError, InferenceTimeoutError και η ακύρωση (αποσύνδεση
+        του client) διαδίδονται στον καλούντα.
         """
+        routed = await self.route(message)
+        if routed is not None:
+            return routed
+        await self.wait_until_ready()
+        context = await self.build_context(message)
+        if context is not None:
+            versions = context.versions
+        # Οι απαντήσεις της cache ανήκουν στην παραλλαγή που τις παρήγαγε
+        versions = {**(versions or {}), "model": self.model_generation}
+        request = (message, context.text if context else None)
+        def compute():
+            return self._generate_logged(message, context, request, timeout)
+
         try:
-            # Προς το παρόν, επιστρέφει μια απλή απάντηση
-            return f"Λήφθηκε το μήνυμα: {message}"
+            return await self.cache.get_or_compute(message, versions, compute)
+        except (InferenceQueueFullError, InferenceTimeoutError):
+            raise
         except Exception as e:
             self.logger.error(f"Σφάλμα κατά την παραγωγή απάντησης: {str(e)}")
             return "Παρουσιάστηκε σφάλμα κατά την επεξεργασία του αιτήματος."
 
+    async def _generate_logged(self, message: str, context: Optional[ChatContext],
+                               request: Tuple[str, Optional[str]], timeout: Optional[float]) -> str:
+        # Μόνο οι απαντήσεις που παρήχθησαν καταγράφονται, όχι όσες δόθηκαν από την cache
+        response = await self.scheduler.submit(request, timeout=timeout)
+        self._log_chat(message, context, response, "generate")
+        return response
+
+    def _log_chat(self, message: str, context: Optional[ChatContext], response: str, source: str):
+        turns = [
+            self._user_turn(message, context.text if context else None),
+            {"role": "assistant", "content": response}
+        ]
+        self.dataset.log_chat(
+            SYSTEM_PROMPT, turns, source=source,
+            model=self._active.name if self._active else None,
+            versions=context.versions if context else None
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor.metrics(),
+            "batching": self.scheduler.metrics(),
+            "cache": self.cache.metrics(),
+            "context": self.context_builder.metrics() if self.context_builder else None,
+            "router": self.router.metrics() if self.router else None,
+            "sessions": self.sessions.metrics(),
+            "strategy": self.strategy.metrics(),
+            "dataset": self.dataset.metrics(),
+            "model": {
+                "active": self._active.summary() if self._active else None,
+                "generation": self.model_generation,
+                "swap": self.swap_status
+            },
+            "streaming": {
+                "streams": self.streams,
+                "streamed_chunks": self.streamed_chunks,
+                "ttft": self._ttft_metrics()
+            }
+        }
+
+    async def shutdown(self):
+        """
+        Τερματισμός των workers inference
+        """
+        await self.executor.shutdown()
+        self.dataset.close()
+
     async def analyze_mining_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Βασική ανάλυση δεδομένων mining
+        Ανάλυση telemetry mining (αποδοτικότητα, outliers, τάσεις, παλινδρομήσεις, προβολή εσόδων)
+
+        Δεδομένα: "telemetry" (λίστα μετρήσεων ανά GPU και χρόνο) ή "gpus"
+        (στιγμιότυπο). Αν δεν δοθεί κανένα, αναλύεται το παράθυρο των τελευταίων
+        "days" ημερών (προεπιλογή 30) από τον πίνακα mining_stats. Το
+        "energy_cost_per_kwh" ενεργοποιεί την προβολή κόστους ενέργειας.
         """
         try:
-            # Προς το παρόν, επιστρέφει μια απλή ανάλυση
+            records = data.get("telemetry") or data.get("gpus")
+            energy_cost = data.get("energy_cost_per_kwh")
+            horizons = tuple(int(day) for day in data.get("horizons_days", (1, 7, 30)))
+
+            def analyze():
+                if records:
+                    frame = telemetry_frame(records)
+                    source = "submitted"
+                else:
+                    start, end = default_analysis_range(int(data.get("days", 30)))
+                    db = SessionLocal()
+                    try:
+                        frame = load_mining_telemetry(db, start, end)
+                    finally:
+                        db.close()
+                    source = "mining_stats"
+                return source, analyze_telemetry(
+                    frame,
+                    float(energy_cost) if energy_cost is not None else None,
+                    horizons
+                )
+
+            started = time.perf_counter()
+            source, result = await asyncio.to_thread(analyze)
+            elapsed = time.perf_counter() - started
+
+            if not result["samples"]:
+                summary = "Δεν βρέθηκαν δεδομένα telemetry για ανάλυση."
+            else:
+                best = result["gpus"][0]
+                degrading = [gpu["gpu_id"] for gpu in result["gpus"] if gpu["degrading"]]
+                summary = (
+                    f"Αναλύθηκαν {result['samples']} μετρήσεις από {len(result['gpus'])} GPU. "
+                    f"Πιο αποδοτική: {best['gpu_id']} ({best['model']}, {best['efficiency']} MH/s/W). "
+                    f"Outliers: {len(result['outliers']['samples'])} μετρήσεις, "
+                    f"{len(result['outliers']['gpus'])} GPU. "
+                )
+                if degrading:
+                    summary += f"Πτωτική απόδοση ή άνοδος θερμοκρασίας: {', '.join(degrading[:10])}."
+                else:
+                    summary += "Δεν εντοπίστηκε υποβάθμιση απόδοσης."
+
+            if result["samples"]:
+                self.dataset.log_analysis(
+                    SYSTEM_PROMPT, result, summary, source=source,
+                    energy_cost_per_kwh=energy_cost, horizons_days=list(horizons)
+                )
+
             return {
                 "status": "success",
-                "data": data,
-                "analysis": "Πραγματοποιήθηκε βασική ανάλυση των δεδομένων mining."
+                "source": source,
+                **result,
+                "analysis": summary,
+                "elapsed_ms": round(elapsed * 1000, 1)
             }
         except Exception as e:
             self.logger.error(f"Σφάλμα κατά την ανάλυση δεδομένων: {str(e)}")
             return {"status": "error", "message": str(e)}
 
-    async def optimize_mining_strategy(self, 
-                                       user_config: Dict[str, Any], 
-                                       market_data: Dict[str, Any], 
+    async def optimize_mining_strategy(self,
+                                       user_config: Dict[str, Any],
+                                       market_data: Dict[str, Any],
                                        energy_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Βελτιστοποίηση στρατηγικής mining
+        Βελτιστοποίηση στρατηγικής mining: ανάθεση κάθε GPU σε νόμισμα, ενοικίαση ή αδράνεια
+
+        user_config: "gpus" (στοιχεία GPU, με προαιρετικά rig_id/assignment) και
+        περιορισμοί (power_cap_w, rigs, switch_cost, solar_only) που συμπληρώνουν
+        το gpu_config της MiningConfig ("config_id" ή η πιο πρόσφατη ενεργή).
+        market_data: "profitability" (κερδοφορία νομισμάτων) και "rental_prices"
+        (τιμή ανά ώρα ανά μοντέλο GPU στο CloreAI).
         """
         try:
-            # Προς το παρόν, επιστρέφει μια απλή σύσταση
+            gpus = [gpu if isinstance(gpu, dict) else {"model": str(gpu)} for gpu in user_config.get("gpus", [])]
+
+            def solve():
+                db = SessionLocal()
+                try:
+                    stored = load_mining_config(db, user_config.get("config_id"))
+                finally:
+                    db.close()
+                constraints = {**stored, **{key: value for key, value in user_config.items() if value is not None}}
+                return self.strategy.optimize(
+                    gpus,
+                    market_data.get("profitability", {}),
+                    energy_data,
+                    constraints,
+                    market_data.get("rental_prices")
+                )
+
+            result = await asyncio.to_thread(solve)
+            totals = result["totals"]
+            if result["assignments"]:
+                counts: Dict[str, int] = {}
+                for item in result["assignments"]:
+                    counts[item["assignment"]] = counts.get(item["assignment"], 0) + 1
+                allocation = ", ".join(f"{count}x {label}" for label, count in sorted(counts.items(), key=lambda pair: -pair[1]))
+                rationale = (
+                    f"Κατανομή: {allocation}. Καθαρό κέρδος {totals['net_profit']:.2f} USD σε "
+                    f"{totals['horizon_hours']:.0f} ώρες με ισχύ {totals['power_w']:.0f} W "
+                    f"(κόστος ενέργειας {totals['energy_cost']:.2f} €, {totals['switches']} αλλαγές)."
+                )
+            else:
+                rationale = "Δεν υπάρχουν GPU για βελτιστοποίηση."
+
             return {
                 "status": "success",
                 "suggestions": {
-                    "recommended_coin": "BTC",
-                    "gpu_allocation": user_config.get('gpus', [])
+                    "recommended_coin": result["recommended_coin"] or "",
+                    "gpu_allocation": result["assignments"]
                 },
-                "rationale": "Βασική βελτιστοποίηση με βάση τα παρεχόμενα δεδομένα."
+                "totals": totals,
+                "constraints": result["constraints"],
+                "solver": result["solver"],
+                "rationale": rationale
             }
         except Exception as e:
             self.logger.error(f"Σφάλμα κατά τη βελτιστοποίηση στρατηγικής: {str(e)}")
@@ -0,0 +1,312 @@
+import os
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from backend.offer_book import normalize_model
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Δείκτης απόδοσης (performance_rating) της GPU αναφοράς των εκτιμήσεων κερδοφορίας
+REFERENCE_RATING = 10.0
+
+
+def coin_revenue_per_hour(coins_data: Dict) -> Dict[str, float]:
+    """
+    Έσοδα ανά ώρα (σε USD) για την GPU αναφοράς, ανά κρυπτονόμισμα
+
+    Τα estimated_earnings["day"] είναι σε μονάδες νομίσματος και μετατρέπονται
+    με την τρέχουσα τιμή του νομίσματος.
+    """
+    revenue = {}
+    for coin, data in coins_data.items():
+        earnings = data.get("estimated_earnings", {}) or {}
+        revenue[coin] = float(earnings.get("day", 0) or 0) * float(data.get("current_price", 0) or 0) / 24
+    return revenue
+
+
+class RentalArbitrageOptimizer:
+    """
+    Σύγκριση ενοικίασης GPU από το CloreAI με την εξόρυξη και τη διάθεση των
+    δικών μας GPU στο marketplace
+
+    Για κάθε προσφορά τα αναμενόμενα έσοδα ανά ώρα προκύπτουν από τον πίνακα
+    κερδοφορίας νομισμάτων κλιμακωμένο με τον δείκτη απόδοσης της GPU. Όλες οι
+    προσφορές αξιολογούνται μαζί (πίνακας προσφορών x νομισμάτων) και η επιλογή
+    χαρτοφυλακίου υπό όριο προϋπολογισμού λύνεται ως ακέραιο knapsack με το
+    scipy (HiGHS), με greedy fallback κατά λόγο κέρδους/κόστους.
+    """
+
+    def __init__(self):
+        # Προμήθεια του marketplace επί των εσόδων από τη διάθεση δικών μας GPU
+        self.market_fee = float(os.getenv("CLOREAI_MARKET_FEE", 0.1))
+        # Αναμενόμενο ποσοστό χρόνου που μια GPU μας θα είναι ενοικιασμένη
+        self.rental_utilization = float(os.getenv("CLOREAI_RENTAL_UTILIZATION", 0.7))
+        self.solver_time_limit = float(os.getenv("ARBITRAGE_SOLVER_TIME_LIMIT", 0.5))
+        # Προσφορές εκατέρωθεν του σημείου θραύσης που εξετάζονται από τον solver
+        self.core_size = int(os.getenv("ARBITRAGE_CORE_SIZE", 50))
+        # USD ανά EUR: το τιμολόγιο ενέργειας είναι σε EUR, τα έσοδα και οι τιμές ενοικίασης σε USD
+        self.eur_usd_rate = float(os.getenv("EUR_USD_RATE", 1.08))
+
+    @staticmethod
+    def _rating_lookup(offers: List[Dict]) -> Dict[str, float]:
+        ratings = {}
+        for offer in offers:
+            rating = offer.get("performance_rating")
+            if rating:
+                ratings[normalize_model(offer.get("gpu_model", ""))] = float(rating)
+        return ratings
+
+    @staticmethod
+    def _market_prices(offers: List[Dict]) -> Dict[str, float]:
+        """
+        Φθηνότερη τιμή ανά ώρα ανά μοντέλο (η τιμή στην οποία ανταγωνιζόμαστε ως πωλητές)
+        """
+        prices = {}
+        for offer in offers:
+            price = offer.get("price_per_hour")
+            if not price or price <= 0:
+                continue
+            model = normalize_model(offer.get("gpu_model", ""))
+            prices[model] = min(prices.get(model, float("inf")), float(price))
+        return prices
+
+    def rank_offers(self, offers: List[Dict], coins_data: Dict, horizon_hours: float = 24) -> List[Dict]:
+        """
+        Κατάταξη προσφορών κατά αναμενόμενο καθαρό κέρδος ανά ώρα (ένα vectorized πέρασμα)
+
+        Η ενοικίαση δεσμεύει τουλάχιστον minimum_hours, οπότε το κόστος και το
+        κέρδος της δέσμευσης υπολογίζονται στο max(horizon_hours, minimum_hours).
+        """
+        # Προσφορές χωρίς θετική τιμή δεν αξιολογούνται (μηδενικό κόστος δέσμευσης)
+        offers = [offer for offer in offers if (offer.get("price_per_hour") or 0) > 0]
+        if not offers:
+            return []
+
+        coins = coin_revenue_per_hour(coins_data)
+        coin_names = list(coins)
+        coin_revenue = np.array([coins[coin] for coin in coin_names]) if coins else np.zeros(1)
+
+        price = np.array([offer["price_per_hour"] for offer in offers], dtype=float)
+        rating = np.array([offer.get("performance_rating") or REFERENCE_RATING for offer in offers], dtype=float)
+        minimum_hours = np.array([offer.get("minimum_hours") or 1 for offer in offers], dtype=float)
+        available = np.array([offer.get("available", 0) or 0 for offer in offers], dtype=np.int64)
+
+        # Πίνακας εσόδων προσφορά x νόμισμα και καλύτερο νόμισμα ανά προσφορά
+        revenue = np.outer(rating / REFERENCE_RATING, coin_revenue)
+        best = revenue.argmax(axis=1)
+        revenue_per_hour = revenue[np.arange(len(offers)), best]
+
+        hours = np.maximum(horizon_hours, minimum_hours)
+        net_per_hour = revenue_per_hour - price
+        commitment_cost = price * hours
+        commitment_profit = net_per_hour * hours
+        roi = np.divide(commitment_profit, commitment_cost, out=np.zeros_like(commitment_cost), where=commitment_cost > 0)
+
+        order = np.argsort(-net_per_hour, kind="stable")
+        return [
+            {
+                **offers[i],
+                "best_coin": coin_names[best[i]] if coin_names else None,
+                "revenue_per_hour": float(revenue_per_hour[i]),
+                "net_per_hour": float(net_per_hour[i]),
+                "commitment_hours": float(hours[i]),
+                "commitment_cost": float(commitment_cost[i]),
+                "commitment_profit": float(commitment_profit[i]),
+                "roi": float(roi[i]),
+                "available": int(available[i])
+            }
+            for i in order
+        ]
+
+    def evaluate_own_gpus(self,
+                          gpus: List[Dict],
+                          offers: List[Dict],
+                          coins_data: Dict,
+                          energy_cost_per_kwh: float) -> List[Dict]:
+        """
+        Σύγκριση εξόρυξης και διάθεσης στο marketplace για κάθε δική μας GPU
+
+        Και στις δύο περιπτώσεις πληρώνουμε την ενέργεια της GPU. Στη διάθεση τα
+        έσοδα είναι η τρέχουσα φθηνότερη τιμή του μοντέλου μείον την προμήθεια,
+        επί το αναμενόμενο ποσοστό χρήσης. Το energy_cost_per_kwh είναι σε EUR
+        (τιμολόγιο) και μετατρέπεται σε USD με το EUR_USD_RATE.
+        """
+        if not gpus:
+            return []
+
+        ratings = self._rating_lookup(offers)
+        prices = self._market_prices(offers)
+        default_rating = float(np.median(list(ratings.values()))) if ratings else REFERENCE_RATING
+        best_coin_revenue = max(coin_revenue_per_hour(coins_data).values(), default=0.0)
+
+        models = [normalize_model(gpu.get("model", "")) for gpu in gpus]
+        rating = np.array([ratings.get(model, default_rating) for model in models])
+        market_price = np.array([prices.get(model, np.nan) for model in models])
+        power_kw = np.array([gpu.get("power_consumption", 0) or 0 for gpu in gpus], dtype=float) / 1000
+        energy_per_hour = power_kw * energy_cost_per_kwh * self.eur_usd_rate
+
+        mining_net = rating / REFERENCE_RATING * best_coin_revenue - energy_per_hour
+        lease_net = np.nan_to_num(market_price, nan=0.0) * (1 - self.market_fee) * self.rental_utilization - energy_per_hour
+        lease_net = np.where(np.isnan(market_price), -np.inf, lease_net)
+
+        results = []
+        for i, gpu in enumerate(gpus):
+            idle = not gpu.get("hashrate")
+            options = {"mine": mining_net[i], "lease": lease_net[i], "idle": 0.0}
+            action = max(options, key=options.get)
+            results.append({
+                "model": gpu.get("model", "Unknown"),
+                "idle": idle,
+                "mining_net_per_hour": float(mining_net[i]),
+                "lease_net_per_hour": float(lease_net[i]) if np.isfinite(lease_net[i]) else None,
+                "market_price_per_hour": float(market_price[i]) if np.isfinite(market_price[i]) else None,
+                "recommended_action": action,
+                "gain_per_hour": float(options[action] - (0.0 if idle else mining_net[i]))
+            })
+        return results
+
+    def select_portfolio(self, ranked: List[Dict], budget: float, max_gpus: Optional[int] = None) -> Dict:
+        """
+        Επιλογή αριθμού GPU ανά προσφορά που μεγιστοποιεί το κέρδος με όριο προϋπολογισμού
+
+        Κάθε προσφορά είναι μεταβλητή x_i ∈ {0..available_i} με κόστος
+        commitment_cost και κέρδος commitment_profit ανά GPU.
+        """
+        candidates = [offer for offer in ranked
+                      if offer["commitment_profit"] > 0 and offer["commitment_cost"] > 0 and offer["available"] > 0]
+        if not candidates or budget <= 0:
+            return {"selections": [], "total_cost": 0.0, "total_profit": 0.0, "solver": "none"}
+
+        cost = np.array([offer["commitment_cost"] for offer in candidates])
+        profit = np.array([offer["commitment_profit"] for offer in candidates])
+        available = np.array([offer["available"] for offer in candidates], dtype=float)
+
+        counts, solver = self._solve_milp(cost, profit, available, budget, max_gpus)
+        greedy = self._solve_greedy(cost, profit, available, budget, max_gpus)
+        if counts is None or greedy @ profit > counts @ profit:
+            counts, solver = greedy, "greedy"
+
+        selections = [
+            {
+                "offer_id": offer.get("offer_id"),
+                "gpu_model": offer.get("gpu_model"),
+                "count": int(count),
+                "best_coin": offer.get("best_coin"),
+                "cost": float(count * offer["commitment_cost"]),
+                "profit": float(count * offer["commitment_profit"]),
+                "commitment_hours": offer["commitment_hours"]
+            }
+            for offer, count in zip(candidates, counts) if count > 0
+        ]
+        return {
+            "selections": selections,
+            "total_cost": float(counts @ cost),
+            "total_profit": float(counts @ profit),
+            "solver": solver
+        }
+
+    def _solve_milp(self, cost, profit, available, budget, max_gpus):
+        """
+        Ακέραιο knapsack στον "πυρήνα" των προσφορών γύρω από το σημείο θραύσης
+
+        Με ταξινόμηση κατά λόγο κέρδους/κόστους, η βέλτιστη λύση διαφέρει από τη
+        greedy μόνο κοντά στην πρώτη προσφορά που δεν χωρά ολόκληρη. Οι προηγούμενες
+        προσφορές επιλέγονται πλήρως, οι επόμενες αγνοούνται, και στον πυρήνα
+        λύνεται MILP, ώστε ο χρόνος να μην εξαρτάται από το πλήθος των προσφορών.
+        """
+        try:
+            from scipy.optimize import Bounds, LinearConstraint, milp
+        except ImportError:
+            logger.warning("Το scipy δεν είναι διαθέσιμο. Χρήση greedy επιλογής χαρτοφυλακίου")
+            return None, None
+
+        order = np.argsort(-(profit / cost), kind="stable")
+        over = np.cumsum(available[order] * cost[order]) > budget
+        if max_gpus is not None:
+            over |= np.cumsum(available[order]) > max_gpus
+        split = int(over.argmax()) if over.any() else len(order)
+        fixed = order[:max(0, split - self.core_size)]
+        core = order[max(0, split - self.core_size):split + self.core_size]
+
+        counts = np.zeros_like(cost)
+        counts[fixed] = available[fixed]
+        rows = [cost[core]]
+        upper = [budget - counts @ cost]
+        if max_gpus is not None:
+            rows.append(np.ones(len(core)))
+            upper.append(max_gpus - counts.sum())
+
+        result = milp(
+            c=-profit[core],
+            constraints=LinearConstraint(np.vstack(rows), -np.inf, upper),
+            integrality=np.ones(len(core)),
+            bounds=Bounds(0, available[core]),
+            options={"time_limit": self.solver_time_limit}
+        )
+        if result.x is None:
+            logger.warning(f"Αποτυχία επίλυσης χαρτοφυλακίου ενοικίασης: {result.message}")
+            return None, None
+        counts[core] = np.round(result.x)
+        return counts, "milp"
+
+    @staticmethod
+    def _solve_greedy(cost, profit, available, budget, max_gpus):
+        counts = np.zeros_like(cost)
+        remaining_budget = budget
+        remaining_gpus = max_gpus if max_gpus is not None else np.inf
+        for i in np.argsort(-(profit / cost), kind="stable"):
+            count = min(available[i], remaining_budget // cost[i], remaining_gpus)
+            if count <= 0:
+                continue
+            counts[i] = count
+            remaining_budget -= count * cost[i]
+            remaining_gpus -= count
+        return counts
+
+    def optimize(self,
+                 offers: List[Dict],
+                 coins_data: Dict,
+                 budget: float,
+                 horizon_hours: float = 24,
+                 own_gpus: Optional[List[Dict]] = None,
+                 energy_cost_per_kwh: float = 0.0,
+                 max_gpus: Optional[int] = None,
+                 market_offers: Optional[List[Dict]] = None) -> Dict:
+        """
+        Πλήρης ανάλυση: κατάταξη προσφορών, χαρτοφυλάκιο ενοικίασης και δικές μας GPU
+
+        Οι τιμές αγοράς για τις δικές μας GPU προκύπτουν από τα market_offers
+        (προεπιλογή: οι ίδιες οι προσφορές).
+        """
+        ranked = self.rank_offers(offers, coins_data, horizon_hours)
+        portfolio = self.select_portfolio(ranked, budget, max_gpus)
+        own = self.evaluate_own_gpus(own_gpus or [], market_offers or offers, coins_data, energy_cost_per_kwh)
+
+        return {
+            "horizon_hours": horizon_hours,
+            "budget": budget,
+            "ranked_offers": ranked,
+            "portfolio": portfolio,
+            "own_gpus": own,
+            "recommendation": self._recommendation(portfolio, own)
+        }
+
+    @staticmethod
+    def _recommendation(portfolio: Dict, own: List[Dict]) -> str:
+        parts = []
+        if portfolio["selections"]:
+            rentals = ", ".join(f"{s['count']}x {s['gpu_model']} ({s['best_coin']})" for s in portfolio["selections"])
+            parts.append(f"Ενοικίαση {rentals} με αναμενόμενο κέρδος {portfolio['total_profit']:.2f} USD "
+                         f"για κόστος {portfolio['total_cost']:.2f} USD.")
+        else:
+            parts.append("Καμία προσφορά ενοικίασης δεν είναι κερδοφόρα με τις τρέχουσες τιμές.")
+        lease = [gpu["model"] for gpu in own if gpu["recommended_action"] == "lease"]
+        if lease:
+            parts.append(f"Διάθεση στο marketplace: {', '.join(lease)}.")
+        return " ".join(parts)
@@ -0,0 +1,134 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.inference_executor import InferenceExecutor, InferenceTimeoutError
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class _Batch:
+    def __init__(self):
+        self.items: List[Tuple[Any, asyncio.Future]] = []
+        self.task: Optional[asyncio.Task] = None
+
+
+class BatchScheduler:
+    """
+    Micro-batching αιτημάτων inference
+
+    Τα αιτήματα που φτάνουν μέσα σε ένα μικρό χρονικό παράθυρο (window_ms) ή μέχρι
+    να συμπληρωθεί το max_batch_size συγκεντρώνονται και εκτελούνται μαζί με μία
+    κλήση της batch συνάρτησης στον InferenceExecutor. Κάθε καλών παίρνει πίσω το
+    δικό του αποτέλεσμα. Μεγαλύτερο παράθυρο/batch αυξάνει το throughput με κόστος
+    στην καθυστέρηση· με max_batch_size=1 κάθε αίτημα εκτελείται μόνο του.
+
+    Η batch συνάρτηση δέχεται (inputs, cancel_event) και επιστρέφει λίστα από
+    ζεύγη (αποτέλεσμα, αριθμός παραγόμενων tokens) με την ίδια σειρά.
+    """
+
+    def __init__(self,
+                 executor: InferenceExecutor,
+                 batch_fn: Callable,
+                 max_batch_size: Optional[int] = None,
+                 window_ms: Optional[float] = None):
+        self.executor = executor
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size or int(os.getenv("AI_BATCH_MAX_SIZE", 8))
+        self.window_ms = float(os.getenv("AI_BATCH_WINDOW_MS", 15)) if window_ms is None else window_ms
+        self._pending: Optional[_Batch] = None
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.batched_requests = 0
+        self.generated_tokens = 0
+        self.max_observed_batch = 0
+        self._busy_seconds = 0.0
+
+    def configure(self, max_batch_size: Optional[int] = None, window_ms: Optional[float] = None):
+        """
+        Αλλαγή της ισορροπίας throughput/καθυστέρησης κατά την εκτέλεση
+        """
+        if max_batch_size is not None:
+            self.max_batch_size = max(1, int(max_batch_size))
+        if window_ms is not None:
+            self.window_ms = max(0.0, float(window_ms))
+
+    async def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Προσθήκη αιτήματος στο τρέχον batch και αναμονή του αποτελέσματός του
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._pending is None:
+            self._pending = _Batch()
+            if self.window_ms > 0 and self.max_batch_size > 1:
+                self._flush_handle = loop.call_later(self.window_ms / 1000, self._flush)
+        batch = self._pending
+        batch.items.append((item, future))
+        future.add_done_callback(lambda _: self._on_caller_done(batch))
+        if len(batch.items) >= self.max_batch_size or self._flush_handle is None:
+            self._flush()
+
+        try:
+            return await asyncio.wait_for(future, timeout or self.executor.timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutError(f"Το inference ξεπέρασε το όριο των {timeout or self.executor.timeout:g}s")
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, None
+        if batch is None:
+            return
+        # Αιτήματα που ακυρώθηκαν όσο περίμεναν δεν μπαίνουν στο batch
+        batch.items = [(item, future) for item, future in batch.items if not future.done()]
+        if batch.items:
+            batch.task = asyncio.create_task(self._run(batch))
+
+    def _on_caller_done(self, batch: _Batch):
+        # Αν όλοι οι καλούντες ενός batch σε εκτέλεση έφυγαν, διακόπτεται και η εκτέλεση
+        if batch.task is not None and not batch.task.done() and all(f.cancelled() for _, f in batch.items):
+            batch.task.cancel()
+
+    async def _run(self, batch: _Batch):
+        inputs = [item for item, _ in batch.items]
+        started = time.perf_counter()
+        try:
+            results = await self.executor.submit(self.batch_fn, inputs)
+        except asyncio.CancelledError:
+            return
+        except Exception as e:
+            for _, future in batch.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._busy_seconds += time.perf_counter() - started
+
+        self.batches += 1
+        self.batched_requests += len(inputs)
+        self.max_observed_batch = max(self.max_observed_batch, len(inputs))
+        for (_, future), (result, tokens) in zip(batch.items, results):
+            self.generated_tokens += tokens
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "window_ms": self.window_ms,
+            "batches": self.batches,
+            "batched_requests": self.batched_requests,
+            "avg_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+            "max_observed_batch": self.max_observed_batch,
+            "generated_tokens": self.generated_tokens,
+            "tokens_per_busy_second": self.generated_tokens / self._busy_seconds if self._busy_seconds else 0.0
+        }
@@ -0,0 +1,464 @@
+import os
+import re
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import func
+
+from backend.database import SessionLocal
+from backend.energy_history import get_energy_history
+from backend.models import MiningStat
+from backend.offer_book import normalize_model
+from backend.rental_tracker import list_rentals
+from backend.response_cache import normalize_prompt
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = re.compile(r"\d{3,4}")
+
+# Θέματα ερωτήσεων: προθέματα λέξεων (χωρίς τόνους) που παραπέμπουν σε κάθε ενότητα
+SECTION_KEYWORDS = {
+    "energy": ("ενεργει", "καταναλ", "ρευμα", "ρευματ", "κοστ", "kwh", "ηλιακ", "φωτοβολτ",
+               "solar", "energy", "power", "ισχυ", "δικτυ", "τιμολογ"),
+    "coins": ("νομισμ", "κερδ", "coin", "profit", "αποδο", "εσοδ", "τιμη", "αλγοριθμ", "algorithm"),
+    "gpus": ("gpu", "καρτ", "hashrate", "θερμοκρ", "rig", "ανεμιστ", "fan", "rtx", "gtx", "rx",
+             "αποδοτικ", "efficiency"),
+    "offers": ("ενοικ", "νοικ", "clore", "rent", "προσφορ", "μισθ"),
+    "history": ("ιστορικ", "ενοικιασ", "χθες", "εβδομαδ", "τελευται", "history", "24ωρ", "σημερα", "μεσο", "μεση"),
+}
+
+# Ενότητες που περιλαμβάνονται όταν η ερώτηση δεν ταιριάζει σε κάποιο θέμα
+DEFAULT_SECTIONS = ("energy", "coins", "gpus")
+
+# Πηγές (εκδόσεις του versions()) από τις οποίες αποδίδεται κάθε ενότητα
+SECTION_SOURCES = {
+    "energy": ("energy",),
+    "coins": ("coins", "mining"),
+    "gpus": ("mining",),
+    "offers": ("offers",),
+    "history": ("history",)
+}
+
+SECTION_TITLES = {
+    "energy": "Ενέργεια",
+    "coins": "Κερδοφορία νομισμάτων",
+    "gpus": "GPU",
+    "offers": "Προσφορές CloreAI",
+    "history": "Ιστορικό 24 ωρών",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Πρόχειρη εκτίμηση tokens όταν δεν υπάρχει tokenizer (~4 χαρακτήρες ανά token)
+    """
+    return max(1, len(text) // 4)
+
+
+class ChatContext:
+    """
+    Αποτέλεσμα της συναρμολόγησης: κείμενο, εκτιμώμενα tokens και εκδόσεις των πηγών του
+    """
+
+    def __init__(self, text: str, tokens: int, versions: Dict[str, int], sections: List[str]):
+        self.text = text
+        self.tokens = tokens
+        self.versions = versions
+        self.sections = sections
+
+
+class _Line:
+    __slots__ = ("text", "tags", "rank", "tokens")
+
+    def __init__(self, text: str, tags: Set[str] = frozenset(), rank: float = 0.0):
+        self.text = text
+        self.tags = tags
+        # Μικρότερο rank = πιο σημαντική γραμμή όταν δεν υπάρχει συγκεκριμένη αναφορά
+        self.rank = rank
+        self.tokens = 0
+
+
+class ChatContextBuilder:
+    """
+    Συναρμολόγηση περιεχομένου (context) για το AI chatbot από τα δεδομένα του API
+
+    Για κάθε ερώτηση επιλέγονται οι σχετικές ενότητες (ενέργεια, νομίσματα, GPU,
+    προσφορές CloreAI, ιστορικό) με βάση λέξεις-κλειδιά, και μέσα σε κάθε ενότητα
+    προτιμώνται οι γραμμές που αφορούν όσα αναφέρει η ερώτηση (π.χ. μόνο οι RTX
+    3080 όταν ρωτάει για RTX 3080). Οι γραμμές προστίθενται μέχρι να εξαντληθεί
+    ο προϋπολογισμός CHAT_CONTEXT_MAX_TOKENS.
+
+    Οι πηγές διαβάζονται από τα υπάρχοντα στιγμιότυπα (ενέργεια, βιβλίο προσφορών)
+    ή από δική τους cache με TTL (στατιστικά mining, ιστορικό από τη βάση). Οι
+    γραμμές κάθε πηγής αποδίδονται ξανά μόνο όταν αλλάξει η έκδοσή της, και το
+    τελικό context ανά (ενότητες, αναφορές, εκδόσεις) κρατιέται σε μικρή LRU cache.
+    """
+
+    def __init__(self, mining_connector, energy_connector, cloreai_connector):
+        self.mining_connector = mining_connector
+        self.energy_connector = energy_connector
+        self.cloreai_connector = cloreai_connector
+        self.max_tokens = int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", 384))
+        self.mining_ttl = float(os.getenv("CHAT_CONTEXT_MINING_TTL", 30))
+        self.history_ttl = float(os.getenv("CHAT_CONTEXT_HISTORY_TTL", 300))
+        self.top_k = int(os.getenv("CHAT_CONTEXT_TOP_K", 5))
+        self.max_cached = int(os.getenv("CHAT_CONTEXT_CACHE_SIZE", 256))
+        self._mining: Optional[Dict] = None
+        self._mining_at = 0.0
+        self._mining_fingerprint: Optional[str] = None
+        self.mining_version = 0
+        self._history: Optional[Dict] = None
+        self._history_at = 0.0
+        self.history_version = 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._rendered: Dict[str, Tuple[Tuple, List[_Line]]] = {}
+        self._contexts: "OrderedDict[Tuple, ChatContext]" = OrderedDict()
+        self.stats = {"builds": 0, "cache_hits": 0, "renders": 0, "build_seconds": 0.0, "tokens": 0}
+
+    def _lock(self, name: str) -> asyncio.Lock:
+        if name not in self._locks:
+            self._locks[name] = asyncio.Lock()
+        return self._locks[name]
+
+    # Πηγές δεδομένων
+
+    async def _refresh_mining(self):
+        if self._mining is not None and time.monotonic() - self._mining_at <= self.mining_ttl:
+            return
+        async with self._lock("mining"):
+            if self._mining is not None and time.monotonic() - self._mining_at <= self.mining_ttl:
+                return
+            stats = await self.mining_connector.get_stats()
+            fingerprint = json.dumps(stats.get("gpus", []), sort_keys=True, default=str)
+            if fingerprint != self._mining_fingerprint:
+                self._mining_fingerprint = fingerprint
+                self.mining_version += 1
+            self._mining = stats
+            self._mining_at = time.monotonic()
+
+    def _load_history(self) -> Dict:
+        db = SessionLocal()
+        try:
+            end = datetime.now(timezone.utc)
+            start = end - timedelta(hours=24)
+            energy = get_energy_history(db, start, end, bucket_seconds=24 * 3600)
+            mining = db.query(
+                MiningStat.coin,
+                func.avg(MiningStat.hashrate),
+                func.sum(MiningStat.earnings),
+                func.avg(MiningStat.temperature)
+            ).filter(MiningStat.timestamp >= start).group_by(MiningStat.coin).all()
+            rentals = [
+                {"rental_id": rental.rental_id, "gpu_model": rental.gpu_model,
+                 "price_per_hour": rental.price_per_hour, "accrued_cost": rental.accrued_cost,
+                 "end_time": rental.end_time}
+                for rental in list_rentals(db, "active")
+            ]
+            return {
+                "energy": {
+                    "power_usage": sum(row["power_usage"] for row in energy),
+                    "solar_generation": sum(row["solar_generation"] for row in energy),
+                    "grid_consumption": sum(row["grid_consumption"] for row in energy),
+                    "cost": sum(row["cost"] for row in energy),
+                    "samples": sum(row["samples"] for row in energy)
+                },
+                "mining": [
+                    {"coin": coin, "hashrate": hashrate or 0.0, "earnings": earnings or 0.0, "temperature": temperature}
+                    for coin, hashrate, earnings, temperature in mining
+                ],
+                "rentals": rentals
+            }
+        finally:
+            db.close()
+
+    async def _refresh_history(self):
+        if self._history is not None and time.monotonic() - self._history_at <= self.history_ttl:
+            return
+        async with self._lock("history"):
+            if self._history is not None and time.monotonic() - self._history_at <= self.history_ttl:
+                return
+            try:
+                history = await asyncio.to_thread(self._load_history)
+            except Exception as e:
+                logger.error(f"Σφάλμα κατά τη λήψη ιστορικού για το AI context: {str(e)}")
+                history = {"energy": {}, "mining": [], "rentals": []}
+            if history != self._history:
+                self.history_version += 1
+            self._history = history
+            self._history_at = time.monotonic()
+
+    async def _refresh(self, sections: List[str]):
+        tasks = []
+        if "energy" in sections:
+            tasks.append(self.energy_connector.get_snapshot())
+        if "coins" in sections or "gpus" in sections:
+            tasks.append(self._refresh_mining())
+        if "offers" in sections:
+            tasks.append(self.cloreai_connector.refresh_offer_book())
+        if "history" in sections:
+            tasks.append(self._refresh_history())
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Σφάλμα κατά την ανανέωση δεδομένων για το AI context: {str(result)}")
+
+    def versions(self) -> Dict[str, int]:
+        """
+        Εκδόσεις των πηγών· αλλάζουν όταν αλλάξουν τα δεδομένα πίσω από το context
+        """
+        snapshot = self.energy_connector.snapshot
+        return {
+            "energy": snapshot.version if snapshot else 0,
+            "offers": self.cloreai_connector.offer_book.version,
+            "coins": self.mining_connector.coins_version,
+            "mining": self.mining_version,
+            "history": self.history_version
+        }
+
+    async def sources(self, sections: List[str]) -> Dict[str, Any]:
+        """
+        Τα στιγμιότυπα πίσω από τις ενότητες (ενέργεια, mining, ιστορικό, προσφορές), ανανεωμένα με τα ίδια TTL
+        """
+        await self._refresh(sections)
+        return {
+            "energy": self.energy_connector.snapshot if "energy" in sections else None,
+            "mining": self._mining if "coins" in sections or "gpus" in sections else None,
+            "history": self._history if "history" in sections else None,
+            "offers": self.cloreai_connector.offer_book if "offers" in sections else None
+        }
+
+    # Απόδοση γραμμών ανά ενότητα
+
+    def _render_energy(self) -> List[_Line]:
+        snapshot = self.energy_connector.snapshot
+        if snapshot is None:
+            return []
+        data = snapshot.data
+        solar = snapshot.solar_production
+        lines = [
+            _Line(f"Τρέχουσα κατανάλωση {data.get('current_consumption', 0):.2f} kW, "
+                  f"σήμερα {data.get('daily_consumption', 0):.1f} kWh, "
+                  f"τιμή {data.get('cost_per_kwh', 0):.3f} €/kWh", rank=0),
+            _Line(f"Κόστος ημέρας {data.get('daily_cost', 0):.2f} €, μήνα {data.get('monthly_cost', 0):.2f} €", rank=1),
+        ]
+        if solar:
+            lines.append(_Line(
+                f"Φωτοβολταϊκά τώρα {solar.get('current_output', 0):.2f} kW, σήμερα {solar.get('daily_production', 0):.1f} kWh "
+                f"({data.get('solar_percentage', 0):.0f}% της κατανάλωσης)", rank=0.5
+            ))
+        return lines
+
+    def _render_coins(self) -> List[_Line]:
+        coins = (self._mining or {}).get("coins_data") or {}
+
+        def daily_value(coin: Dict) -> float:
+            return ((coin.get("estimated_earnings") or {}).get("day", 0) or 0) * (coin.get("current_price") or 0)
+
+        # Ταξινόμηση κατά αξία εσόδων ημέρας, ώστε τα νομίσματα να συγκρίνονται
+        ranked = sorted(coins.items(), key=lambda item: -daily_value(item[1]))
+        lines = []
+        for position, (tag, coin) in enumerate(ranked):
+            tags = {tag.lower(), normalize_prompt(coin.get("name", "")).replace(" ", "")}
+            lines.append(_Line(
+                f"{tag} ({coin.get('algorithm', '?')}): τιμή {coin.get('current_price', 0):g}, "
+                f"μεταβολή 24h {coin.get('price_change_24h', 0):g}%, "
+                f"έσοδα/ημέρα {(coin.get('estimated_earnings') or {}).get('day', 0):g} {tag} "
+                f"(~{daily_value(coin):.2f})",
+                tags, rank=position
+            ))
+        return lines
+
+    def _render_gpus(self) -> List[_Line]:
+        stats = self._mining or {}
+        gpus = stats.get("gpus") or []
+        lines = [_Line(
+            f"Σύνολο: {stats.get('active_gpus', len(gpus))} GPU, {stats.get('total_hashrate', 0):g} MH/s, "
+            f"{stats.get('total_power', 0):g} W, νόμισμα {stats.get('active_coin', '?')}, "
+            f"έσοδα 24h {stats.get('total_earnings_24h', 0):g}", rank=-1
+        )]
+        # Πρώτες οι λιγότερο αποδοτικές, που συνήθως αφορούν οι ερωτήσεις
+        order = sorted(range(len(gpus)), key=lambda index: gpus[index].get("efficiency", 0) or 0)
+        for position, index in enumerate(order):
+            gpu = gpus[index]
+            model = gpu.get("model", "Unknown")
+            lines.append(_Line(
+                f"GPU {index} {model}: {gpu.get('hashrate', 0):g} MH/s, {gpu.get('power_consumption', 0):g} W, "
+                f"{gpu.get('temperature', 0):g}°C, ανεμιστήρας {gpu.get('fan_speed', 0):g}%, "
+                f"αποδοτικότητα {gpu.get('efficiency', 0):.3f}",
+                {normalize_model(model), *_NUMBER.findall(model)}, rank=position
+            ))
+        return lines
+
+    def _render_offers(self) -> List[_Line]:
+        lines = []
+        for position, offer in enumerate(self.cloreai_connector.offer_book.query()):
+            model = offer.get("gpu_model", "")
+            lines.append(_Line(
+                f"{model}: {offer.get('price_per_hour', 0):g}/ώρα, διαθέσιμες {offer.get('available', 0)}, "
+                f"απόδοση {offer.get('performance_rating', 0):g}",
+                {normalize_model(model), *_NUMBER.findall(model)}, rank=position
+            ))
+        return lines
+
+    def _render_history(self) -> List[_Line]:
+        history = self._history or {}
+        energy = history.get("energy") or {}
+        lines = []
+        if energy.get("samples"):
+            lines.append(_Line(
+                f"Ενέργεια 24h: {energy['power_usage']:.1f} kWh, από δίκτυο {energy['grid_consumption']:.1f} kWh, "
+                f"ηλιακή {energy['solar_generation']:.1f} kWh, κόστος {energy['cost']:.2f} €", rank=0
+            ))
+        for position, row in enumerate(history.get("mining", [])):
+            lines.append(_Line(
+                f"Mining 24h {row['coin']}: μέσο hashrate {row['hashrate']:g}, έσοδα {row['earnings']:g}",
+                {str(row["coin"]).lower()}, rank=1 + position
+            ))
+        for position, rental in enumerate(history.get("rentals", [])):
+            model = rental.get("gpu_model") or ""
+            lines.append(_Line(
+                f"Ενεργή ενοικίαση {rental['rental_id']} ({model}): {rental['price_per_hour'] or 0:g}/ώρα, "
+                f"κόστος έως τώρα {rental['accrued_cost'] or 0:.2f}",
+                {normalize_model(model), *_NUMBER.findall(model)}, rank=1 + position
+            ))
+        return lines
+
+    def _section_version(self, section: str, versions: Dict[str, int]) -> Tuple:
+        return tuple(versions[source] for source in SECTION_SOURCES[section])
+
+    @staticmethod
+    def _used_versions(sections: List[str], versions: Dict[str, int]) -> Dict[str, int]:
+        """
+        Εκδόσεις μόνο των πηγών των ενοτήτων που μπήκαν στο context (κλειδί της cache απαντήσεων)
+        """
+        return {source: versions[source] for section in sections for source in SECTION_SOURCES[section]}
+
+    def _section_lines(self, section: str, count_tokens: Callable[[str], int]) -> List[_Line]:
+        """
+        Γραμμές της ενότητας, από την cache όσο δεν αλλάζει η έκδοση της πηγής
+        """
+        version = self._section_version(section, self.versions())
+        cached = self._rendered.get(section)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        lines = getattr(self, f"_render_{section}")()
+        for line in lines:
+            line.tokens = count_tokens(line.text)
+        self._rendered[section] = (version, lines)
+        self.stats["renders"] += 1
+        return lines
+
+    # Επιλογή και συναρμολόγηση
+
+    @staticmethod
+    def select_sections(normalized: str) -> List[str]:
+        """
+        Ενότητες που σχετίζονται με την ερώτηση, με σειρά συνάφειας
+        """
+        words = normalized.split()
+        scores = {}
+        for section, prefixes in SECTION_KEYWORDS.items():
+            score = sum(1 for word in words for prefix in prefixes if word.startswith(prefix))
+            if score:
+                scores[section] = score
+        if not scores:
+            return list(DEFAULT_SECTIONS)
+        return sorted(scores, key=lambda section: -scores[section])
+
+    @staticmethod
+    def _mentions(normalized: str) -> Set[str]:
+        words = set(normalized.split())
+        return words | {normalized.replace(" ", "")} | set(_NUMBER.findall(normalized))
+
+    @staticmethod
+    def _matched(lines: List[_Line], mentions: Set[str], compact: str) -> List[_Line]:
+        return [
+            line for line in lines
+            if line.tags and (line.tags & mentions or any(tag and tag in compact for tag in line.tags))
+        ]
+
+    def _pick_lines(self, lines: List[_Line], matched: List[_Line]) -> List[_Line]:
+        tagged = [line for line in lines if line.tags]
+        if matched:
+            # Η ερώτηση αναφέρει συγκεκριμένα μοντέλα/νομίσματα: μόνο αυτά και οι συνοπτικές γραμμές
+            chosen = [line for line in lines if not line.tags] + matched
+        else:
+            chosen = [line for line in lines if not line.tags] + sorted(tagged, key=lambda line: line.rank)[:self.top_k]
+        return sorted(chosen, key=lambda line: line.rank)
+
+    async def build(self, message: str, count_tokens: Callable[[str], int] = estimate_tokens) -> ChatContext:
+        """
+        Context για μία ερώτηση, μέσα στον προϋπολογισμό tokens
+        """
+        started = time.perf_counter()
+        normalized = normalize_prompt(message)
+        sections = self.select_sections(normalized)
+        await self._refresh(sections)
+
+        versions = self.versions()
+        mentions = self._mentions(normalized)
+        compact = normalized.replace(" ", "")
+        lines = {section: self._section_lines(section, count_tokens) for section in sections}
+        matched = {section: self._matched(lines[section], mentions, compact) for section in sections}
+        # Ερωτήσεις με τις ίδιες ενότητες και αναφορές μοιράζονται το ίδιο context
+        tags = frozenset(tag for section in sections for line in matched[section] for tag in line.tags)
+        key = (tuple(sections), tags, tuple(self._section_version(section, versions) for section in sections))
+        cached = self._contexts.get(key)
+        if cached is not None:
+            self._contexts.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            # Το κείμενο εξαρτάται μόνο από τις ενότητες του κλειδιού και οι εκδόσεις τους
+            # είναι οι τρέχουσες
+            return ChatContext(cached.text, cached.tokens, self._used_versions(cached.sections, versions),
+                               cached.sections)
+
+        parts: List[str] = []
+        used = 0
+        included = []
+        for section in sections:
+            picked = self._pick_lines(lines[section], matched[section])
+            if not picked:
+                continue
+            header = f"[{SECTION_TITLES[section]}]"
+            header_tokens = count_tokens(header)
+            if used + header_tokens + picked[0].tokens > self.max_tokens:
+                continue
+            parts.append(header)
+            used += header_tokens
+            included.append(section)
+            for line in picked:
+                if used + line.tokens > self.max_tokens:
+                    break
+                parts.append(line.text)
+                used += line.tokens
+
+        context = ChatContext("\n".join(parts), used, self._used_versions(included, versions), included)
+        self._contexts[key] = context
+        while len(self._contexts) > self.max_cached:
+            self._contexts.popitem(last=False)
+        self.stats["builds"] += 1
+        self.stats["build_seconds"] += time.perf_counter() - started
+        self.stats["tokens"] += used
+        return context
+
+    def metrics(self) -> Dict[str, Any]:
+        builds = self.stats["builds"]
+        return {
+            "max_tokens": self.max_tokens,
+            "builds": builds,
+            "cache_hits": self.stats["cache_hits"],
+            "renders": self.stats["renders"],
+            "cached_contexts": len(self._contexts),
+            "avg_build_ms": self.stats["build_seconds"] / builds * 1000 if builds else 0.0,
+            "avg_tokens": self.stats["tokens"] / builds if builds else 0.0,
+            "versions": self.versions()
+        }
@@ -0,0 +1,230 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+def kv_cache_length(cache) -> int:
+    """
+    Πλήθος tokens που καλύπτει ένα KV cache (Cache των transformers ή tuple ανά επίπεδο)
+    """
+    if cache is None:
+        return 0
+    if hasattr(cache, "get_seq_length"):
+        return int(cache.get_seq_length())
+    return int(cache[0][0].shape[-2])
+
+
+def kv_cache_bytes(cache) -> int:
+    """
+    Μνήμη (bytes) των tensors key/value ενός KV cache
+    """
+    if cache is None:
+        return 0
+    if hasattr(cache, "key_cache"):
+        layers = zip(cache.key_cache, cache.value_cache)
+    else:
+        layers = ((layer[0], layer[1]) for layer in cache)
+    return sum(key.numel() * key.element_size() + value.numel() * value.element_size() for key, value in layers)
+
+
+def crop_kv_cache(cache, length: int):
+    """
+    Περικοπή του KV cache στα πρώτα `length` tokens
+    """
+    if cache is None or kv_cache_length(cache) <= length:
+        return cache
+    if hasattr(cache, "crop"):
+        cache.crop(length)
+        return cache
+    return tuple((key[:, :, :length, :], value[:, :, :length, :]) for key, value, *_ in cache)
+
+
+def common_prefix_length(cached: List[int], tokens: List[int]) -> int:
+    length = min(len(cached), len(tokens))
+    for index in range(length):
+        if cached[index] != tokens[index]:
+            return index
+    return length
+
+
+class ChatSession:
+    """
+    Συνομιλία πολλών γύρων με το KV cache των tokens που έχουν ήδη κωδικοποιηθεί
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.turns: List[Dict[str, str]] = []
+        # KV cache και τα token ids που καλύπτει (None μετά από εκτόπιση)
+        self.kv_cache = None
+        self.cached_ids: List[int] = []
+        self.kv_bytes = 0
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self.prompt_tokens = 0
+        self.reused_tokens = 0
+        self.lock = asyncio.Lock()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "turns": len(self.turns),
+            "cached_tokens": len(self.cached_ids),
+            "kv_bytes": self.kv_bytes,
+            "prompt_tokens": self.prompt_tokens,
+            "reused_tokens": self.reused_tokens,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1)
+        }
+
+
+class SessionStore:
+    """
+    Συνεδρίες συνομιλίας με LRU εκτόπιση KV cache ανά προϋπολογισμό μνήμης
+
+    Όταν η συνολική μνήμη των KV caches ξεπεράσει το AI_SESSION_KV_BUDGET_MB,
+    αφαιρείται το cache των λιγότερο πρόσφατων συνεδριών (το ιστορικό κειμένου
+    μένει, οπότε ο επόμενος γύρος απλώς ξανακωδικοποιεί). Συνεδρίες ανενεργές
+    για AI_SESSION_TTL δευτερόλεπτα διαγράφονται ολόκληρες.
+    """
+
+    def __init__(self):
+        self.ttl = float(os.getenv("AI_SESSION_TTL", 1800))
+        self.kv_budget = int(float(os.getenv("AI_SESSION_KV_BUDGET_MB", 512)) * 1024 * 1024)
+        self.max_sessions = int(os.getenv("AI_SESSION_MAX", 256))
+        self.max_turns = int(os.getenv("AI_SESSION_MAX_TURNS", 20))
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self.kv_bytes = 0
+        self.stats = {"created": 0, "expired": 0, "evicted": 0, "kv_evictions": 0, "turns": 0,
+                      "prompt_tokens": 0, "reused_tokens": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _drop(self, session_id: str, counter: Optional[str] = None):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self.kv_bytes -= session.kv_bytes
+            if counter:
+                self.stats[counter] += 1
+
+    def _expire(self):
+        now = time.monotonic()
+        for session_id in [
+            key for key, session in self._sessions.items()
+            if now - session.last_used > self.ttl and not session.lock.locked()
+        ]:
+            self._drop(session_id, "expired")
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        self._expire()
+        return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ChatSession:
+        self._expire()
+        session = self._sessions.get(session_id) if session_id else None
+        if session is None:
+            session = ChatSession(session_id or uuid.uuid4().hex)
+            self._sessions[session.session_id] = session
+            self.stats["created"] += 1
+            while len(self._sessions) > self.max_sessions:
+                self._drop(next(iter(self._sessions)), "evicted")
+        self._sessions.move_to_end(session.session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def delete(self, session_id: str) -> bool:
+        if session_id not in self._sessions:
+            return False
+        self._drop(session_id)
+        return True
+
+    def trim_turns(self, session: ChatSession):
+        """
+        Κράτηση των τελευταίων AI_SESSION_MAX_TURNS ζευγών ερώτησης/απάντησης
+        """
+        excess = len(session.turns) - self.max_turns * 2
+        if excess > 0:
+            session.turns = session.turns[excess:]
+
+    def take(self, session: ChatSession) -> Tuple[Any, List[int]]:
+        """
+        Παράδοση του KV cache της συνεδρίας στον worker
+
+        Το generate τροποποιεί το cache επί τόπου, οπότε η συνεδρία μένει χωρίς
+        cache μέχρι το record(). Αν ο γύρος αποτύχει, ο επόμενος ξανακωδικοποιεί.
+        """
+        cache, ids = session.kv_cache, session.cached_ids
+        self.kv_bytes -= session.kv_bytes
+        session.kv_cache, session.cached_ids, session.kv_bytes = None, [], 0
+        return cache, ids
+
+    def record(self, session: ChatSession, cache, cached_ids: List[int], kv_bytes: int,
+               prompt_tokens: int, reused_tokens: int):
+        """
+        Αποθήκευση του νέου KV cache της συνεδρίας και εκτόπιση όσων ξεπερνούν τον προϋπολογισμό
+        """
+        self.stats["turns"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["reused_tokens"] += reused_tokens
+        session.prompt_tokens += prompt_tokens
+        session.reused_tokens += reused_tokens
+        session.last_used = time.monotonic()
+        if self._sessions.get(session.session_id) is not session:
+            # Η συνεδρία διαγράφηκε όσο έτρεχε ο γύρος
+            return
+        session.kv_cache, session.cached_ids, session.kv_bytes = cache, cached_ids, kv_bytes
+        self.kv_bytes += kv_bytes
+
+        for other in list(self._sessions.values()):
+            if self.kv_bytes <= self.kv_budget:
+                break
+            if other is session or other.kv_cache is None:
+                continue
+            self.kv_bytes -= other.kv_bytes
+            other.kv_cache, other.cached_ids, other.kv_bytes = None, [], 0
+            self.stats["kv_evictions"] += 1
+        if self.kv_bytes > self.kv_budget and session.kv_cache is not None:
+            # Ούτε μόνο του δεν χωρά: δεν κρατάμε cache για αυτή τη συνεδρία
+            self.kv_bytes -= session.kv_bytes
+            session.kv_cache, session.cached_ids, session.kv_bytes = None, [], 0
+            self.stats["kv_evictions"] += 1
+
+    def clear_kv(self) -> int:
+        """
+        Αφαίρεση των KV caches όλων των συνεδριών (π.χ. μετά από αλλαγή μοντέλου)
+
+        Το ιστορικό κειμένου μένει, οπότε ο επόμενος γύρος απλώς ξανακωδικοποιεί.
+        """
+        cleared = 0
+        for session in self._sessions.values():
+            if session.kv_cache is not None:
+                session.kv_cache, session.cached_ids, session.kv_bytes = None, [], 0
+                cleared += 1
+        self.kv_bytes = 0
+        return cleared
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        self._expire()
+        return [session.summary() for session in reversed(self._sessions.values())]
+
+    def metrics(self) -> Dict[str, Any]:
+        self._expire()
+        return {
+            "sessions": len(self._sessions),
+            "kv_bytes": self.kv_bytes,
+            "kv_budget": self.kv_budget,
+            "ttl": self.ttl,
+            **self.stats,
+            "reuse_ratio": self.stats["reused_tokens"] / self.stats["prompt_tokens"] if self.stats["prompt_tokens"] else 0.0
+        }
@@ -1,12 +1,16 @@
 import os
 import logging
 import json
+import time
 import asyncio
 import httpx
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from backend.offer_book import OfferBook, normalize_model, offer_id
+from backend.schemas import RentalOffer
+
 # Φόρτωση περιβαλλοντικών μεταβλητών
 load_dotenv()
 
@@ -23,6 +27,16 @@ class CloreAIConnector:
         self.client = None
         self.is_initialized = False
         self.use_mock = os.getenv("USE_MOCK_CLOREAI_DATA", "False").lower() == "true" or not self.api_key
+        # Ευρετήριο προσφορών στη μνήμη για γρήγορα φιλτραρισμένα ερωτήματα
+        self.offer_book = OfferBook()
+        self.offer_book_ttl = float(os.getenv("CLOREAI_OFFER_BOOK_TTL", 60))
+        self._offer_book_lock: Optional[asyncio.Lock] = None
+        # Πίνακας προσφορών (διαθεσιμότητα + τιμές) από την τελευταία ανανέωση
+        self.offers: List[RentalOffer] = []
+        # Μέγιστος αριθμός ταυτόχρονων ελέγχων κατάστασης ενοικιάσεων
+        self.status_concurrency = int(os.getenv("CLOREAI_STATUS_CONCURRENCY", 10))
+        # Ενοικιάσεις του δοκιμαστικού mode (rental_id -> κατάσταση)
+        self._mock_rentals: Dict[str, Dict] = {}
         
     async def initialize(self) -> bool:
         """
@@ -68,7 +82,50 @@ class CloreAIConnector:
     
     async def get_gpu_availability(self) -> List[Dict]:
         """
-        Λήψη διαθεσιμότητας GPU από το CloreAI
+        Λήψη διαθεσιμότητας GPU από το CloreAI (από τον πίνακα προσφορών)
+        """
+        offers = await self.get_rental_offers()
+        return [
+            {
+                "gpu_model": offer.gpu_model,
+                "available": offer.available,
+                "total": offer.total,
+                "last_updated": offer.last_updated.isoformat() if offer.last_updated else None
+            }
+            for offer in offers
+        ]
+    
+    async def get_gpu_pricing(self) -> List[Dict]:
+        """
+        Λήψη τιμών ενοικίασης GPU από το CloreAI (μία γραμμή ανά μοντέλο, η φθηνότερη)
+        """
+        offers = await self.get_rental_offers()
+        pricing = {}
+        for offer in offers:
+            if offer.price_per_hour is None:
+                continue
+            current = pricing.get(offer.gpu_model)
+            if current is None or offer.price_per_hour < current["price_per_hour"]:
+                pricing[offer.gpu_model] = {
+                    "gpu_model": offer.gpu_model,
+                    "price_per_hour": offer.price_per_hour,
+                    "price_per_day": offer.price_per_day,
+                    "price_per_week": offer.price_per_week,
+                    "minimum_hours": offer.minimum_hours,
+                    "performance_rating": offer.performance_rating
+                }
+        return list(pricing.values())
+    
+    async def get_rental_offers(self) -> List[RentalOffer]:
+        """
+        Πίνακας προσφορών ενοικίασης (ανανεώνεται μόνο όταν λήξει)
+        """
+        await self.refresh_offer_book()
+        return self.offers
+    
+    async def _fetch_gpu_availability(self) -> List[Dict]:
+        """
+        Λήψη διαθεσιμότητας GPU από το API του CloreAI
         """
         if not self.is_initialized:
             await self.initialize()
@@ -92,9 +149,9 @@ class CloreAIConnector:
             # Σε περίπτωση σφάλματος, επιστρέφουμε δοκιμαστικά δεδομένα
             return await self._get_mock_gpu_availability()
     
-    async def get_gpu_pricing(self) -> List[Dict]:
+    async def _fetch_gpu_pricing(self) -> List[Dict]:
         """
-        Λήψη τιμών ενοικίασης GPU από το CloreAI
+        Λήψη τιμών ενοικίασης GPU από το API του CloreAI
         """
         if not self.is_initialized:
             await self.initialize()
@@ -118,6 +175,66 @@ class CloreAIConnector:
             # Σε περίπτωση σφάλματος, επιστρέφουμε δοκιμαστικά δεδομένα
             return await self._get_mock_gpu_pricing()
     
+    async def refresh_offer_book(self, force: bool = False) -> Optional[Dict]:
+        """
+        Ανανέωση του ευρετηρίου προσφορών όταν έχει λήξει (ή αν ζητηθεί ρητά)
+        """
+        if self._offer_book_lock is None:
+            self._offer_book_lock = asyncio.Lock()
+        async with self._offer_book_lock:
+            updated_at = self.offer_book.updated_at
+            if not force and updated_at and time.time() - updated_at < self.offer_book_ttl:
+                return None
+            
+            # Διαθεσιμότητα και τιμές ταυτόχρονα
+            availability, pricing = await asyncio.gather(
+                self._fetch_gpu_availability(),
+                self._fetch_gpu_pricing()
+            )
+            
+            self.offers = self._join_offers(availability, pricing)
+            changes = self.offer_book.update([offer.model_dump() for offer in self.offers])
+            logger.info(f"Ανανέωση προσφορών CloreAI: {changes}")
+            return changes
+    
+    @staticmethod
+    def _join_offers(availability: List[Dict], pricing: List[Dict]) -> List[RentalOffer]:
+        """
+        Σύνδεση διαθεσιμότητας και τιμών ανά μοντέλο GPU σε έναν πίνακα προσφορών
+        """
+        prices = {normalize_model(price.get("gpu_model", "")): price for price in pricing}
+        offers = []
+        for entry in availability:
+            # Τα πεδία της ίδιας της προσφοράς υπερισχύουν των τιμών του μοντέλου
+            row = {**prices.get(normalize_model(entry.get("gpu_model", "")), {}), **entry}
+            price = row.get("price_per_hour")
+            rating = row.get("performance_rating")
+            offers.append(RentalOffer(
+                offer_id=offer_id(row),
+                gpu_model=row.get("gpu_model", "Unknown"),
+                available=row.get("available") or 0,
+                total=row.get("total") or 0,
+                price_per_hour=price,
+                price_per_day=row.get("price_per_day"),
+                price_per_week=row.get("price_per_week"),
+                minimum_hours=row.get("minimum_hours") or 1,
+                performance_rating=rating,
+                price_per_performance=price / rating if price is not None and rating else None,
+                last_updated=row.get("last_updated")
+            ))
+        return offers
+    
+    async def query_offers(self,
+                           model: Optional[str] = None,
+                           min_available: int = 0,
+                           max_price: Optional[float] = None,
+                           limit: Optional[int] = None) -> List[Dict]:
+        """
+        Φιλτραρισμένες προσφορές GPU από το ευρετήριο, φθηνότερη πρώτη
+        """
+        await self.refresh_offer_book()
+        return self.offer_book.query(model, min_available, max_price, limit)
+    
     async def get_profitability(self, gpu_models: List[str]) -> Dict:
         """
         Λήψη δεδομένων κερδοφορίας για συγκεκριμένα μοντέλα GPU
@@ -198,6 +315,8 @@ class CloreAIConnector:
             
         try:
             if self.use_mock:
+                if rental_id in self._mock_rentals:
+                    self._mock_rentals[rental_id]["status"] = "cancelled"
                 return {
                     "status": "success",
                     "message": f"Η ενοικίαση {rental_id} ακυρώθηκε επιτυχώς"
@@ -227,6 +346,87 @@ class CloreAIConnector:
                 "message": f"Σφάλμα κατά την ακύρωση ενοικίασης: {str(e)}"
             }
     
+    async def get_rental_status(self, rental_id: str) -> Dict:
+        """
+        Κατάσταση μιας ενοικίασης GPU
+        """
+        if not self.is_initialized:
+            await self.initialize()
+            
+        try:
+            if self.use_mock:
+                return self._get_mock_rental_status(rental_id)
+            
+            headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+            response = await self.client.get(
+                f"{self.api_url}/api/v1/gpus/rentals/{rental_id}",
+                headers=headers
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code == 404:
+                return {"rental_id": rental_id, "status": "not_found"}
+            logger.error(f"Σφάλμα κατά τον έλεγχο ενοικίασης {rental_id}. Status code: {response.status_code}")
+            return {"rental_id": rental_id, "status": "error"}
+                
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά τον έλεγχο ενοικίασης {rental_id}: {str(e)}")
+            return {"rental_id": rental_id, "status": "error"}
+    
+    async def get_rentals_status(self, rental_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Κατάσταση πολλών ενοικιάσεων με ταυτόχρονες κλήσεις (έως status_concurrency)
+        """
+        semaphore = asyncio.Semaphore(self.status_concurrency)
+        
+        async def fetch(rental_id: str) -> Dict:
+            async with semaphore:
+                return await self.get_rental_status(rental_id)
+        
+        statuses = await asyncio.gather(*[fetch(rental_id) for rental_id in rental_ids])
+        return dict(zip(rental_ids, statuses))
+    
+    async def extend_rental(self, rental_id: str, duration_hours: int) -> Dict:
+        """
+        Παράταση ενοικίασης GPU
+        """
+        if not self.is_initialized:
+            await self.initialize()
+            
+        try:
+            if self.use_mock:
+                rental = self._mock_rentals.get(rental_id)
+                if rental is None or rental["status"] != "active":
+                    return {"status": "error", "message": f"Η ενοικίαση {rental_id} δεν είναι ενεργή"}
+                end_time = datetime.fromisoformat(rental["end_time"]) + timedelta(hours=duration_hours)
+                rental["end_time"] = end_time.isoformat()
+                return {"status": "success", "rental_id": rental_id, "end_time": rental["end_time"]}
+            
+            headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+            response = await self.client.post(
+                f"{self.api_url}/api/v1/gpus/rentals/{rental_id}/extend",
+                headers=headers,
+                json={"duration_hours": duration_hours}
+            )
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Σφάλμα κατά την παράταση ενοικίασης. Status code: {response.status_code}")
+                return {
+                    "status": "error",
+                    "message": f"Αποτυχία παράτασης ενοικίασης. Status code: {response.status_code}",
+                    "error": response.text
+                }
+                
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά την παράταση ενοικίασης: {str(e)}")
+            return {
+                "status": "error",
+                "message": f"Σφάλμα κατά την παράταση ενοικίασης: {str(e)}"
+            }
+    
     async def _get_mock_gpu_availability(self) -> List[Dict]:
         """
         Δημιουργία δοκιμαστικών δεδομένων διαθεσιμότητας GPU για development/testing
@@ -424,14 +624,16 @@ class CloreAIConnector:
                 break
         
         total_cost = price_per_hour * duration_hours
+        start_time = datetime.now()
+        end_time = start_time + timedelta(hours=duration_hours)
         
-        return {
+        response = {
             "status": "success",
             "rental_id": rental_id,
             "gpu_model": gpu_model,
             "duration_hours": duration_hours,
-            "start_time": datetime.now().isoformat(),
-            "end_time": (datetime.now() + datetime.timedelta(hours=duration_hours)).isoformat(),
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
             "price_per_hour": price_per_hour,
             "total_cost": total_cost,
             "connection_info": {
@@ -441,3 +643,21 @@ class CloreAIConnector:
                 "password": "demo_password_12345"
             }
         }
+        self._mock_rentals[rental_id] = {**response, "status": "active"}
+        return response
+    
+    def _get_mock_rental_status(self, rental_id: str) -> Dict:
+        """
+        Δοκιμαστική κατάσταση ενοικίασης (λήγει αυτόματα στο end_time)
+        """
+        rental = self._mock_rentals.get(rental_id)
+        if rental is None:
+            return {"rental_id": rental_id, "status": "not_found"}
+        if rental["status"] == "active" and datetime.fromisoformat(rental["end_time"]) <= datetime.now():
+            rental["status"] = "expired"
+        return {
+            "rental_id": rental_id,
+            "status": rental["status"],
+            "end_time": rental["end_time"],
+            "price_per_hour": rental["price_per_hour"]
+        }
@@ -1,17 +1,43 @@
 import os
 import logging
 import json
+import time
 import asyncio
 import httpx
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+from backend.database import SessionLocal
+from backend.energy_forecast import EnergyForecaster
+from backend.energy_history import (
+    ENERGY_SAMPLE_INTERVAL, EnergySampleBuffer, get_energy_history, upsert_energy_rows
+)
+from backend.tariffs import get_tariff
+
 # Φόρτωση περιβαλλοντικών μεταβλητών
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+class EnergySnapshot:
+    """
+    Στιγμιότυπο ενεργειακών δεδομένων, κοινό για όλα τα endpoints μέχρι να λήξει
+    """
+    
+    def __init__(self, data: Dict, version: int):
+        self.data = data
+        self.version = version
+        self.fetched_at = time.monotonic()
+    
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+    
+    @property
+    def solar_production(self) -> Dict:
+        return self.data.get("solar_production") or {}
+
 class EnergyConnector:
     """
     Connector για την επικοινωνία με συστήματα μέτρησης ενέργειας και φωτοβολταϊκά
@@ -22,11 +48,33 @@ class EnergyConnector:
         self.energy_meter_token = os.getenv("ENERGY_METER_TOKEN")
         self.solar_api_url = os.getenv("SOLAR_API_URL")
         self.solar_api_token = os.getenv("SOLAR_API_TOKEN")
-        self.energy_cost_per_kwh = float(os.getenv("ENERGY_COST_PER_KWH", 0.08))
+        # Τιμολόγιο ενέργειας (ζώνες χρήσης, χρέωση ισχύος, συμψηφισμός)
+        self.tariff = get_tariff()
+        self._period_costs: Optional[Dict] = None
+        self._period_costs_expiry = 0.0
         self.client = None
         self.is_initialized = False
         self.use_mock = os.getenv("USE_MOCK_ENERGY_DATA", "False").lower() == "true"
+        # Αποθήκευση ιστορικού κατανάλωσης στον πίνακα energy_consumption
+        self.persist_history = os.getenv("PERSIST_ENERGY_DATA", "True").lower() == "true"
+        self.flush_batch_size = int(os.getenv("ENERGY_FLUSH_BATCH_SIZE", 6))
+        self.sample_buffer = EnergySampleBuffer()
+        self._pending_rows: List[Dict] = []
+        # Μοντέλο πρόβλεψης που εκπαιδεύεται στο αποθηκευμένο ιστορικό
+        self.forecaster = EnergyForecaster()
+        # Κοινό στιγμιότυπο δεδομένων (μία ανανέωση εξυπηρετεί όλους τους καλούντες)
+        self.snapshot_ttl = float(os.getenv("ENERGY_SNAPSHOT_TTL", 10))
+        self.snapshot: Optional[EnergySnapshot] = None
+        self._snapshot_lock: Optional[asyncio.Lock] = None
+        self._snapshot_fingerprint: Optional[str] = None
         
+    @property
+    def energy_cost_per_kwh(self) -> float:
+        """
+        Τρέχουσα τιμή ενέργειας από το τιμολόγιο
+        """
+        return self.tariff.rate_at()
+    
     async def initialize(self) -> bool:
         """
         Αρχικοποίηση της σύνδεσης με τα συστήματα μέτρησης ενέργειας
@@ -72,6 +120,8 @@ class EnergyConnector:
         """
         Κλείσιμο των συνδέσεων
         """
+        # Αποθήκευση των μετρήσεων που δεν έχουν γραφτεί ακόμα στη βάση
+        await self.flush_samples(force=True)
         if self.client:
             await self.client.aclose()
             logger.info("Έκλεισαν οι συνδέσεις του Energy Connector")
@@ -80,6 +130,54 @@ class EnergyConnector:
         """
         Λήψη ενεργειακών δεδομένων
         """
+        snapshot = await self.get_snapshot()
+        return snapshot.data
+    
+    async def get_snapshot(self, max_age: Optional[float] = None) -> EnergySnapshot:
+        """
+        Λήψη του κοινού στιγμιότυπου, με ανανέωση μόνο αν είναι παλαιότερο από `max_age`
+
+        Ταυτόχρονοι καλούντες περιμένουν την ίδια ανανέωση αντί να ξεκινά
+        ο καθένας τη δική του κλήση στα εξωτερικά APIs.
+        """
+        ttl = self.snapshot_ttl if max_age is None else max_age
+        if self.snapshot and self.snapshot.age <= ttl:
+            return self.snapshot
+        
+        if self._snapshot_lock is None:
+            self._snapshot_lock = asyncio.Lock()
+        async with self._snapshot_lock:
+            # Κάποιος άλλος καλών μπορεί να ανανέωσε το στιγμιότυπο όσο περιμέναμε
+            if self.snapshot and self.snapshot.age <= ttl:
+                return self.snapshot
+            data = await self._fetch_energy_data()
+            # Η έκδοση αλλάζει μόνο όταν αλλάξουν τα δεδομένα (όχι σε κάθε ανανέωση του TTL)
+            fingerprint = json.dumps({key: value for key, value in data.items() if key != "timestamp"},
+                                     sort_keys=True, default=str)
+            version = self.snapshot.version if self.snapshot else 0
+            if fingerprint != self._snapshot_fingerprint:
+                self._snapshot_fingerprint = fingerprint
+                version += 1
+            self.snapshot = EnergySnapshot(data, version)
+            return self.snapshot
+    
+    async def _fetch_json(self, base_url: Optional[str], path: str, token: Optional[str]) -> Optional[Dict]:
+        """
+        GET σε εξωτερικό API ενέργειας (None αν δεν έχει ρυθμιστεί ή αποτύχει)
+        """
+        if not base_url:
+            return None
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = await self.client.get(f"{base_url}{path}", headers=headers)
+        if response.status_code == 200:
+            return response.json()
+        logger.warning(f"Αποτυχία λήψης {base_url}{path}. Status code: {response.status_code}")
+        return None
+    
+    async def _fetch_energy_data(self) -> Dict:
+        """
+        Λήψη μετρητή, φωτοβολταϊκών και κόστους ταυτόχρονα και υπολογισμός των παραγώγων
+        """
         if not self.is_initialized:
             await self.initialize()
             
@@ -87,21 +185,13 @@ class EnergyConnector:
             if self.use_mock:
                 return await self._get_mock_energy_data()
             
-            # Λήψη δεδομένων κατανάλωσης ενέργειας
-            energy_data = {}
-            if self.energy_meter_url:
-                headers = {"Authorization": f"Bearer {self.energy_meter_token}"} if self.energy_meter_token else {}
-                response = await self.client.get(f"{self.energy_meter_url}/consumption", headers=headers)
-                if response.status_code == 200:
-                    energy_data = response.json()
-            
-            # Λήψη δεδομένων από φωτοβολταϊκά
-            solar_data = None
-            if self.solar_api_url:
-                headers = {"Authorization": f"Bearer {self.solar_api_token}"} if self.solar_api_token else {}
-                response = await self.client.get(f"{self.solar_api_url}/production", headers=headers)
-                if response.status_code == 200:
-                    solar_data = response.json()
+            # Ταυτόχρονες κλήσεις στον μετρητή, στα φωτοβολταϊκά και στο ιστορικό κόστους
+            energy_data, solar_data, period_costs = await asyncio.gather(
+                self._fetch_json(self.energy_meter_url, "/consumption", self.energy_meter_token),
+                self._fetch_json(self.solar_api_url, "/production", self.solar_api_token),
+                self.get_period_costs()
+            )
+            energy_data = energy_data or {}
             
             # Συνδυασμός των δεδομένων
             current_consumption = energy_data.get("current", 0)
@@ -126,9 +216,19 @@ class EnergyConnector:
                     solar_percentage = min(100, (solar_data.get("daily", 0) / daily_consumption) * 100)
                     grid_percentage = 100 - solar_percentage
             
-            # Υπολογισμός κόστους
-            daily_cost = daily_consumption * self.energy_cost_per_kwh
-            monthly_cost = monthly_consumption * self.energy_cost_per_kwh
+            # Υπολογισμός κόστους με το τιμολόγιο πάνω στο αποθηκευμένο ιστορικό
+            if period_costs:
+                daily_cost = period_costs["daily_cost"]
+                monthly_cost = period_costs["monthly_cost"]
+            else:
+                daily_cost = daily_consumption * self.energy_cost_per_kwh
+                monthly_cost = monthly_consumption * self.energy_cost_per_kwh
+            
+            # Καταγραφή της μέτρησης για το ιστορικό κατανάλωσης
+            await self._record_sample(
+                current_consumption,
+                solar_data.get("current", 0) if solar_data else 0
+            )
             
             return {
                 "timestamp": datetime.now().isoformat(),
@@ -148,13 +248,100 @@ class EnergyConnector:
             # Σε περίπτωση σφάλματος, επιστρέφουμε δοκιμαστικά δεδομένα
             return await self._get_mock_energy_data()
     
+    async def get_period_costs(self) -> Optional[Dict]:
+        """
+        Κόστος ημέρας και μήνα από το ιστορικό κατανάλωσης με βάση το τιμολόγιο
+
+        Το αποτέλεσμα αποθηκεύεται για ένα διάστημα δειγματοληψίας, αφού το
+        ιστορικό δεν αλλάζει πιο συχνά.
+        """
+        if time.monotonic() < self._period_costs_expiry:
+            return self._period_costs
+        try:
+            now = datetime.now().astimezone()
+            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            history = await asyncio.to_thread(
+                self._read_history, month_start.astimezone(timezone.utc), now.astimezone(timezone.utc),
+                ENERGY_SAMPLE_INTERVAL
+            )
+            costs = None
+            if history:
+                # Μετατροπή της ενέργειας κάθε διαστήματος (kWh) σε μέση ισχύ (kW)
+                hours = ENERGY_SAMPLE_INTERVAL / 3600
+                breakdown = self.tariff.compute_cost(
+                    [row["timestamp"] for row in history],
+                    [row["power_usage"] / hours for row in history],
+                    [row["solar_generation"] / hours for row in history],
+                    interval_seconds=ENERGY_SAMPLE_INTERVAL
+                )
+                today = breakdown["timestamps"] >= day_start
+                costs = {
+                    "daily_cost": float(breakdown["interval_cost"][today].sum()),
+                    "monthly_cost": breakdown["total_cost"],
+                    "demand_charge": breakdown["demand_charge"],
+                    "feed_in_credit": breakdown["feed_in_credit"]
+                }
+            self._period_costs = costs
+            self._period_costs_expiry = time.monotonic() + ENERGY_SAMPLE_INTERVAL
+            return costs
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά τον υπολογισμό κόστους από το τιμολόγιο: {str(e)}")
+            return None
+    
+    async def _record_sample(self, consumption_kw: float, solar_kw: float):
+        """
+        Προσθήκη στιγμιαίας μέτρησης στο buffer και αποθήκευση όταν συμπληρωθεί παρτίδα
+        """
+        if not self.persist_history:
+            return
+        try:
+            self.sample_buffer.add(datetime.now(), consumption_kw, solar_kw, self.energy_cost_per_kwh)
+            self._pending_rows.extend(self.sample_buffer.drain())
+            if len(self._pending_rows) >= self.flush_batch_size:
+                await self.flush_samples()
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά την καταγραφή μέτρησης ενέργειας: {str(e)}")
+    
+    async def flush_samples(self, force: bool = False) -> int:
+        """
+        Μαζική αποθήκευση των ολοκληρωμένων διαστημάτων στη βάση δεδομένων
+        """
+        if not self.persist_history:
+            return 0
+        self._pending_rows.extend(self.sample_buffer.drain(force=force))
+        if not self._pending_rows:
+            return 0
+        
+        rows, self._pending_rows = self._pending_rows, []
+        try:
+            # Η εγγραφή γίνεται σε thread ώστε να μη μπλοκάρει το event loop
+            written = await asyncio.to_thread(self._write_rows, rows)
+            logger.info(f"Αποθηκεύτηκαν {written} διαστήματα κατανάλωσης ενέργειας")
+            return written
+        except Exception as e:
+            logger.error(f"Αποτυχία αποθήκευσης ιστορικού ενέργειας: {str(e)}")
+            # Επαναφορά των γραμμών για νέα προσπάθεια (με όριο μεγέθους)
+            self._pending_rows = (rows + self._pending_rows)[-self.flush_batch_size * 50:]
+            return 0
+    
+    def _write_rows(self, rows: List[Dict]) -> int:
+        """
+        Σύγχρονη εγγραφή γραμμών energy_consumption με νέα σύνδεση βάσης
+        """
+        db = SessionLocal()
+        try:
+            return upsert_energy_rows(db, rows)
+        finally:
+            db.close()
+    
     async def get_solar_production(self) -> Dict:
         """
         Λήψη δεδομένων παραγωγής από φωτοβολταϊκά
         """
         try:
-            energy_data = await self.get_energy_data()
-            return energy_data.get("solar_production", {})
+            snapshot = await self.get_snapshot()
+            return snapshot.solar_production
         except Exception as e:
             logger.error(f"Σφάλμα κατά τη λήψη δεδομένων φωτοβολταϊκών: {str(e)}")
             return {}
@@ -167,15 +354,126 @@ class EnergyConnector:
             if self.use_mock:
                 return await self._get_mock_energy_forecast(days)
             
-            # Εδώ θα υλοποιήσουμε τη λογική για πρόβλεψη ενέργειας
-            # Μπορεί να χρησιμοποιηθεί εξωτερικό API ή μοντέλο
+            await self._refresh_forecaster()
+            if not self.forecaster.is_ready:
+                logger.info("Ανεπαρκές ιστορικό για πρόβλεψη ενέργειας. Χρήση δοκιμαστικών δεδομένων")
+                return await self._get_mock_energy_forecast(days)
+            
+            # Ωριαία πρόβλεψη για όλο τον ορίζοντα σε μία κλήση και ομαδοποίηση ανά ημέρα
+            today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+            predictions = self.forecaster.predict(today.astimezone(timezone.utc), days * 24)
+            consumption = predictions["power_usage"].reshape(days, 24)
+            solar = predictions["solar_generation"].reshape(days, 24)
+            costs = self.tariff.compute_cost(
+                predictions["timestamp"] * 10**9,
+                predictions["power_usage"],
+                predictions["solar_generation"],
+                interval_seconds=3600
+            )["interval_cost"].reshape(days, 24)
             
-            # Προς το παρόν, επιστρέφουμε δοκιμαστικά δεδομένα
-            return await self._get_mock_energy_forecast(days)
+            forecast = []
+            for day in range(days):
+                daily_consumption = float(consumption[day].sum())
+                daily_solar = float(solar[day].sum())
+                solar_percentage = min(100, daily_solar / daily_consumption * 100) if daily_consumption > 0 else 0
+                forecast.append({
+                    "day": day + 1,
+                    "date": (today + timedelta(days=day)).isoformat(),
+                    "consumption": daily_consumption,
+                    "solar_production": daily_solar,
+                    "cost": float(costs[day].sum()),
+                    "grid_percentage": 100 - solar_percentage,
+                    "solar_percentage": solar_percentage
+                })
+            return forecast
         except Exception as e:
             logger.error(f"Σφάλμα κατά την πρόβλεψη ενέργειας: {str(e)}")
             return []
     
+    async def get_hourly_forecast(self, hours: int = 24) -> List[Dict]:
+        """
+        Ωριαία πρόβλεψη κατανάλωσης και ηλιακής παραγωγής από την τρέχουσα ώρα
+        """
+        await self._refresh_forecaster()
+        if not self.forecaster.is_ready:
+            return []
+        
+        start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        predictions = self.forecaster.predict(start, hours)
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(int(ts), tz=timezone.utc).isoformat(),
+                "consumption": float(consumption),
+                "solar_production": float(solar),
+                "grid_consumption": max(0.0, float(consumption - solar))
+            }
+            for ts, consumption, solar in zip(
+                predictions["timestamp"], predictions["power_usage"], predictions["solar_generation"]
+            )
+        ]
+    
+    async def _refresh_forecaster(self):
+        """
+        Επαυξητική ενημέρωση του μοντέλου πρόβλεψης με τις νέες ώρες ιστορικού
+        """
+        if not self.forecaster.needs_refit():
+            return
+        try:
+            # Μόνο ολοκληρωμένες ώρες, από την τελευταία ώρα που έχει δει το μοντέλο
+            end = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            if self.forecaster.last_timestamp:
+                start = self.forecaster.last_timestamp + timedelta(hours=1)
+            else:
+                start = end - timedelta(days=self.forecaster.history_days)
+            
+            history = await asyncio.to_thread(self._read_history, start, end)
+            fitted = await asyncio.to_thread(self.forecaster.update, history)
+            if fitted:
+                await asyncio.to_thread(self._store_predictions, end)
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά την ενημέρωση του μοντέλου πρόβλεψης ενέργειας: {str(e)}")
+    
+    async def get_history(self, start: datetime, end: datetime, bucket_seconds: int = 3600) -> List[Dict]:
+        """
+        Ιστορικό κατανάλωσης από τη βάση δεδομένων χωρίς να μπλοκάρει το event loop
+        """
+        return await asyncio.to_thread(self._read_history, start, end, bucket_seconds)
+    
+    def _read_history(self, start: datetime, end: datetime, bucket_seconds: int = 3600) -> List[Dict]:
+        """
+        Ανάγνωση ιστορικού (προεπιλογή: ωριαίο) από τη βάση δεδομένων
+        """
+        db = SessionLocal()
+        try:
+            return get_energy_history(db, start, end, bucket_seconds=bucket_seconds)
+        finally:
+            db.close()
+    
+    def _store_predictions(self, start: datetime, hours: int = 48):
+        """
+        Αποθήκευση των ωριαίων προβλέψεων στον πίνακα energy_consumption (is_predicted)
+        """
+        predictions = self.forecaster.predict(start, hours)
+        costs = self.tariff.compute_cost(
+            predictions["timestamp"] * 10**9,
+            predictions["power_usage"],
+            predictions["solar_generation"],
+            interval_seconds=3600
+        )["interval_cost"]
+        rows = []
+        for ts, consumption, solar, cost in zip(
+            predictions["timestamp"], predictions["power_usage"], predictions["solar_generation"], costs
+        ):
+            rows.append({
+                "timestamp": datetime.fromtimestamp(int(ts), tz=timezone.utc),
+                "power_usage": float(consumption),
+                "solar_generation": float(solar),
+                "grid_consumption": max(0.0, float(consumption - solar)),
+                "cost": float(cost),
+                "is_predicted": True
+            })
+        self._write_rows(rows)
+    
     async def _get_mock_energy_data(self) -> Dict:
         """
         Δημιουργία δοκιμαστικών ενεργειακών δεδομένων για development/testing
@@ -244,7 +542,7 @@ class EnergyConnector:
             forecast.append({
                 "day": day + 1,
                 "date": (datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + 
-                         datetime.timedelta(days=day)).isoformat(),
+                         timedelta(days=day)).isoformat(),
                 "consumption": daily_consumption,
                 "solar_production": daily_solar,
                 "cost": daily_cost,
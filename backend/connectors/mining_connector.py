@@ -1,13 +1,19 @@
 import os
+import hmac
+import time
+import uuid
+import hashlib
 import logging
 import json
 import asyncio
 import httpx
 from typing import Dict, List, Optional, Any
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import subprocess
 from dotenv import load_dotenv
 
+from backend.tariffs import get_tariff
+
 # Φόρτωση περιβαλλοντικών μεταβλητών
 load_dotenv()
 
@@ -22,10 +28,22 @@ class MiningConnector:
         self.api_url = os.getenv("MINING_API_URL")
         self.api_key = os.getenv("MINING_API_KEY")
         self.api_secret = os.getenv("MINING_API_SECRET")
+        self.organization_id = os.getenv("MINING_ORGANIZATION_ID")
         self.whattomine_api_key = os.getenv("WHATTOMINE_API_KEY")
+        self.whattomine_api_url = os.getenv("WHATTOMINE_API_URL", "https://whattomine.com")
         self.mining_software = os.getenv("MINING_SOFTWARE", "nicehash")
         self.client = None
         self.is_initialized = False
+        self.tariff = get_tariff()
+        # Όρια ισχύος (W) ανά rig όπως εφαρμόστηκαν τελευταία φορά
+        self.power_limits: Dict[str, float] = {}
+        self._rig_max_power: Dict[str, float] = {}
+        self._rig_max_hashrate: Dict[str, float] = {}
+        # Αυξάνεται όταν αλλάζουν τα δεδομένα κερδοφορίας (ακύρωση της cache του AI)
+        self.coins_version = 0
+        self._coins_fingerprint: Optional[str] = None
+        # Διαφορά (ms) του ρολογιού του NiceHash από το τοπικό, για το X-Time των υπογραφών
+        self._time_offset_ms: Optional[int] = None
         
     async def initialize(self) -> bool:
         """
@@ -124,7 +142,8 @@ class MiningConnector:
                     "gpus": gpus_info,
                     "active_coin": active_coin,
                     "coins_data": coins_data,
-                    "total_earnings_24h": total_earnings_24h
+                    "total_earnings_24h": total_earnings_24h,
+                    "energy_cost_24h": self.get_energy_cost_24h(total_power)
                 }
             else:
                 # Για άλλο mining software θα προσθέσουμε την κατάλληλη λογική
@@ -142,7 +161,7 @@ class MiningConnector:
         """
         try:
             # Χρήση του WhatToMine API για πληροφορίες κερδοφορίας
-            url = f"https://whattomine.com/coins.json?key={self.whattomine_api_key}"
+            url = f"{self.whattomine_api_url}/coins.json?key={self.whattomine_api_key}"
             response = await self.client.get(url)
             data = response.json()
             
@@ -169,12 +188,28 @@ class MiningConnector:
                     "reward_per_hashrate": reward_per_hashrate
                 }
             
-            return coins_data
+            return self._track_coins_version(coins_data)
             
         except Exception as e:
             logger.error(f"Σφάλμα κατά τη λήψη δεδομένων κερδοφορίας: {str(e)}")
             # Σε περίπτωση σφάλματος, επιστρέφουμε δοκιμαστικά δεδομένα
-            return await self._get_mock_coin_profitability()
+            return self._track_coins_version(await self._get_mock_coin_profitability())
+
+    def _track_coins_version(self, coins_data: Dict) -> Dict:
+        fingerprint = json.dumps(coins_data, sort_keys=True, default=str)
+        if fingerprint != self._coins_fingerprint:
+            self._coins_fingerprint = fingerprint
+            self.coins_version += 1
+        return coins_data
+    
+    def get_energy_cost_24h(self, power_watts: float) -> float:
+        """
+        Κόστος ενέργειας για τις επόμενες 24 ώρες με σταθερή κατανάλωση, βάσει τιμολογίου
+        """
+        start = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        timestamps = [start + timedelta(minutes=15 * i) for i in range(96)]
+        costs = self.tariff.compute_cost(timestamps, [power_watts / 1000] * len(timestamps), interval_seconds=900)
+        return costs["energy_cost"]
     
     async def get_gpu_stats(self) -> List[Dict]:
         """
@@ -224,11 +259,180 @@ class MiningConnector:
             logger.error(f"Σφάλμα κατά τη διακοπή mining: {str(e)}")
             raise
     
+    async def get_rigs(self) -> List[Dict]:
+        """
+        Λήψη των rigs με την τρέχουσα και τη μέγιστη παρατηρημένη κατανάλωση ισχύος
+
+        Το "live" είναι False για τα δοκιμαστικά rigs (και όταν το API δεν απαντά),
+        ώστε να μη στέλνονται όρια ισχύος για rigs που δεν υπάρχουν.
+        """
+        if not self.is_initialized:
+            await self.initialize()
+            
+        try:
+            if self.mining_software.lower() != "nicehash":
+                return await self._get_mock_rigs()
+            
+            rigs_url = f"{self.api_url}/api/v2/mining/external/{self.api_key}/rigs"
+            rigs_response = await self.client.get(rigs_url)
+            rigs = []
+            for rig in rigs_response.json().get("rigs", []):
+                devices = [device for device in rig.get("devices", []) if device.get("status") == "MINING"]
+                rigs.append(self._with_max_power({
+                    "rig_id": rig.get("rigId", rig.get("name", "unknown")),
+                    "name": rig.get("name", "Unknown"),
+                    "power": sum(device.get("powerUsage", 0) for device in devices),
+                    "hashrate": sum(device.get("speedAccepted", 0) for device in devices),
+                    "max_power": rig.get("maxPower", 0),
+                    "live": True
+                }))
+            return rigs
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά τη λήψη των rigs: {str(e)}")
+            return await self._get_mock_rigs()
+    
+    def _with_max_power(self, rig: Dict) -> Dict:
+        """
+        Ενημέρωση της μέγιστης ισχύος και του μέγιστου hashrate του rig με τις υψηλότερες τιμές που έχουν παρατηρηθεί
+        """
+        rig_id = rig["rig_id"]
+        self._rig_max_power[rig_id] = max(self._rig_max_power.get(rig_id, 0), rig["power"], rig.get("max_power") or 0)
+        self._rig_max_hashrate[rig_id] = max(self._rig_max_hashrate.get(rig_id, 0), rig["hashrate"])
+        rig["max_power"] = self._rig_max_power[rig_id]
+        rig["max_hashrate"] = self._rig_max_hashrate[rig_id]
+        return rig
+    
+    @property
+    def can_sign(self) -> bool:
+        """
+        Υπάρχουν τα στοιχεία για υπογεγραμμένες κλήσεις στο NiceHash API
+        """
+        return bool(self.api_key and self.api_secret and self.organization_id)
+    
+    async def _server_time(self) -> str:
+        """
+        Χρόνος (ms) του NiceHash για το X-Time, με το τοπικό ρολόι αν δεν είναι διαθέσιμος
+        """
+        if self._time_offset_ms is None:
+            self._time_offset_ms = 0
+            try:
+                response = await self.client.get(f"{self.api_url}/api/v2/time")
+                if response.status_code == 200:
+                    self._time_offset_ms = int(response.json()["serverTime"]) - int(time.time() * 1000)
+            except Exception as e:
+                logger.warning(f"Αδυναμία λήψης του χρόνου του NiceHash, χρήση του τοπικού ρολογιού: {str(e)}")
+        return str(int(time.time() * 1000) + self._time_offset_ms)
+    
+    async def _signed_headers(self, method: str, path: str, query: str = "", body: str = "") -> Dict[str, str]:
+        """
+        Headers υπογραφής HMAC-SHA256 του NiceHash API v2
+        """
+        x_time = await self._server_time()
+        nonce = str(uuid.uuid4())
+        message = "\x00".join([
+            self.api_key, x_time, nonce, "", self.organization_id, "", method, path, query
+        ])
+        if body:
+            message += "\x00" + body
+        signature = hmac.new(self.api_secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+        return {
+            "X-Time": x_time,
+            "X-Nonce": nonce,
+            "X-Organization-Id": self.organization_id,
+            "X-Request-Id": nonce,
+            "X-Auth": f"{self.api_key}:{signature}",
+            "Content-Type": "application/json"
+        }
+    
+    async def set_rig_power_limits(self, limits: Dict[str, float]) -> Dict:
+        """
+        Εφαρμογή ορίων ισχύος (W) ανά rig
+
+        Στο NiceHash τα όρια μετατρέπονται στις διαθέσιμες καταστάσεις ισχύος
+        (STOP/LOW/MEDIUM/HIGH) ως ποσοστό της μέγιστης ισχύος του rig. Οι κλήσεις
+        υπογράφονται με τα MINING_API_KEY/MINING_API_SECRET/MINING_ORGANIZATION_ID·
+        χωρίς αυτά τα όρια δεν εφαρμόζονται και τα rigs αναφέρονται ως "unsupported".
+        """
+        if not self.is_initialized:
+            await self.initialize()
+            
+        nicehash = self.mining_software.lower() == "nicehash" and self.client
+        if nicehash and not self.can_sign:
+            logger.warning("Λείπουν τα στοιχεία υπογραφής του NiceHash, τα όρια ισχύος δεν εφαρμόζονται")
+            
+        path = "/main/api/v2/mining/rigs/status2"
+        results = {}
+        for rig_id, watts in limits.items():
+            try:
+                if nicehash:
+                    if not self.can_sign:
+                        results[rig_id] = "unsupported"
+                        continue
+                    max_power = self._rig_max_power.get(rig_id) or watts or 1
+                    ratio = watts / max_power
+                    if ratio <= 0:
+                        payload = {"rigId": rig_id, "action": "STOP"}
+                    else:
+                        mode = "LOW" if ratio < 0.5 else "MEDIUM" if ratio < 0.85 else "HIGH"
+                        payload = {"rigId": rig_id, "action": "POWER_MODE", "options": [mode]}
+                    # Αποστέλλεται ακριβώς το σώμα που υπογράφηκε
+                    body = json.dumps(payload)
+                    response = await self.client.post(
+                        f"{self.api_url}{path}",
+                        content=body,
+                        headers=await self._signed_headers("POST", path, body=body)
+                    )
+                    if response.status_code != 200:
+                        logger.error(f"Αποτυχία ορισμού ισχύος για το rig {rig_id}. Status code: {response.status_code}")
+                        results[rig_id] = "error"
+                        continue
+                self.power_limits[rig_id] = watts
+                results[rig_id] = "applied"
+            except Exception as e:
+                logger.error(f"Σφάλμα κατά τον ορισμό ισχύος για το rig {rig_id}: {str(e)}")
+                results[rig_id] = "error"
+        
+        if all(result == "applied" for result in results.values()):
+            status = "success"
+        elif results and all(result == "unsupported" for result in results.values()):
+            status = "unsupported"
+        else:
+            status = "partial"
+        return {
+            "status": status,
+            "results": results,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    async def _get_mock_rigs(self) -> List[Dict]:
+        """
+        Δημιουργία δοκιμαστικών rigs από τις δοκιμαστικές GPUs για development/testing
+        """
+        stats = await self._get_mock_mining_stats()
+        gpus = stats["gpus"]
+        rigs = []
+        for index, rig_gpus in enumerate([gpus[:3], gpus[3:]]):
+            rig_id = f"mock-rig-{index + 1}"
+            max_power = sum(gpu["power_consumption"] for gpu in rig_gpus)
+            max_hashrate = sum(gpu["hashrate"] for gpu in rig_gpus)
+            # Τα δοκιμαστικά rigs ακολουθούν το τελευταίο όριο ισχύος που εφαρμόστηκε
+            power = min(self.power_limits.get(rig_id, max_power), max_power)
+            rigs.append({
+                "rig_id": rig_id,
+                "name": f"Mock Rig {index + 1}",
+                "power": power,
+                "hashrate": max_hashrate * power / max_power if max_power else 0,
+                "max_power": max_power,
+                "max_hashrate": max_hashrate,
+                "live": False
+            })
+        return rigs
+    
     async def _get_mock_mining_stats(self) -> Dict:
         """
         Δημιουργία δοκιμαστικών δεδομένων mining για development/testing
         """
-        coins_data = await self._get_mock_coin_profitability()
+        coins_data = self._track_coins_version(await self._get_mock_coin_profitability())
         
         return {
             "timestamp": datetime.now().isoformat(),
@@ -279,7 +483,8 @@ class MiningConnector:
             ],
             "active_coin": "ETH",
             "coins_data": coins_data,
-            "total_earnings_24h": 0.0045
+            "total_earnings_24h": 0.0045,
+            "energy_cost_24h": self.get_energy_cost_24h(1200)
         }
     
     async def _get_mock_coin_profitability(self) -> Dict:
@@ -0,0 +1,324 @@
+import os
+import time
+import logging
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Table, delete, func, select, text
+from sqlalchemy.engine import Connection
+
+from backend.database import engine as default_engine
+from backend.models import CryptoPrice, EnergyConsumption
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Πίνακες χρονοσειρών για τους οποίους δίνονται μετρικές μεγέθους
+TIME_SERIES_TABLES = ("mining_stats", "energy_consumption", "crypto_prices")
+
+
+def _utc(value: datetime) -> datetime:
+    # Οι naive τιμές της βάσης (SQLite) έχουν αποθηκευτεί σε UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def bucket_start(value: datetime, bucket_seconds: int) -> datetime:
+    epoch = int(_utc(value).timestamp())
+    return datetime.fromtimestamp(epoch - epoch % bucket_seconds, tz=timezone.utc)
+
+
+def _merge_energy(rows: List[Dict], bucket: datetime) -> Tuple[List[int], List[Dict]]:
+    """
+    Τα διαστήματα ενέργειας μιας ώρας γίνονται μία γραμμή με τα αθροίσματά τους (kWh, €)
+    """
+    solar = [row["solar_generation"] for row in rows if row["solar_generation"] is not None]
+    merged = {
+        "timestamp": bucket,
+        "power_usage": sum(row["power_usage"] or 0.0 for row in rows),
+        "cost": sum(row["cost"] or 0.0 for row in rows),
+        "solar_generation": sum(solar) if solar else None,
+        "grid_consumption": sum(row["grid_consumption"] or 0.0 for row in rows),
+        "is_predicted": False
+    }
+    return [row["id"] for row in rows], [merged]
+
+
+def _merge_prices(rows: List[Dict], bucket: datetime) -> Tuple[List[int], List[Dict]]:
+    """
+    Από τις τιμές ενός νομίσματος μέσα στη ώρα κρατιέται η τελευταία (τιμή κλεισίματος)
+    """
+    latest = max(rows, key=lambda row: (_utc(row["timestamp"]), row["id"]))
+    return [row["id"] for row in rows if row["id"] != latest["id"]], []
+
+
+class RetentionPolicy:
+    """
+    Πολιτική διατήρησης ενός πίνακα χρονοσειρών
+
+    Οι γραμμές παλαιότερες από compact_after_days συμπτύσσονται σε μία ανά
+    bucket_seconds (και ανά group_by), με τη συνάρτηση merge. Όσες είναι
+    παλαιότερες από retention_days διαγράφονται (0: διατηρούνται πάντα).
+    """
+
+    def __init__(self, table: Table, compact_after_days: int, retention_days: int,
+                 merge: Callable[[List[Dict], datetime], Tuple[List[int], List[Dict]]],
+                 group_by: Optional[str] = None, compact_filter=None, expire_filter=None):
+        self.table = table
+        self.compact_after_days = compact_after_days
+        self.retention_days = retention_days
+        self.merge = merge
+        self.group_by = group_by
+        # Επιπλέον συνθήκες: ποιες γραμμές συμπτύσσονται και ποιες διαγράφονται ήδη από το compact_after_days
+        self.compact_filter = compact_filter
+        self.expire_filter = expire_filter
+
+    @property
+    def name(self) -> str:
+        return self.table.name
+
+
+def default_policies() -> List[RetentionPolicy]:
+    energy = EnergyConsumption.__table__
+    prices = CryptoPrice.__table__
+    return [
+        RetentionPolicy(
+            energy,
+            compact_after_days=int(os.getenv("ENERGY_COMPACT_AFTER_DAYS", 30)),
+            retention_days=int(os.getenv("ENERGY_RETENTION_DAYS", 730)),
+            merge=_merge_energy,
+            compact_filter=energy.c.is_predicted.is_(False),
+            # Οι προβλέψεις για διαστήματα που έχουν περάσει δεν χρειάζονται μετά τη σύμπτυξη
+            expire_filter=energy.c.is_predicted.is_(True)
+        ),
+        RetentionPolicy(
+            prices,
+            compact_after_days=int(os.getenv("CRYPTO_PRICES_COMPACT_AFTER_DAYS", 7)),
+            retention_days=int(os.getenv("CRYPTO_PRICES_RETENTION_DAYS", 730)),
+            merge=_merge_prices,
+            group_by="coin"
+        ),
+    ]
+
+
+class RetentionManager:
+    """
+    Σύμπτυξη και διαγραφή παλιών δεδομένων των χρονοσειρών σε μικρές παρτίδες
+
+    Σε κάθε κύκλο, για κάθε πολιτική:
+    - σύμπτυξη: οι γραμμές παλαιότερες από compact_after_days επεξεργάζονται σε
+      παράθυρα RETENTION_COMPACT_WINDOW_HOURS, μία συναλλαγή ανά παράθυρο. Κάθε
+      bucket (RETENTION_BUCKET_SECONDS) με περισσότερες από μία γραμμές
+      αντικαθίσταται από το αποτέλεσμα του merge. Η πρόοδος κρατιέται στη μνήμη,
+      οπότε κάθε κύκλος επεξεργάζεται μόνο τα νέα παράθυρα.
+    - διαγραφή: οι γραμμές παλαιότερες από retention_days διαγράφονται ανά
+      RETENTION_BATCH_SIZE ids, κάθε παρτίδα σε δική της συναλλαγή με παύση
+      RETENTION_BATCH_PAUSE ανάμεσα, ώστε να μην κρατούνται κλειδώματα για πολύ.
+
+    Το mining_stats αποσύρεται ανά διαμέριση από το PartitionMaintainer.
+    """
+
+    def __init__(self, engine=None, policies: Optional[List[RetentionPolicy]] = None):
+        self.engine = engine or default_engine
+        self.policies = policies if policies is not None else default_policies()
+        self.enabled = os.getenv("RETENTION_ENABLED", "True").lower() == "true"
+        self.interval = int(os.getenv("RETENTION_INTERVAL", 3600))
+        self.batch_size = int(os.getenv("RETENTION_BATCH_SIZE", 5000))
+        self.batch_pause = float(os.getenv("RETENTION_BATCH_PAUSE", 0.05))
+        self.bucket_seconds = int(os.getenv("RETENTION_BUCKET_SECONDS", 3600))
+        self.window = timedelta(hours=int(os.getenv("RETENTION_COMPACT_WINDOW_HOURS", 24)))
+        self.last_run: Optional[Dict] = None
+        self._compacted_until: Dict[str, datetime] = {}
+        # Ο κύκλος του παρασκηνίου και οι χειροκίνητες εκτελέσεις δεν επικαλύπτονται
+        self._run_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _delete_batches(self, table: Table, condition) -> int:
+        """
+        Διαγραφή των γραμμών της συνθήκης ανά batch_size, μία συναλλαγή ανά παρτίδα
+        """
+        deleted = 0
+        while True:
+            ids = select(table.c.id).where(condition).limit(self.batch_size).scalar_subquery()
+            with self.engine.begin() as conn:
+                count = conn.execute(delete(table).where(table.c.id.in_(ids))).rowcount
+            deleted += count
+            if count < self.batch_size:
+                return deleted
+            time.sleep(self.batch_pause)
+
+    def _compact_window(self, conn: Connection, policy: RetentionPolicy,
+                        start: datetime, end: datetime) -> Tuple[int, int, int]:
+        table = policy.table
+        query = select(table).where(table.c.timestamp >= start).where(table.c.timestamp < end)
+        if policy.compact_filter is not None:
+            query = query.where(policy.compact_filter)
+        groups: Dict[Tuple, List[Dict]] = {}
+        for row in conn.execute(query).mappings():
+            bucket = bucket_start(row["timestamp"], self.bucket_seconds)
+            key = (bucket, row[policy.group_by] if policy.group_by else None)
+            groups.setdefault(key, []).append(dict(row))
+
+        removed = inserted = 0
+        for (bucket, _), rows in groups.items():
+            if len(rows) < 2:
+                continue
+            ids, replacements = policy.merge(rows, bucket)
+            # Πρώτα η διαγραφή: η νέα γραμμή μπορεί να έχει τη χρονοσφραγίδα μιας από τις παλιές
+            for offset in range(0, len(ids), self.batch_size):
+                conn.execute(delete(table).where(table.c.id.in_(ids[offset:offset + self.batch_size])))
+            if replacements:
+                conn.execute(table.insert(), replacements)
+            removed += len(ids)
+            inserted += len(replacements)
+        return sum(len(rows) for rows in groups.values()), removed, inserted
+
+    def _oldest(self, policy: RetentionPolicy, since: Optional[datetime] = None) -> Optional[datetime]:
+        table = policy.table
+        query = select(func.min(table.c.timestamp))
+        if since is not None:
+            query = query.where(table.c.timestamp >= since)
+        if policy.compact_filter is not None:
+            query = query.where(policy.compact_filter)
+        with self.engine.connect() as conn:
+            oldest = conn.execute(query).scalar()
+        return bucket_start(oldest, self.bucket_seconds) if oldest is not None else None
+
+    def _compact(self, policy: RetentionPolicy, cutoff: datetime) -> Dict:
+        summary = {"removed": 0, "inserted": 0, "windows": 0}
+        start = self._compacted_until.get(policy.name) or self._oldest(policy)
+        while start is not None and start < cutoff:
+            end = min(start + self.window, cutoff)
+            with self.engine.begin() as conn:
+                rows, removed, inserted = self._compact_window(conn, policy, start, end)
+            summary["removed"] += removed
+            summary["inserted"] += inserted
+            summary["windows"] += 1
+            self._compacted_until[policy.name] = end
+            if removed:
+                time.sleep(self.batch_pause)
+            # Κενά διαστήματα χωρίς μετρήσεις παραλείπονται
+            start = end if rows else self._oldest(policy, end)
+        return summary
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Ένας κύκλος σύμπτυξης και διαγραφής για όλες τις πολιτικές
+        """
+        with self._run_lock:
+            return self._run_policies(now or datetime.now(timezone.utc))
+
+    def _run_policies(self, now: datetime) -> Dict:
+        summary = {"timestamp": now.isoformat(), "tables": {}, "errors": []}
+        for policy in self.policies:
+            result = {"compacted": None, "expired": 0, "deleted": 0}
+            try:
+                # Πρώτα η διαγραφή, ώστε να μη συμπτύσσονται γραμμές που θα διαγραφούν
+                if policy.retention_days > 0:
+                    horizon = now - timedelta(days=policy.retention_days)
+                    result["deleted"] = self._delete_batches(policy.table, policy.table.c.timestamp < horizon)
+                if policy.compact_after_days > 0:
+                    cutoff = bucket_start(now - timedelta(days=policy.compact_after_days), self.bucket_seconds)
+                    if policy.expire_filter is not None:
+                        result["expired"] = self._delete_batches(
+                            policy.table, (policy.table.c.timestamp < cutoff) & policy.expire_filter
+                        )
+                    result["compacted"] = self._compact(policy, cutoff)
+            except Exception as e:
+                logger.error(f"Σφάλμα κατά τη διατήρηση δεδομένων του {policy.name}: {str(e)}")
+                summary["errors"].append({"table": policy.name, "error": str(e)})
+            summary["tables"][policy.name] = result
+        self.last_run = summary
+        return summary
+
+    def table_metrics(self) -> Dict[str, Dict]:
+        """
+        Πλήθος γραμμών και μέγεθος (με τα ευρετήρια) των πινάκων χρονοσειρών
+
+        Στην PostgreSQL το πλήθος είναι η εκτίμηση του planner (χωρίς σάρωση) και
+        τα μεγέθη αθροίζονται σε όλες τις διαμερίσεις. Στην SQLite το πλήθος είναι
+        ακριβές και το μέγεθος προκύπτει από το dbstat (None αν δεν είναι διαθέσιμο).
+        """
+        metrics = {}
+        with self.engine.connect() as conn:
+            for name in TIME_SERIES_TABLES:
+                try:
+                    if self.engine.dialect.name == "postgresql":
+                        rows, size = conn.execute(text(
+                            "SELECT sum(greatest(c.reltuples, 0)), sum(pg_total_relation_size(t.relid)) "
+                            "FROM pg_partition_tree(CAST(:table AS regclass)) t "
+                            "JOIN pg_class c ON c.oid = t.relid"
+                        ), {"table": name}).one()
+                        metrics[name] = {"rows": int(rows or 0), "rows_estimated": True, "bytes": int(size or 0)}
+                        continue
+                    rows = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+                    try:
+                        size = conn.execute(text(
+                            "SELECT sum(pgsize) FROM dbstat "
+                            "WHERE name IN (SELECT name FROM sqlite_master WHERE tbl_name = :table)"
+                        ), {"table": name}).scalar()
+                    except Exception:
+                        conn.rollback()
+                        size = None
+                    metrics[name] = {"rows": rows, "rows_estimated": False, "bytes": size}
+                except Exception as e:
+                    conn.rollback()
+                    logger.error(f"Σφάλμα κατά τη λήψη μεγέθους του πίνακα {name}: {str(e)}")
+                    metrics[name] = {"error": str(e)}
+        return metrics
+
+    async def maintain(self) -> Dict:
+        return await asyncio.to_thread(self.run_once)
+
+    async def _run(self):
+        logger.info("Εκκίνηση διατήρησης δεδομένων χρονοσειρών")
+        while True:
+            try:
+                await self.maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Σφάλμα στη διατήρηση δεδομένων χρονοσειρών: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Τερματισμός διατήρησης δεδομένων χρονοσειρών")
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running,
+            "interval": self.interval,
+            "batch_size": self.batch_size,
+            "bucket_seconds": self.bucket_seconds,
+            "policies": {
+                policy.name: {
+                    "compact_after_days": policy.compact_after_days,
+                    "retention_days": policy.retention_days,
+                    "compacted_until": self._compacted_until.get(policy.name)
+                }
+                for policy in self.policies
+            },
+            "last_run": self.last_run
+        }
@@ -0,0 +1,209 @@
+import os
+import json
+import uuid
+import hashlib
+import queue
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Είδη εγγραφών: ένας υποφάκελος shards ανά είδος
+DATASET_KINDS = ("chat", "analysis")
+
+
+def messages_hash(messages: List[Dict[str, str]]) -> str:
+    """
+    Σταθερό αποτύπωμα μιας συνομιλίας, για αφαίρεση διπλοτύπων κατά την εκπαίδευση
+    """
+    payload = json.dumps(messages, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _Shard:
+    """
+    Ανοιχτό αρχείο JSONL στο οποίο γίνεται μόνο προσθήκη
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.day = os.path.basename(path).split("-", 1)[0]
+        self.file = open(path, "a", encoding="utf-8")
+        self.size = self.file.tell()
+
+    def write(self, line: str):
+        self.file.write(line)
+        # Κάθε εγγραφή φτάνει στο αρχείο αμέσως: μια διακοπή χάνει το πολύ την τρέχουσα γραμμή
+        self.file.flush()
+        self.size += len(line.encode("utf-8"))
+
+    def close(self):
+        self.file.close()
+
+
+class DatasetLogger:
+    """
+    Καταγραφή συνομιλιών και αναλύσεων του AIEngine σε shards JSONL για fine-tuning
+
+    Κάθε είδος εγγραφής (chat, analysis) γράφεται στον δικό του υποφάκελο του
+    AI_DATASET_DIR, σε αρχεία <ημέρα>-<pid>-<αύξων>.jsonl μόνο με προσθήκες.
+    Νέο shard ανοίγει με την αλλαγή ημέρας ή όταν το τρέχον ξεπεράσει το
+    AI_DATASET_SHARD_MB, οπότε τα κλεισμένα shards δεν αλλάζουν ποτέ και
+    μπορούν να αποθηκευτούν σε cache tokenization. Κάθε εγγραφή περιέχει τα
+    μηνύματα (system/user/assistant) όπως τα είδε το μοντέλο.
+
+    Η καταγραφή είναι ανενεργή εκτός αν AI_DATASET_ENABLED=True. Οι εγγραφές
+    μπαίνουν σε ουρά (AI_DATASET_QUEUE_SIZE) και γράφονται στον δίσκο από ένα
+    νήμα του παρασκηνίου, ώστε το event loop να μην περιμένει ποτέ I/O· όταν η
+    ουρά είναι γεμάτη η εγγραφή απορρίπτεται και μετριέται στο "dropped".
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.getenv("AI_DATASET_ENABLED", "False").lower() == "true"
+        self.enabled = enabled
+        self.directory = os.getenv("AI_DATASET_DIR", "./data/finetune")
+        self.shard_bytes = int(float(os.getenv("AI_DATASET_SHARD_MB", 64)) * 1024 * 1024)
+        # Πλήθος GPU της ανάλυσης που μπαίνουν στο prompt του δείγματος
+        self.analysis_gpus = int(os.getenv("AI_DATASET_ANALYSIS_GPUS", 20))
+        self._shards: Dict[str, _Shard] = {}
+        self._sequence: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("AI_DATASET_QUEUE_SIZE", 1000)))
+        self._writer: Optional[threading.Thread] = None
+        self.stats = {"records": 0, "bytes": 0, "shards": 0, "errors": 0, "dropped": 0}
+
+    def _shard(self, kind: str, size: int) -> _Shard:
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        shard = self._shards.get(kind)
+        if shard is not None and shard.day == day and shard.size + size <= self.shard_bytes:
+            return shard
+        if shard is not None:
+            shard.close()
+        directory = os.path.join(self.directory, kind)
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            self._sequence[kind] = self._sequence.get(kind, 0) + 1
+            path = os.path.join(directory, f"{day}-{os.getpid()}-{self._sequence[kind]:04d}.jsonl")
+            # Shard προηγούμενης εκτέλεσης με ίδιο pid δεν επεκτείνεται
+            if not os.path.exists(path):
+                break
+        shard = _Shard(path)
+        self._shards[kind] = shard
+        self.stats["shards"] += 1
+        return shard
+
+    def log(self, kind: str, messages: List[Dict[str, str]], **fields) -> Optional[str]:
+        """
+        Προσθήκη εγγραφής στην ουρά (επιστρέφει το id της ή None αν δεν καταγράφεται)
+
+        Σφάλματα εγγραφής καταγράφονται και δεν διακόπτουν την απάντηση στον χρήστη.
+        """
+        if not self.enabled:
+            return None
+        record = {
+            "id": uuid.uuid4().hex,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "kind": kind,
+            "messages": messages,
+            **fields
+        }
+        self._start_writer()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.warning("Η ουρά καταγραφής δειγμάτων fine-tuning είναι γεμάτη, το δείγμα απορρίφθηκε")
+            return None
+        return record["id"]
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="dataset-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            record = self._queue.get()
+            try:
+                if record is None:
+                    return
+                self._write(record)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, record: Dict[str, Any]):
+        try:
+            record["hash"] = messages_hash(record["messages"])
+            line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+            size = len(line.encode("utf-8"))
+            with self._lock:
+                shard = self._shard(record["kind"], size)
+                shard.write(line)
+                self.stats["records"] += 1
+                self.stats["bytes"] += size
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Σφάλμα κατά την καταγραφή δείγματος fine-tuning: {str(e)}")
+
+    def flush(self):
+        """
+        Αναμονή μέχρι να γραφτούν όλες οι εγγραφές της ουράς
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+
+    def log_chat(self, system: str, turns: List[Dict[str, str]], **fields) -> Optional[str]:
+        return self.log("chat", [{"role": "system", "content": system}] + list(turns), **fields)
+
+    def log_analysis(self, system: str, result: Dict[str, Any], summary: str, **fields) -> Optional[str]:
+        """
+        Ανάλυση telemetry ως δείγμα: τα βασικά μεγέθη ανά GPU στο prompt, η περίληψη ως απάντηση
+        """
+        gpus = [
+            {
+                key: gpu.get(key)
+                for key in ("gpu_id", "model", "efficiency", "avg_hashrate", "avg_power",
+                            "avg_temperature", "outlier_samples", "trends", "degrading")
+            }
+            for gpu in result.get("gpus", [])[:self.analysis_gpus]
+        ]
+        prompt = (
+            "Ανάλυσε την απόδοση των GPU από τα παρακάτω δεδομένα telemetry "
+            f"({result.get('samples', 0)} μετρήσεις):\n"
+            + json.dumps({"gpus": gpus, "projection": result.get("projection")},
+                         ensure_ascii=False, separators=(",", ":"), default=str)
+        )
+        messages = [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": summary}
+        ]
+        return self.log("analysis", messages, result=result, **fields)
+
+    def close(self):
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._writer = None
+        with self._lock:
+            for shard in self._shards.values():
+                shard.close()
+            self._shards.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "directory": self.directory,
+            "queued": self._queue.qsize(),
+            "current_shards": {kind: shard.path for kind, shard in self._shards.items()},
+            **self.stats
+        }
@@ -0,0 +1,222 @@
+import os
+import copy
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from backend.energy_history import ENERGY_SAMPLE_INTERVAL
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 7 * 24
+
+# Μεγέθη που προβλέπονται (στήλες του πίνακα energy_consumption)
+FORECAST_TARGETS = ("power_usage", "solar_generation")
+
+
+def _to_epoch_hours(timestamps: List[datetime]) -> np.ndarray:
+    """
+    Μετατροπή χρονοσφραγίδων σε ακέραιες ώρες από το epoch (UTC)
+    """
+    return np.array([int(ts.timestamp()) // 3600 for ts in timestamps], dtype=np.int64)
+
+
+def _hour_of_week(epoch_hours: np.ndarray) -> np.ndarray:
+    """
+    Ώρα της εβδομάδας (0 = Δευτέρα 00:00 UTC) για κάθε ώρα epoch
+    """
+    # Η 1η Ιανουαρίου 1970 ήταν Πέμπτη, δηλαδή 3 ημέρες μετά τη Δευτέρα
+    return (epoch_hours + 3 * 24) % HOURS_PER_WEEK
+
+
+def _build_features(epoch_hours: np.ndarray) -> np.ndarray:
+    """
+    Πίνακας χαρακτηριστικών για το μοντέλο gradient boosting (ένα row ανά ώρα)
+    """
+    hour_of_day = epoch_hours % 24
+    day_of_week = (epoch_hours // 24 + 3) % 7
+    day_of_year = (epoch_hours // 24) % 365.25
+    return np.column_stack([
+        np.sin(2 * np.pi * hour_of_day / 24),
+        np.cos(2 * np.pi * hour_of_day / 24),
+        day_of_week,
+        np.sin(2 * np.pi * day_of_year / 365.25),
+        np.cos(2 * np.pi * day_of_year / 365.25),
+    ])
+
+
+class _TargetModel:
+    """
+    Μοντέλο πρόβλεψης για ένα μέγεθος: εποχικό προφίλ ώρας-εβδομάδας και
+    gradient boosting πάνω στα υπόλοιπα (residuals) του προφίλ
+    """
+
+    def __init__(self, non_negative: bool = True):
+        self.non_negative = non_negative
+        self.sums = np.zeros(HOURS_PER_WEEK)
+        self.counts = np.zeros(HOURS_PER_WEEK)
+        self.regressor = None
+
+    def clone(self) -> "_TargetModel":
+        """
+        Αντίγραφο του προφίλ (ο regressor αντιγράφεται μόνο όταν εκπαιδεύεται ξανά)
+        """
+        model = _TargetModel(self.non_negative)
+        model.sums = self.sums.copy()
+        model.counts = self.counts.copy()
+        model.regressor = self.regressor
+        return model
+
+    def update_profile(self, epoch_hours: np.ndarray, values: np.ndarray):
+        """
+        Επαυξητική ενημέρωση του εποχικού προφίλ με νέες παρατηρήσεις
+        """
+        how = _hour_of_week(epoch_hours)
+        np.add.at(self.sums, how, values)
+        np.add.at(self.counts, how, 1)
+
+    def profile(self, epoch_hours: np.ndarray) -> np.ndarray:
+        """
+        Τιμή εποχικού προφίλ για κάθε ώρα (με fallback στον συνολικό μέσο όρο)
+        """
+        overall = self.sums.sum() / self.counts.sum() if self.counts.sum() else 0.0
+        means = np.divide(self.sums, self.counts, out=np.full(HOURS_PER_WEEK, overall), where=self.counts > 0)
+        return means[_hour_of_week(epoch_hours)]
+
+    def predict(self, epoch_hours: np.ndarray) -> np.ndarray:
+        """
+        Πρόβλεψη για όλες τις ώρες σε μία κλήση
+        """
+        prediction = self.profile(epoch_hours)
+        if self.regressor is not None:
+            prediction = prediction + self.regressor.predict(_build_features(epoch_hours))
+        if self.non_negative:
+            prediction = np.clip(prediction, 0.0, None)
+        return prediction
+
+
+class EnergyForecaster:
+    """
+    Πρόβλεψη ωριαίας κατανάλωσης και ηλιακής παραγωγής από το αποθηκευμένο ιστορικό
+
+    Το εποχικό προφίλ ενημερώνεται επαυξητικά με κάθε νέα ώρα ιστορικού. Ο
+    GradientBoostingRegressor συνεχίζει την εκπαίδευση (warm start) με λίγα νέα
+    δέντρα στα πρόσφατα δεδομένα και εκπαιδεύεται από την αρχή μόνο όταν το
+    σύνολο δέντρων ξεπεράσει το όριο. Η εκπαίδευση γίνεται σε αντίγραφα των
+    μοντέλων, οπότε οι προβλέψεις δεν περιμένουν ποτέ μια εκπαίδευση σε εξέλιξη.
+    """
+
+    def __init__(self):
+        self.min_history_hours = int(os.getenv("ENERGY_FORECAST_MIN_HISTORY_HOURS", 48))
+        self.history_days = int(os.getenv("ENERGY_FORECAST_HISTORY_DAYS", 90))
+        self.refit_interval = int(os.getenv("ENERGY_FORECAST_REFIT_INTERVAL", 3600))
+        self.initial_estimators = 150
+        self.incremental_estimators = 20
+        self.max_estimators = 400
+        self.models: Dict[str, _TargetModel] = {}
+        self.last_timestamp: Optional[datetime] = None
+        self.last_update: Optional[float] = None
+        self.observed_hours = 0
+        self._history_hours = np.zeros(0, dtype=np.int64)
+        self._history_values: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self.models) and self.observed_hours >= self.min_history_hours
+
+    def needs_refit(self) -> bool:
+        return self.last_update is None or time.time() - self.last_update >= self.refit_interval
+
+    def update(self, history: List[Dict]) -> bool:
+        """
+        Ενημέρωση των μοντέλων με νέες ωριαίες γραμμές ιστορικού
+
+        Οι γραμμές πρέπει να προέρχονται από get_energy_history με bucket 3600.
+        Επιστρέφει True αν έγινε (επαυξητική ή πλήρης) εκπαίδευση.
+        """
+        with self._lock:
+            self.last_update = time.time()
+            rows = [row for row in history if self.last_timestamp is None or row["timestamp"] > self.last_timestamp]
+            if not rows:
+                return False
+
+            epoch_hours = _to_epoch_hours([row["timestamp"] for row in rows])
+            # Κανονικοποίηση σε kWh/ώρα όταν λείπουν διαστήματα δειγματοληψίας
+            expected_samples = 3600 / ENERGY_SAMPLE_INTERVAL
+            scale = np.array([expected_samples / max(row.get("samples", expected_samples), 1) for row in rows])
+
+            cutoff = epoch_hours.max() - self.history_days * 24
+            keep = self._history_hours >= cutoff
+            self._history_hours = np.concatenate([self._history_hours[keep], epoch_hours])
+
+            models = {target: model.clone() for target, model in self.models.items()}
+            for target in FORECAST_TARGETS:
+                values = np.array([row.get(target) or 0.0 for row in rows], dtype=float) * scale
+                model = models.setdefault(target, _TargetModel())
+                model.update_profile(epoch_hours, values)
+                previous = self._history_values.get(target, np.zeros(0))
+                self._history_values[target] = np.concatenate([previous[keep], values])
+
+            self.last_timestamp = rows[-1]["timestamp"]
+            self.observed_hours += len(rows)
+
+            fitted = self.observed_hours >= self.min_history_hours
+            if fitted:
+                self._fit_regressors(models, new_rows=len(rows))
+            # Ατομική αντικατάσταση των μοντέλων που χρησιμοποιούνται για πρόβλεψη
+            self.models = models
+            return fitted
+
+    def _fit_regressors(self, models: Dict[str, _TargetModel], new_rows: int):
+        """
+        Εκπαίδευση (ή συνέχιση εκπαίδευσης) του gradient boosting στα residuals
+        """
+        try:
+            from sklearn.ensemble import GradientBoostingRegressor
+        except ImportError:
+            logger.warning("Το scikit-learn δεν είναι διαθέσιμο. Χρήση μόνο εποχικού προφίλ")
+            return
+
+        features = _build_features(self._history_hours)
+        for target, model in models.items():
+            residuals = self._history_values[target] - model.profile(self._history_hours)
+            regressor = model.regressor
+            cold = regressor is None or regressor.n_estimators + self.incremental_estimators > self.max_estimators
+
+            if cold:
+                regressor = GradientBoostingRegressor(
+                    n_estimators=self.initial_estimators,
+                    max_depth=3,
+                    learning_rate=0.05,
+                    subsample=0.8,
+                    warm_start=True
+                )
+                regressor.fit(features, residuals)
+            else:
+                # Νέα δέντρα μόνο στα πρόσφατα δεδομένα (τουλάχιστον μία εβδομάδα)
+                recent = max(new_rows, HOURS_PER_WEEK)
+                regressor = copy.deepcopy(regressor)
+                regressor.n_estimators += self.incremental_estimators
+                regressor.fit(features[-recent:], residuals[-recent:])
+            model.regressor = regressor
+            logger.info(f"Εκπαίδευση μοντέλου πρόβλεψης {target} "
+                        f"({'πλήρης' if cold else 'επαυξητική'}, {regressor.n_estimators} δέντρα)")
+
+    def predict(self, start: datetime, hours: int) -> Dict[str, np.ndarray]:
+        """
+        Πρόβλεψη για `hours` διαδοχικές ώρες από την `start` (batch, μία κλήση ανά μέγεθος)
+        """
+        first = int(start.timestamp()) // 3600
+        epoch_hours = np.arange(first, first + hours, dtype=np.int64)
+        predictions = {target: model.predict(epoch_hours) for target, model in self.models.items()}
+        predictions["timestamp"] = epoch_hours * 3600
+        return predictions
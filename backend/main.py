@@ -1,10 +1,13 @@
+import asyncio
+import json
 import logging
 import os
 import time
+from datetime import datetime, timezone
 from typing import Dict, List, Optional
-from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Query, Request, status
+from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks, Body, Query, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from dotenv import load_dotenv
 
@@ -12,13 +15,25 @@ from dotenv import load_dotenv
 from backend.models import Base
 from backend.database import engine, get_db, init_db
 from backend.schemas import (
-    MiningStats, EnergyData, ProfitabilityRequest, ProfitabilityResponse,
+    MiningStats, EnergyData, EnergyHistoryPoint, ThrottleSimulationRequest, RentalOffer, RentalCreate, GPURental, ModelVariantCreate, ModelVariant, ArbitrageRequest, ChatRequest, ProfitabilityRequest, ProfitabilityResponse,
     UserCreate, User, MiningConfig, MiningStat, EnergyConsumption, CryptoPrice
 )
 from backend.connectors.mining_connector import MiningConnector
 from backend.connectors.energy_connector import EnergyConnector
 from backend.connectors.cloreai_connector import CloreAIConnector
-from backend.ai_engine import AIEngine
+from backend.ai_engine import AIEngine, ModelNotReadyError
+from backend.chat_context import ChatContextBuilder
+from backend.inference_executor import InferenceQueueFullError, InferenceTimeoutError
+from backend.arbitrage import RentalArbitrageOptimizer
+from backend.energy_history import get_energy_history, default_history_range
+from backend.throttle_controller import SolarThrottleController
+from backend.rental_tracker import RentalTracker, list_rentals
+from backend.partition_maintenance import PartitionMaintainer
+from backend.data_retention import RetentionManager
+from backend.model_registry import (
+    ModelSwapInProgressError, ModelVariantNotFoundError,
+    benchmark_to_dict, list_benchmarks, list_variants, register_variant
+)
 
 # Απενεργοποίηση προειδοποιήσεων TensorFlow
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # 0=all, 1=no INFO, 2=no WARNING, 3=no ERROR
@@ -78,7 +93,12 @@ async def add_process_time_header(request: Request, call_next):
 mining_connector = MiningConnector()
 energy_connector = EnergyConnector()
 cloreai_connector = CloreAIConnector()
-ai_engine = AIEngine()
+ai_engine = AIEngine(ChatContextBuilder(mining_connector, energy_connector, cloreai_connector))
+throttle_controller = SolarThrottleController(mining_connector, energy_connector)
+arbitrage_optimizer = RentalArbitrageOptimizer()
+rental_tracker = RentalTracker(cloreai_connector)
+partition_maintainer = PartitionMaintainer()
+retention_manager = RetentionManager()
 
 # Εκτέλεση στην εκκίνηση της εφαρμογής
 @app.on_event("startup")
@@ -91,9 +111,21 @@ async def startup_event():
         await mining_connector.initialize()
         await energy_connector.initialize()
         await cloreai_connector.initialize()
-        # Φόρτωση του AI μοντέλου στο παρασκήνιο
+        # Φόρτωση του AI μοντέλου στο παρασκήνιο (δεν μπλοκάρει την εκκίνηση)
         await ai_engine.load_model()
         logger.info("Connectors και AI Engine αρχικοποιήθηκαν επιτυχώς")
+        # Έλεγχος ισχύος rigs με βάση το ηλιακό πλεόνασμα (αν είναι ενεργοποιημένος)
+        if throttle_controller.enabled:
+            throttle_controller.start()
+        # Παρακολούθηση ενοικιάσεων GPU του CloreAI
+        if rental_tracker.enabled:
+            rental_tracker.start()
+        # Δημιουργία/απόσυρση μηνιαίων διαμερίσεων των χρονοσειρών (PostgreSQL)
+        if partition_maintainer.enabled and partition_maintainer.supported:
+            partition_maintainer.start()
+        # Σύμπτυξη και διαγραφή παλιών τιμών και μετρήσεων ενέργειας
+        if retention_manager.enabled:
+            retention_manager.start()
     except Exception as e:
         logger.error(f"Αποτυχία αρχικοποίησης υπηρεσιών: {str(e)}")
 
@@ -102,6 +134,11 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Τερματισμός του AI Mining Assistant API")
     # Κλείσιμο συνδέσεων
+    await throttle_controller.stop()
+    await rental_tracker.stop()
+    await partition_maintainer.stop()
+    await retention_manager.stop()
+    await ai_engine.shutdown()
     await mining_connector.close()
     await energy_connector.close()
     await cloreai_connector.close()
@@ -121,8 +158,9 @@ def health_check():
             "mining_connector": mining_connector.is_initialized,
             "energy_connector": energy_connector.is_initialized,
             "cloreai_connector": cloreai_connector.is_initialized,
-            "ai_engine": ai_engine.model is not None
-        }
+            "ai_engine": ai_engine.is_ready
+        },
+        "ai_model": ai_engine.readiness()
     }
 
 # ---------- MINING ENDPOINTS ---------- #
@@ -207,14 +245,103 @@ async def get_solar_production():
         logger.error(f"Σφάλμα κατά τη λήψη δεδομένων φωτοβολταϊκών: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/energy/tariff", response_model=Dict)
+async def get_energy_tariff(hours: int = Query(24, ge=1, le=168, description="Ώρες τιμών")):
+    """
+    Ενεργό τιμολόγιο ενέργειας και τιμές για τις επόμενες ώρες.
+    """
+    tariff = energy_connector.tariff
+    return {
+        "name": tariff.name,
+        "timezone": tariff.timezone,
+        "current_rate": tariff.rate_at(),
+        "feed_in_rate": tariff.feed_in_rate,
+        "demand_charge_per_kw": tariff.demand_charge_per_kw,
+        "hourly_rates": tariff.hourly_rates(hours)
+    }
+
+@app.get("/api/energy/forecast", response_model=List[Dict])
+async def get_energy_forecast(days: int = Query(7, ge=1, le=30, description="Ημέρες πρόβλεψης")):
+    """
+    Πρόβλεψη κατανάλωσης και ηλιακής παραγωγής για τις επόμενες ημέρες.
+    """
+    try:
+        return await energy_connector.get_energy_forecast(days)
+    except Exception as e:
+        logger.error(f"Σφάλμα κατά την πρόβλεψη ενέργειας: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/energy/history", response_model=List[EnergyHistoryPoint])
+def get_energy_history_endpoint(
+    start: Optional[datetime] = Query(None, description="Αρχή χρονικού εύρους (προεπιλογή: πριν από 24 ώρες)"),
+    end: Optional[datetime] = Query(None, description="Τέλος χρονικού εύρους (προεπιλογή: τώρα)"),
+    bucket: int = Query(3600, ge=60, le=31 * 24 * 3600, description="Διάρκεια bucket σε δευτερόλεπτα"),
+    include_predicted: bool = Query(False, description="Επιστροφή προβλέψεων αντί για μετρήσεις"),
+    db: Session = Depends(get_db)
+):
+    """
+    Ιστορικό κατανάλωσης ενέργειας ομαδοποιημένο σε χρονικά διαστήματα.
+    """
+    default_start, default_end = default_history_range()
+    start = _as_utc(start) if start else default_start
+    end = _as_utc(end) if end else default_end
+    if start >= end:
+        raise HTTPException(status_code=400, detail="Η αρχή του εύρους πρέπει να προηγείται του τέλους")
+    try:
+        return get_energy_history(db, start, end, bucket, include_predicted)
+    except Exception as e:
+        logger.error(f"Σφάλμα κατά τη λήψη ιστορικού ενέργειας: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _as_utc(value: datetime) -> datetime:
+    """
+    Μετατροπή χρονοσφραγίδας σε UTC (οι naive τιμές θεωρούνται τοπική ώρα)
+    """
+    return value.astimezone(timezone.utc)
+
+@app.get("/api/energy/throttle", response_model=Dict)
+async def get_throttle_status():
+    """
+    Κατάσταση του ελέγχου ισχύος rigs με βάση το ηλιακό πλεόνασμα.
+    """
+    return throttle_controller.status()
+
+@app.post("/api/energy/throttle/simulate", response_model=Dict)
+async def simulate_throttle(request: ThrottleSimulationRequest):
+    """
+    Προσομοίωση του ελέγχου ισχύος rigs σε καταγεγραμμένα δεδομένα ενέργειας.
+    """
+    try:
+        trace = request.trace
+        if trace is None:
+            default_start, default_end = default_history_range(hours=7 * 24)
+            start = _as_utc(request.start) if request.start else default_start
+            end = _as_utc(request.end) if request.end else default_end
+            trace = await throttle_controller.load_trace(start, end, request.recorded_mining_kw)
+        return await throttle_controller.simulate(
+            trace, speed=request.speed, include_timeline=request.include_timeline
+        )
+    except Exception as e:
+        logger.error(f"Σφάλμα κατά την προσομοίωση ελέγχου ισχύος: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ---------- CLOREAI ENDPOINTS ---------- #
 
 @app.get("/api/cloreai/gpus", response_model=List[Dict])
-async def get_gpu_availability():
+async def get_gpu_availability(
+    model: Optional[str] = Query(None, description="Μοντέλο GPU (π.χ. RTX 3080)"),
+    min_available: int = Query(0, ge=0, description="Ελάχιστος αριθμός διαθέσιμων GPU"),
+    max_price: Optional[float] = Query(None, ge=0, description="Μέγιστη τιμή ανά ώρα"),
+    limit: Optional[int] = Query(None, ge=1, description="Μέγιστος αριθμός αποτελεσμάτων")
+):
     """
     Λήψη διαθεσιμότητας GPU από το CloreAI.
+
+    Με φίλτρα, τα αποτελέσματα προέρχονται από το ευρετήριο προσφορών, ταξινομημένα κατά τιμή.
     """
     try:
+        if model or min_available or max_price is not None or limit:
+            return await cloreai_connector.query_offers(model, min_available, max_price, limit)
         availability = await cloreai_connector.get_gpu_availability()
         return availability
     except Exception as e:
@@ -233,6 +360,116 @@ async def get_gpu_pricing():
         logger.error(f"Σφάλμα κατά τη λήψη τιμών ενοικίασης GPU από CloreAI: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/cloreai/offers", response_model=List[RentalOffer])
+async def get_rental_offers(
+    model: Optional[str] = Query(None, description="Μοντέλο GPU (π.χ. RTX 3080)"),
+    min_available: int = Query(0, ge=0, description="Ελάχιστος αριθμός διαθέσιμων GPU"),
+    max_price: Optional[float] = Query(None, ge=0, description="Μέγιστη τιμή ανά ώρα"),
+    limit: Optional[int] = Query(None, ge=1, description="Μέγιστος αριθμός αποτελεσμάτων")
+):
+    """
+    Προσφορές ενοικίασης GPU (διαθεσιμότητα, τιμές και τιμή ανά μονάδα απόδοσης).
+    """
+    try:
+        return await cloreai_connector.query_offers(model, min_available, max_price, limit)
+    except Exception as e:
+        logger.error(f"Σφάλμα κατά τη λήψη προσφορών CloreAI: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/cloreai/rentals", response_model=GPURental)
+async def create_rental(request: RentalCreate):
+    """
+    Ενοικίαση GPU και καταγραφή της στο μητρώο ενοικιάσεων.
+    """
+    result = await cloreai_connector.rent_gpu(request.gpu_model, request.duration_hours)
+    if result.get("status") != "success":
+        raise HTTPException(status_code=502, detail=result.get("message", "Αποτυχία ενοικίασης GPU"))
+    try:
+        return await rental_tracker.register(
+            result,
+            auto_renew=request.auto_renew,
+            renew_hours=request.renew_hours,
+            max_price_per_hour=request.max_price_per_hour,
+            max_total_cost=request.max_total_cost
+        )
+    except Exception as e:
+        # Η GPU έχει ήδη ενοικιαστεί: χωρίς εγγραφή δεν θα παρακολουθούνταν ούτε θα ακυρωνόταν ποτέ
+        rental_id = result.get("rental_id")
+        logger.error(f"Σφάλμα κατά την καταγραφή της ενοικίασης {rental_id}, ακύρωση: {str(e)}")
+        cancelled = await cloreai_connector.cancel_rental(rental_id) if rental_id else {}
+        if cancelled.get("status") != "success":
+            logger.critical(f"Η ενοικίαση {rental_id} δεν καταγράφηκε ούτε ακυρώθηκε: απαιτείται χειροκίνητη ακύρωση")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/cloreai/rentals", response_model=List[GPURental])
+def get_rentals(
+    status: Optional[str] = Query(None, description="Φίλτρο κατάστασης (active, expired, cancelled, failed)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Ενοικιάσεις GPU από το μητρώο με το συσσωρευμένο κόστος τους.
+    """
+    return list_rentals(db, status)
+
+@app.get("/api/cloreai/rentals/tracker", response_model=Dict)
+async def get_rental_tracker_status():
+    """
+    Κατάσταση της παρακολούθησης ενοικιάσεων και αποτέλεσμα του τελευταίου κύκλου.
+    """
+    return rental_tracker.status()
+
+@app.delete("/api/cloreai/rentals/{rental_id}", response_model=Dict)
+async def cancel_rental(rental_id: str):
+    """
+    Ακύρωση ενοικίασης GPU.
+    """
+    result = await rental_tracker.cancel(rental_id)
+    if result.get("status") != "success":
+        raise HTTPException(status_code=502, detail=result.get("message", "Αποτυχία ακύρωσης ενοικίασης"))
+    return result
+
+async def _run_arbitrage(request: ArbitrageRequest, coins_data: Dict, own_gpus: List[Dict]) -> Dict:
+    """
+    Βελτιστοποίηση ενοικίασης πάνω στον πίνακα προσφορών του CloreAI
+    """
+    if request.gpu_models:
+        results = await asyncio.gather(*[
+            cloreai_connector.query_offers(model, 1, request.max_price) for model in request.gpu_models
+        ])
+        offers = [offer for result in results for offer in result]
+    else:
+        offers = await cloreai_connector.query_offers(None, 1, request.max_price)
+    # Οι τιμές αγοράς για τις δικές μας GPU προκύπτουν από όλες τις προσφορές
+    market = await cloreai_connector.query_offers() if request.gpu_models or request.max_price is not None else offers
+
+    return arbitrage_optimizer.optimize(
+        offers,
+        coins_data,
+        budget=request.budget,
+        horizon_hours=request.horizon_hours,
+        own_gpus=own_gpus,
+        energy_cost_per_kwh=energy_connector.energy_cost_per_kwh,
+        max_gpus=request.max_gpus,
+        market_offers=market
+    )
+
+@app.post("/api/cloreai/arbitrage", response_model=Dict)
+async def optimize_rentals(request: ArbitrageRequest):
+    """
+    Κατάταξη προσφορών CloreAI κατά καθαρό κέρδος εξόρυξης, επιλογή χαρτοφυλακίου
+    ενοικίασης εντός προϋπολογισμού και σύγκριση εξόρυξης/διάθεσης για τις δικές μας GPU.
+    """
+    try:
+        if request.include_own_gpus:
+            mining_stats = await mining_connector.get_stats()
+            coins_data, own_gpus = mining_stats.get("coins_data", {}), mining_stats.get("gpus", [])
+        else:
+            coins_data, own_gpus = await mining_connector.get_coin_profitability(), []
+        return await _run_arbitrage(request, coins_data, own_gpus)
+    except Exception as e:
+        logger.error(f"Σφάλμα κατά τη βελτιστοποίηση ενοικίασης: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ---------- PROFITABILITY ENDPOINTS ---------- #
 
 @app.post("/api/profitability", response_model=ProfitabilityResponse)
@@ -243,39 +480,275 @@ async def calculate_profitability(request: ProfitabilityRequest, db: Session = D
         energy_data = await energy_connector.get_energy_data()
         cloreai_data = await cloreai_connector.get_profitability(request.gpu_models)
         
-        # Χρησιμοποιούμε το AI για πιο προηγμένη ανάλυση
-        user_config = {"gpus": request.gpu_models}
-        market_data = {"profitability": mining_stats.coins_data}
-        
-        # Βελτιστοποίηση στρατηγικής με AI
-        optimization = await ai_engine.optimize_mining_strategy(
-            user_config, market_data, energy_data.dict()
+        # Η σύσταση ενοικίασης προκύπτει από τον βελτιστοποιητή ενοικίασης/εξόρυξης
+        arbitrage = await _run_arbitrage(
+            ArbitrageRequest(budget=float(os.getenv("CLOREAI_RENTAL_BUDGET", 100)), gpu_models=request.gpu_models or None),
+            mining_stats.get("coins_data", {}),
+            mining_stats.get("gpus", [])
         )
+        cloreai_data["arbitrage"] = {key: arbitrage[key] for key in ("portfolio", "own_gpus")}
+        cloreai_data["recommendation"] = arbitrage["recommendation"]
+        
+        # Ανάθεση κάθε GPU σε νόμισμα/ενοικίαση με τους περιορισμούς της MiningConfig
+        user_config = {"gpus": mining_stats.get("gpus", []), "active_coin": mining_stats.get("active_coin")}
+        market_data = {
+            "profitability": mining_stats.get("coins_data", {}),
+            "rental_prices": {
+                gpu["model"]: gpu["market_price_per_hour"]
+                for gpu in arbitrage["own_gpus"] if gpu.get("market_price_per_hour") is not None
+            }
+        }
+        optimization = await ai_engine.optimize_mining_strategy(user_config, market_data, energy_data)
+        cloreai_data["strategy"] = {key: optimization.get(key) for key in ("suggestions", "totals", "solver")}
         
         return {
             "mining_stats": mining_stats,
             "energy_data": energy_data,
             "cloreai_data": cloreai_data,
-            "recommendation": optimization["suggestions"].get("recommended_coin", "")
+            "recommendation": optimization.get("suggestions", {}).get("recommended_coin", "")
         }
     except Exception as e:
         logger.error(f"Σφάλμα κατά τον υπολογισμό κερδοφορίας: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# ---------- ENDPOINTS ΒΑΣΗΣ ΔΕΔΟΜΕΝΩΝ ---------- #
+
+@app.get("/api/db/partitions", response_model=Dict)
+async def get_partitions():
+    """
+    Μηνιαίες διαμερίσεις των χρονοσειρών (όρια, μέγεθος) και αποτέλεσμα της τελευταίας συντήρησης.
+    """
+    try:
+        return await asyncio.to_thread(partition_maintainer.status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/db/partitions/maintain", response_model=Dict)
+async def maintain_partitions():
+    """
+    Άμεση εκτέλεση ενός κύκλου συντήρησης διαμερίσεων.
+    """
+    return await partition_maintainer.maintain()
+
+@app.get("/api/db/tables", response_model=Dict)
+async def get_table_metrics():
+    """
+    Πλήθος γραμμών και μέγεθος των πινάκων χρονοσειρών και κατάσταση της διατήρησης δεδομένων.
+    """
+    try:
+        tables = await asyncio.to_thread(retention_manager.table_metrics)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"tables": tables, "retention": retention_manager.status()}
+
+@app.post("/api/db/retention/run", response_model=Dict)
+async def run_retention():
+    """
+    Άμεση εκτέλεση ενός κύκλου σύμπτυξης και διαγραφής παλιών δεδομένων.
+    """
+    return await retention_manager.maintain()
+
 # ---------- AI ENDPOINTS ---------- #
 
+async def _cancel_on_disconnect(request: Request, coro):
+    """
+    Εκτέλεση coroutine που ακυρώνεται αν ο client αποσυνδεθεί πριν ολοκληρωθεί
+    """
+    task = asyncio.create_task(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=0.5)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            logger.info(f"Ακύρωση αιτήματος {request.url.path}: ο client αποσυνδέθηκε")
+            # 499: ο client έκλεισε τη σύνδεση (η απάντηση δεν θα παραδοθεί)
+            raise HTTPException(status_code=499, detail="Ο client αποσυνδέθηκε")
+
+def _inference_http_error(e: Exception) -> HTTPException:
+    if isinstance(e, (ModelNotReadyError, InferenceQueueFullError)):
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "10"}
+        )
+    if isinstance(e, InferenceTimeoutError):
+        return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    logger.error(f"Σφάλμα κατά τη συνομιλία με το AI: {str(e)}")
+    return HTTPException(status_code=500, detail=str(e))
+
+def _chat_message(message: Optional[str], body: Optional[ChatRequest]) -> str:
+    message = body.message if body is not None else message
+    if not message:
+        raise HTTPException(status_code=422, detail="Απαιτείται μήνυμα (query parameter message ή σώμα JSON)")
+    return message
+
 @app.post("/api/ai/chat", response_model=Dict)
-async def chat_with_ai(message: str = Query(..., description="Μήνυμα προς το AI")):
+async def chat_with_ai(request: Request,
+                       message: Optional[str] = Query(None, description="Μήνυμα προς το AI"),
+                       body: Optional[ChatRequest] = Body(None)):
     """
     Συνομιλία με το AI chatbot.
+
+    Με session_id στο σώμα η συνομιλία συνεχίζεται σε πολλούς γύρους και η
+    απάντηση αναφέρει πόσα tokens του prompt επαναχρησιμοποιήθηκαν από το KV cache.
     """
+    message = _chat_message(message, body)
     try:
-        response = await ai_engine.generate_response(message)
+        if body is not None and body.session_id:
+            return await _cancel_on_disconnect(request, ai_engine.chat_session(message, body.session_id))
+        response = await _cancel_on_disconnect(request, ai_engine.generate_response(message))
         return {"response": response}
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Σφάλμα κατά τη συνομιλία με το AI: {str(e)}")
+        raise _inference_http_error(e)
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/ai/chat/stream")
+async def stream_chat_with_ai(body: ChatRequest):
+    """
+    Συνομιλία με το AI chatbot με ροή tokens (Server-Sent Events).
+
+    Κάθε κομμάτι κειμένου αποστέλλεται ως event "token" μόλις παραχθεί, και η
+    ροή κλείνει με event "done" (ή "error" αν η παραγωγή αποτύχει στην πορεία).
+    Σφάλματα πριν το πρώτο token επιστρέφονται ως κανονικές HTTP απαντήσεις.
+    """
+    stream = ai_engine.stream_response(body.message)
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = None
+    except Exception as e:
+        raise _inference_http_error(e)
+
+    async def events():
+        try:
+            if first is not None:
+                yield _sse("token", {"text": first})
+                async for chunk in stream:
+                    yield _sse("token", {"text": chunk})
+            yield _sse("done", {})
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά τη ροή απάντησης του AI: {str(e)}")
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            # Αποσύνδεση του client: κλείσιμο του generator διακόπτει την παραγωγή
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/ai/metrics", response_model=Dict)
+async def get_ai_metrics():
+    """
+    Μετρικές inference: βάθος ουράς, ταυτόχρονες εκτελέσεις, timeouts, ακυρώσεις
+    μέγεθος batches, χρόνος έως το πρώτο token (TTFT) των streaming απαντήσεων
+    χρόνοι κρύων/θερμών επιλύσεων του βελτιστοποιητή στρατηγικής, καταγραφή
+    δειγμάτων fine-tuning και ποσοστό ερωτήσεων που απαντήθηκαν χωρίς το μοντέλο.
+    """
+    metrics = ai_engine.metrics()
+    return {
+        "model": ai_engine.readiness(),
+        "inference": metrics["executor"],
+        "batching": metrics["batching"],
+        "streaming": metrics["streaming"],
+        "cache": metrics["cache"],
+        "context": metrics["context"],
+        "sessions": metrics["sessions"],
+        "strategy": metrics["strategy"],
+        "dataset": metrics["dataset"],
+        "router": metrics["router"],
+        "active_model": metrics["model"]
+    }
+
+@app.post("/api/ai/router/evaluate", response_model=Dict)
+def evaluate_intent_router():
+    """
+    Ακρίβεια του IntentRouter στο held-out σύνολο (ενσωματωμένο και AI_ROUTER_EVAL_FILE) και στο σύνολο ρύθμισης.
+    """
+    if ai_engine.router is None:
+        raise HTTPException(status_code=404, detail="Ο router ερωτήσεων δεν είναι διαθέσιμος")
+    return ai_engine.router.evaluate()
+
+@app.get("/api/ai/models", response_model=List[ModelVariant])
+def get_model_variants(db: Session = Depends(get_db)):
+    """
+    Παραλλαγές του AI μοντέλου στο μητρώο (διαδρομή, κβάντιση, μνήμη, καθυστέρηση ζεστάματος).
+    """
+    return list_variants(db)
+
+@app.post("/api/ai/models", response_model=ModelVariant)
+def create_model_variant(request: ModelVariantCreate, db: Session = Depends(get_db)):
+    """
+    Καταχώριση (ή ενημέρωση) παραλλαγής μοντέλου. Δεν φορτώνεται μέχρι να ενεργοποιηθεί.
+    """
+    try:
+        return register_variant(db, request.name, request.path, request.quantization, request.device)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/ai/models/{name}/activate", response_model=Dict)
+async def activate_model_variant(name: str):
+    """
+    Αλλαγή του ενεργού μοντέλου χωρίς επανεκκίνηση. Η τρέχουσα παραλλαγή
+    εξυπηρετεί τα αιτήματα μέχρι η νέα να φορτωθεί και να ζεσταθεί.
+    """
+    try:
+        return {"status": "success", **(await ai_engine.swap_model(name))}
+    except ModelVariantNotFoundError:
+        raise HTTPException(status_code=404, detail="Η παραλλαγή μοντέλου δεν βρέθηκε")
+    except ModelSwapInProgressError as e:
+        raise HTTPException(status_code=409, detail=f"Εκτελείται ήδη αλλαγή μοντέλου ({str(e)})")
+    except Exception as e:
+        logger.error(f"Σφάλμα κατά την αλλαγή μοντέλου: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/ai/models/{name}/benchmarks", response_model=List[Dict])
+def get_model_benchmarks(name: str, limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    """
+    Αποτελέσματα benchmark της παραλλαγής (tokens/sec, καθυστέρηση) ανά ταυτοχρονισμό.
+    """
+    try:
+        return [benchmark_to_dict(benchmark) for benchmark in list_benchmarks(db, name, limit)]
+    except ModelVariantNotFoundError:
+        raise HTTPException(status_code=404, detail="Η παραλλαγή μοντέλου δεν βρέθηκε")
+
+@app.post("/api/ai/sessions", response_model=Dict)
+async def create_ai_session():
+    """
+    Δημιουργία νέας συνεδρίας συνομιλίας με το AI.
+    """
+    return ai_engine.sessions.get_or_create().summary()
+
+@app.get("/api/ai/sessions", response_model=Dict)
+async def list_ai_sessions():
+    """
+    Ενεργές συνεδρίες συνομιλίας και χρήση μνήμης KV cache.
+    """
+    return {"metrics": ai_engine.sessions.metrics(), "sessions": ai_engine.sessions.summaries()}
+
+@app.delete("/api/ai/sessions/{session_id}", response_model=Dict)
+async def delete_ai_session(session_id: str):
+    """
+    Τερματισμός συνεδρίας συνομιλίας και αποδέσμευση του KV cache της.
+    """
+    if not ai_engine.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Η συνεδρία δεν βρέθηκε")
+    return {"status": "success", "session_id": session_id}
+
+@app.delete("/api/ai/cache", response_model=Dict)
+async def clear_ai_cache():
+    """
+    Χειροκίνητη εκκαθάριση της cache απαντήσεων του AI.
+    """
+    return {"removed": ai_engine.cache.invalidate()}
+
 @app.post("/api/ai/analyze", response_model=Dict)
 async def analyze_mining(data: Dict):
     """
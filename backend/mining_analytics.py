@@ -0,0 +1,346 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import MiningStat
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Όριο robust z-score (median/MAD) πάνω από το οποίο μια τιμή θεωρείται outlier
+OUTLIER_THRESHOLD = float(os.getenv("ANALYTICS_OUTLIER_THRESHOLD", 3.5))
+
+# Εναλλακτικά ονόματα πεδίων telemetry (NiceHash, mining_stats, στιγμιότυπα του API)
+_COLUMN_ALIASES = {
+    "gpu_id": ("gpu_id", "gpu", "device_id", "id"),
+    "model": ("model", "name", "gpu_model"),
+    "timestamp": ("timestamp", "time", "ts"),
+    "hashrate": ("hashrate", "speedAccepted", "speed"),
+    "power": ("power", "power_consumption", "powerUsage"),
+    "temperature": ("temperature", "temp"),
+    "earnings": ("earnings", "earnings_24h"),
+    "coin": ("coin", "active_coin"),
+}
+
+_HOURS_PER_DAY = 24.0
+
+
+def telemetry_frame(records: List[Dict]) -> pd.DataFrame:
+    """
+    DataFrame telemetry με ενιαία ονόματα στηλών από λίστα εγγραφών
+
+    Εγγραφές χωρίς gpu_id αντιστοιχίζονται στη θέση τους (στιγμιότυπο μιας
+    στιγμής), ενώ εγγραφές χωρίς timestamp παίρνουν την τρέχουσα ώρα.
+    """
+    raw = pd.DataFrame.from_records(records)
+    frame = pd.DataFrame(index=raw.index)
+    for column, aliases in _COLUMN_ALIASES.items():
+        source = next((alias for alias in aliases if alias in raw.columns), None)
+        if source is not None:
+            frame[column] = raw[source]
+
+    if "gpu_id" not in frame:
+        frame["gpu_id"] = raw.index.astype(str)
+    frame["gpu_id"] = frame["gpu_id"].astype(str)
+    if "model" not in frame:
+        frame["model"] = "Unknown"
+    frame["model"] = frame["model"].fillna("Unknown").astype(str)
+
+    if "timestamp" in frame:
+        timestamps = frame["timestamp"]
+        if pd.api.types.is_numeric_dtype(timestamps):
+            frame["timestamp"] = pd.to_datetime(timestamps, unit="s", utc=True)
+        else:
+            frame["timestamp"] = pd.to_datetime(timestamps, utc=True, format="ISO8601")
+    else:
+        frame["timestamp"] = pd.Timestamp.now(tz="UTC")
+
+    for column in ("hashrate", "power", "temperature", "earnings"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce") if column in frame else np.nan
+    return frame.dropna(subset=["hashrate", "power"])
+
+
+def load_mining_telemetry(db: Session, start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    Telemetry από τον πίνακα mining_stats για το χρονικό παράθυρο [start, end)
+
+    Ο πίνακας δεν έχει στοιχεία ανά GPU, οπότε κάθε χρήστης αντιμετωπίζεται ως
+    μία "συσκευή" (το σύνολο των rigs του).
+    """
+    query = (
+        select(
+            MiningStat.user_id,
+            MiningStat.timestamp,
+            MiningStat.hashrate,
+            MiningStat.power_consumption,
+            MiningStat.temperature,
+            MiningStat.earnings,
+            MiningStat.coin
+        )
+        .where(MiningStat.timestamp >= start)
+        .where(MiningStat.timestamp < end)
+        .order_by(MiningStat.timestamp)
+    )
+    rows = db.execute(query).all()
+    frame = pd.DataFrame(rows, columns=["user_id", "timestamp", "hashrate", "power", "temperature", "earnings", "coin"])
+    frame["gpu_id"] = "user-" + frame["user_id"].astype(str)
+    frame["model"] = "fleet"
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], utc=True)
+    return frame.drop(columns=["user_id"]).dropna(subset=["hashrate", "power"])
+
+
+def _group_linear_fit(codes: np.ndarray, groups: int, x: np.ndarray, y: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Ελάχιστα τετράγωνα y = a + b·x ανά ομάδα, με αθροίσματα bincount (χωρίς βρόχο)
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    if not valid.all():
+        codes, x, y = codes[valid], x[valid], y[valid]
+    n = np.bincount(codes, minlength=groups).astype(float)
+    sx = np.bincount(codes, x, minlength=groups)
+    sy = np.bincount(codes, y, minlength=groups)
+    sxx = np.bincount(codes, x * x, minlength=groups)
+    sxy = np.bincount(codes, x * y, minlength=groups)
+    syy = np.bincount(codes, y * y, minlength=groups)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        cov = n * sxy - sx * sy
+        slope = np.where(var_x > 1e-12, cov / var_x, np.nan)
+        intercept = (sy - slope * sx) / n
+        r2 = np.where((var_x > 1e-12) & (var_y > 1e-12), cov * cov / (var_x * var_y), np.nan)
+    return {"slope": slope, "intercept": intercept, "r2": r2, "n": n}
+
+
+def _robust_z(values: pd.Series, groups: pd.Series) -> np.ndarray:
+    """
+    Robust z-score (0.6745·(x − median)/MAD) μέσα σε κάθε ομάδα
+    """
+    grouped = values.groupby(groups, sort=False, observed=True)
+    median = grouped.transform("median")
+    deviation = (values - median).abs()
+    mad = deviation.groupby(groups, sort=False, observed=True).transform("median")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * (values - median).to_numpy() / mad.to_numpy()
+    return np.where(np.isfinite(z), z, 0.0)
+
+
+def _clean(value) -> Optional[float]:
+    if value is None:
+        return None
+    value = float(value)
+    return round(value, 6) if np.isfinite(value) else None
+
+
+def analyze_telemetry(frame: pd.DataFrame,
+                      energy_cost_per_kwh: Optional[float] = None,
+                      horizons_days: tuple = (1, 7, 30),
+                      outlier_threshold: float = OUTLIER_THRESHOLD) -> Dict:
+    """
+    Αναλυτικά στοιχεία για ένα παράθυρο telemetry (μία vectorized διέλευση ανά μέτρηση)
+
+    - κατάταξη GPU κατά αποδοτικότητα (MH/s ανά W) και σύγκριση με GPU ίδιου μοντέλου
+    - outliers: δείγματα με ακραία αποδοτικότητα/θερμοκρασία για τη GPU τους και
+      GPU με ακραία αποδοτικότητα για το μοντέλο τους
+    - κλίσεις τάσης (ανά ημέρα) για hashrate, θερμοκρασία και αποδοτικότητα
+    - παλινδρόμηση hashrate ως προς ισχύ ανά μοντέλο και για όλο τον στόλο
+    - προβολή εσόδων (με την τάση τους) και κόστους ενέργειας
+    """
+    if frame.empty:
+        return {"samples": 0, "gpus": [], "outliers": {"samples": [], "gpus": []}, "regressions": {}, "projection": None}
+
+    # Κανένας υπολογισμός δεν εξαρτάται από τη σειρά των γραμμών, οπότε δεν
+    # ταξινομείται (ούτε αντιγράφεται) το DataFrame
+    gpu_codes, gpu_ids = pd.factorize(frame["gpu_id"], sort=False)
+    groups = len(gpu_ids)
+    timestamps = frame["timestamp"]
+    start = timestamps.min()
+    end = timestamps.max()
+    days = ((timestamps - start).dt.total_seconds() / 86400).to_numpy()
+
+    hashrate = frame["hashrate"].to_numpy(dtype=float)
+    power = frame["power"].to_numpy(dtype=float)
+    temperature = frame["temperature"].to_numpy(dtype=float)
+    earnings = frame["earnings"].to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        efficiency = np.where(power > 0, hashrate / power, np.nan)
+
+    # Συγκεντρωτικά ανά GPU
+    samples = np.bincount(gpu_codes, minlength=groups)
+    sum_hashrate = np.bincount(gpu_codes, hashrate, minlength=groups)
+    sum_power = np.bincount(gpu_codes, power, minlength=groups)
+    temp_valid = np.isfinite(temperature)
+    temp_count = np.bincount(gpu_codes[temp_valid], minlength=groups)
+    sum_temp = np.bincount(gpu_codes[temp_valid], temperature[temp_valid], minlength=groups)
+    max_temp = np.full(groups, np.nan)
+    np.fmax.at(max_temp, gpu_codes[temp_valid], temperature[temp_valid])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gpu_efficiency = np.where(sum_power > 0, sum_hashrate / sum_power, np.nan)
+        mean_temp = np.where(temp_count > 0, sum_temp / temp_count, np.nan)
+    last_index = np.zeros(groups, dtype=int)
+    last_index[gpu_codes] = np.arange(len(gpu_codes))
+    gpu_models = frame["model"].to_numpy()[last_index]
+
+    # Σύγκριση με GPU του ίδιου μοντέλου (ή όλου του στόλου αν είναι λίγες)
+    per_gpu = pd.DataFrame({"model": gpu_models, "efficiency": gpu_efficiency})
+    model_counts = per_gpu.groupby("model")["model"].transform("size").to_numpy()
+    peer_group = np.where(model_counts >= 3, gpu_models, "__fleet__")
+    model_median = per_gpu.groupby(peer_group)["efficiency"].transform("median").to_numpy()
+    peer_z = _robust_z(per_gpu["efficiency"], pd.Series(peer_group))
+
+    # Τάσεις ανά ημέρα
+    hashrate_trend = _group_linear_fit(gpu_codes, groups, days, hashrate)
+    temperature_trend = _group_linear_fit(gpu_codes, groups, days, temperature)
+    efficiency_trend = _group_linear_fit(gpu_codes, groups, days, efficiency)
+
+    # Outliers σε επίπεδο δείγματος, ως προς την ίδια τη GPU
+    # Categorical από τους έτοιμους κωδικούς, ώστε το groupby να μην ξανακάνει factorize
+    codes_series = pd.Series(pd.Categorical.from_codes(gpu_codes, categories=range(groups)))
+    efficiency_z = _robust_z(pd.Series(efficiency), codes_series)
+    temperature_z = _robust_z(pd.Series(temperature), codes_series)
+    score = np.maximum(np.abs(efficiency_z), np.abs(temperature_z))
+    flagged = np.flatnonzero(score > outlier_threshold)
+    outlier_counts = np.bincount(gpu_codes[flagged], minlength=groups)
+    top = flagged[np.argsort(-score[flagged], kind="stable")[:20]]
+    top_timestamps = timestamps.iloc[top]
+
+    mean_hashrate = sum_hashrate / np.maximum(samples, 1)
+    order = np.argsort(-np.nan_to_num(gpu_efficiency, nan=-np.inf), kind="stable")
+    gpus = []
+    for rank, index in enumerate(order, start=1):
+        hashrate_slope = hashrate_trend["slope"][index]
+        temperature_slope = temperature_trend["slope"][index]
+        degrading = bool(
+            (np.isfinite(hashrate_slope) and mean_hashrate[index] > 0 and hashrate_slope < -0.01 * mean_hashrate[index])
+            or (np.isfinite(temperature_slope) and temperature_slope > 0.5)
+        )
+        gpus.append({
+            "rank": rank,
+            "gpu_id": gpu_ids[index],
+            "model": gpu_models[index],
+            "samples": int(samples[index]),
+            "efficiency": _clean(gpu_efficiency[index]),
+            "relative_efficiency": _clean(gpu_efficiency[index] / model_median[index]) if model_median[index] else None,
+            "avg_hashrate": _clean(mean_hashrate[index]),
+            "avg_power": _clean(sum_power[index] / max(samples[index], 1)),
+            "avg_temperature": _clean(mean_temp[index]),
+            "max_temperature": _clean(max_temp[index]),
+            "outlier_samples": int(outlier_counts[index]),
+            "trends": {
+                "hashrate_per_day": _clean(hashrate_slope),
+                "temperature_per_day": _clean(temperature_slope),
+                "efficiency_per_day": _clean(efficiency_trend["slope"][index])
+            },
+            "degrading": degrading
+        })
+
+    # Παλινδρόμηση hashrate ως προς ισχύ
+    gpu_model_codes, models = pd.factorize(gpu_models, sort=True)
+    model_codes = gpu_model_codes[gpu_codes]
+    by_model = _group_linear_fit(model_codes, len(models), power, hashrate)
+    fleet = _group_linear_fit(np.zeros(len(power), dtype=int), 1, power, hashrate)
+    regressions = {
+        model: {
+            "hashrate_per_watt": _clean(by_model["slope"][index]),
+            "intercept": _clean(by_model["intercept"][index]),
+            "r2": _clean(by_model["r2"][index]),
+            "samples": int(by_model["n"][index])
+        }
+        for index, model in enumerate(models)
+    }
+    regressions["fleet"] = {
+        "hashrate_per_watt": _clean(fleet["slope"][0]),
+        "intercept": _clean(fleet["intercept"][0]),
+        "r2": _clean(fleet["r2"][0]),
+        "samples": int(fleet["n"][0])
+    }
+
+    return {
+        "window": {"start": start.isoformat(), "end": end.isoformat(), "days": _clean(days.max())},
+        "samples": int(len(frame)),
+        "gpus": gpus,
+        "outliers": {
+            "threshold": outlier_threshold,
+            "samples": [
+                {
+                    "gpu_id": gpu_ids[gpu_codes[index]],
+                    "timestamp": timestamp.isoformat(),
+                    "efficiency_z": _clean(efficiency_z[index]),
+                    "temperature_z": _clean(temperature_z[index])
+                }
+                for index, timestamp in zip(top, top_timestamps)
+            ],
+            "gpus": [
+                {"gpu_id": gpu_ids[index], "model": gpu_models[index], "z": _clean(peer_z[index])}
+                for index in np.flatnonzero(np.abs(peer_z) > outlier_threshold)
+            ]
+        },
+        "regressions": regressions,
+        "projection": _project(gpu_codes, days, power, earnings, energy_cost_per_kwh, horizons_days)
+    }
+
+
+def _project(gpu_codes: np.ndarray,
+             days: np.ndarray,
+             power: np.ndarray,
+             earnings: np.ndarray,
+             energy_cost_per_kwh: Optional[float],
+             horizons_days: tuple) -> Dict:
+    """
+    Προβολή εσόδων και κόστους ενέργειας για τους επόμενους `horizons_days`
+
+    Τα earnings θεωρούνται ρυθμός ανά 24ωρο τη στιγμή της μέτρησης (όπως το
+    total_earnings_24h). Ο ρυθμός του στόλου ανά ώρα προσαρμόζεται γραμμικά και
+    η προβολή ολοκληρώνει τη γραμμή από το τέλος του παραθύρου (όχι κάτω από 0).
+    """
+    hours = np.floor(days * _HOURS_PER_DAY).astype(int)
+    # Ισχύς στόλου ανά ώρα: άθροισμα των μέσων τιμών κάθε GPU σε εκείνη την ώρα
+    stride = int(gpu_codes.max()) + 1
+    unique_keys, key_codes = np.unique(hours * stride + gpu_codes, return_inverse=True)
+    key_count = np.bincount(key_codes)
+    key_power = np.bincount(key_codes, power) / key_count
+    hour_values, hour_codes = np.unique(unique_keys // stride, return_inverse=True)
+    fleet_power = np.bincount(hour_codes, key_power)
+    recent = hour_values >= hour_values.max() - 23
+    power_kw = float(fleet_power[recent].mean()) / 1000 if recent.any() else 0.0
+
+    projection = {"fleet_power_kw": _clean(power_kw), "horizons": {}}
+    rate_today = slope = None
+    if np.isfinite(earnings).any():
+        valid = np.isfinite(earnings)
+        key_earnings = np.bincount(key_codes[valid], earnings[valid], minlength=len(unique_keys))
+        key_earning_count = np.bincount(key_codes[valid], minlength=len(unique_keys))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            key_rate = np.where(key_earning_count > 0, key_earnings / key_earning_count, 0.0)
+        fleet_rate = np.bincount(hour_codes, key_rate)
+        fit = _group_linear_fit(np.zeros(len(hour_values), dtype=int), 1, hour_values / _HOURS_PER_DAY, fleet_rate)
+        slope = fit["slope"][0] if np.isfinite(fit["slope"][0]) else 0.0
+        rate_today = float(fleet_rate[recent].mean()) if recent.any() else float(fleet_rate.mean())
+        projection["earnings_rate_per_day"] = _clean(rate_today)
+        projection["earnings_trend_per_day"] = _clean(slope)
+
+    for horizon in horizons_days:
+        entry = {}
+        if rate_today is not None:
+            entry["earnings"] = _clean(max(0.0, rate_today * horizon + slope * horizon * horizon / 2))
+        if energy_cost_per_kwh is not None:
+            entry["energy_cost"] = _clean(power_kw * _HOURS_PER_DAY * horizon * energy_cost_per_kwh)
+        if "earnings" in entry and "energy_cost" in entry:
+            entry["net"] = _clean(entry["earnings"] - entry["energy_cost"])
+        projection["horizons"][f"{horizon}d"] = entry
+    return projection
+
+
+def default_analysis_range(days: int = 30):
+    end = datetime.now(timezone.utc)
+    return end - timedelta(days=days), end
@@ -0,0 +1,227 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from backend.models import ModelBenchmark, ModelVariant
+
+logger = logging.getLogger(__name__)
+
+# Τρόποι κβάντισης: dynamic (CPU int8), 8bit/4bit (CUDA, bitsandbytes) ή none
+QUANTIZATIONS = ("none", "dynamic", "8bit", "4bit")
+
+
+class ModelVariantNotFoundError(Exception):
+    """
+    Δεν υπάρχει παραλλαγή μοντέλου με αυτό το όνομα στο μητρώο
+    """
+
+
+class ModelSwapInProgressError(Exception):
+    """
+    Εκτελείται ήδη αλλαγή του ενεργού μοντέλου
+    """
+
+
+def model_memory_bytes(model) -> int:
+    """
+    Μνήμη των βαρών του μοντέλου (bytes)
+
+    Μετρά τα tensors του state_dict. Τα γραμμικά επίπεδα του dynamic
+    quantization αποθηκεύουν τα βάρη ως tuple (packed params), οπότε τα tuples
+    εξετάζονται αναδρομικά.
+    """
+    def size(value) -> int:
+        if isinstance(value, (tuple, list)):
+            return sum(size(item) for item in value)
+        if hasattr(value, "element_size") and hasattr(value, "numel"):
+            return value.numel() * value.element_size()
+        return 0
+
+    try:
+        return sum(size(value) for value in model.state_dict().values())
+    except Exception as e:
+        logger.warning(f"Αδυναμία υπολογισμού μνήμης μοντέλου: {str(e)}")
+        return 0
+
+
+class LoadedModel:
+    """
+    Φορτωμένη παραλλαγή μοντέλου: tokenizer, βάρη και KV cache του κοινού προθέματος
+
+    Τα αιτήματα κρατούν αναφορά στο στιγμιότυπο που ήταν ενεργό όταν ξεκίνησαν,
+    οπότε η αλλαγή μοντέλου δεν επηρεάζει όσα εκτελούνται ήδη.
+    """
+
+    def __init__(self, name: str, path: str, quantization: str, device: str, model, tokenizer,
+                 generation: int = 0):
+        self.name = name
+        self.path = path
+        self.quantization = quantization
+        self.device = device
+        self.model = model
+        self.tokenizer = tokenizer
+        self.generation = generation
+        self.load_seconds: Optional[float] = None
+        self.memory_bytes = 0
+        self.warmup_latency_ms: Optional[float] = None
+        self.loaded_at = datetime.now(timezone.utc)
+        # KV cache του system prompt, υπολογίζεται με την πρώτη συνεδρία
+        self.prefix: Optional[Tuple[Any, List[int]]] = None
+        self.prefix_lock = threading.Lock()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "quantization": self.quantization,
+            "device": self.device,
+            "generation": self.generation,
+            "memory_bytes": self.memory_bytes,
+            "load_seconds": self.load_seconds,
+            "warmup_latency_ms": self.warmup_latency_ms,
+            "loaded_at": self.loaded_at.isoformat()
+        }
+
+
+def variant_to_dict(variant: ModelVariant, benchmark: Optional[ModelBenchmark] = None) -> Dict:
+    data = {
+        column.name: getattr(variant, column.name)
+        for column in ModelVariant.__table__.columns
+    }
+    if benchmark is not None:
+        data["latest_benchmark"] = benchmark_to_dict(benchmark)
+    return data
+
+
+def benchmark_to_dict(benchmark: ModelBenchmark) -> Dict:
+    return {
+        column.name: getattr(benchmark, column.name)
+        for column in ModelBenchmark.__table__.columns
+    }
+
+
+def list_variants(db: Session) -> List[ModelVariant]:
+    return db.query(ModelVariant).order_by(ModelVariant.name).all()
+
+
+def get_variant(db: Session, name: str) -> Optional[ModelVariant]:
+    return db.query(ModelVariant).filter(ModelVariant.name == name).first()
+
+
+def active_variant(db: Session) -> Optional[ModelVariant]:
+    return db.query(ModelVariant).filter(ModelVariant.status == "active").first()
+
+
+def latest_benchmark(db: Session, variant: ModelVariant) -> Optional[ModelBenchmark]:
+    return (
+        db.query(ModelBenchmark)
+        .filter(ModelBenchmark.variant_id == variant.id)
+        .order_by(ModelBenchmark.timestamp.desc(), ModelBenchmark.id.desc())
+        .first()
+    )
+
+
+def register_variant(db: Session, name: str, path: str, quantization: str = "dynamic",
+                     device: str = "cpu") -> ModelVariant:
+    """
+    Καταχώριση (ή ενημέρωση) παραλλαγής μοντέλου
+
+    Οι αλλαγές σε ενεργή παραλλαγή ισχύουν από την επόμενη ενεργοποίησή της.
+    """
+    quantization = quantization.lower()
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Μη υποστηριζόμενη κβάντιση: {quantization}")
+    variant = get_variant(db, name)
+    if variant is None:
+        variant = ModelVariant(name=name, status="registered")
+        db.add(variant)
+    variant.path = path
+    variant.quantization = quantization
+    variant.device = device
+    db.commit()
+    db.refresh(variant)
+    return variant
+
+
+def ensure_variant(db: Session, name: str, path: str, quantization: str, device: str) -> ModelVariant:
+    """
+    Η παραλλαγή με αυτό το όνομα, καταχωρισμένη από τις ρυθμίσεις αν δεν υπάρχει
+    """
+    variant = get_variant(db, name)
+    if variant is None:
+        variant = register_variant(db, name, path, quantization, device)
+    return variant
+
+
+def mark_variant(db: Session, name: str, status: str, error: Optional[str] = None):
+    variant = get_variant(db, name)
+    if variant is None:
+        return
+    variant.status = status
+    variant.error = error
+    db.commit()
+
+
+def set_active_variant(db: Session, loaded: LoadedModel) -> ModelVariant:
+    """
+    Σήμανση της φορτωμένης παραλλαγής ως ενεργής (οι υπόλοιπες επιστρέφουν σε registered)
+    """
+    variant = get_variant(db, loaded.name)
+    if variant is None:
+        variant = ModelVariant(name=loaded.name, path=loaded.path, quantization=loaded.quantization)
+        db.add(variant)
+    db.query(ModelVariant).filter(
+        ModelVariant.status == "active", ModelVariant.name != loaded.name
+    ).update({ModelVariant.status: "registered"}, synchronize_session=False)
+    variant.status = "active"
+    variant.error = None
+    variant.device = loaded.device
+    variant.memory_bytes = loaded.memory_bytes
+    variant.load_seconds = loaded.load_seconds
+    variant.warmup_latency_ms = loaded.warmup_latency_ms
+    variant.activated_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(variant)
+    return variant
+
+
+def record_benchmark(db: Session, name: str, device: str, results: Dict[str, Any],
+                     num_threads: Optional[int] = None) -> ModelBenchmark:
+    """
+    Αποθήκευση αποτελεσμάτων benchmark (ενός επιπέδου ταυτοχρονισμού) για την παραλλαγή
+    """
+    variant = get_variant(db, name)
+    if variant is None:
+        raise ModelVariantNotFoundError(name)
+    benchmark = ModelBenchmark(
+        variant_id=variant.id,
+        device=device,
+        num_threads=num_threads,
+        max_batch_size=results.get("max_batch_size"),
+        concurrency=results.get("concurrency"),
+        tokens_per_sec=results.get("tokens_per_sec"),
+        requests_per_sec=results.get("requests_per_sec"),
+        latency_p50_ms=results.get("latency_p50_ms"),
+        latency_p95_ms=results.get("latency_p95_ms"),
+        details=results
+    )
+    db.add(benchmark)
+    db.commit()
+    db.refresh(benchmark)
+    return benchmark
+
+
+def list_benchmarks(db: Session, name: str, limit: int = 100) -> List[ModelBenchmark]:
+    variant = get_variant(db, name)
+    if variant is None:
+        raise ModelVariantNotFoundError(name)
+    return (
+        db.query(ModelBenchmark)
+        .filter(ModelBenchmark.variant_id == variant.id)
+        .order_by(ModelBenchmark.timestamp.desc(), ModelBenchmark.id.desc())
+        .limit(limit)
+        .all()
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String, JSON
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -51,6 +51,14 @@ class MiningStat(Base):
     
     user = relationship("User", back_populates="mining_stats")
 
+    # Στην PostgreSQL ο πίνακας είναι διαμερισμένος ανά μήνα στο timestamp (βλ.
+    # partition_maintenance) με πρωτεύον κλειδί (id, timestamp)
+    __table_args__ = (
+        Index("ix_mining_stats_user_timestamp", "user_id", "timestamp"),
+        # BRIN στην PostgreSQL, B-tree στην SQLite
+        Index("ix_mining_stats_timestamp", "timestamp", postgresql_using="brin"),
+    )
+
 
 class EnergyConsumption(Base):
     __tablename__ = "energy_consumption"
@@ -63,14 +71,85 @@ class EnergyConsumption(Base):
     grid_consumption = Column(Float)  # kWh from grid
     is_predicted = Column(Boolean, default=False)  # Whether this is a prediction or actual measurement
 
+    # Μία γραμμή ανά διάστημα δειγματοληψίας (πραγματική ή πρόβλεψη), για upserts
+    __table_args__ = (
+        Index("ix_energy_consumption_timestamp_predicted", "timestamp", "is_predicted", unique=True),
+    )
+
 
 class CryptoPrice(Base):
     __tablename__ = "crypto_prices"
 
     id = Column(Integer, primary_key=True, index=True)
-    coin = Column(String, index=True)
+    coin = Column(String)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
     price_usd = Column(Float)
     price_eur = Column(Float)
     market_cap = Column(Float, nullable=True)
     volume_24h = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_crypto_prices_coin_timestamp", "coin", "timestamp"),
+        Index("ix_crypto_prices_timestamp", "timestamp"),
+    )
+
+
+class GPURental(Base):
+    __tablename__ = "gpu_rentals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    rental_id = Column(String, unique=True, index=True)  # Αναγνωριστικό ενοικίασης του CloreAI
+    gpu_model = Column(String)
+    status = Column(String, index=True, default="active")  # active, expired, cancelled, failed
+    price_per_hour = Column(Float)
+    start_time = Column(DateTime(timezone=True))
+    end_time = Column(DateTime(timezone=True))
+    accrued_cost = Column(Float, default=0.0)  # Κόστος μέχρι τον τελευταίο έλεγχο
+    last_accrued_at = Column(DateTime(timezone=True))
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)
+    auto_renew = Column(Boolean, default=False)
+    renew_hours = Column(Integer, default=1)
+    max_price_per_hour = Column(Float, nullable=True)  # Ανανέωση μόνο κάτω από αυτή την τιμή
+    max_total_cost = Column(Float, nullable=True)  # Ακύρωση όταν το κόστος το ξεπεράσει
+    connection_info = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class ModelVariant(Base):
+    __tablename__ = "model_variants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True)
+    path = Column(String)
+    quantization = Column(String, default="dynamic")  # none, dynamic (CPU int8), 8bit, 4bit (CUDA)
+    device = Column(String, default="cpu")
+    status = Column(String, index=True, default="registered")  # registered, loading, active, failed
+    memory_bytes = Column(BigInteger, nullable=True)  # Μνήμη βαρών μετά τη φόρτωση/κβάντιση
+    load_seconds = Column(Float, nullable=True)
+    warmup_latency_ms = Column(Float, nullable=True)  # Χρόνος παραγωγής των tokens του warmup
+    error = Column(String, nullable=True)
+    activated_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    benchmarks = relationship("ModelBenchmark", back_populates="variant", cascade="all, delete-orphan")
+
+
+class ModelBenchmark(Base):
+    __tablename__ = "model_benchmarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    variant_id = Column(Integer, ForeignKey("model_variants.id"), index=True)
+    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    device = Column(String)
+    num_threads = Column(Integer, nullable=True)
+    max_batch_size = Column(Integer, nullable=True)
+    concurrency = Column(Integer, nullable=True)
+    tokens_per_sec = Column(Float, nullable=True)
+    requests_per_sec = Column(Float, nullable=True)
+    latency_p50_ms = Column(Float, nullable=True)
+    latency_p95_ms = Column(Float, nullable=True)
+    details = Column(JSON, nullable=True)
+
+    variant = relationship("ModelVariant", back_populates="benchmarks")
@@ -0,0 +1,139 @@
+import re
+import time
+import logging
+from bisect import bisect_right, insort
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Λέξεις που παραλείπονται κατά την κανονικοποίηση ονομάτων GPU
+_MODEL_NOISE = re.compile(r"\b(nvidia|geforce|amd|radeon)\b|[^a-z0-9]")
+
+# Πεδία που αλλάζουν σε κάθε απόκριση χωρίς να αλλάζει η προσφορά
+_VOLATILE_FIELDS = ("last_updated",)
+
+
+def normalize_model(model: str) -> str:
+    """
+    Κανονικοποίηση ονόματος GPU ("NVIDIA GeForce RTX 3080" -> "rtx3080")
+    """
+    return _MODEL_NOISE.sub("", (model or "").lower())
+
+
+def offer_id(offer: Dict) -> str:
+    """
+    Σταθερό αναγνωριστικό προσφοράς (id του marketplace ή το μοντέλο GPU)
+    """
+    for key in ("id", "offer_id", "server_id"):
+        if offer.get(key) is not None:
+            return str(offer[key])
+    return normalize_model(offer.get("gpu_model", ""))
+
+
+class OfferBook:
+    """
+    Ευρετήριο προσφορών GPU του CloreAI στη μνήμη
+
+    Για κάθε μοντέλο (και συνολικά) διατηρείται λίστα (τιμή, id) ταξινομημένη κατά
+    τιμή, οπότε τα ερωτήματα του τύπου "φθηνότερη RTX 3080 με τουλάχιστον N
+    διαθέσιμες κάτω από X/ώρα" διασχίζουν μόνο τις προσφορές κάτω από το όριο τιμής.
+    Οι ανανεώσεις εφαρμόζουν μόνο τις διαφορές (νέες, αλλαγμένες, αφαιρεμένες).
+    """
+
+    def __init__(self):
+        self._offers: Dict[str, Dict] = {}
+        self._by_model: Dict[str, List[Tuple[float, str]]] = {}
+        self._by_price: List[Tuple[float, str]] = []
+        self.updated_at: Optional[float] = None
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._offers)
+
+    @staticmethod
+    def _price(offer: Dict) -> float:
+        price = offer.get("price_per_hour")
+        return float(price) if price is not None else float("inf")
+
+    def _index(self, key: str, offer: Dict):
+        entry = (self._price(offer), key)
+        insort(self._by_model.setdefault(normalize_model(offer.get("gpu_model", "")), []), entry)
+        insort(self._by_price, entry)
+
+    def _unindex(self, key: str, offer: Dict):
+        entry = (self._price(offer), key)
+        model = normalize_model(offer.get("gpu_model", ""))
+        for entries in (self._by_model.get(model, []), self._by_price):
+            position = bisect_right(entries, entry) - 1
+            if position >= 0 and entries[position] == entry:
+                del entries[position]
+        if not self._by_model.get(model):
+            self._by_model.pop(model, None)
+
+    @staticmethod
+    def _same_offer(current: Dict, offer: Dict) -> bool:
+        if current.keys() != offer.keys():
+            return False
+        return all(current[field] == offer[field] for field in offer if field not in _VOLATILE_FIELDS)
+
+    def update(self, offers: List[Dict]) -> Dict[str, int]:
+        """
+        Επαυξητική ανανέωση του ευρετηρίου με την τρέχουσα λίστα προσφορών
+        """
+        # Αντίγραφα, ώστε μεταγενέστερες αλλαγές του καλούντος να μην αλλοιώνουν το ευρετήριο
+        incoming = {offer_id(offer): dict(offer) for offer in offers}
+        added = updated = removed = 0
+
+        for key in list(self._offers):
+            if key not in incoming:
+                self._unindex(key, self._offers.pop(key))
+                removed += 1
+
+        for key, offer in incoming.items():
+            current = self._offers.get(key)
+            if current is not None and self._same_offer(current, offer):
+                # Ίδια τιμή και διαθεσιμότητα: δεν χρειάζεται αλλαγή στο ευρετήριο
+                self._offers[key] = offer
+                continue
+            if current is not None:
+                self._unindex(key, current)
+                updated += 1
+            else:
+                added += 1
+            self._offers[key] = offer
+            self._index(key, offer)
+
+        self.updated_at = time.time()
+        if added or updated or removed:
+            self.version += 1
+        return {"added": added, "updated": updated, "removed": removed, "total": len(self._offers)}
+
+    def query(self,
+              model: Optional[str] = None,
+              min_available: int = 0,
+              max_price: Optional[float] = None,
+              limit: Optional[int] = None) -> List[Dict]:
+        """
+        Προσφορές ταξινομημένες κατά τιμή ανά ώρα (φθηνότερη πρώτη)
+        """
+        if model:
+            entries = self._by_model.get(normalize_model(model), [])
+        else:
+            entries = self._by_price
+        end = len(entries) if max_price is None else bisect_right(entries, (max_price, "\uffff"))
+
+        results = []
+        for position in range(end):
+            offer = self._offers[entries[position][1]]
+            if offer.get("available", 0) < min_available:
+                continue
+            results.append(dict(offer))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def models(self) -> List[str]:
+        """
+        Κανονικοποιημένα μοντέλα GPU που υπάρχουν στο ευρετήριο
+        """
+        return sorted(self._by_model)
@@ -0,0 +1,216 @@
+import os
+import re
+import logging
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from backend.database import engine as default_engine
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Πίνακες διαμερισμένοι ανά μήνα (RANGE στη στήλη timestamp) στην PostgreSQL
+PARTITIONED_TABLES = ("mining_stats",)
+
+
+def month_start(value: datetime, offset: int = 0) -> datetime:
+    """
+    Αρχή του μήνα (UTC) της χρονοσφραγίδας, μετατοπισμένη κατά offset μήνες
+    """
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    index = value.year * 12 + value.month - 1 + offset
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table: str, name: str) -> Optional[datetime]:
+    """
+    Μήνας μιας μηνιαίας διαμέρισης από το όνομά της (None για τη default)
+    """
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    if match is None:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+class PartitionMaintainer:
+    """
+    Συντήρηση των μηνιαίων διαμερίσεων των πινάκων χρονοσειρών (PostgreSQL)
+
+    Σε κάθε κύκλο δημιουργούνται οι διαμερίσεις του τρέχοντος μήνα και των
+    επόμενων PARTITION_PREMAKE_MONTHS, ώστε οι εγγραφές να μην καταλήγουν στη
+    default διαμέριση. Κάθε νέα διαμέριση δημιουργείται ως ανεξάρτητος πίνακας,
+    παίρνει τις γραμμές του μήνα της από τη default και προσαρτάται (ATTACH), που
+    δεν κλειδώνει τον γονικό πίνακα για εγγραφές. Οι διαμερίσεις παλαιότερες από
+    PARTITION_RETENTION_MONTHS αποσπώνται (DETACH) και διαγράφονται, ή μένουν ως
+    ανεξάρτητοι πίνακες για αρχειοθέτηση αν PARTITION_DROP_RETIRED=False.
+
+    Στην SQLite δεν υπάρχουν διαμερίσεις και ο κύκλος δεν κάνει τίποτα.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or default_engine
+        self.enabled = os.getenv("PARTITION_MAINTENANCE_ENABLED", "True").lower() == "true"
+        self.interval = int(os.getenv("PARTITION_MAINTENANCE_INTERVAL", 6 * 3600))
+        self.premake_months = int(os.getenv("PARTITION_PREMAKE_MONTHS", 3))
+        # 0: οι διαμερίσεις δεν αποσύρονται ποτέ
+        self.retention_months = int(os.getenv("PARTITION_RETENTION_MONTHS", 24))
+        self.drop_retired = os.getenv("PARTITION_DROP_RETIRED", "True").lower() == "true"
+        self.last_run: Optional[Dict] = None
+        # Ο κύκλος του παρασκηνίου και οι χειροκίνητες εκτελέσεις δεν επικαλύπτονται
+        self._run_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def supported(self) -> bool:
+        return self.engine.dialect.name == "postgresql"
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def is_partitioned(self, table: str) -> bool:
+        if not self.supported:
+            return False
+        with self.engine.connect() as conn:
+            return conn.execute(text(
+                "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :table"
+            ), {"table": table}).first() is not None
+
+    def list_partitions(self, table: str) -> List[Dict]:
+        """
+        Διαμερίσεις του πίνακα με τα όρια και το μέγεθός τους (κενή λίστα στην SQLite)
+        """
+        if not self.supported:
+            return []
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), "
+                "pg_total_relation_size(child.oid) "
+                "FROM pg_inherits "
+                "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE parent.relname = :table ORDER BY child.relname"
+            ), {"table": table}).all()
+        return [
+            {"name": name, "bound": bound, "bytes": size, "month": partition_month(table, name)}
+            for name, bound, size in rows
+        ]
+
+    def _create(self, table: str, month: datetime) -> int:
+        """
+        Δημιουργία της διαμέρισης του μήνα (επιστρέφει τις γραμμές που μεταφέρθηκαν από τη default)
+        """
+        name = partition_name(table, month)
+        start, end = month.isoformat(), month_start(month, 1).isoformat()
+        with self.engine.begin() as conn:
+            conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            moved = conn.execute(text(
+                f"WITH moved AS (DELETE FROM {table}_default "
+                f"WHERE timestamp >= :start AND timestamp < :end RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), {"start": month, "end": month_start(month, 1)}).rowcount
+            # Τα ευρετήρια και τα foreign keys του γονικού πίνακα δημιουργούνται κατά την προσάρτηση
+            conn.execute(text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+        logger.info(f"Δημιουργήθηκε η διαμέριση {name} ({moved} γραμμές από τη default)")
+        return moved
+
+    def _retire(self, table: str, name: str):
+        with self.engine.begin() as conn:
+            conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            if self.drop_retired:
+                conn.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Αποσύρθηκε η διαμέριση {name}{'' if self.drop_retired else ' (διατηρείται αποσπασμένη)'}")
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Ένας κύκλος συντήρησης: δημιουργία των επόμενων και απόσυρση των παλιών διαμερίσεων
+        """
+        with self._run_lock:
+            return self._maintain_tables(now or datetime.now(timezone.utc))
+
+    def _maintain_tables(self, now: datetime) -> Dict:
+        summary = {"timestamp": now.isoformat(), "created": [], "retired": [], "moved_rows": 0, "errors": []}
+        if not self.supported:
+            summary["skipped"] = f"Οι διαμερίσεις δεν υποστηρίζονται από τη βάση {self.engine.dialect.name}"
+            self.last_run = summary
+            return summary
+
+        cutoff = month_start(now, -self.retention_months) if self.retention_months > 0 else None
+        for table in PARTITIONED_TABLES:
+            try:
+                if not self.is_partitioned(table):
+                    continue
+                partitions = self.list_partitions(table)
+                existing = {partition["name"] for partition in partitions}
+                for offset in range(self.premake_months + 1):
+                    month = month_start(now, offset)
+                    if partition_name(table, month) not in existing:
+                        summary["moved_rows"] += self._create(table, month)
+                        summary["created"].append(partition_name(table, month))
+                if cutoff is None:
+                    continue
+                for partition in partitions:
+                    if partition["month"] is not None and month_start(partition["month"], 1) <= cutoff:
+                        self._retire(table, partition["name"])
+                        summary["retired"].append(partition["name"])
+            except Exception as e:
+                logger.error(f"Σφάλμα κατά τη συντήρηση διαμερίσεων του {table}: {str(e)}")
+                summary["errors"].append({"table": table, "error": str(e)})
+        self.last_run = summary
+        return summary
+
+    async def maintain(self) -> Dict:
+        return await asyncio.to_thread(self.run_once)
+
+    async def _run(self):
+        logger.info("Εκκίνηση συντήρησης διαμερίσεων")
+        while True:
+            try:
+                await self.maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Σφάλμα στη συντήρηση διαμερίσεων: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Τερματισμός συντήρησης διαμερίσεων")
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "supported": self.supported,
+            "running": self.is_running,
+            "interval": self.interval,
+            "premake_months": self.premake_months,
+            "retention_months": self.retention_months,
+            "drop_retired": self.drop_retired,
+            "last_run": self.last_run,
+            "partitions": {table: self.list_partitions(table) for table in PARTITIONED_TABLES}
+        }
@@ -0,0 +1,307 @@
+import os
+import logging
+import asyncio
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models import GPURental
+from backend.offer_book import normalize_model
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Καταστάσεις του CloreAI που σημαίνουν ότι η ενοικίαση έχει τελειώσει
+_FINAL_STATUSES = {"expired": "expired", "cancelled": "cancelled", "not_found": "expired", "failed": "failed"}
+
+
+def _as_utc(value) -> Optional[datetime]:
+    """
+    Μετατροπή χρονοσφραγίδας (datetime ή ISO string) σε aware UTC datetime
+
+    Οι naive τιμές του API θεωρούνται τοπική ώρα, ενώ οι naive τιμές της βάσης
+    (SQLite) έχουν ήδη αποθηκευτεί σε UTC.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if value.tzinfo is None:
+            value = value.astimezone()
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def rental_to_dict(rental: GPURental) -> Dict:
+    return {
+        column.name: getattr(rental, column.name)
+        for column in GPURental.__table__.columns
+    }
+
+
+def list_rentals(db: Session, status: Optional[str] = None) -> List[GPURental]:
+    """
+    Ενοικιάσεις από το μητρώο (νεότερη πρώτη)
+    """
+    query = db.query(GPURental)
+    if status:
+        query = query.filter(GPURental.status == status)
+    return query.order_by(GPURental.start_time.desc()).all()
+
+
+class RentalTracker:
+    """
+    Παρακολούθηση του κύκλου ζωής των ενοικιάσεων GPU του CloreAI
+
+    Κάθε ενοικίαση καταγράφεται στον πίνακα gpu_rentals. Σε κάθε κύκλο ο poller
+    ελέγχει ταυτόχρονα την κατάσταση όλων των ενεργών ενοικιάσεων, προσθέτει το
+    κόστος του χρόνου που πέρασε και εφαρμόζει τους κανόνες:
+    - ακύρωση όταν το συσσωρευμένο κόστος φτάσει το max_total_cost
+    - παράταση κατά renew_hours λίγο πριν τη λήξη, αν auto_renew και η τρέχουσα
+      φθηνότερη τιμή του μοντέλου δεν ξεπερνά το max_price_per_hour· ο υπόλοιπος
+      χρόνος χρεώνεται με την παλιά τιμή και η παράταση με την τρέχουσα
+    Οι αλλαγές αποθηκεύονται με μία συναλλαγή ανά κύκλο.
+    """
+
+    def __init__(self, cloreai_connector):
+        self.cloreai_connector = cloreai_connector
+        self.enabled = os.getenv("RENTAL_TRACKER_ENABLED", "True").lower() == "true"
+        self.interval = int(os.getenv("RENTAL_POLL_INTERVAL", 60))
+        # Δευτερόλεπτα πριν τη λήξη στα οποία εξετάζεται η παράταση
+        self.renew_before = int(os.getenv("RENTAL_RENEW_BEFORE", 600))
+        self.last_poll: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def register(self,
+                       rental: Dict,
+                       auto_renew: bool = False,
+                       renew_hours: int = 1,
+                       max_price_per_hour: Optional[float] = None,
+                       max_total_cost: Optional[float] = None) -> Dict:
+        """
+        Καταγραφή νέας ενοικίασης από την απάντηση του rent_gpu
+        """
+        start_time = _as_utc(rental.get("start_time")) or datetime.now(timezone.utc)
+        row = {
+            "rental_id": rental["rental_id"],
+            "gpu_model": rental.get("gpu_model"),
+            "status": "active",
+            "price_per_hour": rental.get("price_per_hour", 0.0),
+            "start_time": start_time,
+            "end_time": _as_utc(rental.get("end_time")),
+            "accrued_cost": 0.0,
+            "last_accrued_at": start_time,
+            "auto_renew": auto_renew,
+            "renew_hours": renew_hours,
+            "max_price_per_hour": max_price_per_hour,
+            "max_total_cost": max_total_cost,
+            "connection_info": rental.get("connection_info")
+        }
+        return await asyncio.to_thread(self._insert, row)
+
+    def _insert(self, row: Dict) -> Dict:
+        db = SessionLocal()
+        try:
+            rental = GPURental(**row)
+            db.add(rental)
+            db.commit()
+            db.refresh(rental)
+            return rental_to_dict(rental)
+        finally:
+            db.close()
+
+    def _load_active(self) -> List[Dict]:
+        db = SessionLocal()
+        try:
+            return [rental_to_dict(rental) for rental in list_rentals(db, "active")]
+        finally:
+            db.close()
+
+    def _apply_updates(self, updates: Dict[int, Dict]):
+        """
+        Εφαρμογή όλων των αλλαγών του κύκλου σε μία συναλλαγή
+        """
+        if not updates:
+            return
+        db = SessionLocal()
+        try:
+            db.bulk_update_mappings(GPURental, [{"id": key, **values} for key, values in updates.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _accrue(rental: Dict, now: datetime) -> Dict:
+        """
+        Κόστος από τον τελευταίο υπολογισμό έως τώρα (ή έως τη λήξη)
+        """
+        until = now
+        end_time = _as_utc(rental["end_time"])
+        if end_time is not None:
+            until = min(until, end_time)
+        since = _as_utc(rental["last_accrued_at"]) or _as_utc(rental["start_time"]) or now
+        hours = max(0.0, (until - since).total_seconds() / 3600)
+        return {
+            "accrued_cost": (rental["accrued_cost"] or 0.0) + hours * (rental["price_per_hour"] or 0.0),
+            "last_accrued_at": max(until, since)
+        }
+
+    async def _market_prices(self) -> Dict[str, float]:
+        prices = {}
+        for offer in await self.cloreai_connector.query_offers():
+            if offer.get("price_per_hour") is None:
+                continue
+            model = normalize_model(offer.get("gpu_model", ""))
+            prices[model] = min(prices.get(model, float("inf")), offer["price_per_hour"])
+        return prices
+
+    def _should_renew(self, rental: Dict, update: Dict, market_price: Optional[float], now: datetime) -> bool:
+        end_time = _as_utc(update.get("end_time", rental["end_time"]))
+        if not rental["auto_renew"] or end_time is None:
+            return False
+        if (end_time - now).total_seconds() > self.renew_before:
+            return False
+        if rental["max_price_per_hour"] is not None and (market_price is None or market_price > rental["max_price_per_hour"]):
+            return False
+        if rental["max_total_cost"] is not None:
+            remaining_hours = max(0.0, (end_time - now).total_seconds() / 3600)
+            renew_price = market_price if market_price is not None else (rental["price_per_hour"] or 0.0)
+            projected = (update["accrued_cost"] + remaining_hours * (rental["price_per_hour"] or 0.0)
+                         + rental["renew_hours"] * renew_price)
+            if projected > rental["max_total_cost"]:
+                return False
+        return True
+
+    async def poll_once(self, now: Optional[datetime] = None) -> Dict:
+        """
+        Ένας κύκλος ελέγχου όλων των ενεργών ενοικιάσεων
+        """
+        now = now or datetime.now(timezone.utc)
+        rentals = await asyncio.to_thread(self._load_active)
+        summary = {"timestamp": now.isoformat(), "checked": len(rentals), "renewed": 0, "cancelled": 0, "finished": 0}
+        if not rentals:
+            self.last_poll = summary
+            return summary
+
+        statuses = await self.cloreai_connector.get_rentals_status([rental["rental_id"] for rental in rentals])
+        prices = await self._market_prices() if any(rental["auto_renew"] for rental in rentals) else {}
+
+        updates: Dict[int, Dict] = {}
+        to_cancel: List[Dict] = []
+        to_renew: List[Dict] = []
+        renew_prices: List[Optional[float]] = []
+        for rental in rentals:
+            remote = statuses.get(rental["rental_id"], {})
+            update = {"last_checked_at": now}
+            if remote.get("end_time"):
+                update["end_time"] = _as_utc(remote["end_time"])
+            update.update(self._accrue({**rental, **update}, now))
+
+            remote_status = remote.get("status")
+            market_price = prices.get(normalize_model(rental["gpu_model"] or ""))
+            if remote_status in _FINAL_STATUSES:
+                update["status"] = _FINAL_STATUSES[remote_status]
+                summary["finished"] += 1
+            elif rental["max_total_cost"] is not None and update["accrued_cost"] >= rental["max_total_cost"]:
+                to_cancel.append(rental)
+            elif remote_status != "error" and self._should_renew(rental, update, market_price, now):
+                to_renew.append(rental)
+                renew_prices.append(market_price)
+            updates[rental["id"]] = update
+
+        # Ακυρώσεις και παρατάσεις εκτελούνται ταυτόχρονα
+        results = await asyncio.gather(
+            *[self.cloreai_connector.cancel_rental(rental["rental_id"]) for rental in to_cancel],
+            *[self.cloreai_connector.extend_rental(rental["rental_id"], rental["renew_hours"]) for rental in to_renew]
+        )
+        for rental, result in zip(to_cancel, results[:len(to_cancel)]):
+            if result.get("status") == "success":
+                updates[rental["id"]]["status"] = "cancelled"
+                summary["cancelled"] += 1
+                logger.info(f"Ακύρωση ενοικίασης {rental['rental_id']}: συμπληρώθηκε το όριο κόστους")
+        for rental, market_price, result in zip(to_renew, renew_prices, results[len(to_cancel):]):
+            if result.get("status") == "success":
+                update = updates[rental["id"]]
+                price = result.get("price_per_hour") or market_price
+                if price is not None:
+                    # Ο χρόνος έως την παλιά λήξη κοστολογείται με την παλιά τιμή, η παράταση με τη νέα
+                    old_end = _as_utc(update.get("end_time", rental["end_time"]))
+                    update.update(self._accrue({**rental, **update}, old_end))
+                    update["price_per_hour"] = price
+                if result.get("end_time"):
+                    update["end_time"] = _as_utc(result["end_time"])
+                summary["renewed"] += 1
+                logger.info(f"Παράταση ενοικίασης {rental['rental_id']} κατά {rental['renew_hours']} ώρες")
+
+        await asyncio.to_thread(self._apply_updates, updates)
+        self.last_poll = summary
+        return summary
+
+    async def cancel(self, rental_id: str) -> Dict:
+        """
+        Ακύρωση ενοικίασης και κλείσιμο του κόστους της στο μητρώο
+        """
+        result = await self.cloreai_connector.cancel_rental(rental_id)
+        if result.get("status") == "success":
+            await asyncio.to_thread(self._close, rental_id, "cancelled")
+        return result
+
+    def _close(self, rental_id: str, status: str):
+        db = SessionLocal()
+        try:
+            rental = db.query(GPURental).filter(GPURental.rental_id == rental_id).first()
+            if rental is None:
+                return
+            if rental.status == "active":
+                for key, value in self._accrue(rental_to_dict(rental), datetime.now(timezone.utc)).items():
+                    setattr(rental, key, value)
+            rental.status = status
+            db.commit()
+        finally:
+            db.close()
+
+    async def _run(self):
+        logger.info("Εκκίνηση παρακολούθησης ενοικιάσεων GPU")
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Σφάλμα στην παρακολούθηση ενοικιάσεων GPU: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Τερματισμός παρακολούθησης ενοικιάσεων GPU")
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running,
+            "interval": self.interval,
+            "last_poll": self.last_poll
+        }
@@ -0,0 +1,266 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBERS = re.compile(r"\d+(?:[.,]\d+)?")
+
+# Διαστάσεις του ενσωματωμένου (χωρίς εξαρτήσεις) embedding από n-grams χαρακτήρων
+_NGRAM_DIM = 1024
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Κανονικοποίηση ερώτησης για το κλειδί της cache
+
+    Πεζά, χωρίς τόνους και σημεία στίξης, με ενιαία κενά: "Ποιο νόμισμα είναι
+    πιο κερδοφόρο;" και "ποιο νομισμα ειναι πιο κερδοφορο" δίνουν το ίδιο κλειδί.
+    """
+    text = unicodedata.normalize("NFD", prompt.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _ngram_embedding(text: str) -> np.ndarray:
+    """
+    Κανονικοποιημένο διάνυσμα από hashed trigrams χαρακτήρων
+    """
+    vector = np.zeros(_NGRAM_DIM, dtype=np.float32)
+    padded = f"  {text} "
+    for index in range(len(padded) - 2):
+        vector[zlib.crc32(padded[index:index + 3].encode()) % _NGRAM_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _Entry:
+    __slots__ = ("key", "response", "versions", "created_at", "size", "embedding", "numbers")
+
+    def __init__(self, key: Tuple[str, Tuple], prompt: str, response: str, embedding: Optional[np.ndarray]):
+        self.key = key
+        self.response = response
+        self.versions = key[1]
+        self.created_at = time.monotonic()
+        self.embedding = embedding
+        self.numbers = tuple(_NUMBERS.findall(key[0]))
+        self.size = len(prompt.encode()) + len(response.encode()) + (embedding.nbytes if embedding is not None else 0)
+
+
+class ResponseCache:
+    """
+    Cache απαντήσεων του AI chatbot (LRU + TTL, με όριο μνήμης)
+
+    Το κλειδί είναι η κανονικοποιημένη ερώτηση μαζί με τις εκδόσεις των πηγών
+    δεδομένων που χρησιμοποίησε το context της (ενέργεια, προσφορές CloreAI,
+    κερδοφορία νομισμάτων, ...). Μια αλλαγή σε άλλη πηγή δεν επηρεάζει την
+    απάντηση· όταν αλλάξει μια πηγή της, η επόμενη ίδια ερώτηση έχει νέο κλειδί
+    και η παλιά απάντηση αντικαθίσταται όταν αποθηκευτεί η νέα.
+
+    Προαιρετικά (AI_CACHE_SEMANTIC) ενεργοποιείται δεύτερο επίπεδο ομοιότητας:
+    αν δεν υπάρχει ακριβές ταίριασμα, επιστρέφεται η απάντηση της πιο κοντινής
+    ερώτησης με cosine similarity >= AI_CACHE_SIMILARITY και τους ίδιους αριθμούς
+    (ώστε π.χ. "RTX 3080" να μη ταιριάζει με "RTX 3090"). Embeddings:
+    - ngram: hashed trigrams χαρακτήρων, χωρίς εξαρτήσεις
+    - sentence-transformers: το μοντέλο AI_CACHE_EMBEDDING_MODEL
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("AI_CACHE_ENABLED", "True").lower() == "true"
+        self.ttl = float(os.getenv("AI_CACHE_TTL", 300))
+        self.max_entries = int(os.getenv("AI_CACHE_MAX_ENTRIES", 1024))
+        self.max_bytes = int(os.getenv("AI_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+        self.semantic = os.getenv("AI_CACHE_SEMANTIC", "none").lower()
+        self.embedding_model_name = os.getenv(
+            "AI_CACHE_EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+        )
+        self.similarity = float(os.getenv("AI_CACHE_SIMILARITY", 0.92))
+        self._entries: "OrderedDict[Tuple[str, Tuple], _Entry]" = OrderedDict()
+        self._bytes = 0
+        # Κλειδί της τρέχουσας απάντησης ανά κανονικοποιημένη ερώτηση
+        self._prompt_keys: Dict[str, Tuple[str, Tuple]] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[Tuple[str, Tuple]] = []
+        self._embedder = None
+        self._inflight: Dict[Tuple[str, Tuple], asyncio.Future] = {}
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "coalesced": 0,
+                      "evictions": 0, "expired": 0, "invalidated": 0}
+
+    @staticmethod
+    def _versions_key(versions: Optional[Dict[str, Any]]) -> Tuple:
+        return tuple(sorted((versions or {}).items()))
+
+    def _remove(self, key: Tuple[str, Tuple], counter: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            self._matrix = None
+            self.stats[counter] += 1
+            if self._prompt_keys.get(key[0]) == key:
+                del self._prompt_keys[key[0]]
+
+    def invalidate(self) -> int:
+        """
+        Αφαίρεση όλων των απαντήσεων
+        """
+        keys = list(self._entries)
+        for key in keys:
+            self._remove(key, "invalidated")
+        return len(keys)
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        if self.semantic == "ngram":
+            return _ngram_embedding(text)
+        if self.semantic == "sentence-transformers":
+            if self._embedder is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                except ImportError:
+                    logger.warning("Το sentence-transformers δεν είναι διαθέσιμο. Χρήση ngram embeddings στην cache")
+                    self.semantic = "ngram"
+                    return _ngram_embedding(text)
+                self._embedder = SentenceTransformer(self.embedding_model_name, device="cpu")
+            return self._embedder.encode(text, normalize_embeddings=True).astype(np.float32)
+        return None
+
+    def _semantic_lookup(self, normalized: str, versions_key: Tuple, embedding: np.ndarray) -> Optional[_Entry]:
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry.embedding is not None]
+            self._matrix = (np.stack([self._entries[key].embedding for key in self._matrix_keys])
+                            if self._matrix_keys else np.empty((0, embedding.shape[0]), dtype=np.float32))
+        if not len(self._matrix_keys) or self._matrix.shape[1] != embedding.shape[0]:
+            return None
+        scores = self._matrix @ embedding
+        numbers = tuple(_NUMBERS.findall(normalized))
+        for position in np.argsort(-scores)[:5]:
+            if scores[position] < self.similarity:
+                break
+            entry = self._entries.get(self._matrix_keys[position])
+            # Μόνο απαντήσεις με τις ίδιες εκδόσεις δεδομένων
+            if entry is not None and entry.numbers == numbers and entry.key[1] == versions_key:
+                return entry
+        return None
+
+    def _store(self, key: Tuple[str, Tuple], entry: _Entry):
+        if entry.size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.size
+        # Η απάντηση της ίδιας ερώτησης με παλαιότερες εκδόσεις δεν θα ξαναζητηθεί
+        stale = self._prompt_keys.get(key[0])
+        if stale is not None and stale != key:
+            self._remove(stale, "invalidated")
+        self._entries[key] = entry
+        self._prompt_keys[key[0]] = key
+        self._bytes += entry.size
+        self._matrix = None
+        # Εκτόπιση των λιγότερο πρόσφατα χρησιμοποιημένων μέχρι να χωρούν τα όρια
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)), "evictions")
+
+    async def lookup(self, prompt: str, versions: Optional[Dict[str, Any]] = None) -> Tuple[Optional[str], Tuple, Optional[np.ndarray]]:
+        """
+        Αναζήτηση απάντησης (ακριβές ταίριασμα και μετά ομοιότητα)
+
+        Επιστρέφει (απάντηση ή None, κλειδί, embedding της ερώτησης), ώστε ο
+        καλών να αποθηκεύσει τη νέα απάντηση χωρίς να ξαναϋπολογίσει το embedding.
+        """
+        versions_key = self._versions_key(versions)
+        normalized = normalize_prompt(prompt)
+        key = (normalized, versions_key)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if time.monotonic() - entry.created_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry.response, key, entry.embedding
+            self._remove(key, "expired")
+
+        embedding = None
+        if self.semantic != "none":
+            embedding = await asyncio.to_thread(self._embed, normalized)
+            entry = self._semantic_lookup(normalized, versions_key, embedding) if embedding is not None else None
+            if entry is not None and time.monotonic() - entry.created_at <= self.ttl:
+                self._entries.move_to_end(entry.key)
+                self.stats["semantic_hits"] += 1
+                return entry.response, key, embedding
+
+        self.stats["misses"] += 1
+        return None, key, embedding
+
+    def store(self, key: Tuple[str, Tuple], prompt: str, response: str, embedding: Optional[np.ndarray] = None):
+        if self.enabled:
+            self._store(key, _Entry(key, prompt, response, embedding))
+
+    async def get_or_compute(self,
+                             prompt: str,
+                             versions: Optional[Dict[str, Any]],
+                             compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Απάντηση από την cache ή υπολογισμός της, μία φορά για ταυτόχρονες ίδιες ερωτήσεις
+        """
+        if not self.enabled:
+            return await compute()
+        response, key, embedding = await self.lookup(prompt, versions)
+        if response is not None:
+            return response
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Ο πρώτος καλών ακυρώθηκε (π.χ. αποσυνδέθηκε): υπολογισμός από εμάς
+                if not pending.cancelled():
+                    raise
+                return await compute()
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await compute()
+            self.store(key, prompt, response, embedding)
+            future.set_result(response)
+            return response
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                # Η εξαίρεση παραδίδεται και στους υπόλοιπους αναμένοντες
+                future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["semantic_hits"] + self.stats["misses"]
+        return {
+            "enabled": self.enabled,
+            "semantic": self.semantic,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            **self.stats,
+            "hit_rate": (self.stats["hits"] + self.stats["semantic_hits"]) / lookups if lookups else 0.0
+        }
@@ -16,6 +16,7 @@ class MiningStats(BaseModel):
     active_coin: str
     coins_data: Dict
     total_earnings_24h: float
+    energy_cost_24h: Optional[float] = None
 
 class EnergyData(BaseModel):
     """
@@ -32,6 +33,124 @@ class EnergyData(BaseModel):
     grid_percentage: float
     solar_percentage: float
 
+class EnergyHistoryPoint(BaseModel):
+    """
+    Συγκεντρωτικά δεδομένα ενέργειας για ένα χρονικό bucket
+    """
+    timestamp: datetime
+    power_usage: float
+    solar_generation: float
+    grid_consumption: float
+    cost: float
+    samples: int
+
+class ThrottleSimulationRequest(BaseModel):
+    """
+    Αίτημα προσομοίωσης του ελέγχου ισχύος rigs σε καταγεγραμμένα δεδομένα ενέργειας
+    """
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    trace: Optional[List[Dict]] = None
+    recorded_mining_kw: float = 0.0
+    speed: float = Field(0.0, ge=0)
+    include_timeline: bool = False
+
+class RentalOffer(BaseModel):
+    """
+    Προσφορά ενοικίασης GPU του CloreAI (διαθεσιμότητα και τιμές σε μία γραμμή)
+    """
+    offer_id: str
+    gpu_model: str
+    available: int = 0
+    total: int = 0
+    price_per_hour: Optional[float] = None
+    price_per_day: Optional[float] = None
+    price_per_week: Optional[float] = None
+    minimum_hours: int = 1
+    performance_rating: Optional[float] = None
+    price_per_performance: Optional[float] = None
+    last_updated: Optional[datetime] = None
+
+class RentalCreate(BaseModel):
+    """
+    Αίτημα ενοικίασης GPU με κανόνες αυτόματης ανανέωσης/ακύρωσης
+    """
+    gpu_model: str
+    duration_hours: int = Field(..., ge=1)
+    auto_renew: bool = False
+    renew_hours: int = Field(1, ge=1)
+    max_price_per_hour: Optional[float] = Field(None, ge=0)
+    max_total_cost: Optional[float] = Field(None, ge=0)
+
+class GPURental(BaseModel):
+    """
+    Ενοικίαση GPU όπως καταγράφεται στο μητρώο
+    """
+    id: int
+    rental_id: str
+    gpu_model: Optional[str] = None
+    status: str
+    price_per_hour: Optional[float] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    accrued_cost: float = 0.0
+    last_checked_at: Optional[datetime] = None
+    auto_renew: bool = False
+    renew_hours: int = 1
+    max_price_per_hour: Optional[float] = None
+    max_total_cost: Optional[float] = None
+
+    class Config:
+        orm_mode = True
+
+class ModelVariantCreate(BaseModel):
+    """
+    Καταχώριση παραλλαγής του AI μοντέλου στο μητρώο
+    """
+    name: str
+    path: str
+    quantization: str = "dynamic"  # none, dynamic (CPU int8), 8bit, 4bit (CUDA)
+    device: str = "cpu"
+
+class ModelVariant(BaseModel):
+    """
+    Παραλλαγή του AI μοντέλου με τις μετρήσεις της τελευταίας φόρτωσης
+    """
+    id: int
+    name: str
+    path: str
+    quantization: str
+    device: Optional[str] = None
+    status: str
+    memory_bytes: Optional[int] = None
+    load_seconds: Optional[float] = None
+    warmup_latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    activated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class ArbitrageRequest(BaseModel):
+    """
+    Αίτημα βελτιστοποίησης ενοικίασης GPU έναντι εξόρυξης με δικές μας GPU
+    """
+    budget: float = Field(..., ge=0)
+    horizon_hours: float = Field(24, gt=0)
+    gpu_models: Optional[List[str]] = None
+    max_price: Optional[float] = Field(None, ge=0)
+    max_gpus: Optional[int] = Field(None, ge=1)
+    include_own_gpus: bool = True
+
+class ChatRequest(BaseModel):
+    """
+    Μήνυμα προς το AI chatbot (στο σώμα του αιτήματος, για μεγάλα prompts)
+
+    Με session_id η ερώτηση συνεχίζει την αντίστοιχη συνομιλία (νέα αν δεν υπάρχει).
+    """
+    message: str = Field(..., min_length=1)
+    session_id: Optional[str] = Field(None, max_length=64)
+
 class ProfitabilityRequest(BaseModel):
     """
     Αίτημα υπολογισμού κερδοφορίας
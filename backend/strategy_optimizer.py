@@ -0,0 +1,624 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+
+from backend.arbitrage import REFERENCE_RATING, coin_revenue_per_hour
+from backend.models import MiningConfig
+from backend.offer_book import normalize_model
+from backend.tariffs import get_tariff
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPTION_RENT = "cloreai"
+OPTION_IDLE = "idle"
+ECO_SUFFIX = ":eco"
+
+_EPS = 1e-9
+
+
+def load_mining_config(db: Session, config_id: Optional[int] = None) -> Dict:
+    """
+    Περιορισμοί βελτιστοποίησης από το gpu_config μιας διαμόρφωσης mining
+
+    Χωρίς config_id χρησιμοποιείται η πιο πρόσφατη ενεργή διαμόρφωση. Κλειδιά
+    του gpu_config που αναγνωρίζονται: power_cap_w, solar_only, switch_cost,
+    rigs ({rig_id: {max_power_w, thermal_limit_c}}).
+    """
+    query = db.query(MiningConfig)
+    if config_id is not None:
+        query = query.filter(MiningConfig.id == config_id)
+    else:
+        query = query.filter(MiningConfig.is_active.is_(True))
+    config = query.order_by(MiningConfig.id.desc()).first()
+    if config is None:
+        return {}
+    return {"config_id": config.id, "active_coin": config.coin, **(config.gpu_config or {})}
+
+
+class _Problem:
+    """
+    Στατικό μέρος του προβλήματος (GPU, επιλογές, ισχύς, rigs, όρια)
+
+    Οι τιμές νομισμάτων και ενέργειας δεν ανήκουν εδώ, ώστε μια αλλαγή τιμών να
+    ξαναχρησιμοποιεί την ίδια δομή και την προηγούμενη λύση.
+    """
+
+    def __init__(self, labels: List[str], power: np.ndarray, allowed: np.ndarray,
+                 rig_codes: np.ndarray, rig_ids: List[str], rig_limits: np.ndarray,
+                 cap: float, current: np.ndarray):
+        self.labels = labels
+        self.power = power
+        self.allowed = allowed
+        self.rig_codes = rig_codes
+        self.rig_ids = rig_ids
+        self.rig_limits = rig_limits
+        self.cap = cap
+        self.current = current
+
+    @property
+    def key(self) -> Tuple:
+        return (
+            tuple(self.labels),
+            self.power.round(6).tobytes(),
+            self.allowed.tobytes(),
+            self.rig_codes.tobytes(),
+            self.rig_limits.round(6).tobytes(),
+            round(self.cap, 6),
+            self.current.tobytes()
+        )
+
+
+class MiningStrategyOptimizer:
+    """
+    Ανάθεση κάθε GPU σε νόμισμα (πλήρης ή eco ισχύς), ενοικίαση στο CloreAI ή
+    αδράνεια, ώστε να μεγιστοποιείται το καθαρό κέρδος στον ορίζοντα
+
+    Περιορισμοί:
+    - συνολικό όριο ισχύος (power_cap_w της MiningConfig ή STRATEGY_POWER_CAP_W)
+    - ηλιακό πλεόνασμα: η ισχύς μέχρι το πλεόνασμα κοστίζει STRATEGY_SOLAR_VALUE_KWH
+      (προεπιλογή η τιμή εξαγωγής του τιμολογίου), η υπόλοιπη την τιμή δικτύου κάθε
+      ώρας του ορίζοντα από το τιμολόγιο (με solar_only, μόνο το πλεόνασμα)
+    - θερμικά όρια ανά rig: μέγιστη ισχύς, ρητή ή από τη θερμοκρασία της πιο
+      ζεστής GPU (η άνοδος θερμοκρασίας θεωρείται ανάλογη της ισχύος) και καμία
+      πλήρης ισχύς για GPU ήδη πάνω από το όριο
+    - κόστος αλλαγής: σταθερό ανά αλλαγή συν τα έσοδα του χρόνου διακοπής
+
+    Κρύα επίλυση: αναζήτηση (bisection) της σκιώδους τιμής ισχύος, ώστε η
+    ανεξάρτητη επιλογή κάθε GPU (vectorized argmax) να σέβεται το πλεόνασμα/όριο,
+    με πολλαπλασιαστές ανά rig για τα θερμικά όρια, και έπειτα τοπική αναζήτηση
+    (μεμονωμένες αλλαγές και ζεύγη) στην πραγματική αντικειμενική συνάρτηση.
+    Όσο η δομή (GPU, επιλογές, όρια) δεν αλλάζει, η επόμενη επίλυση ξεκινά από
+    την προηγούμενη λύση και κάνει μόνο τοπική αναζήτηση, με πλήρη επίλυση ανά
+    STRATEGY_COLD_EVERY επιλύσεις.
+    """
+
+    def __init__(self):
+        self.horizon_hours = float(os.getenv("STRATEGY_HORIZON_HOURS", 24))
+        self.switch_cost = float(os.getenv("STRATEGY_SWITCH_COST", 0.05))
+        self.switch_downtime_minutes = float(os.getenv("STRATEGY_SWITCH_DOWNTIME_MIN", 5))
+        self.power_cap_w = float(os.getenv("STRATEGY_POWER_CAP_W", 0)) or None
+        self.tariff = get_tariff()
+        # Η ηλιακή ενέργεια που καταναλώνεται δεν πωλείται στο δίκτυο
+        self.solar_value_kwh = float(os.getenv("STRATEGY_SOLAR_VALUE_KWH", self.tariff.feed_in_rate))
+        self.thermal_limit_c = float(os.getenv("STRATEGY_THERMAL_LIMIT_C", 80))
+        self.ambient_c = float(os.getenv("STRATEGY_AMBIENT_C", 25))
+        self.eco_power = float(os.getenv("STRATEGY_ECO_POWER", 0.7))
+        self.eco_hashrate = float(os.getenv("STRATEGY_ECO_HASHRATE", 0.85))
+        self.max_moves = int(os.getenv("STRATEGY_MAX_MOVES", 500))
+        self.pair_candidates = int(os.getenv("STRATEGY_PAIR_CANDIDATES", 32))
+        self.cold_every = int(os.getenv("STRATEGY_COLD_EVERY", 20))
+        # Μέγιστη σχετική απόσταση θερμής λύσης από το δυϊκό φράγμα για να γίνει δεκτή
+        self.warm_gap = float(os.getenv("STRATEGY_WARM_GAP", 0.01))
+        self.solver_time_limit = float(os.getenv("STRATEGY_SOLVER_TIME_LIMIT", 2.0))
+        self.market_fee = float(os.getenv("CLOREAI_MARKET_FEE", 0.1))
+        self.rental_utilization = float(os.getenv("CLOREAI_RENTAL_UTILIZATION", 0.7))
+
+        self._problem: Optional[_Problem] = None
+        self._choice: Optional[np.ndarray] = None
+        self._multipliers: Optional[Tuple[float, np.ndarray]] = None
+        # Η προηγούμενη λύση είναι κοινή κατάσταση μεταξύ των threads
+        self._lock = threading.Lock()
+        self._warm_solves = 0
+        self.stats = {"solves": 0, "cold_solves": 0, "warm_solves": 0,
+                      "cold_ms_total": 0.0, "warm_ms_total": 0.0, "last_ms": 0.0}
+
+    # ---------- Δομή προβλήματος ---------- #
+
+    def _rig_limits(self, gpus: List[Dict], rig_codes: np.ndarray, rig_ids: List[str],
+                    gpu_power: np.ndarray, rigs: Dict) -> np.ndarray:
+        """
+        Μέγιστη ισχύς (kW) ανά rig: ρητή ή από τη θερμική ανοχή της πιο ζεστής GPU
+        """
+        temperature = np.array([float(gpu.get("temperature") or np.nan) for gpu in gpus])
+        rig_power = np.bincount(rig_codes, gpu_power, minlength=len(rig_ids))
+        hottest = np.full(len(rig_ids), np.nan)
+        np.fmax.at(hottest, rig_codes, temperature)
+
+        limits = np.full(len(rig_ids), np.inf)
+        for index, rig_id in enumerate(rig_ids):
+            settings = rigs.get(rig_id) or {}
+            if settings.get("max_power_w") is not None:
+                limits[index] = float(settings["max_power_w"]) / 1000
+                continue
+            limit_c = float(settings.get("thermal_limit_c", self.thermal_limit_c))
+            rise = hottest[index] - self.ambient_c
+            if np.isfinite(rise) and rise > 0 and rig_power[index] > 0:
+                limits[index] = rig_power[index] * max(0.0, limit_c - self.ambient_c) / rise
+        return limits
+
+    def _build(self, gpus: List[Dict], coins: List[str], rental_prices: Dict[str, float],
+               constraints: Dict) -> Tuple[_Problem, np.ndarray, np.ndarray]:
+        """
+        Δομή προβλήματος και πίνακας εσόδων ανά ώρα (GPU x επιλογή)
+        """
+        labels = coins + [coin + ECO_SUFFIX for coin in coins] + [OPTION_RENT, OPTION_IDLE]
+        gpu_count, coin_count = len(gpus), len(coins)
+
+        gpu_power = np.array([float(gpu.get("power_consumption") or gpu.get("power") or 0) for gpu in gpus]) / 1000
+        power = np.concatenate([
+            np.repeat(gpu_power[:, None], coin_count, axis=1),
+            np.repeat(gpu_power[:, None] * self.eco_power, coin_count, axis=1),
+            gpu_power[:, None] * self.rental_utilization,
+            np.zeros((gpu_count, 1))
+        ], axis=1)
+
+        allowed = np.ones((gpu_count, len(labels)), dtype=bool)
+        temperature = np.array([float(gpu.get("temperature") or 0) for gpu in gpus])
+        rigs = constraints.get("rigs") or {}
+        rig_keys = [str(gpu.get("rig_id", "default")) for gpu in gpus]
+        rig_ids = sorted(set(rig_keys))
+        rig_codes = np.array([rig_ids.index(key) for key in rig_keys], dtype=np.int64)
+        limit_c = np.array([float((rigs.get(key) or {}).get("thermal_limit_c", self.thermal_limit_c)) for key in rig_keys])
+        # GPU ήδη στο θερμικό όριο: μόνο eco, ενοικίαση ή αδράνεια
+        allowed[:, :coin_count] &= (temperature < limit_c)[:, None]
+        models = [normalize_model(gpu.get("model", "")) for gpu in gpus]
+        rent_price = np.array([rental_prices.get(model, np.nan) for model in models], dtype=float)
+        allowed[:, 2 * coin_count] = np.isfinite(rent_price) & (gpu_power > 0)
+        allowed[:, :2 * coin_count] &= (gpu_power > 0)[:, None]
+
+        rig_limits = self._rig_limits(gpus, rig_codes, rig_ids, gpu_power, rigs)
+        cap_w = constraints.get("power_cap_w") or self.power_cap_w
+        cap = float(cap_w) / 1000 if cap_w else np.inf
+
+        index = {label: position for position, label in enumerate(labels)}
+        active_coin = constraints.get("active_coin")
+        current = np.full(gpu_count, -1, dtype=np.int64)
+        for position, gpu in enumerate(gpus):
+            label = gpu.get("assignment") or (active_coin if gpu.get("hashrate") else OPTION_IDLE)
+            current[position] = index.get(label, -1)
+
+        # Συντελεστής απόδοσης: ρητός δείκτης ή hashrate ως προς τον μέσο όρο του στόλου
+        hashrate = np.array([float(gpu.get("hashrate") or 0) for gpu in gpus])
+        mean_hashrate = hashrate[hashrate > 0].mean() if (hashrate > 0).any() else 1.0
+        factor = np.array([
+            float(gpu["performance_rating"]) / REFERENCE_RATING if gpu.get("performance_rating")
+            else (hashrate[position] / mean_hashrate if hashrate[position] > 0 else 1.0)
+            for position, gpu in enumerate(gpus)
+        ])
+
+        problem = _Problem(labels, power, allowed, rig_codes, rig_ids, rig_limits, cap, current)
+        return problem, factor, rent_price
+
+    def _revenue(self, factor: np.ndarray, rent_price: np.ndarray,
+                 coin_revenue: np.ndarray) -> np.ndarray:
+        """
+        Έσοδα ανά ώρα (USD) ανά GPU και επιλογή, με τις τρέχουσες τιμές
+        """
+        mining = np.outer(factor, coin_revenue)
+        rent = np.nan_to_num(rent_price, nan=0.0) * (1 - self.market_fee) * self.rental_utilization
+        return np.concatenate([mining, mining * self.eco_hashrate, rent[:, None], np.zeros((len(factor), 1))], axis=1)
+
+    def _values(self, problem: _Problem, revenue: np.ndarray, switch_cost: float) -> np.ndarray:
+        """
+        Αξία κάθε επιλογής στον ορίζοντα χωρίς την ενέργεια (έσοδα μείον κόστος αλλαγής)
+        """
+        labels = problem.labels
+        coin_of = np.array([label.split(":")[0] for label in labels])
+        penalty = switch_cost + revenue * self.switch_downtime_minutes / 60
+        has_current = problem.current >= 0
+        current_coin = np.where(has_current, coin_of[np.maximum(problem.current, 0)], "")
+        # Η αλλαγή πλήρους/eco ισχύος στο ίδιο νόμισμα είναι απλώς νέο όριο ισχύος
+        unchanged = coin_of[None, :] == current_coin[:, None]
+        unchanged[:, labels.index(OPTION_IDLE)] = True
+        # Χωρίς γνωστή τρέχουσα επιλογή δεν υπάρχει αλλαγή να χρεωθεί (ούτε μετριέται ως switch)
+        unchanged[~has_current, :] = True
+        penalty = np.where(unchanged, 0.0, penalty)
+        values = revenue * self.horizon_hours - penalty
+        return np.where(problem.allowed, values, -np.inf)
+
+    # ---------- Επίλυση ---------- #
+
+    def _energy(self, total_kw, solar_kw: float, rate: float):
+        """
+        Κόστος ενέργειας στον ορίζοντα για συνολική ισχύ total_kw (κυρτό, τμηματικά γραμμικό)
+        """
+        solar = np.minimum(total_kw, solar_kw)
+        return self.horizon_hours * (self.solar_value_kwh * solar + rate * np.maximum(0.0, total_kw - solar_kw))
+
+    def _assign(self, problem: _Problem, values: np.ndarray, price: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Επιλογή ανά GPU για σκιώδη τιμή ισχύος `price`, με πολλαπλασιαστές ανά rig
+        ώστε κανένα rig να μην ξεπερνά το θερμικό του όριο (bisection σε όλα μαζί)
+        """
+        power = problem.power * self.horizon_hours
+        rows = np.arange(len(values))
+
+        def choose(rig_price):
+            return np.argmax(values - (price + rig_price[problem.rig_codes])[:, None] * power, axis=1)
+
+        def rig_load(choice):
+            return np.bincount(problem.rig_codes, problem.power[rows, choice], minlength=len(problem.rig_ids))
+
+        rig_price = np.zeros(len(problem.rig_ids))
+        choice = choose(rig_price)
+        over = rig_load(choice) > problem.rig_limits + _EPS
+        if not over.any():
+            return choice, rig_price
+
+        finite = values[np.isfinite(values)]
+        low = np.zeros(len(problem.rig_ids))
+        high = np.where(over, (np.abs(finite).max() if finite.size else 1.0) / max(power[power > 0].min(), _EPS) + 1, 0.0)
+        for _ in range(40):
+            middle = (low + high) / 2
+            feasible = rig_load(choose(middle)) <= problem.rig_limits + _EPS
+            high = np.where(over & feasible, middle, high)
+            low = np.where(over & ~feasible, middle, low)
+        return choose(high), high
+
+    def _lagrangian(self, problem: _Problem, values: np.ndarray, solar_kw: float, rate: float) -> Tuple[np.ndarray, Tuple[float, np.ndarray], int]:
+        """
+        Σκιώδης τιμή ισχύος που σέβεται το ηλιακό πλεόνασμα και το όριο ισχύος
+
+        Επιστρέφει την επιλογή, τους πολλαπλασιαστές (τιμή ισχύος, τιμές ανά rig)
+        και το πλήθος των αξιολογήσεων.
+        """
+        rows = np.arange(len(values))
+        evaluations = 0
+
+        def load(price):
+            nonlocal evaluations
+            evaluations += 1
+            choice, rig_price = self._assign(problem, values, price)
+            return choice, rig_price, problem.power[rows, choice].sum()
+
+        def lowest_price(low, high, limit):
+            # Ελάχιστη τιμή στο [low, high] για την οποία η ισχύς χωρά στο limit
+            best, best_rig_price, _ = load(high)
+            for _ in range(40):
+                middle = (low + high) / 2
+                choice, rig_price, total = load(middle)
+                if total <= limit + _EPS:
+                    high, best, best_rig_price = middle, choice, rig_price
+                else:
+                    low = middle
+            return best, (high, best_rig_price)
+
+        solar_kw = min(solar_kw, problem.cap)
+        choice, rig_price, total = load(self.solar_value_kwh)
+        if total <= solar_kw + _EPS:
+            return choice, (self.solar_value_kwh, rig_price), evaluations
+        choice, rig_price, total = load(rate)
+        if total <= solar_kw + _EPS:
+            choice, multipliers = lowest_price(self.solar_value_kwh, rate, solar_kw)
+            return choice, multipliers, evaluations
+        if total <= problem.cap + _EPS:
+            return choice, (rate, rig_price), evaluations
+        finite = values[np.isfinite(values)]
+        ceiling = (finite.max() if finite.size else 1.0) / (self.horizon_hours * max(problem.power[problem.power > 0].min(), _EPS)) + rate + 1
+        choice, multipliers = lowest_price(rate, ceiling, problem.cap)
+        return choice, multipliers, evaluations
+
+    def _dual_bound(self, problem: _Problem, values: np.ndarray, multipliers: Tuple[float, np.ndarray],
+                    solar_kw: float, rate: float) -> float:
+        """
+        Άνω φράγμα του βέλτιστου κέρδους (δυϊκό Lagrange) για οποιουσδήποτε πολλαπλασιαστές
+
+        Με τους πολλαπλασιαστές της τελευταίας κρύας επίλυσης το φράγμα υπολογίζεται
+        σε ένα πέρασμα και πιστοποιεί πόσο κοντά στο βέλτιστο είναι μια θερμή λύση.
+        """
+        price, rig_price = multipliers
+        rig_price = np.where(np.isfinite(problem.rig_limits), rig_price, 0.0)
+        hours = self.horizon_hours
+        relaxed = np.max(values - (price + rig_price[problem.rig_codes])[:, None] * problem.power * hours, axis=1).sum()
+        solar = min(solar_kw, problem.cap)
+        candidates = [0.0, solar]
+        if np.isfinite(problem.cap):
+            candidates.append(problem.cap)
+        elif price > rate + _EPS:
+            return np.inf
+        energy_term = max(price * hours * total - self._energy(total, solar, rate) for total in candidates)
+        rig_term = hours * float((rig_price * np.where(np.isfinite(problem.rig_limits), problem.rig_limits, 0.0)).sum())
+        return float(relaxed + energy_term + rig_term)
+
+    def _objective(self, problem: _Problem, values: np.ndarray, choice: np.ndarray, solar_kw: float, rate: float) -> float:
+        rows = np.arange(len(choice))
+        return float(values[rows, choice].sum() - self._energy(problem.power[rows, choice].sum(), solar_kw, rate))
+
+    def _solve_milp(self, problem: _Problem, values: np.ndarray, solar_kw: float, rate: float) -> Optional[np.ndarray]:
+        """
+        Ακριβής λύση ως MILP (scipy/HiGHS): μία επιλογή ανά GPU, ισχύς από ηλιακό
+        πλεόνασμα και δίκτυο, όριο ισχύος και θερμικά όρια ανά rig
+        """
+        try:
+            from scipy.optimize import Bounds, LinearConstraint, milp
+            from scipy.sparse import csr_matrix, hstack, vstack
+        except ImportError:
+            logger.warning("Το scipy δεν είναι διαθέσιμο. Χρήση ευρετικής βελτιστοποίησης στρατηγικής")
+            return None
+
+        gpu_count, option_count = values.shape
+        size = gpu_count * option_count
+        allowed = np.isfinite(values).ravel()
+        power = problem.power.ravel()
+        hours = self.horizon_hours
+        solar = min(solar_kw, problem.cap)
+
+        # Μεταβλητές: x (GPU x επιλογή), ισχύς από ηλιακό, ισχύς από δίκτυο
+        cost = np.concatenate([-np.where(allowed, values.ravel(), 0.0), [hours * self.solar_value_kwh, hours * rate]])
+        gpu_rows = np.repeat(np.arange(gpu_count), option_count)
+        one_choice = hstack([csr_matrix((np.ones(size), (gpu_rows, np.arange(size))), shape=(gpu_count, size)),
+                             csr_matrix((gpu_count, 2))])
+        balance = csr_matrix(np.concatenate([power, [-1.0, -1.0]])[None, :])
+        rows, lower, upper = [one_choice, balance], [np.ones(gpu_count), [0.0]], [np.ones(gpu_count), [0.0]]
+        limited = np.flatnonzero(np.isfinite(problem.rig_limits))
+        if len(limited):
+            member = np.isin(problem.rig_codes[gpu_rows], limited)
+            rig_rows = np.searchsorted(limited, problem.rig_codes[gpu_rows][member])
+            rows.append(hstack([csr_matrix((power[member], (rig_rows, np.flatnonzero(member))), shape=(len(limited), size)),
+                                csr_matrix((len(limited), 2))]))
+            lower.append(np.full(len(limited), -np.inf))
+            upper.append(problem.rig_limits[limited])
+
+        result = milp(
+            c=cost,
+            constraints=LinearConstraint(vstack(rows).tocsr(), np.concatenate(lower), np.concatenate(upper)),
+            integrality=np.concatenate([np.ones(size), [0, 0]]),
+            bounds=Bounds(np.zeros(size + 2),
+                          np.concatenate([allowed.astype(float), [solar, max(0.0, problem.cap - solar)]])),
+            options={"time_limit": self.solver_time_limit}
+        )
+        if result.x is None:
+            logger.warning(f"Αποτυχία επίλυσης στρατηγικής mining: {result.message}")
+            return None
+        return np.argmax(result.x[:size].reshape(gpu_count, option_count), axis=1)
+
+    def _feasible(self, problem: _Problem, values: np.ndarray, choice: np.ndarray) -> bool:
+        rows = np.arange(len(choice))
+        chosen = problem.power[rows, choice]
+        rig_load = np.bincount(problem.rig_codes, chosen, minlength=len(problem.rig_ids))
+        return (np.isfinite(values[rows, choice]).all()
+                and chosen.sum() <= problem.cap + _EPS
+                and (rig_load <= problem.rig_limits + _EPS).all())
+
+    def _improve(self, problem: _Problem, values: np.ndarray, choice: np.ndarray,
+                 solar_kw: float, rate: float) -> Tuple[np.ndarray, int]:
+        """
+        Τοπική αναζήτηση στην πραγματική αντικειμενική: η καλύτερη εφικτή αλλαγή
+        μίας GPU ή ενός ζεύγους GPU σε κάθε βήμα, μέχρι να μην υπάρχει βελτίωση
+        """
+        choice = choice.copy()
+        rows = np.arange(len(choice))
+        rig_count = len(problem.rig_ids)
+        moves = 0
+        while moves < self.max_moves:
+            chosen_power = problem.power[rows, choice]
+            total = chosen_power.sum()
+            rig_load = np.bincount(problem.rig_codes, chosen_power, minlength=rig_count)
+            rig_slack = (problem.rig_limits - rig_load)[problem.rig_codes]
+            delta_power = problem.power - chosen_power[:, None]
+            delta_value = values - values[rows, choice][:, None]
+            base_energy = self._energy(total, solar_kw, rate)
+
+            gain = delta_value - (self._energy(total + delta_power, solar_kw, rate) - base_energy)
+            feasible = (total + delta_power <= problem.cap + _EPS) & (delta_power <= rig_slack[:, None] + _EPS)
+            single = np.where(feasible, gain, -np.inf)
+            best = np.unravel_index(np.argmax(single), single.shape)
+            if single[best] > _EPS:
+                choice[best[0]] = best[1]
+                moves += 1
+                continue
+
+            # Ζεύγη: μια GPU ανεβαίνει (μη εφικτή μόνη της) και μια άλλη απελευθερώνει ισχύ
+            finite_gain = np.where(np.isfinite(delta_value), gain, -np.inf)
+            up = np.argsort(-np.where(feasible | (delta_power <= 0), -np.inf, finite_gain), axis=None)[:self.pair_candidates]
+            down = np.argsort(-np.where(delta_power < 0, finite_gain, -np.inf), axis=None)[:self.pair_candidates]
+            up = up[np.isfinite(finite_gain.flat[up]) & ~feasible.flat[up] & (delta_power.flat[up] > 0)]
+            down = down[np.isfinite(finite_gain.flat[down]) & (delta_power.flat[down] < 0)]
+            if not len(up) or not len(down):
+                break
+            up_gpu, up_option = np.unravel_index(up, values.shape)
+            down_gpu, down_option = np.unravel_index(down, values.shape)
+            up_power = delta_power[up_gpu, up_option][:, None]
+            down_power = delta_power[down_gpu, down_option][None, :]
+            pair_total = total + up_power + down_power
+            same_rig = problem.rig_codes[up_gpu][:, None] == problem.rig_codes[down_gpu][None, :]
+            up_rig_ok = up_power + np.where(same_rig, down_power, 0.0) <= rig_slack[up_gpu][:, None] + _EPS
+            pair_gain = (delta_value[up_gpu, up_option][:, None] + delta_value[down_gpu, down_option][None, :]
+                         - (self._energy(pair_total, solar_kw, rate) - base_energy))
+            pair_ok = (up_gpu[:, None] != down_gpu[None, :]) & (pair_total <= problem.cap + _EPS) & up_rig_ok
+            pair_gain = np.where(pair_ok, pair_gain, -np.inf)
+            best = np.unravel_index(np.argmax(pair_gain), pair_gain.shape)
+            if pair_gain[best] <= _EPS:
+                break
+            choice[up_gpu[best[0]]] = up_option[best[0]]
+            choice[down_gpu[best[1]]] = down_option[best[1]]
+            moves += 1
+        return choice, moves
+
+    def _horizon_rates(self, energy_data: Dict) -> Tuple[np.ndarray, float]:
+        """
+        Τιμή δικτύου ανά ώρα του ορίζοντα και η σταθμισμένη μέση τιμή της
+
+        Η ανάθεση και το ηλιακό πλεόνασμα μένουν σταθερά σε όλο τον ορίζοντα, οπότε
+        το κόστος της ενέργειας από το δίκτυο είναι γραμμικό στο άθροισμα των
+        ωριαίων τιμών και η μέση τιμή δίνει ακριβώς το ίδιο κόστος.
+        """
+        hours = max(1, int(np.ceil(self.horizon_hours)))
+        schedule = energy_data.get("hourly_rates") or self.tariff.hourly_rates(hours)
+        rates = np.array([float(item["rate"]) for item in schedule[:hours]])
+        # Η τελευταία ώρα μετρά κατά το κλάσμα της που ανήκει στον ορίζοντα
+        weights = np.clip(self.horizon_hours - np.arange(len(rates)), 0.0, 1.0)
+        return rates, float((rates * weights).sum() / max(weights.sum(), _EPS))
+
+    def optimize(self,
+                 gpus: List[Dict],
+                 coins_data: Dict,
+                 energy_data: Dict,
+                 constraints: Optional[Dict] = None,
+                 rental_prices: Optional[Dict[str, float]] = None) -> Dict:
+        """
+        Βέλτιστη ανάθεση των GPU με τις τρέχουσες τιμές νομισμάτων, ενοικίασης και ενέργειας
+
+        rental_prices: τιμή αγοράς ανά ώρα ανά μοντέλο GPU στο CloreAI.
+        energy_data: current_consumption (kW), solar_production.current_output (kW) και
+        προαιρετικά hourly_rates (όπως το TariffSchedule.hourly_rates, αλλιώς από το τιμολόγιο).
+        """
+        with self._lock:
+            return self._optimize(gpus, coins_data, energy_data, constraints or {}, rental_prices or {})
+
+    def _optimize(self, gpus: List[Dict], coins_data: Dict, energy_data: Dict,
+                  constraints: Dict, rental_prices: Dict[str, float]) -> Dict:
+        started = time.perf_counter()
+        if not gpus:
+            return {"assignments": [], "totals": {}, "constraints": {}, "solver": {"mode": "none"}, "recommended_coin": None}
+
+        revenue_by_coin = coin_revenue_per_hour(coins_data)
+        coins = sorted(revenue_by_coin)
+        prices = {normalize_model(model): float(price) for model, price in rental_prices.items() if price is not None}
+        problem, factor, rent_price = self._build(gpus, coins, prices, constraints)
+        revenue = self._revenue(factor, rent_price, np.array([revenue_by_coin[coin] for coin in coins]))
+        switch_cost = float(constraints.get("switch_cost", self.switch_cost))
+        values = self._values(problem, revenue, switch_cost)
+
+        hourly_rates, rate = self._horizon_rates(energy_data)
+        solar_output = float((energy_data.get("solar_production") or {}).get("current_output") or 0)
+        mining_kw = float(np.sum(problem.power[np.arange(len(gpus)), np.maximum(problem.current, 0)] * (problem.current >= 0)))
+        base_load = max(0.0, float(energy_data.get("current_consumption") or 0) - mining_kw)
+        solar_kw = max(0.0, solar_output - base_load)
+        if constraints.get("solar_only"):
+            problem.cap = min(problem.cap, solar_kw)
+
+        choice, moves, evaluations, method = None, 0, 0, "local_search"
+        if (self._problem is not None
+                and self._problem.key == problem.key
+                and self._warm_solves < self.cold_every
+                and self._feasible(problem, values, self._choice)):
+            # Θερμή επίλυση: τοπική αναζήτηση από την προηγούμενη λύση, δεκτή αν
+            # απέχει λιγότερο από STRATEGY_WARM_GAP από το δυϊκό φράγμα
+            candidate, moves = self._improve(problem, values, self._choice, solar_kw, rate)
+            bound = self._dual_bound(problem, values, self._multipliers, solar_kw, rate)
+            if bound - self._objective(problem, values, candidate, solar_kw, rate) <= self.warm_gap * max(abs(bound), _EPS):
+                choice = candidate
+                self._warm_solves += 1
+
+        mode = "warm" if choice is not None else "cold"
+        if choice is None:
+            start, self._multipliers, evaluations = self._lagrangian(problem, values, solar_kw, rate)
+            if not self._feasible(problem, values, start):
+                start = np.full(len(gpus), problem.labels.index(OPTION_IDLE))
+            choice, moves = self._improve(problem, values, start, solar_kw, rate)
+            exact = self._solve_milp(problem, values, solar_kw, rate)
+            if (exact is not None and self._feasible(problem, values, exact)
+                    and self._objective(problem, values, exact, solar_kw, rate) >= self._objective(problem, values, choice, solar_kw, rate) - _EPS):
+                choice, method = exact, "milp"
+            bound = self._dual_bound(problem, values, self._multipliers, solar_kw, rate)
+            self._warm_solves = 0
+        self._problem, self._choice = problem, choice
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats["solves"] += 1
+        self.stats[f"{mode}_solves"] += 1
+        self.stats[f"{mode}_ms_total"] += elapsed_ms
+        self.stats["last_ms"] = elapsed_ms
+        objective = self._objective(problem, values, choice, solar_kw, rate)
+        return self._result(gpus, problem, revenue, values, choice, solar_kw, rate, hourly_rates, switch_cost, {
+            "mode": mode,
+            "method": method,
+            "moves": moves,
+            "price_evaluations": evaluations,
+            "shadow_price_kwh": round(float(self._multipliers[0]), 6),
+            "dual_bound": round(bound, 6) if np.isfinite(bound) else None,
+            "gap": round((bound - objective) / max(abs(bound), _EPS), 6) if np.isfinite(bound) else None,
+            "elapsed_ms": round(elapsed_ms, 3)
+        })
+
+    def _result(self, gpus: List[Dict], problem: _Problem, revenue: np.ndarray, values: np.ndarray,
+                choice: np.ndarray, solar_kw: float, rate: float, hourly_rates: np.ndarray,
+                switch_cost: float, solver: Dict) -> Dict:
+        rows = np.arange(len(choice))
+        chosen_power = problem.power[rows, choice]
+        total_kw = float(chosen_power.sum())
+        chosen_revenue = revenue[rows, choice]
+        switching = revenue[rows, choice] * self.horizon_hours - values[rows, choice]
+        energy = float(self._energy(total_kw, solar_kw, rate))
+        net = float(values[rows, choice].sum()) - energy
+
+        assignments = []
+        coin_revenue: Dict[str, float] = {}
+        for position, gpu in enumerate(gpus):
+            label = problem.labels[choice[position]]
+            current = problem.labels[problem.current[position]] if problem.current[position] >= 0 else None
+            coin = None if label in (OPTION_RENT, OPTION_IDLE) else label.split(":")[0]
+            if coin:
+                coin_revenue[coin] = coin_revenue.get(coin, 0.0) + float(chosen_revenue[position])
+            assignments.append({
+                "gpu_id": gpu.get("gpu_id", position),
+                "model": gpu.get("model", "Unknown"),
+                "rig_id": problem.rig_ids[problem.rig_codes[position]],
+                "current": current,
+                "assignment": label,
+                "coin": coin,
+                "mode": "eco" if label.endswith(ECO_SUFFIX) else ("full" if coin else label),
+                "power_w": round(float(chosen_power[position]) * 1000, 1),
+                "revenue_per_hour": round(float(chosen_revenue[position]), 6),
+                "switch": current is not None and current != label,
+                "switching_cost": round(float(switching[position]), 6)
+            })
+
+        rig_load = np.bincount(problem.rig_codes, chosen_power, minlength=len(problem.rig_ids))
+        return {
+            "assignments": assignments,
+            "recommended_coin": max(coin_revenue, key=coin_revenue.get) if coin_revenue else None,
+            "totals": {
+                "horizon_hours": self.horizon_hours,
+                "power_w": round(total_kw * 1000, 1),
+                "revenue_per_hour": round(float(chosen_revenue.sum()), 6),
+                "energy_cost": round(energy, 6),
+                "switching_cost": round(float(switching.sum()), 6),
+                "net_profit": round(net, 6),
+                "switches": sum(1 for item in assignments if item["switch"])
+            },
+            "constraints": {
+                "power_cap_w": round(problem.cap * 1000, 1) if np.isfinite(problem.cap) else None,
+                "solar_surplus_w": round(solar_kw * 1000, 1),
+                "grid_rate_kwh": round(rate, 6),
+                "grid_rates_kwh": [round(float(value), 6) for value in hourly_rates],
+                "solar_value_kwh": self.solar_value_kwh,
+                "switch_cost": switch_cost,
+                "rigs": {
+                    rig_id: {
+                        "power_w": round(float(rig_load[index]) * 1000, 1),
+                        "limit_w": round(float(problem.rig_limits[index]) * 1000, 1) if np.isfinite(problem.rig_limits[index]) else None
+                    }
+                    for index, rig_id in enumerate(problem.rig_ids)
+                }
+            },
+            "solver": solver
+        }
+
+    def metrics(self) -> Dict:
+        stats = self.stats
+        return {
+            **{key: value for key, value in stats.items() if not key.endswith("_total")},
+            "avg_cold_ms": stats["cold_ms_total"] / stats["cold_solves"] if stats["cold_solves"] else 0.0,
+            "avg_warm_ms": stats["warm_ms_total"] / stats["warm_solves"] if stats["warm_solves"] else 0.0
+        }
@@ -0,0 +1,228 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+
+def _parse_minutes(value: str) -> int:
+    """
+    Μετατροπή ώρας της μορφής "HH:MM" σε λεπτά από τα μεσάνυχτα ("24:00" επιτρέπεται)
+    """
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class TariffSchedule:
+    """
+    Τιμολόγιο ηλεκτρικής ενέργειας με ζώνες χρήσης (time-of-use), χρέωση ισχύος
+    (demand charge) και τιμή συμψηφισμού για την ενέργεια που εγχέεται στο δίκτυο
+
+    Οι ζώνες μετατρέπονται κατά τη φόρτωση σε πίνακα τιμών ανά λεπτό της εβδομάδας,
+    οπότε η τιμή για οποιαδήποτε χρονοσειρά προκύπτει με ένα vectorized indexing.
+
+    Μορφή αρχείου (JSON):
+        {
+            "name": "Οικιακό ΤΟU",
+            "timezone": "Europe/Athens",
+            "default_rate": 0.12,
+            "periods": [
+                {"name": "peak", "days": [0, 1, 2, 3, 4], "start": "17:00", "end": "21:00", "rate": 0.22},
+                {"name": "night", "start": "23:00", "end": "07:00", "rate": 0.07}
+            ],
+            "demand_charge_per_kw": 0.0,
+            "demand_window_minutes": 15,
+            "feed_in_rate": 0.05
+        }
+    Οι ημέρες μετρούν από Δευτέρα (0) έως Κυριακή (6). Οι μεταγενέστερες ζώνες
+    υπερισχύουν των προηγούμενων όταν επικαλύπτονται.
+    """
+
+    def __init__(self,
+                 default_rate: float,
+                 periods: Optional[List[Dict]] = None,
+                 demand_charge_per_kw: float = 0.0,
+                 demand_window_minutes: int = 15,
+                 feed_in_rate: float = 0.0,
+                 tz: str = "UTC",
+                 name: str = "flat"):
+        self.name = name
+        self.timezone = tz
+        self.default_rate = float(default_rate)
+        self.periods = periods or []
+        self.demand_charge_per_kw = float(demand_charge_per_kw)
+        self.demand_window_minutes = int(demand_window_minutes)
+        self.feed_in_rate = float(feed_in_rate)
+        self.minute_rates = self._build_minute_rates()
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TariffSchedule":
+        return cls(
+            default_rate=data.get("default_rate", 0.08),
+            periods=data.get("periods", []),
+            demand_charge_per_kw=data.get("demand_charge_per_kw", 0.0),
+            demand_window_minutes=data.get("demand_window_minutes", 15),
+            feed_in_rate=data.get("feed_in_rate", 0.0),
+            tz=data.get("timezone", "UTC"),
+            name=data.get("name", "custom")
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "TariffSchedule":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def _build_minute_rates(self) -> np.ndarray:
+        """
+        Πίνακας τιμής (EUR/kWh) για κάθε λεπτό της εβδομάδας
+        """
+        rates = np.full(MINUTES_PER_WEEK, self.default_rate)
+        for period in self.periods:
+            start = _parse_minutes(period.get("start", "00:00"))
+            end = _parse_minutes(period.get("end", "24:00"))
+            for day in period.get("days", range(7)):
+                base = day * MINUTES_PER_DAY
+                if start < end:
+                    rates[base + start:base + end] = period["rate"]
+                else:
+                    # Ζώνη που περνά τα μεσάνυχτα (π.χ. 23:00-07:00)
+                    rates[base + start:base + MINUTES_PER_DAY] = period["rate"]
+                    next_base = ((day + 1) % 7) * MINUTES_PER_DAY
+                    rates[next_base:next_base + end] = period["rate"]
+        return rates
+
+    def _local_index(self, timestamps) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+        return index.tz_convert(self.timezone)
+
+    def rates(self, timestamps) -> np.ndarray:
+        """
+        Τιμή ενέργειας για κάθε χρονοσφραγίδα (vectorized)
+        """
+        local = self._local_index(timestamps)
+        minute_of_week = local.dayofweek * MINUTES_PER_DAY + local.hour * 60 + local.minute
+        return self.minute_rates[np.asarray(minute_of_week)]
+
+    def rate_at(self, timestamp: Optional[datetime] = None) -> float:
+        """
+        Τιμή ενέργειας τη δεδομένη στιγμή (προεπιλογή: τώρα)
+        """
+        timestamp = timestamp or datetime.now(timezone.utc)
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.astimezone()
+        return float(self.rates([timestamp])[0])
+
+    def hourly_rates(self, hours: int = 24, start: Optional[datetime] = None) -> List[Dict]:
+        """
+        Τιμές ενέργειας για τις επόμενες ώρες
+        """
+        start = (start or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+        timestamps = [start + timedelta(hours=h) for h in range(hours)]
+        return [
+            {"timestamp": ts.isoformat(), "rate": float(rate)}
+            for ts, rate in zip(timestamps, self.rates(timestamps))
+        ]
+
+    def compute_cost(self,
+                     timestamps: Sequence,
+                     consumption_kw: Sequence[float],
+                     solar_kw: Optional[Sequence[float]] = None,
+                     interval_seconds: Optional[float] = None) -> Dict:
+        """
+        Κόστος ενέργειας πάνω σε χρονοσειρά ισχύος σε ένα vectorized πέρασμα
+
+        Κάθε σημείο θεωρείται σταθερή ισχύς (kW) μέχρι το επόμενο σημείο. Η χρέωση
+        ισχύος υπολογίζεται στη μέγιστη μέση ισχύ εισαγωγής ανά παράθυρο ζήτησης
+        για κάθε μήνα και προστίθεται στο διάστημα όπου σημειώθηκε η αιχμή.
+        Επιστρέφει πίνακες ανά διάστημα και τα συνολικά μεγέθη.
+        """
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+        consumption = np.asarray(consumption_kw, dtype=float)
+        solar = np.zeros_like(consumption) if solar_kw is None else np.asarray(solar_kw, dtype=float)
+        n = len(consumption)
+        if n == 0:
+            empty = np.zeros(0)
+            return {"timestamps": index, "rate": empty, "import_kwh": empty, "export_kwh": empty,
+                    "interval_cost": empty, "cumulative_cost": empty, "energy_cost": 0.0,
+                    "feed_in_credit": 0.0, "demand_charge": 0.0, "total_cost": 0.0}
+
+        # Διάρκεια κάθε διαστήματος σε ώρες
+        if interval_seconds is not None:
+            hours = np.full(n, interval_seconds / 3600)
+        else:
+            deltas = np.asarray((index[1:] - index[:-1]).total_seconds()) / 3600
+            fallback = np.median(deltas) if len(deltas) else 1.0
+            hours = np.append(deltas, fallback)
+
+        net_kw = consumption - solar
+        import_kwh = np.clip(net_kw, 0, None) * hours
+        export_kwh = np.clip(-net_kw, 0, None) * hours
+        rates = self.rates(index)
+
+        energy_cost = import_kwh * rates
+        feed_in_credit = export_kwh * self.feed_in_rate
+        demand_cost = np.zeros(n)
+
+        if self.demand_charge_per_kw > 0:
+            local = index.tz_convert(self.timezone)
+            frame = pd.DataFrame({
+                "import_kw": np.clip(net_kw, 0, None),
+                # Τα παράθυρα ορίζονται σε UTC ώστε να μην επηρεάζονται από την αλλαγή ώρας
+                "window": index.floor(f"{self.demand_window_minutes}min"),
+                "month": local.year * 12 + local.month,
+                "position": np.arange(n)
+            })
+            windows = frame.groupby(["month", "window"], sort=False).agg(
+                demand=("import_kw", "mean"), position=("position", "first")
+            )
+            peaks = windows.loc[windows.groupby(level="month")["demand"].idxmax()]
+            demand_cost[peaks["position"].to_numpy()] = peaks["demand"].to_numpy() * self.demand_charge_per_kw
+
+        interval_cost = energy_cost - feed_in_credit + demand_cost
+        cumulative = np.cumsum(interval_cost)
+
+        return {
+            "timestamps": index,
+            "rate": rates,
+            "import_kwh": import_kwh,
+            "export_kwh": export_kwh,
+            "interval_cost": interval_cost,
+            "cumulative_cost": cumulative,
+            "energy_cost": float(energy_cost.sum()),
+            "feed_in_credit": float(feed_in_credit.sum()),
+            "demand_charge": float(demand_cost.sum()),
+            "total_cost": float(cumulative[-1])
+        }
+
+
+@lru_cache(maxsize=1)
+def get_tariff() -> TariffSchedule:
+    """
+    Φόρτωση του ενεργού τιμολογίου (TARIFF_SCHEDULE_PATH ή σταθερή τιμή ENERGY_COST_PER_KWH)
+    """
+    flat_rate = float(os.getenv("ENERGY_COST_PER_KWH", 0.08))
+    path = os.getenv("TARIFF_SCHEDULE_PATH")
+    if path:
+        try:
+            tariff = TariffSchedule.from_file(path)
+            logger.info(f"Φορτώθηκε τιμολόγιο ενέργειας '{tariff.name}' από {path}")
+            return tariff
+        except Exception as e:
+            logger.error(f"Σφάλμα κατά τη φόρτωση τιμολογίου από {path}: {str(e)}")
+    return TariffSchedule(
+        default_rate=flat_rate,
+        feed_in_rate=float(os.getenv("ENERGY_FEED_IN_RATE", 0.0))
+    )
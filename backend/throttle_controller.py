@@ -0,0 +1,367 @@
+import os
+import logging
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.energy_history import ENERGY_SAMPLE_INTERVAL
+
+# Φόρτωση περιβαλλοντικών μεταβλητών
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+class SolarThrottleController:
+    """
+    Έλεγχος ισχύος των rigs με βάση το ηλιακό πλεόνασμα και την τιμή του δικτύου
+
+    Σε κάθε βήμα υπολογίζεται ένας προϋπολογισμός ισχύος για το mining: το ηλιακό
+    πλεόνασμα (παραγωγή μείον το φορτίο εκτός mining) συν ένα επιτρεπόμενο ποσό από
+    το δίκτυο που μειώνεται γραμμικά από την φθηνή προς την ακριβή τιμή. Ο
+    προϋπολογισμός μοιράζεται στα rigs κατά σειρά ονομαστικής αποδοτικότητας
+    (μέγιστο hashrate / μέγιστη ισχύς), ώστε ένα rig που έχει περιοριστεί να μη
+    χάνει τη θέση του.
+
+    Οι αλλαγές περιορίζονται με:
+    - νεκρή ζώνη (hysteresis) στην ισχύ και στο όριο ακριβής τιμής
+    - ελάχιστο χρόνο μεταξύ διαδοχικών αλλαγών
+    - μέγιστη μεταβολή ισχύος ανά αλλαγή (ramp)
+
+    Όρια στέλνονται μόνο όταν τα δεδομένα των rigs είναι ζωντανά. Αν ο connector
+    δεν μπορεί να τα εφαρμόσει ("unsupported") ή αποτύχει, τα ίδια όρια δεν
+    ξαναστέλνονται πριν περάσει το THROTTLE_RETRY_BACKOFF (στο "unsupported"
+    καθόλου μέχρι τότε).
+    """
+
+    def __init__(self, mining_connector, energy_connector):
+        self.mining_connector = mining_connector
+        self.energy_connector = energy_connector
+        self.tariff = energy_connector.tariff
+        self.enabled = os.getenv("THROTTLE_CONTROLLER_ENABLED", "False").lower() == "true"
+        self.interval = int(os.getenv("THROTTLE_INTERVAL", 60))
+        self.min_change_interval = int(os.getenv("THROTTLE_MIN_CHANGE_INTERVAL", 300))
+        self.max_ramp_w = float(os.getenv("THROTTLE_MAX_RAMP_W", 500))
+        self.hysteresis_w = float(os.getenv("THROTTLE_HYSTERESIS_W", 150))
+        self.cheap_rate = float(os.getenv("THROTTLE_CHEAP_RATE", 0.10))
+        self.expensive_rate = float(os.getenv("THROTTLE_EXPENSIVE_RATE", 0.20))
+        self.rate_hysteresis = float(os.getenv("THROTTLE_RATE_HYSTERESIS", 0.01))
+        self.min_rig_power_w = float(os.getenv("THROTTLE_MIN_RIG_POWER_W", 100))
+        self.retry_backoff = int(os.getenv("THROTTLE_RETRY_BACKOFF", 900))
+        self.targets: Dict[str, float] = {}
+        self.expensive_mode = False
+        self.last_change: Optional[float] = None
+        self.last_decision: Optional[Dict] = None
+        # Αποτέλεσμα της τελευταίας εφαρμογής ορίων και τα όρια που δεν εφαρμόστηκαν
+        self.actuation: Optional[str] = None
+        self._pending: Optional[Dict[str, float]] = None
+        self._retry_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _spawn(self) -> "SolarThrottleController":
+        """
+        Νέος controller με τις ίδιες ρυθμίσεις και καθαρή κατάσταση (για προσομοιώσεις)
+        """
+        controller = SolarThrottleController(self.mining_connector, self.energy_connector)
+        for name in ("interval", "min_change_interval", "max_ramp_w", "hysteresis_w", "cheap_rate",
+                     "expensive_rate", "rate_hysteresis", "min_rig_power_w"):
+            setattr(controller, name, getattr(self, name))
+        return controller
+
+    def _grid_allowance(self, rate: float, max_total_w: float) -> float:
+        """
+        Ισχύς που επιτρέπεται να αντληθεί από το δίκτυο για mining στην τρέχουσα τιμή
+        """
+        # Hysteresis στο όριο ακριβής τιμής ώστε να μην εναλλάσσεται σε κάθε βήμα
+        if self.expensive_mode:
+            self.expensive_mode = rate > self.expensive_rate - self.rate_hysteresis
+        else:
+            self.expensive_mode = rate >= self.expensive_rate
+
+        if self.expensive_mode:
+            return 0.0
+        if rate <= self.cheap_rate:
+            return max_total_w
+        span = max(self.expensive_rate - self.cheap_rate, 1e-9)
+        return max_total_w * (self.expensive_rate - rate) / span
+
+    def _allocate(self, rigs: List[Dict], budget_w: float) -> Dict[str, float]:
+        """
+        Κατανομή του προϋπολογισμού ισχύος στα rigs, πρώτα στα πιο αποδοτικά
+        """
+        def efficiency(rig: Dict) -> float:
+            hashrate = rig.get("max_hashrate") or rig.get("hashrate", 0)
+            return hashrate / rig["max_power"] if rig.get("max_power") else 0.0
+
+        targets = {}
+        remaining = budget_w
+        for rig in sorted(rigs, key=efficiency, reverse=True):
+            share = min(rig["max_power"], remaining)
+            # Κάτω από την ελάχιστη λειτουργική ισχύ το rig σταματά
+            if share < self.min_rig_power_w:
+                share = 0.0
+            targets[rig["rig_id"]] = share
+            remaining -= share
+        return targets
+
+    def compute_targets(self,
+                        rigs: List[Dict],
+                        consumption_kw: float,
+                        solar_kw: float,
+                        rate: float,
+                        now: float) -> Dict:
+        """
+        Απόφαση ελέγχου για ένα βήμα (χωρίς I/O)
+
+        Το `now` είναι χρόνος σε δευτερόλεπτα, ώστε η ίδια λογική να χρησιμοποιείται
+        τόσο σε πραγματικό χρόνο όσο και σε επανάληψη καταγεγραμμένων δεδομένων.
+        """
+        mining_w = sum(rig["power"] for rig in rigs)
+        max_total_w = sum(rig["max_power"] for rig in rigs)
+        base_load_w = max(0.0, consumption_kw * 1000 - mining_w)
+        surplus_w = max(0.0, solar_kw * 1000 - base_load_w)
+        budget_w = min(max_total_w, surplus_w + self._grid_allowance(rate, max_total_w))
+
+        current_w = sum(self.targets.get(rig["rig_id"], rig["power"]) for rig in rigs)
+        decision = {
+            "timestamp": now,
+            "consumption_kw": consumption_kw,
+            "solar_kw": solar_kw,
+            "surplus_kw": surplus_w / 1000,
+            "rate": rate,
+            "expensive_mode": self.expensive_mode,
+            "budget_w": budget_w,
+            "current_w": current_w,
+            "targets": dict(self.targets),
+            "action": "hold"
+        }
+
+        if self.targets and abs(budget_w - current_w) < self.hysteresis_w:
+            decision["reason"] = "hysteresis"
+            return decision
+        if self.last_change is not None and now - self.last_change < self.min_change_interval:
+            decision["reason"] = "rate_limited"
+            return decision
+
+        # Περιορισμός της μεταβολής ανά αλλαγή
+        target_w = min(max(budget_w, current_w - self.max_ramp_w), current_w + self.max_ramp_w)
+        targets = self._allocate(rigs, target_w)
+        if targets == self.targets:
+            decision["reason"] = "unchanged"
+            return decision
+
+        decision.update({"targets": dict(targets), "action": "apply", "reason": "budget_changed"})
+        return decision
+
+    def commit(self, targets: Dict[str, float], now: float):
+        """
+        Καταχώριση ορίων που εφαρμόστηκαν (μόνο αυτά θεωρούνται τρέχοντα στα επόμενα βήματα)
+        """
+        if targets:
+            self.targets = {**self.targets, **targets}
+            self.last_change = now
+
+    def _backing_off(self, targets: Dict[str, float], now: float) -> bool:
+        if self._retry_at is None or now >= self._retry_at:
+            return False
+        return self.actuation == "unsupported" or targets == self._pending
+
+    async def _actuate(self, decision: Dict, rigs: List[Dict], now: float):
+        """
+        Αποστολή των ορίων της απόφασης στα rigs και καταχώριση όσων εφαρμόστηκαν
+        """
+        if not rigs or not all(rig.get("live") for rig in rigs):
+            decision.update({"action": "hold", "reason": "rigs_not_live"})
+            return
+        if self._backing_off(decision["targets"], now):
+            decision.update({"action": "hold", "reason": "backoff", "result": self.actuation})
+            return
+
+        result = await self.mining_connector.set_rig_power_limits(decision["targets"])
+        self.actuation = decision["result"] = result.get("status")
+        # Τα rigs που απέτυχαν κρατούν το προηγούμενο όριο και ξαναδοκιμάζονται μετά το backoff
+        results = result.get("results", {})
+        applied = {
+            rig_id: watts for rig_id, watts in decision["targets"].items()
+            if results.get(rig_id) == "applied"
+        }
+        self.commit(applied, now)
+        if len(applied) == len(decision["targets"]):
+            self._pending = self._retry_at = None
+        else:
+            self._pending = decision["targets"]
+            self._retry_at = now + self.retry_backoff
+            logger.warning(f"Τα όρια ισχύος δεν εφαρμόστηκαν ({self.actuation}), νέα προσπάθεια σε {self.retry_backoff} s")
+        if applied:
+            logger.info(f"Νέα όρια ισχύος rigs: {applied} (προϋπολογισμός {decision['budget_w']:.0f} W)")
+
+    async def step(self) -> Dict:
+        """
+        Ένα βήμα ελέγχου με ζωντανά δεδομένα ενέργειας, τιμολογίου και rigs
+        """
+        energy_data, rigs = await asyncio.gather(
+            self.energy_connector.get_energy_data(),
+            self.mining_connector.get_rigs()
+        )
+        solar = energy_data.get("solar_production") or {}
+        now = time.monotonic()
+        decision = self.compute_targets(
+            rigs,
+            energy_data.get("current_consumption", 0),
+            solar.get("current_output", 0),
+            self.tariff.rate_at(),
+            now
+        )
+        if decision["action"] == "apply":
+            await self._actuate(decision, rigs, now)
+        decision["timestamp"] = datetime.now().isoformat()
+        self.last_decision = decision
+        return decision
+
+    async def _run(self):
+        logger.info("Εκκίνηση ελέγχου ισχύος rigs με βάση το ηλιακό πλεόνασμα")
+        while True:
+            try:
+                await self.step()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Σφάλμα στον έλεγχο ισχύος rigs: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if not self.is_running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Τερματισμός ελέγχου ισχύος rigs")
+
+    def status(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.is_running,
+            "targets": self.targets,
+            "actuation": self.actuation,
+            "pending": self._pending,
+            "expensive_mode": self.expensive_mode,
+            "last_decision": self.last_decision
+        }
+
+    async def load_trace(self, start: datetime, end: datetime, recorded_mining_kw: float = 0.0) -> List[Dict]:
+        """
+        Δημιουργία trace για προσομοίωση από το αποθηκευμένο ιστορικό ενέργειας
+
+        Η καταγεγραμμένη κατανάλωση περιλαμβάνει και τα rigs, οπότε αφαιρείται η
+        `recorded_mining_kw` για να προκύψει το φορτίο εκτός mining.
+        """
+        history = await self.energy_connector.get_history(start, end, ENERGY_SAMPLE_INTERVAL)
+        hours = ENERGY_SAMPLE_INTERVAL / 3600
+        return [
+            {
+                "timestamp": row["timestamp"],
+                "consumption_kw": max(0.0, row["power_usage"] / hours - recorded_mining_kw),
+                "solar_kw": row["solar_generation"] / hours
+            }
+            for row in history
+        ]
+
+    async def simulate(self,
+                       trace: List[Dict],
+                       rigs: Optional[List[Dict]] = None,
+                       speed: float = 0,
+                       include_timeline: bool = False) -> Dict:
+        """
+        Επανάληψη καταγεγραμμένων δεδομένων ενέργειας πιο γρήγορα από τον πραγματικό χρόνο
+
+        Κάθε σημείο του trace περιέχει timestamp, consumption_kw (φορτίο εκτός mining)
+        και solar_kw. Με speed=0 τα βήματα εκτελούνται χωρίς αναμονή, αλλιώς η
+        αναμονή μεταξύ βημάτων είναι ο πραγματικός χρόνος διαιρεμένος με το speed.
+        Τα rigs είναι εικονικά, οπότε δεν εφαρμόζεται κανένα όριο στα πραγματικά rigs.
+        """
+        controller = self._spawn()
+        rigs = [dict(rig) for rig in (rigs or await self.mining_connector.get_rigs())]
+        for rig in rigs:
+            rig["power"] = rig["max_power"]
+
+        # Οι τιμές του τιμολογίου υπολογίζονται μία φορά για όλο το trace
+        sample_times = [
+            datetime.fromisoformat(sample["timestamp"]) if isinstance(sample["timestamp"], str) else sample["timestamp"]
+            for sample in trace
+        ]
+        rates = self.tariff.rates(sample_times) if sample_times else []
+
+        timestamps, totals, solars, mining, timeline = [], [], [], [], []
+        changes = 0
+        previous_time = None
+        for index, (sample, sample_time, rate) in enumerate(zip(trace, sample_times, rates)):
+            now = sample_time.timestamp()
+            base_kw = sample.get("consumption_kw", 0)
+            solar_kw = sample.get("solar_kw", 0)
+            mining_kw = sum(rig["power"] for rig in rigs) / 1000
+
+            decision = controller.compute_targets(
+                rigs, base_kw + mining_kw, solar_kw, float(rate), now
+            )
+            if decision["action"] == "apply":
+                controller.commit(decision["targets"], now)
+                changes += 1
+                for rig in rigs:
+                    rig["power"] = decision["targets"].get(rig["rig_id"], rig["power"])
+                mining_kw = sum(rig["power"] for rig in rigs) / 1000
+
+            timestamps.append(sample_time)
+            totals.append(base_kw + mining_kw)
+            solars.append(solar_kw)
+            mining.append(mining_kw)
+            if include_timeline:
+                timeline.append({
+                    "timestamp": sample_time.isoformat(),
+                    "mining_kw": mining_kw,
+                    "solar_kw": solar_kw,
+                    "budget_w": decision["budget_w"],
+                    "action": decision["action"]
+                })
+
+            if speed > 0 and previous_time is not None:
+                await asyncio.sleep(max(0.0, now - previous_time) / speed)
+            elif index % 1000 == 0:
+                # Παραχώρηση του event loop σε μεγάλες επαναλήψεις
+                await asyncio.sleep(0)
+            previous_time = now
+
+        if not timestamps:
+            return {"steps": 0}
+
+        max_mining_kw = sum(rig["max_power"] for rig in rigs) / 1000
+        controlled = self.tariff.compute_cost(timestamps, totals, solars)
+        baseline = self.tariff.compute_cost(
+            timestamps, [total - mined + max_mining_kw for total, mined in zip(totals, mining)], solars
+        )
+        result = {
+            "steps": len(timestamps),
+            "changes": changes,
+            "average_mining_kw": sum(mining) / len(mining),
+            "max_mining_kw": max_mining_kw,
+            "mining_utilization": (sum(mining) / len(mining)) / max_mining_kw if max_mining_kw else 0,
+            "grid_import_kwh": float(controlled["import_kwh"].sum()),
+            "energy_cost": controlled["total_cost"],
+            "baseline_energy_cost": baseline["total_cost"],
+            "savings": baseline["total_cost"] - controlled["total_cost"]
+        }
+        if include_timeline:
+            result["timeline"] = timeline
+        return result
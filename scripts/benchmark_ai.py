@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark throughput/καθυστέρησης του AI Engine σε διάφορα επίπεδα ταυτοχρονισμού
+
+Για κάθε συνδυασμό μέγιστου μεγέθους batch και ταυτοχρονισμού στέλνονται
+--requests αιτήματα στο AIEngine (in-process, χωρίς HTTP) από N ταυτόχρονους
+clients και μετρώνται tokens/sec, αιτήματα/sec, καθυστέρηση p50/p95 και μέσο
+μέγεθος batch. Έτσι φαίνεται πώς το AI_BATCH_WINDOW_MS / AI_BATCH_MAX_SIZE
+αλλάζει την ισορροπία throughput/καθυστέρησης.
+
+Χρήση:
+    python scripts/benchmark_ai.py --concurrency 1,2,4,8,16 --batch-sizes 1,4,8 --requests 64
+    python scripts/benchmark_ai.py --mock --mock-latency 0.2 --window-ms 20
+
+Με --mock χρησιμοποιείται το δοκιμαστικό μοντέλο (USE_MOCK_AI_MODEL), του
+οποίου το κόστος ανά batch ρυθμίζεται με --mock-latency και AI_MOCK_BATCH_COST.
+
+Με --variant μετράται μια παραλλαγή του μητρώου μοντέλων (π.χ. διαφορετική
+κβάντιση) και με --record τα αποτελέσματα αποθηκεύονται στο μητρώο για τη
+σύγκριση των παραλλαγών:
+    python scripts/benchmark_ai.py --variant qwen-int8 --record
+
+Η cache απαντήσεων και ο router απενεργοποιούνται (εκτός αν δοθεί --with-cache),
+ώστε κάθε αίτημα να φτάνει στο μοντέλο και να μετράται το μοντέλο και όχι
+οι αναζητήσεις στη cache.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROMPTS = [
+    "Ποιο νόμισμα είναι πιο κερδοφόρο για RTX 3080 σήμερα;",
+    "Πόση ενέργεια καταναλώνει το rig μου τη νύχτα;",
+    "Αξίζει να νοικιάσω GPU στο CloreAI αντί να κάνω mining;",
+    "Πώς επηρεάζει η ηλιακή παραγωγή το κόστος εξόρυξης;",
+    "Πρότεινε ρυθμίσεις power limit για RTX 3070.",
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run_level(engine, concurrency: int, requests: int) -> Dict:
+    latencies: List[float] = []
+    counter = iter(range(requests))
+    tokens_before = engine.scheduler.generated_tokens
+    batches_before = engine.scheduler.batches
+    batched_before = engine.scheduler.batched_requests
+
+    async def client():
+        for index in counter:
+            started = time.perf_counter()
+            await engine.generate_response(PROMPTS[index % len(PROMPTS)])
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    tokens = engine.scheduler.generated_tokens - tokens_before
+    batches = engine.scheduler.batches - batches_before
+    return {
+        "max_batch_size": engine.scheduler.max_batch_size,
+        "window_ms": engine.scheduler.window_ms,
+        "concurrency": concurrency,
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "tokens": tokens,
+        "tokens_per_sec": round(tokens / elapsed, 2) if elapsed else 0.0,
+        "requests_per_sec": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "latency_p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+        "avg_batch_size": round((engine.scheduler.batched_requests - batched_before) / batches, 2) if batches else 0.0
+    }
+
+
+async def main(args) -> List[Dict]:
+    from backend.ai_engine import AIEngine
+
+    engine = AIEngine()
+    await engine.wait_until_ready(timeout=args.load_timeout)
+    if args.variant and engine.readiness()["variant"]["name"] != args.variant:
+        await engine.swap_model(args.variant)
+    variant = engine.readiness()["variant"]
+    if not args.json:
+        print(f"Παραλλαγή {variant['name']} ({variant['quantization']}, {variant['device']}): "
+              f"{variant['memory_bytes'] / 1024 / 1024:.0f} MB, "
+              f"φόρτωση {variant['load_seconds']:.1f}s, ζέσταμα {variant['warmup_latency_ms']:.1f}ms")
+    # Ζέσταμα ώστε η πρώτη μέτρηση να μην περιλαμβάνει lazy αρχικοποιήσεις
+    await engine.generate_response(PROMPTS[0])
+
+    results = []
+    try:
+        for batch_size in args.batch_sizes:
+            engine.scheduler.configure(max_batch_size=batch_size, window_ms=args.window_ms)
+            for concurrency in args.concurrency:
+                result = await _run_level(engine, concurrency, args.requests)
+                results.append(result)
+                if not args.json:
+                    print(f"batch≤{result['max_batch_size']:<3} "
+                          f"c={result['concurrency']:<4} "
+                          f"{result['tokens_per_sec']:>9.1f} tok/s "
+                          f"{result['requests_per_sec']:>7.2f} req/s "
+                          f"p50 {result['latency_p50_ms']:>8.1f}ms "
+                          f"p95 {result['latency_p95_ms']:>8.1f}ms "
+                          f"batch {result['avg_batch_size']:.2f}")
+    finally:
+        await engine.shutdown()
+    if args.record:
+        _record(variant, results)
+    return results
+
+
+def _record(variant: Dict, results: List[Dict]):
+    """
+    Αποθήκευση των αποτελεσμάτων στο μητρώο μοντέλων, ανά επίπεδο ταυτοχρονισμού
+    """
+    from backend.database import SessionLocal
+    from backend.model_registry import record_benchmark
+
+    try:
+        import torch
+        num_threads = torch.get_num_threads()
+    except ImportError:
+        num_threads = None
+    db = SessionLocal()
+    try:
+        for result in results:
+            record_benchmark(db, variant["name"], variant["device"], result, num_threads)
+    finally:
+        db.close()
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tokens/sec του AI Engine ανά ταυτοχρονισμό")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 2, 4, 8, 16],
+                        help="Επίπεδα ταυτοχρονισμού, χωρισμένα με κόμμα")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 8],
+                        help="Μέγιστα μεγέθη batch προς σύγκριση, χωρισμένα με κόμμα")
+    parser.add_argument("--window-ms", type=float, default=float(os.getenv("AI_BATCH_WINDOW_MS", 15)),
+                        help="Χρονικό παράθυρο συγκέντρωσης batch")
+    parser.add_argument("--requests", type=int, default=64, help="Αιτήματα ανά επίπεδο")
+    parser.add_argument("--load-timeout", type=float, default=600, help="Μέγιστη αναμονή φόρτωσης μοντέλου")
+    parser.add_argument("--mock", action="store_true", help="Χρήση του δοκιμαστικού μοντέλου")
+    parser.add_argument("--mock-latency", type=float, default=None, help="Καθυστέρηση δοκιμαστικού μοντέλου (s)")
+    parser.add_argument("--json", action="store_true", help="Έξοδος σε JSON")
+    parser.add_argument("--variant", default=None, help="Παραλλαγή του μητρώου μοντέλων προς μέτρηση")
+    parser.add_argument("--record", action="store_true", help="Αποθήκευση αποτελεσμάτων στο μητρώο μοντέλων")
+    parser.add_argument("--with-cache", action="store_true",
+                        help="Χωρίς απενεργοποίηση της cache απαντήσεων και του router")
+    args = parser.parse_args()
+
+    if args.mock:
+        os.environ["USE_MOCK_AI_MODEL"] = "True"
+        os.environ.setdefault("AI_MOCK_LATENCY", "0.1")
+    if args.mock_latency is not None:
+        os.environ["AI_MOCK_LATENCY"] = str(args.mock_latency)
+    if not args.with_cache:
+        os.environ["AI_CACHE_ENABLED"] = "False"
+        os.environ["AI_ROUTER_ENABLED"] = "False"
+    # Τα συνθετικά αιτήματα δεν είναι δεδομένα fine-tuning
+    os.environ.setdefault("AI_DATASET_ENABLED", "False")
+    # Η ουρά πρέπει να χωρά όλους τους ταυτόχρονους clients
+    os.environ.setdefault("AI_INFERENCE_QUEUE_SIZE", str(max(32, max(args.concurrency) * 2)))
+
+    results = asyncio.run(main(args))
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
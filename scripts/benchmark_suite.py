@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+Σουίτα benchmark του AI Engine: συνομιλία, streaming, ανάλυση telemetry και βελτιστοποίηση
+
+Κάθε φορτίο (workload) εκτελείται στο AIEngine (in-process, χωρίς HTTP) από N
+ταυτόχρονους clients για κάθε επίπεδο --concurrency και μετρώνται:
+- καθυστέρηση (μέση, p50/p90/p95/p99, μέγιστη) και throughput (αιτήματα/sec)
+- tokens/sec για chat/stream και χρόνος έως το πρώτο κομμάτι (TTFT) για stream
+- RSS της διεργασίας: στην αρχή και μέγιστο κατά το επίπεδο (δειγματοληψία)
+  και το μέγιστο της διεργασίας από την εκκίνηση (getrusage)
+
+Φορτία:
+    chat      generate_response
+    stream    stream_response (TTFT)
+    analyze   analyze_mining_data με συνθετικό telemetry (--gpus x --samples)
+    optimize  optimize_mining_strategy με --gpus GPU και τιμές που αλλάζουν ανά αίτημα
+
+Τα συνθετικά φορτία παράγονται ντετερμινιστικά από το --seed. Με --recorded
+αναπαράγονται καταγεγραμμένα αιτήματα από αρχείο JSONL, μία εγγραφή ανά γραμμή:
+    {"workload": "chat", "message": "..."}
+    {"workload": "analyze", "data": {...}}
+    {"workload": "optimize", "user_config": {...}, "market_data": {...}, "energy_data": {...}}
+Οι εγγραφές chat χρησιμοποιούνται και για το stream. Φορτία χωρίς εγγραφές
+στο αρχείο παραμένουν συνθετικά.
+
+Τα αποτελέσματα, μαζί με το commit του git και τις ρυθμίσεις, γράφονται σε JSON
+(--output) ώστε να συγκρίνονται μεταξύ commits. Με --baseline γίνεται σύγκριση
+με προηγούμενο αρχείο και η έξοδος είναι 1 αν το p95 ή το RSS αυξηθεί ή το
+throughput μειωθεί περισσότερο από --tolerance.
+
+Χρήση:
+    python scripts/benchmark_suite.py --mock --output bench.json
+    python scripts/benchmark_suite.py --workloads analyze,optimize --concurrency 1,8 --requests 50
+    python scripts/benchmark_suite.py --recorded workload.jsonl --baseline bench.json --tolerance 0.15
+
+Η cache απαντήσεων απενεργοποιείται (εκτός αν δοθεί --with-cache), ώστε να
+μετράται το μοντέλο και όχι η cache.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import subprocess
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark_ai import PROMPTS, _int_list, _percentile
+
+WORKLOADS = ("chat", "stream", "analyze", "optimize")
+
+GPU_MODELS = [
+    ("NVIDIA GeForce RTX 3060", 50.0, 170),
+    ("NVIDIA GeForce RTX 3070", 62.0, 200),
+    ("NVIDIA GeForce RTX 3080 Ti", 120.0, 320),
+    ("NVIDIA GeForce RTX 4070 Ti", 80.0, 220),
+    ("NVIDIA GeForce RTX 4090", 140.0, 400),
+]
+
+COINS = {
+    "BTC": (67500.0, 0.00012),
+    "ETH": (3200.0, 0.0025),
+    "XMR": (185.0, 0.015),
+    "RVN": (0.025, 35.0),
+}
+
+QUESTION_TEMPLATES = [
+    "Ποιο νόμισμα είναι πιο κερδοφόρο για {gpu} με ρεύμα {price:.2f} €/kWh;",
+    "Πόση ενέργεια θα καταναλώσουν {count} κάρτες {gpu} σε {hours} ώρες;",
+    "Αξίζει να νοικιάσω {count} {gpu} στο CloreAI για {hours} ώρες;",
+    "Τι power limit προτείνεις για {gpu} στους {temp}°C;",
+    "Με {solar:.1f} kW ηλιακή παραγωγή, πόσες GPU να αφήσω ενεργές;",
+]
+
+
+# ---------- Μέτρηση μνήμης ---------- #
+
+def _current_rss() -> Optional[int]:
+    """
+    Τρέχουσα μνήμη RSS της διεργασίας (bytes), από το /proc όπου υπάρχει
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss() -> Optional[int]:
+    """
+    Μέγιστη RSS της διεργασίας από την εκκίνηση (bytes)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RSSSampler:
+    """
+    Δειγματοληψία της RSS σε thread, για το μέγιστο μέσα σε ένα επίπεδο
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start: Optional[int] = None
+        self.peak: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self):
+        value = _current_rss()
+        if value is not None:
+            self.peak = value if self.peak is None else max(self.peak, value)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self.start = _current_rss()
+        self.peak = self.start
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _mb(value: Optional[int]) -> Optional[float]:
+    return round(value / 1024 / 1024, 1) if value is not None else None
+
+
+# ---------- Φορτία ---------- #
+
+def _synthetic_chat(rng: random.Random, count: int) -> List[Dict]:
+    """
+    Ερωτήσεις από πρότυπα με τυχαίες παραμέτρους (σχεδόν όλες διαφορετικές)
+    """
+    payloads = []
+    for index in range(count):
+        if index < len(PROMPTS):
+            payloads.append({"message": PROMPTS[index]})
+            continue
+        template = rng.choice(QUESTION_TEMPLATES)
+        payloads.append({"message": template.format(
+            gpu=rng.choice(GPU_MODELS)[0],
+            price=rng.uniform(0.08, 0.35),
+            count=rng.randint(1, 12),
+            hours=rng.randint(1, 72),
+            temp=rng.randint(55, 85),
+            solar=rng.uniform(0, 8)
+        )})
+    return payloads
+
+
+def _synthetic_gpus(rng: random.Random, gpus: int) -> List[Dict]:
+    result = []
+    for index in range(gpus):
+        model, hashrate, power = GPU_MODELS[index % len(GPU_MODELS)]
+        result.append({
+            "gpu_id": f"gpu-{index}",
+            "rig_id": f"rig-{index // 6}",
+            "model": model,
+            "hashrate": round(hashrate * rng.uniform(0.9, 1.05), 2),
+            "power_consumption": round(power * rng.uniform(0.9, 1.05), 1),
+            "temperature": round(rng.uniform(55, 80), 1)
+        })
+    return result
+
+
+def _synthetic_analyze(rng: random.Random, count: int, gpus: int, samples: int) -> List[Dict]:
+    """
+    Telemetry samples x gpus ανά 5 λεπτά, με αργή υποβάθμιση σε μερικές GPU
+
+    Όλα τα αιτήματα μοιράζονται το ίδιο telemetry, ώστε η παραγωγή του να μη
+    βαραίνει τη μνήμη της μέτρησης.
+    """
+    end = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    base = _synthetic_gpus(rng, gpus)
+    records = []
+    for gpu in base:
+        degrading = rng.random() < 0.2
+        for step in range(samples):
+            drift = 1 - 0.1 * step / samples if degrading else 1.0
+            records.append({
+                "gpu_id": gpu["gpu_id"],
+                "model": gpu["model"],
+                "timestamp": (end - timedelta(minutes=5 * (samples - step))).isoformat(),
+                "hashrate": gpu["hashrate"] * drift * rng.uniform(0.97, 1.03),
+                "power_consumption": gpu["power_consumption"] * rng.uniform(0.98, 1.02),
+                "temperature": gpu["temperature"] + (5 * step / samples if degrading else 0) + rng.uniform(-1, 1),
+                "earnings": gpu["hashrate"] * 2e-6 * rng.uniform(0.9, 1.1)
+            })
+    data = {"telemetry": records, "energy_cost_per_kwh": 0.15}
+    return [{"data": data} for _ in range(count)]
+
+
+def _synthetic_optimize(rng: random.Random, count: int, gpus: int) -> List[Dict]:
+    """
+    Ίδιες GPU με τιμές νομισμάτων, ενοικίασης και ενέργειας που αλλάζουν ανά αίτημα
+    """
+    fleet = _synthetic_gpus(rng, gpus)
+    payloads = []
+    for _ in range(count):
+        profitability = {
+            coin: {
+                "current_price": price * rng.uniform(0.95, 1.05),
+                "estimated_earnings": {"day": earnings * rng.uniform(0.9, 1.1)}
+            }
+            for coin, (price, earnings) in COINS.items()
+        }
+        rental_prices = {model: round(power / 1000 * rng.uniform(0.2, 0.5), 3) for model, _, power in GPU_MODELS}
+        rate = rng.uniform(0.08, 0.3)
+        payloads.append({
+            "user_config": {"gpus": fleet, "power_cap_w": sum(gpu["power_consumption"] for gpu in fleet) * 0.8},
+            "market_data": {"profitability": profitability, "rental_prices": rental_prices},
+            "energy_data": {
+                "hourly_rates": [{"rate": rate * (1.5 if 17 <= hour < 21 else 1.0)} for hour in range(24)],
+                "solar_production": {"current_output": rng.uniform(0, 5)}
+            }
+        })
+    return payloads
+
+
+def load_recorded(path: str) -> Dict[str, List[Dict]]:
+    """
+    Καταγεγραμμένα αιτήματα ανά φορτίο από αρχείο JSONL
+    """
+    recorded: Dict[str, List[Dict]] = {}
+    with open(path, encoding="utf-8") as source:
+        for number, line in enumerate(source, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"{path}:{number}: μη έγκυρο JSON ({e})")
+            workload = record.pop("workload", None)
+            if workload not in WORKLOADS:
+                raise SystemExit(f"{path}:{number}: άγνωστο workload {workload!r}")
+            recorded.setdefault(workload, []).append(record)
+    if "chat" in recorded:
+        recorded.setdefault("stream", recorded["chat"])
+    return recorded
+
+
+def build_workloads(args) -> Dict[str, Dict[str, Any]]:
+    rng = random.Random(args.seed)
+    recorded = load_recorded(args.recorded) if args.recorded else {}
+    workloads = {}
+    for workload in args.workloads:
+        if workload in recorded:
+            records = recorded[workload]
+            # Κυκλική αναπαραγωγή μέχρι να συμπληρωθούν τα --requests
+            payloads = [records[index % len(records)] for index in range(args.requests)]
+            source = "recorded"
+        elif workload in ("chat", "stream"):
+            payloads = _synthetic_chat(rng, args.requests)
+            source = "synthetic"
+        elif workload == "analyze":
+            payloads = _synthetic_analyze(rng, args.requests, args.gpus, args.samples)
+            source = "synthetic"
+        else:
+            payloads = _synthetic_optimize(rng, args.requests, args.gpus)
+            source = "synthetic"
+        workloads[workload] = {"source": source, "payloads": payloads}
+    return workloads
+
+
+# ---------- Εκτέλεση ---------- #
+
+async def _call(engine, workload: str, payload: Dict) -> Dict[str, Any]:
+    """
+    Ένα αίτημα του φορτίου: επιστρέφει tokens, TTFT και αν απέτυχε
+    """
+    if workload == "chat":
+        response = await engine.generate_response(payload["message"])
+        return {"tokens": engine.count_tokens(response), "error": False}
+    if workload == "stream":
+        started = time.perf_counter()
+        ttft = None
+        parts = []
+        async for chunk in engine.stream_response(payload["message"]):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            parts.append(chunk)
+        return {"tokens": engine.count_tokens("".join(parts)), "ttft": ttft, "error": False}
+    if workload == "analyze":
+        result = await engine.analyze_mining_data(payload["data"])
+    else:
+        result = await engine.optimize_mining_strategy(
+            payload["user_config"], payload.get("market_data", {}), payload.get("energy_data", {})
+        )
+    return {"tokens": 0, "error": result.get("status") != "success"}
+
+
+def _summary(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    return {
+        "mean": round(statistics.fmean(values) * 1000, 2),
+        "p50": round(_percentile(values, 50) * 1000, 2),
+        "p90": round(_percentile(values, 90) * 1000, 2),
+        "p95": round(_percentile(values, 95) * 1000, 2),
+        "p99": round(_percentile(values, 99) * 1000, 2),
+        "max": round(max(values) * 1000, 2)
+    }
+
+
+async def run_level(engine, workload: str, source: str, payloads: List[Dict], concurrency: int) -> Dict:
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    counters = {"tokens": 0, "errors": 0}
+    pending = iter(payloads)
+
+    async def client():
+        for payload in pending:
+            started = time.perf_counter()
+            try:
+                outcome = await _call(engine, workload, payload)
+            except Exception:
+                outcome = {"tokens": 0, "error": True}
+            latencies.append(time.perf_counter() - started)
+            counters["tokens"] += outcome["tokens"]
+            counters["errors"] += outcome["error"]
+            if outcome.get("ttft") is not None:
+                ttfts.append(outcome["ttft"])
+
+    with RSSSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+
+    return {
+        "workload": workload,
+        "source": source,
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "errors": counters["errors"],
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(payloads) / elapsed, 2) if elapsed else 0.0,
+        "tokens_per_sec": round(counters["tokens"] / elapsed, 2) if workload in ("chat", "stream") and elapsed else None,
+        "latency_ms": _summary(latencies),
+        "ttft_ms": _summary(ttfts),
+        "rss_start_mb": _mb(rss.start),
+        "rss_peak_mb": _mb(rss.peak),
+        "max_rss_mb": _mb(_max_rss())
+    }
+
+
+def _git_info() -> Dict[str, Any]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def git(*command) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *command], cwd=root, capture_output=True, text=True, timeout=30, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "branch": git("rev-parse", "--abbrev-ref", "HEAD"),
+        "dirty": bool(status) if status is not None else None
+    }
+
+
+def _metadata(engine, args) -> Dict[str, Any]:
+    try:
+        import torch
+        threads = torch.get_num_threads()
+    except ImportError:
+        threads = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git": _git_info(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": threads,
+        "mock": engine.use_mock,
+        "model": engine.readiness()["variant"],
+        "seed": args.seed,
+        "settings": {key: value for key, value in sorted(os.environ.items()) if key.startswith(("AI_", "STRATEGY_"))}
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Παλινδρομήσεις έναντι προηγούμενου αποτελέσματος (ίδιο φορτίο, πηγή και ταυτοχρονισμός)
+    """
+    previous = {
+        (item["workload"], item["source"], item["concurrency"]): item
+        for item in baseline.get("results", [])
+    }
+    regressions = []
+    for item in results:
+        key = (item["workload"], item["source"], item["concurrency"])
+        base = previous.get(key)
+        if base is None:
+            continue
+        label = f"{item['workload']}/{item['source']} c={item['concurrency']}"
+        checks = [
+            ("p95 ms", (item["latency_ms"] or {}).get("p95"), (base.get("latency_ms") or {}).get("p95"), 1),
+            ("req/s", item["throughput_rps"], base.get("throughput_rps"), -1),
+            ("RSS peak MB", item["rss_peak_mb"], base.get("rss_peak_mb"), 1),
+        ]
+        for name, value, reference, direction in checks:
+            if value is None or not reference:
+                continue
+            change = (value - reference) / reference
+            if change * direction > tolerance:
+                regressions.append(f"{label}: {name} {reference} -> {value} ({change:+.1%})")
+    return regressions
+
+
+async def main(args) -> Dict[str, Any]:
+    from backend.ai_engine import AIEngine
+    from backend.database import init_db
+
+    # Η βελτιστοποίηση διαβάζει περιορισμούς από τη βάση (mining_configs)
+    init_db()
+    engine = AIEngine()
+    await engine.wait_until_ready(timeout=args.load_timeout)
+    if args.variant and engine.readiness()["variant"]["name"] != args.variant:
+        await engine.swap_model(args.variant)
+
+    workloads = build_workloads(args)
+    results = []
+    try:
+        for workload, spec in workloads.items():
+            # Ζέσταμα ώστε η μέτρηση να μην περιλαμβάνει lazy αρχικοποιήσεις
+            await _call(engine, workload, spec["payloads"][0])
+            for concurrency in args.concurrency:
+                result = await run_level(engine, workload, spec["source"], spec["payloads"], concurrency)
+                results.append(result)
+                if not args.json:
+                    latency = result["latency_ms"] or {}
+                    line = (f"{workload:<9} {spec['source']:<9} c={concurrency:<4} "
+                            f"{result['throughput_rps']:>8.2f} req/s "
+                            f"p50 {latency.get('p50', 0):>9.1f}ms "
+                            f"p95 {latency.get('p95', 0):>9.1f}ms "
+                            f"p99 {latency.get('p99', 0):>9.1f}ms "
+                            f"RSS {result['rss_peak_mb']} MB")
+                    if result["tokens_per_sec"] is not None:
+                        line += f" {result['tokens_per_sec']:.1f} tok/s"
+                    if result["ttft_ms"]:
+                        line += f" TTFT p50 {result['ttft_ms']['p50']:.1f}ms"
+                    if result["errors"]:
+                        line += f" σφάλματα {result['errors']}"
+                    print(line)
+    finally:
+        await engine.shutdown()
+    return {"meta": _metadata(engine, args), "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Σουίτα benchmark του AI Engine")
+    parser.add_argument("--workloads", type=lambda value: [item for item in value.split(",") if item.strip()],
+                        default=list(WORKLOADS), help=f"Φορτία, χωρισμένα με κόμμα ({', '.join(WORKLOADS)})")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16],
+                        help="Επίπεδα ταυτοχρονισμού, χωρισμένα με κόμμα")
+    parser.add_argument("--requests", type=int, default=32, help="Αιτήματα ανά επίπεδο")
+    parser.add_argument("--recorded", default=None, help="Αρχείο JSONL με καταγεγραμμένα αιτήματα")
+    parser.add_argument("--gpus", type=int, default=24, help="GPU των συνθετικών analyze/optimize")
+    parser.add_argument("--samples", type=int, default=288, help="Μετρήσεις ανά GPU του συνθετικού telemetry")
+    parser.add_argument("--seed", type=int, default=42, help="Seed των συνθετικών φορτίων")
+    parser.add_argument("--variant", default=None, help="Παραλλαγή του μητρώου μοντέλων προς μέτρηση")
+    parser.add_argument("--load-timeout", type=float, default=600, help="Μέγιστη αναμονή φόρτωσης μοντέλου")
+    parser.add_argument("--mock", action="store_true", help="Χρήση του δοκιμαστικού μοντέλου")
+    parser.add_argument("--mock-latency", type=float, default=None, help="Καθυστέρηση δοκιμαστικού μοντέλου (s)")
+    parser.add_argument("--with-cache", action="store_true", help="Χωρίς απενεργοποίηση της cache απαντήσεων")
+    parser.add_argument("--output", default=None, help="Αρχείο JSON αποτελεσμάτων")
+    parser.add_argument("--baseline", default=None, help="Προηγούμενο αρχείο JSON για σύγκριση")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Ανεκτή σχετική επιδείνωση (0.1 = 10%%)")
+    parser.add_argument("--json", action="store_true", help="Έξοδος σε JSON")
+    args = parser.parse_args()
+
+    unknown = set(args.workloads) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"Άγνωστα φορτία: {', '.join(sorted(unknown))}")
+    if args.mock:
+        os.environ["USE_MOCK_AI_MODEL"] = "True"
+        os.environ.setdefault("AI_MOCK_LATENCY", "0.1")
+    if args.mock_latency is not None:
+        os.environ["AI_MOCK_LATENCY"] = str(args.mock_latency)
+    if not args.with_cache:
+        os.environ["AI_CACHE_ENABLED"] = "False"
+    # Τα συνθετικά αιτήματα δεν είναι δεδομένα fine-tuning
+    os.environ.setdefault("AI_DATASET_ENABLED", "False")
+    os.environ.setdefault("AI_INFERENCE_QUEUE_SIZE", str(max(32, max(args.concurrency) * 2)))
+
+    report = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as target:
+            json.dump(report, target, indent=2, ensure_ascii=False, default=str)
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            regressions = compare(report["results"], json.load(source), args.tolerance)
+        if regressions:
+            print("Παλινδρομήσεις:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print("Καμία παλινδρόμηση έναντι του baseline", file=sys.stderr)
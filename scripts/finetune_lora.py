@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+LoRA fine-tuning του AI μοντέλου από τις καταγεγραμμένες συνομιλίες και αναλύσεις
+
+Τα δείγματα διαβάζονται από τα shards JSONL του AI_DATASET_DIR (DatasetLogger, με AI_DATASET_ENABLED=True)
+με το StreamingSFTDataset: tokenize κατά τη ζήτηση, cache των tokens ανά shard
+και υποσύνολα (--since, --sample-rate, --max-records), ώστε η εκπαίδευση να
+τρέχει σε CPU χωρίς φόρτωση όλου του dataset στη μνήμη. Το loss υπολογίζεται
+μόνο στις απαντήσεις του βοηθού.
+
+Ο adapter αποθηκεύεται στο --output (adapter_config.json), το οποίο το AIEngine
+φορτώνει απευθείας. Με --register καταχωρίζεται και ως παραλλαγή στο μητρώο
+μοντέλων, για ενεργοποίηση χωρίς επανεκκίνηση (POST /api/ai/models/{name}/activate).
+
+Χρήση:
+    python scripts/finetune_lora.py --max-steps 200 --sample-rate 0.25 --output ./models/lora-cpu
+    python scripts/finetune_lora.py --kinds chat --since 2026-10-01 --register lora-chat
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main(args):
+    import torch
+    from torch.utils.data import DataLoader
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+    from peft import LoraConfig, get_peft_model
+
+    from backend.finetune_dataset import StreamingSFTDataset, as_torch_dataset, collate
+
+    if args.threads > 0:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(args.seed)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.base_model)
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+
+    dataset = StreamingSFTDataset(
+        args.data_dir,
+        tokenizer,
+        kinds=args.kinds,
+        max_length=args.max_length,
+        since=args.since,
+        sample_rate=args.sample_rate,
+        seed=args.seed,
+        max_records=args.max_records,
+        shuffle_buffer=args.shuffle_buffer
+    )
+    loader = DataLoader(
+        as_torch_dataset(dataset),
+        batch_size=args.batch_size,
+        collate_fn=lambda batch: collate(batch, tokenizer.pad_token_id),
+        num_workers=args.workers
+    )
+
+    model = AutoModelForCausalLM.from_pretrained(args.base_model, low_cpu_mem_usage=True)
+    model = get_peft_model(model, LoraConfig(
+        task_type="CAUSAL_LM",
+        r=args.rank,
+        lora_alpha=args.alpha,
+        lora_dropout=args.dropout,
+        target_modules=args.target_modules
+    ))
+    model.print_trainable_parameters()
+    model.train()
+
+    optimizer = torch.optim.AdamW([param for param in model.parameters() if param.requires_grad], lr=args.lr)
+    step = 0
+    micro_step = 0
+    tokens = 0
+    running_loss = 0.0
+    started = time.perf_counter()
+    while step < args.max_steps:
+        produced = False
+        for batch in loader:
+            produced = True
+            loss = model(**batch).loss / args.grad_accum
+            loss.backward()
+            running_loss += loss.item()
+            tokens += int(batch["attention_mask"].sum())
+            micro_step += 1
+            if micro_step % args.grad_accum:
+                continue
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+            optimizer.step()
+            optimizer.zero_grad()
+            step += 1
+            if step % args.log_every == 0 or step == args.max_steps:
+                elapsed = time.perf_counter() - started
+                print(f"βήμα {step}/{args.max_steps} loss {running_loss / args.log_every:.4f} "
+                      f"{tokens / elapsed:.0f} tok/s")
+                running_loss = 0.0
+            if step >= args.max_steps:
+                break
+        if not produced:
+            raise SystemExit(f"Δεν βρέθηκαν δείγματα στο {args.data_dir}")
+
+    os.makedirs(args.output, exist_ok=True)
+    model.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    summary = {
+        "base_model": args.base_model,
+        "steps": step,
+        "tokens": tokens,
+        "seconds": round(time.perf_counter() - started, 1),
+        "dataset": dataset.stats
+    }
+    with open(os.path.join(args.output, "training_summary.json"), "w", encoding="utf-8") as target:
+        json.dump(summary, target, indent=2, ensure_ascii=False)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+
+    if args.register:
+        from backend.database import SessionLocal
+        from backend.model_registry import register_variant
+
+        db = SessionLocal()
+        try:
+            register_variant(db, args.register, os.path.abspath(args.output), args.quantization, "cpu")
+        finally:
+            db.close()
+        print(f"Καταχωρίστηκε η παραλλαγή {args.register}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LoRA fine-tuning από τα καταγεγραμμένα δείγματα")
+    parser.add_argument("--data-dir", default=os.getenv("AI_DATASET_DIR", "./data/finetune"))
+    parser.add_argument("--base-model", default=os.getenv("MODEL_PATH", "./models/mining-assistant-llm"))
+    parser.add_argument("--output", default="./models/mining-assistant-lora")
+    parser.add_argument("--kinds", type=lambda value: [item for item in value.split(",") if item.strip()],
+                        default=["chat", "analysis"], help="Είδη δειγμάτων, χωρισμένα με κόμμα")
+    parser.add_argument("--since", default=None, help="Μόνο δείγματα από αυτή την ημερομηνία (ISO)")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="Ποσοστό δειγμάτων (σταθερό ανά seed)")
+    parser.add_argument("--max-records", type=int, default=None, help="Μέγιστο πλήθος δειγμάτων ανά εποχή")
+    parser.add_argument("--max-length", type=int, default=512, help="Μέγιστο μήκος δείγματος σε tokens")
+    parser.add_argument("--shuffle-buffer", type=int, default=256, help="Μέγεθος buffer ανακατέματος")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--grad-accum", type=int, default=4)
+    parser.add_argument("--max-steps", type=int, default=200)
+    parser.add_argument("--lr", type=float, default=2e-4)
+    parser.add_argument("--rank", type=int, default=8)
+    parser.add_argument("--alpha", type=int, default=16)
+    parser.add_argument("--dropout", type=float, default=0.05)
+    parser.add_argument("--target-modules", type=lambda value: value.split(","), default=None,
+                        help="Επίπεδα για LoRA, χωρισμένα με κόμμα (προεπιλογή: ανά αρχιτεκτονική)")
+    parser.add_argument("--workers", type=int, default=0, help="Workers του DataLoader")
+    parser.add_argument("--threads", type=int, default=int(os.getenv("AI_NUM_THREADS", 0)))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-every", type=int, default=10)
+    parser.add_argument("--register", default=None, help="Καταχώριση του adapter ως παραλλαγή μοντέλου")
+    parser.add_argument("--quantization", default="dynamic", help="Κβάντιση της καταχωρισμένης παραλλαγής")
+    main(parser.parse_args())
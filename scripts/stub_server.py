@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Τοπικός stub server για τα εξωτερικά APIs του AI Mining Assistant
+
+Εξυπηρετεί από μία θύρα τα endpoints που καλούν οι connectors, ώστε να
+δοκιμάζεται ολόκληρο το stack (HTTP, connection pooling, timeouts, fallbacks)
+χωρίς πρόσβαση στα πραγματικά APIs:
+- CloreAI: /api/v1/status, /api/v1/gpus/available, /api/v1/gpus/pricing,
+  /api/v1/profitability, /api/v1/gpus/rent, /api/v1/gpus/rentals/{id}[/extend]
+- NiceHash: /api/v2/time, /api/v2/mining/external/{key}/rigs,
+  /main/api/v2/mining/rigs/status2 (απαιτεί υπογεγραμμένο αίτημα, X-Auth)
+- WhatToMine: /coins.json
+- Μετρητής ενέργειας / φωτοβολταϊκά: /status, /consumption, /production
+
+Ρύθμιση του backend ώστε να χρησιμοποιεί τον stub server:
+    CLOREAI_API_URL=http://127.0.0.1:8100  CLOREAI_API_KEY=stub
+    MINING_API_URL=http://127.0.0.1:8100   MINING_API_KEY=stub
+    MINING_API_SECRET=stub                 MINING_ORGANIZATION_ID=stub
+    WHATTOMINE_API_URL=http://127.0.0.1:8100
+    ENERGY_METER_URL=http://127.0.0.1:8100 SOLAR_API_URL=http://127.0.0.1:8100
+
+Χρήση:
+    python scripts/stub_server.py --latency-ms 50 --jitter-ms 20 --error-rate 0.02 --rigs 10 --offers 2000
+
+Η καθυστέρηση, ο ρυθμός σφαλμάτων και τα μεγέθη αλλάζουν και κατά την εκτέλεση
+με POST /stub/config, ενώ το GET /stub/stats επιστρέφει μετρητές αιτημάτων.
+"""
+import os
+import re
+import sys
+import math
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Μοντέλα GPU του stub: (όνομα, δείκτης απόδοσης, τιμή/ώρα, hashrate MH/s, ισχύς W)
+GPU_MODELS = [
+    ("NVIDIA GeForce RTX 3060", 8.5, 0.25, 50.0, 170),
+    ("NVIDIA GeForce RTX 3070", 9.2, 0.35, 62.0, 220),
+    ("NVIDIA GeForce RTX 3080", 9.7, 0.50, 98.0, 300),
+    ("NVIDIA GeForce RTX 3090", 10.0, 0.70, 120.0, 350),
+    ("NVIDIA GeForce RTX 4070", 9.5, 0.45, 80.0, 200),
+    ("NVIDIA GeForce RTX 4080", 9.9, 0.65, 110.0, 280),
+    ("NVIDIA GeForce RTX 4090", 10.0, 0.90, 140.0, 400),
+]
+
+COINS = {
+    "1": {"tag": "BTC", "name": "Bitcoin", "algorithm": "SHA-256", "exchange_rate": 67500.25,
+          "estimated_rewards": 0.00012, "btc_revenue": 0.00012, "nethash": 6.0e20},
+    "151": {"tag": "ETC", "name": "EthereumClassic", "algorithm": "Etchash", "exchange_rate": 26.4,
+            "estimated_rewards": 0.21, "btc_revenue": 0.000082, "nethash": 1.9e14},
+    "101": {"tag": "XMR", "name": "Monero", "algorithm": "RandomX", "exchange_rate": 185.50,
+            "estimated_rewards": 0.015, "btc_revenue": 0.000041, "nethash": 2.4e9},
+    "234": {"tag": "RVN", "name": "Ravencoin", "algorithm": "KawPow", "exchange_rate": 0.025,
+            "estimated_rewards": 35.0, "btc_revenue": 0.000013, "nethash": 5.1e12},
+}
+
+# Τμήματα διαδρομής με αναγνωριστικά, που ομαδοποιούνται στους μετρητές αιτημάτων
+_PATH_IDS = re.compile(r"(/rentals/|/external/)[^/]+")
+
+
+class StubState:
+    """
+    Ρυθμίσεις και δεδομένα του stub server (στόλος rigs, προσφορές, ενοικιάσεις)
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        self.latency_ms = args.latency_ms
+        self.jitter_ms = args.jitter_ms
+        self.error_rate = args.error_rate
+        self.timeout_rate = args.timeout_rate
+        self.rig_count = args.rigs
+        self.gpus_per_rig = args.gpus_per_rig
+        self.offer_count = args.offers
+        self.random = random.Random(args.seed)
+        self.started_at = time.time()
+        self.requests = Counter()
+        self.errors = Counter()
+        self.rentals: Dict[str, Dict] = {}
+        self.power_modes: Dict[str, str] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Δημιουργία του στόλου rigs και του βιβλίου προσφορών με τα τρέχοντα μεγέθη
+        """
+        self.rigs = []
+        for index in range(self.rig_count):
+            devices = []
+            for slot in range(self.gpus_per_rig):
+                name, _, _, hashrate, power = self.random.choice(GPU_MODELS)
+                devices.append({"id": f"gpu-{index}-{slot}", "name": name, "hashrate": hashrate, "power": power})
+            self.rigs.append({"rigId": f"stub-rig-{index + 1}", "name": f"Stub Rig {index + 1}", "devices": devices})
+
+        self.offers = []
+        for index in range(self.offer_count):
+            name, rating, price, _, _ = GPU_MODELS[index % len(GPU_MODELS)]
+            total = self.random.randint(1, 16)
+            self.offers.append({
+                "id": f"offer-{index}",
+                "gpu_model": name,
+                "available": self.random.randint(0, total),
+                "total": total,
+                "price_per_hour": round(price * self.random.uniform(0.8, 1.3), 4),
+                "minimum_hours": self.random.choice([1, 1, 2, 4, 24]),
+                "performance_rating": rating
+            })
+
+    def configure(self, values: Dict):
+        rebuild = False
+        for key in ("latency_ms", "jitter_ms", "error_rate", "timeout_rate"):
+            if key in values:
+                setattr(self, key, float(values[key]))
+        for key, attribute in (("rigs", "rig_count"), ("gpus_per_rig", "gpus_per_rig"), ("offers", "offer_count")):
+            if key in values:
+                setattr(self, attribute, int(values[key]))
+                rebuild = True
+        if rebuild:
+            self.rebuild()
+
+    def config(self) -> Dict:
+        return {
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+            "timeout_rate": self.timeout_rate,
+            "rigs": self.rig_count,
+            "gpus_per_rig": self.gpus_per_rig,
+            "offers": self.offer_count
+        }
+
+
+def create_app(state: StubState) -> FastAPI:
+    app = FastAPI(title="AI Mining Assistant stub APIs")
+
+    @app.middleware("http")
+    async def simulate_network(request: Request, call_next):
+        """
+        Τεχνητή καθυστέρηση, σφάλματα 5xx και "κολλημένα" αιτήματα (timeouts)
+        """
+        path = request.url.path
+        if path.startswith("/stub/"):
+            return await call_next(request)
+
+        route = _PATH_IDS.sub(r"\1{id}", path)
+        state.requests[route] += 1
+        delay = max(0.0, state.latency_ms + state.random.uniform(-state.jitter_ms, state.jitter_ms)) / 1000
+        roll = state.random.random()
+        if roll < state.timeout_rate:
+            # Πολύ μεγαλύτερη καθυστέρηση από το timeout των connectors (10s)
+            delay += 30
+        await asyncio.sleep(delay)
+        if state.timeout_rate <= roll < state.timeout_rate + state.error_rate:
+            state.errors[route] += 1
+            return JSONResponse(status_code=503, content={"error": "stub: τεχνητό σφάλμα"})
+        return await call_next(request)
+
+    # ---------- CloreAI ---------- #
+
+    @app.get("/api/v1/status")
+    async def cloreai_status():
+        return {"status": "ok"}
+
+    @app.get("/api/v1/gpus/available")
+    async def gpus_available():
+        now = datetime.now().isoformat()
+        return [
+            {key: offer[key] for key in ("id", "gpu_model", "available", "total", "price_per_hour", "minimum_hours")}
+            | {"last_updated": now}
+            for offer in state.offers
+        ]
+
+    @app.get("/api/v1/gpus/pricing")
+    async def gpus_pricing():
+        return [
+            {
+                "gpu_model": name,
+                "price_per_hour": price,
+                "price_per_day": round(price * 22, 2),
+                "price_per_week": round(price * 140, 2),
+                "minimum_hours": 1,
+                "performance_rating": rating
+            }
+            for name, rating, price, _, _ in GPU_MODELS
+        ]
+
+    @app.post("/api/v1/profitability")
+    async def profitability(body: Dict):
+        models = set(body.get("gpu_models") or [])
+        rentals = [
+            {"gpu_model": name, "price_per_hour": price, "price_per_day": round(price * 22, 2),
+             "performance_index": rating}
+            for name, rating, price, _, _ in GPU_MODELS if not models or name in models
+        ]
+        return {"rentals": rentals, "market_trends": {}, "recommendation": "stub"}
+
+    @app.post("/api/v1/gpus/rent")
+    async def rent(body: Dict):
+        model = body.get("gpu_model")
+        hours = int(body.get("duration_hours", 1))
+        prices = {name: price for name, _, price, _, _ in GPU_MODELS}
+        if model not in prices:
+            return JSONResponse(status_code=404, content={"error": f"Άγνωστο μοντέλο GPU: {model}"})
+        start = datetime.now()
+        rental = {
+            "status": "success",
+            "rental_id": str(uuid.uuid4()),
+            "gpu_model": model,
+            "duration_hours": hours,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=hours)).isoformat(),
+            "price_per_hour": prices[model],
+            "total_cost": prices[model] * hours,
+            "connection_info": {"ip": "127.0.0.1", "port": 22, "username": "stub"}
+        }
+        state.rentals[rental["rental_id"]] = {**rental, "status": "active"}
+        return rental
+
+    def _rental_status(rental_id: str) -> Optional[Dict]:
+        rental = state.rentals.get(rental_id)
+        if rental and rental["status"] == "active" and datetime.fromisoformat(rental["end_time"]) <= datetime.now():
+            rental["status"] = "expired"
+        return rental
+
+    @app.get("/api/v1/gpus/rentals/{rental_id}")
+    async def rental_status(rental_id: str):
+        rental = _rental_status(rental_id)
+        if rental is None:
+            return JSONResponse(status_code=404, content={"error": "not found"})
+        return {key: rental[key] for key in ("rental_id", "status", "end_time", "price_per_hour")}
+
+    @app.post("/api/v1/gpus/rentals/{rental_id}/extend")
+    async def extend_rental(rental_id: str, body: Dict):
+        rental = _rental_status(rental_id)
+        if rental is None or rental["status"] != "active":
+            return JSONResponse(status_code=409, content={"error": "rental not active"})
+        end_time = datetime.fromisoformat(rental["end_time"]) + timedelta(hours=int(body.get("duration_hours", 1)))
+        rental["end_time"] = end_time.isoformat()
+        return {"status": "success", "rental_id": rental_id, "end_time": rental["end_time"]}
+
+    @app.delete("/api/v1/gpus/rentals/{rental_id}")
+    async def cancel_rental(rental_id: str):
+        rental = _rental_status(rental_id)
+        if rental is None:
+            return JSONResponse(status_code=404, content={"error": "not found"})
+        rental["status"] = "cancelled"
+        return {"status": "success", "message": f"Η ενοικίαση {rental_id} ακυρώθηκε επιτυχώς"}
+
+    # ---------- NiceHash ---------- #
+
+    @app.get("/api/v2/mining/external/{key}/rigs")
+    async def nicehash_rigs(key: str):
+        factors = {"STOP": 0.0, "LOW": 0.5, "MEDIUM": 0.75, "HIGH": 1.0}
+        rigs = []
+        for rig in state.rigs:
+            factor = factors[state.power_modes.get(rig["rigId"], "HIGH")]
+            devices = []
+            for device in rig["devices"]:
+                # Μικρές διακυμάνσεις γύρω από τις ονομαστικές τιμές
+                noise = state.random.uniform(0.95, 1.05)
+                devices.append({
+                    "id": device["id"],
+                    "name": device["name"],
+                    "status": "MINING" if factor > 0 else "STOPPED",
+                    "speedAccepted": round(device["hashrate"] * factor * noise, 2),
+                    "powerUsage": round(device["power"] * factor * noise, 1),
+                    "temperature": round(45 + 25 * factor * noise, 1),
+                    "fanSpeed": round(30 + 50 * factor)
+                })
+            rigs.append({
+                "rigId": rig["rigId"],
+                "name": rig["name"],
+                "maxPower": sum(device["power"] for device in rig["devices"]),
+                "devices": devices
+            })
+        return {"rigs": rigs}
+
+    @app.get("/api/v2/time")
+    async def nicehash_time():
+        return {"serverTime": int(time.time() * 1000)}
+
+    @app.post("/main/api/v2/mining/rigs/status2")
+    async def nicehash_rig_status(body: Dict, request: Request):
+        # Η υπογραφή δεν επαληθεύεται, ελέγχεται μόνο ότι το αίτημα είναι υπογεγραμμένο
+        if not all(request.headers.get(header) for header in ("X-Auth", "X-Time", "X-Nonce", "X-Organization-Id")):
+            return JSONResponse(status_code=403, content={"error": "Unsigned request"})
+        rig_id = body.get("rigId")
+        if body.get("action") == "STOP":
+            state.power_modes[rig_id] = "STOP"
+        elif body.get("action") == "POWER_MODE":
+            state.power_modes[rig_id] = (body.get("options") or ["HIGH"])[0]
+        return {"success": True}
+
+    # ---------- WhatToMine ---------- #
+
+    @app.get("/coins.json")
+    async def whattomine_coins(key: Optional[str] = None):
+        coins = {}
+        for coin_id, coin in COINS.items():
+            change = state.random.uniform(-3, 3)
+            coins[coin_id] = {
+                **coin,
+                "exchange_rate": round(coin["exchange_rate"] * (1 + change / 100), 6),
+                "exchange_rate_vol": round(change, 2)
+            }
+        return {"coins": coins}
+
+    # ---------- Μετρητής ενέργειας / φωτοβολταϊκά ---------- #
+
+    @app.get("/status")
+    async def meter_status():
+        return {"status": "ok"}
+
+    def _solar_kw() -> float:
+        hour = datetime.now().hour + datetime.now().minute / 60
+        return max(0.0, 5.0 * math.sin(math.pi * (hour - 6) / 13)) if 6 <= hour <= 19 else 0.0
+
+    @app.get("/consumption")
+    async def meter_consumption():
+        mining_kw = sum(
+            device["power"] for rig in state.rigs for device in rig["devices"]
+            if state.power_modes.get(rig["rigId"], "HIGH") != "STOP"
+        ) / 1000
+        current = round(mining_kw + state.random.uniform(0.3, 1.2), 3)
+        return {"current": current, "daily": round(current * 24, 2), "monthly": round(current * 24 * 30, 1)}
+
+    @app.get("/production")
+    async def solar_production():
+        current = round(_solar_kw(), 3)
+        return {"current": current, "daily": 32.5, "monthly": 950.0}
+
+    # ---------- Διαχείριση stub ---------- #
+
+    @app.get("/stub/config")
+    async def get_config():
+        return state.config()
+
+    @app.post("/stub/config")
+    async def set_config(body: Dict):
+        state.configure(body)
+        return state.config()
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return {
+            "uptime": time.time() - state.started_at,
+            "requests": dict(state.requests),
+            "errors": dict(state.errors),
+            "total_requests": sum(state.requests.values()),
+            "total_errors": sum(state.errors.values()),
+            "active_rentals": sum(1 for rental in state.rentals.values() if rental["status"] == "active")
+        }
+
+    return app
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Τοπικός stub server για CloreAI, NiceHash, WhatToMine και μετρητή ενέργειας")
+    parser.add_argument("--host", default=os.getenv("STUB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("STUB_PORT", 8100)))
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("STUB_LATENCY_MS", 0)),
+                        help="Μέση καθυστέρηση απόκρισης")
+    parser.add_argument("--jitter-ms", type=float, default=float(os.getenv("STUB_JITTER_MS", 0)),
+                        help="Τυχαία διακύμανση της καθυστέρησης (±)")
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("STUB_ERROR_RATE", 0)),
+                        help="Ποσοστό αιτημάτων που απαντούν 503")
+    parser.add_argument("--timeout-rate", type=float, default=float(os.getenv("STUB_TIMEOUT_RATE", 0)),
+                        help="Ποσοστό αιτημάτων που καθυστερούν πέρα από το timeout των connectors")
+    parser.add_argument("--rigs", type=int, default=int(os.getenv("STUB_RIGS", 2)), help="Αριθμός rigs")
+    parser.add_argument("--gpus-per-rig", type=int, default=int(os.getenv("STUB_GPUS_PER_RIG", 6)))
+    parser.add_argument("--offers", type=int, default=int(os.getenv("STUB_OFFERS", 50)),
+                        help="Αριθμός προσφορών στο marketplace του CloreAI")
+    parser.add_argument("--seed", type=int, default=None, help="Seed για αναπαραγώγιμα δεδομένα")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    state = StubState(args)
+    print(f"Stub server στο http://{args.host}:{args.port} ({state.config()})")
+    uvicorn.run(create_app(state), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import os
+import sys
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import models  # noqa: F401  (καταχώριση των πινάκων στο Base)
+from backend.database import Base
+from backend.connectors.cloreai_connector import CloreAIConnector
+from scripts.stub_server import StubState, create_app, parse_args
+
+
+@pytest.fixture
+def session_factory(tmp_path, monkeypatch):
+    """
+    Προσωρινή βάση SQLite στη θέση της SessionLocal του rental_tracker
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr("backend.rental_tracker.SessionLocal", factory)
+    yield factory
+    engine.dispose()
+
+
+@pytest.fixture
+def stub_state():
+    return StubState(parse_args(["--seed", "1"]))
+
+
+@pytest.fixture
+def cloreai_connector(stub_state, monkeypatch):
+    """
+    CloreAIConnector που μιλά με τον stub server μέσω ASGI, χωρίς δίκτυο
+    """
+    monkeypatch.setenv("CLOREAI_API_URL", "http://stub")
+    monkeypatch.setenv("CLOREAI_API_KEY", "stub")
+    monkeypatch.setenv("USE_MOCK_CLOREAI_DATA", "False")
+    connector = CloreAIConnector()
+    connector.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(stub_state)))
+    connector.is_initialized = True
+    yield connector
+    asyncio.run(connector.close())
@@ -0,0 +1,28 @@
+import pytest
+
+from backend.arbitrage import RentalArbitrageOptimizer
+
+COINS = {"BTC": {"estimated_earnings": {"day": 0.0001}, "current_price": 60000}}
+
+
+def offer(offer_id, price, **fields):
+    return {"offer_id": offer_id, "gpu_model": "RTX 3080", "price_per_hour": price, "available": 2,
+            "performance_rating": 10, **fields}
+
+
+def test_non_positive_prices_are_skipped():
+    optimizer = RentalArbitrageOptimizer()
+    result = optimizer.optimize([offer("free", 0), offer("negative", -0.1), offer("paid", 0.1)], COINS, budget=10)
+
+    assert [ranked["offer_id"] for ranked in result["ranked_offers"]] == ["paid"]
+    assert [selection["offer_id"] for selection in result["portfolio"]["selections"]] == ["paid"]
+
+
+def test_energy_cost_is_converted_to_usd(monkeypatch):
+    monkeypatch.setenv("EUR_USD_RATE", "2")
+    optimizer = RentalArbitrageOptimizer()
+    gpus = [{"model": "RTX 3080", "power_consumption": 500, "hashrate": 1}]
+    [own] = optimizer.evaluate_own_gpus(gpus, [offer("paid", 0.1)], COINS, energy_cost_per_kwh=0.2)
+
+    # 0.5 kW x 0.2 EUR/kWh x 2 USD/EUR
+    assert own["mining_net_per_hour"] == pytest.approx(0.25 - 0.2)
@@ -0,0 +1,31 @@
+import pytest
+
+from backend.intent_router import IntentRouter
+
+
+@pytest.fixture
+def router():
+    return IntentRouter(context_builder=None)
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("how many GPUs are active?", "active_gpus"),
+    ("how many rigs are running?", "active_gpus"),
+    ("how much power are the rigs drawing?", "power"),
+    ("Πόσες GPU δουλεύουν τώρα;", "active_gpus"),
+])
+def test_quantity_questions_are_routed(router, message, intent):
+    assert router.classify(message) == intent
+
+
+@pytest.mark.parametrize("message", [
+    "how do I lower the GPU temperature?",
+    "how should I split the rigs between coins?",
+    "Γιατί έπεσε το hashrate;",
+])
+def test_open_ended_questions_go_to_the_model(router, message):
+    assert router.classify(message) is None
+
+
+def test_tuning_set_is_fully_routed(router):
+    assert router.evaluate()["tuning"]["accuracy"] == 1.0
@@ -0,0 +1,150 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from backend.models import GPURental
+from backend.rental_tracker import RentalTracker, _as_utc
+from scripts.stub_server import GPU_MODELS
+
+MODEL = "NVIDIA GeForce RTX 3080"
+PRICE = next(price for name, _, price, _, _ in GPU_MODELS if name == MODEL)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def tracker(cloreai_connector, session_factory):
+    return RentalTracker(cloreai_connector)
+
+
+def rent(tracker, hours=2, **options):
+    """
+    Ενοικίαση στον stub server και καταγραφή της στο μητρώο
+    """
+    async def go():
+        result = await tracker.cloreai_connector.rent_gpu(MODEL, hours)
+        assert result["status"] == "success"
+        return await tracker.register(result, **options)
+    return run(go())
+
+
+def stored(session_factory, rental_id):
+    db = session_factory()
+    try:
+        return db.query(GPURental).filter(GPURental.rental_id == rental_id).one()
+    finally:
+        db.close()
+
+
+def test_poll_accrues_cost_since_last_check(tracker, session_factory):
+    rental = rent(tracker)
+    start = _as_utc(rental["start_time"])
+
+    summary = run(tracker.poll_once(start + timedelta(minutes=30)))
+    assert summary["checked"] == 1
+    assert stored(session_factory, rental["rental_id"]).accrued_cost == pytest.approx(0.5 * rental["price_per_hour"])
+
+    # Ο επόμενος κύκλος προσθέτει μόνο τον χρόνο από τον προηγούμενο
+    run(tracker.poll_once(start + timedelta(minutes=90)))
+    row = stored(session_factory, rental["rental_id"])
+    assert row.status == "active"
+    assert row.accrued_cost == pytest.approx(1.5 * rental["price_per_hour"])
+    assert _as_utc(row.last_accrued_at) == start + timedelta(minutes=90)
+
+
+def test_poll_renews_before_expiry(tracker, session_factory, stub_state):
+    rental = rent(tracker, auto_renew=True, renew_hours=3, max_price_per_hour=10.0)
+    end_time = _as_utc(rental["end_time"])
+
+    summary = run(tracker.poll_once(end_time - timedelta(minutes=5)))
+
+    assert summary["renewed"] == 1
+    row = stored(session_factory, rental["rental_id"])
+    assert row.status == "active"
+    assert _as_utc(row.end_time) == end_time + timedelta(hours=3)
+    assert _as_utc(stub_state.rentals[rental["rental_id"]]["end_time"]) == end_time + timedelta(hours=3)
+    # Η παράταση χρεώνεται με τη φθηνότερη τρέχουσα προσφορά, ο χρόνος έως την παλιά λήξη με την αρχική τιμή
+    market = min(offer["price_per_hour"] for offer in stub_state.offers if offer["gpu_model"] == MODEL)
+    assert row.price_per_hour == pytest.approx(market)
+    assert row.accrued_cost == pytest.approx(2 * PRICE)
+    assert _as_utc(row.last_accrued_at) == end_time
+
+    # Κόστος μετά την παλιά λήξη με τη νέα τιμή
+    run(tracker.poll_once(end_time + timedelta(hours=1)))
+    assert stored(session_factory, rental["rental_id"]).accrued_cost == pytest.approx(2 * PRICE + market)
+
+
+def test_poll_skips_renewal_above_max_price(tracker, session_factory):
+    rental = rent(tracker, auto_renew=True, max_price_per_hour=0.01)
+    end_time = _as_utc(rental["end_time"])
+
+    summary = run(tracker.poll_once(end_time - timedelta(minutes=5)))
+
+    assert summary["renewed"] == 0
+    assert _as_utc(stored(session_factory, rental["rental_id"]).end_time) == end_time
+
+
+def test_poll_cancels_at_cost_limit(tracker, session_factory, stub_state):
+    rental = rent(tracker, max_total_cost=PRICE)
+    start = _as_utc(rental["start_time"])
+
+    summary = run(tracker.poll_once(start + timedelta(minutes=90)))
+
+    assert summary["cancelled"] == 1
+    row = stored(session_factory, rental["rental_id"])
+    assert row.status == "cancelled"
+    assert row.accrued_cost == pytest.approx(1.5 * rental["price_per_hour"])
+    assert stub_state.rentals[rental["rental_id"]]["status"] == "cancelled"
+
+
+def test_poll_finishes_expired_rental_at_end_time(tracker, session_factory, stub_state):
+    rental = rent(tracker, hours=1)
+    start = _as_utc(rental["start_time"])
+    # Η ενοικίαση έχει λήξει στον stub server όταν γίνεται ο έλεγχος
+    stub_state.rentals[rental["rental_id"]]["status"] = "expired"
+
+    summary = run(tracker.poll_once(start + timedelta(hours=3)))
+
+    assert summary["finished"] == 1
+    row = stored(session_factory, rental["rental_id"])
+    assert row.status == "expired"
+    # Το κόστος σταματά στη λήξη
+    assert row.accrued_cost == pytest.approx(PRICE)
+
+
+def test_cancel_closes_rental(tracker, session_factory, stub_state):
+    rental = rent(tracker)
+
+    result = run(tracker.cancel(rental["rental_id"]))
+
+    assert result["status"] == "success"
+    row = stored(session_factory, rental["rental_id"])
+    assert row.status == "cancelled"
+    assert row.accrued_cost >= 0.0
+    assert stub_state.rentals[rental["rental_id"]]["status"] == "cancelled"
+    assert run(tracker.poll_once())["checked"] == 0
+
+
+
+def test_create_rental_cancels_when_registration_fails(cloreai_connector, stub_state, monkeypatch):
+    from backend import main
+
+    async def failing_register(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(main, "cloreai_connector", cloreai_connector)
+    monkeypatch.setattr(main.rental_tracker, "register", failing_register)
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://api") as client:
+            return await client.post("/api/cloreai/rentals", json={"gpu_model": MODEL, "duration_hours": 2})
+
+    response = run(go())
+
+    assert response.status_code == 500
+    # Η GPU που ενοικιάστηκε χωρίς εγγραφή ακυρώνεται αμέσως
+    assert [rental["status"] for rental in stub_state.rentals.values()] == ["cancelled"]
@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.connectors.mining_connector import MiningConnector
+from backend.tariffs import TariffSchedule
+from backend.throttle_controller import SolarThrottleController
+from scripts.stub_server import create_app
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class EnergyReadings:
+    """
+    Σταθερές μετρήσεις ενέργειας: φθηνό δίκτυο και λίγη ηλιακή παραγωγή
+    """
+
+    def __init__(self):
+        self.tariff = TariffSchedule(default_rate=0.05)
+
+    async def get_energy_data(self):
+        return {"current_consumption": 1.0, "solar_production": {"current_output": 0.5}}
+
+
+@pytest.fixture
+def mining_connector(stub_state, monkeypatch):
+    monkeypatch.setenv("MINING_API_URL", "http://stub")
+    monkeypatch.setenv("MINING_API_KEY", "stub")
+    monkeypatch.setenv("MINING_SOFTWARE", "nicehash")
+    for name in ("MINING_API_SECRET", "MINING_ORGANIZATION_ID"):
+        monkeypatch.delenv(name, raising=False)
+    connector = MiningConnector()
+    connector.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(stub_state)))
+    connector.is_initialized = True
+    yield connector
+    run(connector.close())
+
+
+def controller_for(connector):
+    controller = SolarThrottleController(connector, EnergyReadings())
+    controller.min_change_interval = 0
+    return controller
+
+
+def test_allocate_ranks_by_nominal_efficiency():
+    controller = controller_for(None)
+    rigs = [
+        # Περιορισμένο στα 0 W αλλά το πιο αποδοτικό ονομαστικά
+        {"rig_id": "efficient", "power": 0, "hashrate": 0, "max_power": 1000, "max_hashrate": 500},
+        {"rig_id": "wasteful", "power": 1000, "hashrate": 200, "max_power": 1000, "max_hashrate": 200},
+    ]
+    assert controller._allocate(rigs, 1000) == {"efficient": 1000, "wasteful": 0.0}
+
+
+def test_signed_limits_are_applied_and_committed(mining_connector, stub_state):
+    mining_connector.api_secret = "secret"
+    mining_connector.organization_id = "org"
+    controller = controller_for(mining_connector)
+
+    decision = run(controller.step())
+
+    assert decision["action"] == "apply"
+    assert decision["result"] == "success"
+    assert controller.targets == decision["targets"]
+    assert set(stub_state.power_modes) == set(decision["targets"])
+
+
+def test_unsupported_limits_back_off(mining_connector, stub_state):
+    controller = controller_for(mining_connector)
+    calls = []
+    original = mining_connector.set_rig_power_limits
+
+    async def counted(limits):
+        calls.append(limits)
+        return await original(limits)
+
+    mining_connector.set_rig_power_limits = counted
+
+    first = run(controller.step())
+    second = run(controller.step())
+
+    assert first["result"] == "unsupported"
+    assert controller.targets == {}
+    assert (second["action"], second["reason"]) == ("hold", "backoff")
+    assert len(calls) == 1
+    assert stub_state.power_modes == {}
+    assert controller.status()["actuation"] == "unsupported"
+
+
+def test_mock_rigs_are_never_actuated(mining_connector):
+    # Το API δεν απαντά: το get_rigs επιστρέφει δοκιμαστικά rigs
+    run(mining_connector.client.aclose())
+    mining_connector.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(500)))
+    mining_connector.api_secret = "secret"
+    mining_connector.organization_id = "org"
+    controller = controller_for(mining_connector)
+
+    decision = run(controller.step())
+
+    assert (decision["action"], decision["reason"]) == ("hold", "rigs_not_live")
+    assert mining_connector.power_limits == {}